@@ -5,6 +5,7 @@ This module implements CodART CLI
 To find and run more unit and integration tests please look at `benchmark_projects` and `test` directory
 
 -changelog
+-- Create the parse tree by the parser factory (C++ back-end with Python fallback)
 -- Add support switching between different Java grammar
 -- Add JavaParserLabeled.g4
 -- Add C++ backend support for Java9_v2.g2
@@ -12,7 +13,7 @@ To find and run more unit and integration tests please look at `benchmark_projec
 
 """
 
-__version__ = '0.2.2'
+__version__ = '0.2.3'
 __author__ = 'Morteza Zakeri'
 
 
@@ -25,8 +26,7 @@ from antlr4 import *
 # from gen.java9.Java9_v2Parser import Java9_v2Parser  # Old slow grammar parser
 # from java9speedy.parser import sa_java9_v2  # Old slow grammar enhanced by CPP backend
 
-from gen.javaLabeled.JavaLexer import JavaLexer  # Java8 grammar efficient lexer
-from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled  # Java8 grammar efficient parser labeled
+from codart.utility.parsing import create_parse_tree  # Java8 grammar labeled, C++ backend if available
 
 # Import refactorings listeners
 from refactorings.encapsulate_field import EncapsulateFiledRefactoringListener  # CodART first refactoring :)
@@ -38,26 +38,11 @@ def main(args):
     stream = FileStream(args.file, encoding='utf8', errors='ignore')
     # input_stream = StdinStream()
 
-    # Step 2: Create an instance of AssignmentStLexer
-    # lexer = Java9_v2Lexer(stream)  # Deprecated
-    lexer = JavaLexer(stream) # Current lexer
+    # Step 2: Create parse tree and its token stream
+    # The C++ backend (high speed) is used if available, otherwise the Python backend (low speed)
+    parse_tree, common_token_stream = create_parse_tree(stream)
 
-    # Step 3: Convert the input source into a list of tokens
-    common_token_stream = CommonTokenStream(lexer)
-
-    # Step 4: Create an instance of the AssignmentStParser
-    # parser = Java9_v2Parser(common_token_stream)  # Deprecated
-    parser = JavaParserLabeled(common_token_stream)  # Current parser
-    # parser.getTokenStream()
-
-    # Step 5: Create parse tree
-    # 5.1. Python backend --> Low speed
-    parse_tree = parser.compilationUnit()
-
-    # 5.2. C++ backend --> high speed
-    # parse_tree = sa_java9_v2.parse(stream, 'compilationUnit', None) # Deprecated
-
-    # Step 6: Create an instance of AssignmentStListener
+    # Step 3: Create an instance of AssignmentStListener
     my_listener = EncapsulateFiledRefactoringListener(common_token_stream=common_token_stream, field_identifier='f')
     # my_listener = ExtractClassRefactoringListener(common_token_stream=token_stream, class_identifier='Worker')
 
@@ -1,44 +1,60 @@
+"""
+Cyclic Hierarchy smell: a supertype depends on one of its subtypes, directly or indirectly,
+or the inheritance relation itself is cyclic.
 
-from codart.symbol_table import get_program, get_filenames_in_dir
+The smell is detected on the class dependency graph (see codart.utility.dependency_graph):
+each strongly connected component of the graph which contains an inheritance edge (`extends` or `implements`)
+between its classes is reported, with its classes, packages, files, and edges.
+All cycles are found in one linear-time pass, instead of stopping at the first one.
+
+## Usage
+
+    python -m codart.smells.cyclic_hierarchy path/to/project --output cyclic_hierarchy.json
+
+"""
+
+__author__ = 'Morteza Zakeri'
+__version__ = '0.2.0'
+
+import argparse
+
+from codart.symbol_table import get_filenames_in_dir
+from codart.utility.dependency_graph import get_dependency_graph, save_cycle_report, INHERITANCE_KINDS
+
+SMELL_NAME = 'Cyclic Hierarchy'
 
 
 class CyclicHierarchy(object):
-    def __init__(self, source_filenames: list):
+    def __init__(self, source_filenames: list, dependency_graph=None):
         self.source_filenames = source_filenames
-        self.program = get_program(self.source_filenames)
-
-    def check(self):
-        # package = self.program.packages
-        super_classes = []
-        for package_item in self.program.packages:
-            package_item_dic = self.program.packages[package_item]
-            for classes_item in package_item_dic.classes:
-                class_item_dic = package_item_dic.classes[classes_item]
-                while class_item_dic.superclass_name:
-                    super_class = self.find_super_type(class_item_dic.superclass_name)
-                    super_classes.append(super_class.package_name + '.' + super_class.name)
-                    cycle = self.cycle_check(super_classes)
-                    class_item_dic = super_class
-                    if cycle:
-                        print("Find : cyclic inheritance hierarchy...")
-                        return
+        self.dependency_graph = get_dependency_graph(source_filenames) if dependency_graph is None \
+            else dependency_graph
+        self.program = self.dependency_graph.program
+
+    def check(self) -> list:
+        """
+        Returns the description of each cyclic hierarchy, see DependencyGraph.describe_component
+        """
+        smells = []
+        for component in self.dependency_graph.cycles():
+            inheritance_edges = self.dependency_graph.component_edges(component, INHERITANCE_KINDS)
+            if not inheritance_edges:
+                continue
+            smell = {'smell': SMELL_NAME}
+            smell.update(self.dependency_graph.describe_component(component))
+            smell['supertypes'] = sorted({target for _, target, _ in inheritance_edges})
+            smells.append(smell)
+        return smells
 
     def find_super_type(self, class_name):
-        for package_item in self.program.packages:
-            package_item_dic = self.program.packages[package_item]
-            for classes_item in package_item_dic.classes:
-                class_item_dic = package_item_dic.classes[classes_item]
-                if class_item_dic.name == class_name:
-                    return class_item_dic
-
-    def cycle_check(self, list):
-        if len(list) == len(set(list)):
-            return False
-        else:
-            return True
+        return self.program.find_class(class_name)
+
 
 if __name__ == "__main__":
-    mylist = get_filenames_in_dir('C:/Users/Qafari/Desktop/propagationTest')
-    print("start ....")
-    CyclicHierarchy(mylist).check()
-    print("finish ....")
+    argparser = argparse.ArgumentParser(description='Detects the cyclic hierarchies of a Java project')
+    argparser.add_argument('project_dir')
+    argparser.add_argument('--output', default='cyclic_hierarchy.json', help='JSON or CSV report path')
+    args = argparser.parse_args()
+    cyclic_hierarchies = CyclicHierarchy(get_filenames_in_dir(args.project_dir)).check()
+    save_cycle_report(cyclic_hierarchies, args.output)
+    print(f"Found {len(cyclic_hierarchies)} cyclic hierarchies, see {args.output}")
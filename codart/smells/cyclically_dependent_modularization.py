@@ -1,42 +1,56 @@
 """
+Cyclically-dependent Modularization smell: two or more classes depend on each other, directly or indirectly.
 
+The smell is detected on the class dependency graph (see codart.utility.dependency_graph),
+including the inheritance, field, parameter, return type, and body references:
+each strongly connected component of the graph with more than one class is a cycle,
+and all cycles are reported with their classes, packages, files, and edges, largest cycles first.
+
+## Usage
+
+    python -m codart.smells.cyclically_dependent_modularization path/to/project --output cdm.json
 
 """
-from codart.symbol_table import get_program, get_filenames_in_dir
+
+__author__ = 'Morteza Zakeri'
+__version__ = '0.2.0'
+
+import argparse
+
+from codart.symbol_table import get_filenames_in_dir
+from codart.utility.dependency_graph import get_dependency_graph, save_cycle_report
+
+SMELL_NAME = 'Cyclically-dependent Modularization'
 
 
 class CyclicDependentModularization(object):
-    def __init__(self, source_filenames: list):
+    def __init__(self, source_filenames: list, dependency_graph=None):
         self.source_filenames = source_filenames
-        self.program = get_program(self.source_filenames)
-
-    def check(self):
-        super_classes = []
-        packages = self.program.packages
-        for package_item in packages:
-            package_item_dic = self.program.packages[package_item]
-            for classes_item in package_item_dic.classes:
-                class_item_dic = package_item_dic.classes[classes_item]
-                if class_item_dic.modifiers[0] == 'abstract':
-                    while class_item_dic.superclass_name:
-                        super_class = self.find_super_type(class_item_dic.superclass_name)
-                        if super_class.modifiers[0] == 'abstract':
-                            print("Find : cyclic dependent modularization...")
-                            return
-                        class_item_dic = super_class
+        self.dependency_graph = get_dependency_graph(source_filenames) if dependency_graph is None \
+            else dependency_graph
+        self.program = self.dependency_graph.program
+
+    def check(self) -> list:
+        """
+        Returns the description of each dependency cycle, see DependencyGraph.describe_component
+        """
+        smells = []
+        for component in self.dependency_graph.cycles():
+            smell = {'smell': SMELL_NAME}
+            smell.update(self.dependency_graph.describe_component(component))
+            smells.append(smell)
+        return smells
 
     def find_super_type(self, class_name):
-        for package_item in self.program.packages:
-            package_item_dic = self.program.packages[package_item]
-            for classes_item in package_item_dic.classes:
-                class_item_dic = package_item_dic.classes[classes_item]
-                if class_item_dic.name == class_name:
-                    return class_item_dic
-
+        return self.program.find_class(class_name)
 
 
 if __name__ == "__main__":
-    mylist = get_filenames_in_dir('C:/Users/Qafari/Desktop/propagationTest')
-    print("start ....")
-    CyclicDependentModularization(mylist).check()
-    print("finish ....")
+    argparser = argparse.ArgumentParser(description='Detects the cyclically-dependent modularizations of a Java project')
+    argparser.add_argument('project_dir')
+    argparser.add_argument('--output', default='cyclically_dependent_modularization.json',
+                           help='JSON or CSV report path')
+    args = argparser.parse_args()
+    cycles = CyclicDependentModularization(get_filenames_in_dir(args.project_dir)).check()
+    save_cycle_report(cycles, args.output)
+    print(f"Found {len(cycles)} cyclically-dependent modularizations, see {args.output}")
@@ -0,0 +1,1508 @@
+"""
+Native code smell detection engine of CodART.
+
+The search-based initialization (see `sbse.initialize.SmellInitialization`) used to read the Feature Envy,
+God Class, and Long Method candidates from the CSV files of an external tool (JDeodorant).
+This module detects the smells directly from the source code:
+
+1. Each Java file is parsed once by the JavaLabeled parser, and `SourceFileAnalyzer` and all detectors are walked
+as listeners in a single traversal of the tree (see codart.utility.composite_walker).
+The analyzer keeps the scope (package, imports, classes, methods, and the types of the variables) and
+collects the picklable facts of each class and method, e.g., the cyclomatic complexity,
+and the members of the own class and of the other types accessed by each method.
+2. The files are analyzed in parallel by a process pool, scheduled in chunks balanced by their size,
+as in codart.utility.project_parser.
+3. The project-level smells (Feature Envy and God Class) are computed from the facts of all files,
+after resolving the type names to the classes of the project by the imports and the packages of the files.
+
+The detected smells (`Smell`) are written to a JSON report and to the CSV files consumed by
+`load_move_method_candidates` (Feature Envy), `load_extract_class_candidates` (God Class),
+and `load_extract_method_candidates` (Long Method).
+The detectors implement the smells of `codart.smells.map_smell_refactoring.Mapper` which can be found
+in the source code of one version:
+
+- Method level: Long Method, Long Parameter List, Message Chains, Feature Envy, and Data Clumps.
+- Class level: God Class (Large Class/Multifaceted Abstraction), Middle Man, Repeated Switches, Global Data,
+Deficient Encapsulation, Temporary Field, Primitive Obsession, and Broken Modularization.
+- Hierarchy and package level: Deep Hierarchy, Refused Bequest, Speculative Hierarchy, Unfactored Hierarchy,
+Hub-like Modularization, and Promiscuous Package.
+
+The thresholds are the class attributes of the detectors.
+The cyclic smells are detected on the dependency graph by
+codart.smells.cyclic_hierarchy and codart.smells.cyclically_dependent_modularization.
+The history-based smells (e.g., Shotgun Surgery and Divergent Change) and the smells which require clone or
+name analyses (Duplicated Code, Mysterious Name, and Dead Code) are out of the scope of this engine.
+
+## Usage
+
+    python -m codart.smells.detection_engine path/to/project --output-dir path/to/smells
+
+## Changelog
+### v0.2.0
+- Add the detectors of the hierarchy, package, and data smells of the Mapper
+- Escape the commas in the extracted entities of the God Class CSV file, e.g., in `Map<String\\,Integer> map`
+### v0.1.0
+- Add the single-pass smell detection engine
+
+"""
+
+__author__ = 'Morteza Zakeri'
+__version__ = '0.2.0'
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pickle import PicklingError
+
+from antlr4 import FileStream
+
+from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+from codart.utility.composite_walker import CompositeWalker
+from codart.utility.project_parser import create_chunks
+from sbse import config
+
+# The output file names of the CSV files
+FEATURE_ENVY_FILE = 'Feature-Envy.csv'
+GOD_CLASS_FILE = 'God-Class.csv'
+LONG_METHOD_FILE = 'Long-Method.csv'
+SMELLS_REPORT_FILE = 'smells.json'
+
+# Accessor method names, which access the data of their class
+_ACCESSOR_PATTERN = re.compile(r'^(get|set|is|has)[A-Z_]')
+# The (qualified) type names in a type, e.g., Map, String, and org.Foo in 'Map<String, org.Foo>'
+_TYPE_NAME_PATTERN = re.compile(r'[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*')
+
+PRIMITIVE_TYPES = frozenset(('byte', 'short', 'int', 'long', 'float', 'double', 'boolean', 'char', 'String'))
+
+
+def _type_name(type_text):
+    """
+    Returns the raw type of a type, e.g., 'List<Foo>[]' -> 'List'
+    """
+    return re.sub(r'<.*>|\[\]|\.\.\.', '', type_text or '')
+
+
+def _context_name(ctx):
+    return type(ctx).__name__
+
+
+def _modifiers(member_ctx):
+    """
+    Returns the modifiers of a member declaration, i.e., of its enclosing classBodyDeclaration or typeDeclaration
+    """
+    parent = member_ctx.parentCtx
+    while parent is not None and _context_name(parent).startswith(
+            ('MemberDeclaration', 'InterfaceMemberDeclaration', 'GenericMethodDeclaration',
+             'GenericConstructorDeclaration')):
+        parent = parent.parentCtx
+    if parent is None:
+        return []
+    if _context_name(parent) in ('ClassBodyDeclaration2Context', 'InterfaceBodyDeclarationContext'):
+        return [modifier.getText() for modifier in parent.modifier()]
+    if _context_name(parent) == 'TypeDeclarationContext':
+        return [modifier.getText() for modifier in parent.classOrInterfaceModifier()]
+    return []
+
+
+class Smell:
+    """
+
+    A detected smell, the location and metrics are plain values to be picklable and serializable
+
+    """
+
+    def __init__(self, smell, package_name, class_name, filename, line, method=None, field=None,
+                 metrics=None, target=None, entities=None):
+        self.smell = smell
+        self.package_name = package_name or ''
+        # The class name, the nested classes are named as Outer.Inner
+        self.class_name = class_name
+        self.filename = filename
+        self.line = line
+        # The signature of the method, e.g., put(String, int)
+        self.method = method
+        self.field = field
+        self.metrics = metrics or {}
+        # The qualified name of the target class (Feature Envy)
+        self.target = target
+        # The entities to extract (God Class), e.g., ['org.json.A::m(int):void', 'int count']
+        self.entities = entities or []
+
+    @property
+    def qualified_class_name(self):
+        if not self.class_name:
+            # A package smell
+            return self.package_name
+        return f'{self.package_name}.{self.class_name}' if self.package_name else self.class_name
+
+    def to_dict(self) -> dict:
+        return {
+            'smell': self.smell, 'package': self.package_name, 'class': self.class_name, 'method': self.method,
+            'field': self.field, 'file': self.filename, 'line': self.line, 'metrics': self.metrics,
+            'target': self.target, 'entities': self.entities,
+        }
+
+    def __repr__(self):
+        member = f'::{self.method or self.field}' if self.method or self.field else ''
+        return f'{self.smell}({self.qualified_class_name}{member})'
+
+
+class FieldFacts:
+    def __init__(self, name, datatype, modifiers, line, initialized=False):
+        self.name = name
+        self.datatype = datatype
+        self.modifiers = modifiers
+        self.line = line
+        # Whether the declaration has an initializer
+        self.initialized = initialized
+
+    @property
+    def is_instance_field(self):
+        return 'static' not in self.modifiers
+
+
+class MethodFacts:
+    """
+
+    The facts of a method (or a constructor) collected by SourceFileAnalyzer
+
+    """
+
+    def __init__(self, name, returntype, parameters, modifiers, is_constructor, line):
+        self.name = name
+        self.returntype = returntype
+        # (type, name) of each parameter
+        self.parameters = parameters
+        self.modifiers = modifiers
+        self.is_constructor = is_constructor
+        self.start_line = line
+        self.stop_line = line
+        # Whether the method has a body, i.e., it is not abstract
+        self.has_body = False
+        # The hash of the text of the body, to find the same methods of the sibling classes
+        self.body_hash = None
+        # 'empty body' or 'throws UnsupportedOperationException' if the body refuses to implement the method
+        self.rejection = None
+        # Character offsets of the first and last statements of the body
+        self.body_range = None
+        self.cyclomatic_complexity = 1
+        self.number_of_statements = 0
+        # The names of the own fields and methods used by the method
+        self.own_fields = set()
+        self.own_methods = set()
+        self.own_accesses = 0
+        # Type name -> the number of accesses to the members of the type
+        self.foreign_accesses = Counter()
+        # (type name, member) of the accessed fields and accessors of the other types
+        self.foreign_data = set()
+        # The field name if the body only delegates a call to a field, e.g., `return helper.put(key);`
+        self.delegate = None
+        # The declared types of the local variables
+        self.local_types = set()
+
+    @property
+    def signature(self):
+        return f'{self.name}({", ".join(parameter[0] for parameter in self.parameters)})'
+
+    @property
+    def override_key(self):
+        """
+        The name and the raw parameter types, which are the same for a method and the methods overriding it
+        """
+        return self.name, tuple(_type_name(parameter[0]) for parameter in self.parameters)
+
+    @property
+    def number_of_lines(self):
+        return self.stop_line - self.start_line + 1
+
+
+class ClassFacts:
+    def __init__(self, name, kind, modifiers, superclass_name, line, outer=None, interfaces=None):
+        # The name relative to the file, e.g., Outer.Inner for a nested class
+        self.name = name if outer is None else f'{outer.name}.{name}'
+        self.simple_name = name
+        # 'class', 'enum', or 'interface'
+        self.kind = kind
+        self.modifiers = modifiers
+        self.superclass_name = superclass_name
+        # The implemented interfaces of a class or an enum, and the extended interfaces of an interface
+        self.interfaces = interfaces or []
+        self.line = line
+        self.is_nested = outer is not None
+        self.fields = {}
+        self.methods = []
+
+
+class FileAnalysis:
+    """
+
+    The picklable result of analyzing a Java file
+
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.package_name = ''
+        # Simple name -> qualified name of the single-type imports
+        self.class_imports = {}
+        self.package_imports = []
+        self.classes = []
+        # Smell name -> the smells detected in the file
+        self.smells = {}
+        self.error = None
+
+
+class SourceFileAnalyzer(JavaParserLabeledListener):
+    """
+
+    Keeps the scope of the traversal and collects the facts of the classes and methods of a file,
+    the detectors are notified when a method or a class is exited
+
+    """
+
+    def __init__(self, filename, token_stream, detectors=None):
+        self.analysis = FileAnalysis(filename)
+        self.token_stream = token_stream
+        self.detectors = detectors or []
+        self.class_stack = []
+        self.method = None
+        # Variable name -> type of the parameters and locals of the current method
+        self.variables = {}
+        # The depth of the anonymous class bodies in the current method
+        self.anonymous_depth = 0
+
+    # Scope
+    @property
+    def current_class(self):
+        return self.class_stack[-1] if self.class_stack else None
+
+    def type_of(self, name):
+        """
+        Returns the declared type of a variable or a field visible in the current method, or None
+        """
+        if name in self.variables:
+            return self.variables[name]
+        for class_ in reversed(self.class_stack):
+            if name in class_.fields:
+                return _type_name(class_.fields[name].datatype)
+        return None
+
+    def is_own_field(self, name):
+        return name not in self.variables and self.current_class is not None and name in self.current_class.fields
+
+    # Package and imports
+    def enterPackageDeclaration(self, ctx):
+        self.analysis.package_name = ctx.qualifiedName().getText()
+
+    def enterImportDeclaration(self, ctx):
+        if ctx.STATIC() is not None:
+            return
+        name = ctx.qualifiedName().getText()
+        if ctx.MUL() is not None:
+            self.analysis.package_imports.append(name)
+        else:
+            self.analysis.class_imports[name.rsplit('.', 1)[-1]] = name
+
+    # Classes
+    def _enter_class(self, ctx, kind, superclass_name=None, type_list=None):
+        interfaces = [type_.getText() for type_ in type_list.typeType()] if type_list is not None else []
+        class_ = ClassFacts(ctx.IDENTIFIER().getText(), kind, _modifiers(ctx), superclass_name,
+                            ctx.start.line, outer=self.current_class, interfaces=interfaces)
+        self.class_stack.append(class_)
+        self.analysis.classes.append(class_)
+        # The fields are collected before the methods, which may use the fields declared after them
+        body = ctx.classBody() if kind == 'class' else (ctx.enumBodyDeclarations() if kind == 'enum' else None)
+        for declaration in (body.classBodyDeclaration() if body is not None else []):
+            if _context_name(declaration) != 'ClassBodyDeclaration2Context':
+                continue
+            field_ctx = getattr(declaration.memberDeclaration(), 'fieldDeclaration', lambda: None)()
+            if field_ctx is None:
+                continue
+            modifiers = [modifier.getText() for modifier in declaration.modifier()]
+            for declarator in field_ctx.variableDeclarators().variableDeclarator():
+                name = declarator.variableDeclaratorId().IDENTIFIER().getText()
+                class_.fields[name] = FieldFacts(name, field_ctx.typeType().getText(), modifiers,
+                                                 declarator.start.line, declarator.variableInitializer() is not None)
+
+    def _exit_class(self):
+        class_ = self.class_stack.pop()
+        for detector in self.detectors:
+            detector.exit_class(self, class_)
+
+    def enterClassDeclaration(self, ctx):
+        if self.method is not None:
+            # A local class, its methods are attributed to the enclosing method
+            self.anonymous_depth += 1
+            return
+        self._enter_class(ctx, 'class', ctx.typeType().getText() if ctx.EXTENDS() is not None else None,
+                          ctx.typeList())
+
+    def exitClassDeclaration(self, ctx):
+        if self.anonymous_depth and self.method is not None:
+            self.anonymous_depth -= 1
+            return
+        self._exit_class()
+
+    def enterEnumDeclaration(self, ctx):
+        if self.method is None:
+            self._enter_class(ctx, 'enum', type_list=ctx.typeList())
+
+    def exitEnumDeclaration(self, ctx):
+        if self.method is None:
+            self._exit_class()
+
+    def enterInterfaceDeclaration(self, ctx):
+        if self.method is None:
+            self._enter_class(ctx, 'interface', type_list=ctx.typeList())
+
+    def exitInterfaceDeclaration(self, ctx):
+        if self.method is None:
+            self._exit_class()
+
+    def enterClassCreatorRest(self, ctx):
+        if ctx.classBody() is not None:
+            self.anonymous_depth += 1
+
+    def exitClassCreatorRest(self, ctx):
+        if ctx.classBody() is not None:
+            self.anonymous_depth -= 1
+
+    # Methods
+    def _enter_method(self, ctx, returntype, is_constructor):
+        if self.method is not None or self.current_class is None:
+            return
+        parameters = []
+        formal_parameter_list = ctx.formalParameters().formalParameterList()
+        if formal_parameter_list is not None:
+            for parameter in formal_parameter_list.formalParameter():
+                parameters.append((parameter.typeType().getText(),
+                                   parameter.variableDeclaratorId().IDENTIFIER().getText()))
+            last_parameter = formal_parameter_list.lastFormalParameter()
+            if last_parameter is not None:
+                parameters.append((last_parameter.typeType().getText() + '...',
+                                   last_parameter.variableDeclaratorId().IDENTIFIER().getText()))
+        self.method = MethodFacts(ctx.IDENTIFIER().getText(), returntype, parameters, _modifiers(ctx),
+                                  is_constructor, ctx.start.line)
+        self.method.stop_line = ctx.stop.line
+        self.variables = {name: _type_name(type_) for type_, name in parameters}
+        body = ctx.block() if is_constructor else ctx.methodBody().block()
+        if body is not None:
+            self.method.has_body = True
+            self.method.body_hash = hashlib.md5(body.getText().encode('utf-8')).hexdigest()
+            statements = body.blockStatement()
+            if not statements:
+                self.method.rejection = 'empty body'
+            elif len(statements) == 1 and statements[0].getText().startswith('thrownewUnsupportedOperationException'):
+                self.method.rejection = 'throws UnsupportedOperationException'
+            if statements:
+                tokens = self.token_stream.tokens
+                self.method.body_range = (tokens[statements[0].start.tokenIndex].start,
+                                          tokens[statements[-1].stop.tokenIndex].stop)
+            if len(statements) == 1:
+                self.method.delegate = self._delegated_field(statements[0])
+
+    def _exit_method(self):
+        if self.method is None or self.anonymous_depth:
+            return
+        self.current_class.methods.append(self.method)
+        for detector in self.detectors:
+            detector.exit_method(self, self.current_class, self.method)
+        self.method = None
+        self.variables = {}
+
+    def _delegated_field(self, block_statement):
+        """
+        Returns the field to which a single-statement body delegates, e.g., 'helper' in `return helper.put(k);`
+        """
+        statement = block_statement.getChild(0)
+        if _context_name(statement) == 'Statement10Context':
+            expression = statement.expression()
+        elif _context_name(statement) == 'Statement15Context':
+            expression = statement.expression()
+        else:
+            return None
+        if expression is None or _context_name(expression) != 'Expression1Context' or \
+                expression.methodCall() is None:
+            return None
+        receiver = expression.expression().getText()
+        if receiver.startswith('this.'):
+            receiver = receiver[len('this.'):]
+        return receiver if self.is_own_field(receiver) else None
+
+    def enterMethodDeclaration(self, ctx):
+        if not self.anonymous_depth:
+            self._enter_method(ctx, ctx.typeTypeOrVoid().getText(), is_constructor=False)
+
+    def exitMethodDeclaration(self, ctx):
+        self._exit_method()
+
+    def enterConstructorDeclaration(self, ctx):
+        if not self.anonymous_depth:
+            self._enter_method(ctx, None, is_constructor=True)
+
+    def exitConstructorDeclaration(self, ctx):
+        self._exit_method()
+
+    # Variables
+    def enterLocalVariableDeclaration(self, ctx):
+        if self.method is not None:
+            self.method.local_types.add(ctx.typeType().getText())
+            type_ = _type_name(ctx.typeType().getText())
+            for declarator in ctx.variableDeclarators().variableDeclarator():
+                self.variables[declarator.variableDeclaratorId().IDENTIFIER().getText()] = type_
+
+    def enterEnhancedForControl(self, ctx):
+        if self.method is not None:
+            self.variables[ctx.variableDeclaratorId().IDENTIFIER().getText()] = _type_name(ctx.typeType().getText())
+
+    def enterCatchClause(self, ctx):
+        if self.method is not None:
+            self.method.cyclomatic_complexity += 1
+            self.variables[ctx.IDENTIFIER().getText()] = _type_name(ctx.catchType().getText().split('|')[0])
+
+    # Complexity
+    def enterBlockStatement1(self, ctx):
+        if self.method is not None:
+            self.method.number_of_statements += 1
+
+    def enterBlockStatement0(self, ctx):
+        if self.method is not None:
+            self.method.number_of_statements += 1
+
+    def _add_decision(self, ctx):
+        if self.method is not None:
+            self.method.cyclomatic_complexity += 1
+
+    enterStatement2 = enterStatement3 = enterStatement4 = enterStatement5 = _add_decision
+    enterExpression18 = enterExpression19 = enterExpression20 = _add_decision
+
+    def enterSwitchLabel(self, ctx):
+        if self.method is not None and ctx.CASE() is not None:
+            self.method.cyclomatic_complexity += 1
+
+    # Accesses
+    def enterExpression1(self, ctx):
+        """
+        expression '.' (IDENTIFIER | methodCall | ...), e.g., `other.field`, `other.method()`, and `this.field`
+        """
+        if self.method is None:
+            return
+        method_call = ctx.methodCall()
+        if method_call is not None:
+            member = method_call.IDENTIFIER()
+            is_call = True
+        else:
+            member = ctx.IDENTIFIER()
+            is_call = False
+        if member is None:
+            return
+        member = member.getText()
+        receiver = ctx.expression()
+        if _context_name(receiver) != 'Expression0Context':
+            return
+        primary = receiver.primary()
+        if _context_name(primary) == 'Primary1Context':
+            # this.member
+            self._add_own_access(member, is_call)
+            return
+        if _context_name(primary) != 'Primary4Context':
+            return
+        name = primary.IDENTIFIER().getText()
+        type_ = self.type_of(name)
+        if type_ is None:
+            if not name[:1].isupper():
+                return
+            # A static member of a type, e.g., Math.max()
+            type_ = name
+        if type_ == self.current_class.simple_name:
+            self._add_own_access(member, is_call)
+            return
+        self.method.foreign_accesses[type_] += 1
+        if not is_call or _ACCESSOR_PATTERN.match(member):
+            self.method.foreign_data.add((type_, member))
+
+    def _add_own_access(self, member, is_call):
+        self.method.own_accesses += 1
+        if is_call:
+            self.method.own_methods.add(member)
+        elif member in self.current_class.fields:
+            self.method.own_fields.add(member)
+
+    def enterPrimary4(self, ctx):
+        """
+        An unqualified identifier, an access of an own field unless it is a variable
+        """
+        if self.method is None:
+            return
+        name = ctx.IDENTIFIER().getText()
+        if self.is_own_field(name):
+            parent = ctx.parentCtx.parentCtx
+            if parent is not None and _context_name(parent) == 'Expression1Context' and \
+                    parent.expression() is ctx.parentCtx:
+                # The receiver of an access, e.g., helper in helper.put(), the member is counted by enterExpression1
+                self.method.own_fields.add(name)
+                self.method.own_accesses += 1
+                return
+            self._add_own_access(name, is_call=False)
+
+    def enterMethodCall0(self, ctx):
+        """
+        An unqualified call of an own (or inherited) method
+        """
+        if self.method is None or _context_name(ctx.parentCtx) == 'Expression1Context':
+            return
+        self._add_own_access(ctx.IDENTIFIER().getText(), is_call=True)
+
+    def exitCompilationUnit(self, ctx):
+        for detector in self.detectors:
+            self.analysis.smells[detector.name] = detector.smells
+
+
+class SmellDetector(JavaParserLabeledListener):
+    """
+
+    The base class of the detectors, which are walked with SourceFileAnalyzer as listeners.
+    The file-level detectors add their smells in `exit_method`, `exit_class`, or in their listener methods,
+    and the project-level detectors override `detect_in_project`.
+
+    """
+
+    name = None
+
+    def __init__(self, analyzer: SourceFileAnalyzer = None):
+        self.analyzer = analyzer
+        self.smells = []
+
+    def exit_method(self, analyzer, class_, method):
+        pass
+
+    def exit_class(self, analyzer, class_):
+        pass
+
+    def add_smell(self, class_, line, **kwargs):
+        self.smells.append(Smell(self.name, self.analyzer.analysis.package_name, class_.name,
+                                 self.analyzer.analysis.filename, line, **kwargs))
+
+    @classmethod
+    def detect_in_project(cls, analyses: list, project) -> list:
+        """
+        Returns the smells of the project, by default the smells found in the files
+        """
+        return [smell for analysis in analyses for smell in analysis.smells.get(cls.name, [])]
+
+
+class LongMethodDetector(SmellDetector):
+    name = 'Long Method'
+    MIN_LINES = 30
+    MIN_STATEMENTS = 20
+
+    def exit_method(self, analyzer, class_, method):
+        if method.body_range is None:
+            return
+        if method.number_of_lines >= self.MIN_LINES or method.number_of_statements >= self.MIN_STATEMENTS:
+            self.add_smell(class_, method.start_line, method=method.signature, metrics={
+                'LOC': method.number_of_lines, 'NOS': method.number_of_statements,
+                'CYCLO': method.cyclomatic_complexity, 'NOP': len(method.parameters),
+                'body_range': list(method.body_range)
+            })
+
+
+class LongParameterListDetector(SmellDetector):
+    name = 'Long Parameter List'
+    MIN_PARAMETERS = 5
+
+    def exit_method(self, analyzer, class_, method):
+        if len(method.parameters) >= self.MIN_PARAMETERS:
+            self.add_smell(class_, method.start_line, method=method.signature,
+                           metrics={'NOP': len(method.parameters)})
+
+
+class MessageChainsDetector(SmellDetector):
+    name = 'Message Chains'
+    MIN_CALLS = 4
+
+    def enterExpression1(self, ctx):
+        analyzer = self.analyzer
+        if analyzer.method is None or ctx.methodCall() is None:
+            return
+        parent = ctx.parentCtx
+        if _context_name(parent) == 'Expression1Context' and parent.expression() is ctx:
+            # Not the last call of the chain
+            return
+        calls, receiver = 0, ctx
+        while _context_name(receiver) == 'Expression1Context' and receiver.methodCall() is not None:
+            calls += 1
+            receiver = receiver.expression()
+        if calls >= self.MIN_CALLS:
+            self.add_smell(analyzer.current_class, ctx.start.line, method=analyzer.method.signature,
+                           metrics={'calls': calls, 'chain': ctx.getText()[:200]})
+
+
+class RepeatedSwitchesDetector(SmellDetector):
+    name = 'Repeated Switches'
+    MIN_SWITCHES = 2
+
+    def __init__(self, analyzer=None):
+        super().__init__(analyzer)
+        # Class name -> Counter of the switch expressions
+        self.switches = {}
+
+    def enterStatement8(self, ctx):
+        class_ = self.analyzer.current_class
+        if class_ is not None:
+            self.switches.setdefault(class_.name, Counter())[ctx.parExpression().expression().getText()] += 1
+
+    def exit_class(self, analyzer, class_):
+        for expression, count in self.switches.pop(class_.name, Counter()).items():
+            if count >= self.MIN_SWITCHES:
+                self.add_smell(class_, class_.line, metrics={'switch': expression, 'count': count})
+
+
+class GlobalDataDetector(SmellDetector):
+    name = 'Global Data'
+
+    def exit_class(self, analyzer, class_):
+        if class_.kind == 'interface':
+            return
+        for field in class_.fields.values():
+            if 'static' in field.modifiers and 'final' not in field.modifiers and 'private' not in field.modifiers:
+                self.add_smell(class_, field.line, field=field.name, metrics={'modifiers': field.modifiers})
+
+
+class DeficientEncapsulationDetector(SmellDetector):
+    name = 'Deficient Encapsulation'
+
+    def exit_class(self, analyzer, class_):
+        if class_.kind == 'interface':
+            return
+        for field in class_.fields.values():
+            if 'public' in field.modifiers and not ('static' in field.modifiers and 'final' in field.modifiers):
+                self.add_smell(class_, field.line, field=field.name, metrics={'modifiers': field.modifiers})
+
+
+class MiddleManDetector(SmellDetector):
+    name = 'Middle Man'
+    MIN_METHODS = 3
+    MIN_DELEGATION_RATIO = 0.5
+
+    def exit_class(self, analyzer, class_):
+        methods = [method for method in class_.methods if not method.is_constructor]
+        if len(methods) < self.MIN_METHODS:
+            return
+        delegates = Counter(method.delegate for method in methods if method.delegate is not None)
+        if delegates and sum(delegates.values()) / len(methods) >= self.MIN_DELEGATION_RATIO:
+            self.add_smell(class_, class_.line, metrics={
+                'delegating_methods': sum(delegates.values()), 'methods': len(methods),
+                'delegates': sorted(delegates)
+            })
+
+
+class TemporaryFieldDetector(SmellDetector):
+    """
+    A private instance field which is neither initialized in its declaration nor used by a constructor,
+    and is used by only one method, i.e., it holds a temporary value of the method
+    """
+
+    name = 'Temporary Field'
+
+    def exit_class(self, analyzer, class_):
+        if class_.kind != 'class':
+            return
+        constructor_fields, users = set(), {}
+        for method in class_.methods:
+            if method.is_constructor:
+                constructor_fields.update(method.own_fields)
+                continue
+            for field_name in method.own_fields:
+                users.setdefault(field_name, []).append(method)
+        for field in class_.fields.values():
+            if 'private' not in field.modifiers or not field.is_instance_field or field.initialized or \
+                    field.name in constructor_fields or len(users.get(field.name, [])) != 1:
+                continue
+            self.add_smell(class_, field.line, field=field.name, metrics={'method': users[field.name][0].signature})
+
+
+class PrimitiveObsessionDetector(SmellDetector):
+    """
+    A class whose state is mostly kept in primitive (and String) fields instead of small classes,
+    at least MIN_PRIMITIVE_FIELDS fields and MIN_RATIO of the instance fields
+    """
+
+    name = 'Primitive Obsession'
+    MIN_PRIMITIVE_FIELDS = 6
+    MIN_RATIO = 2 / 3
+
+    def exit_class(self, analyzer, class_):
+        if class_.kind != 'class':
+            return
+        fields = [field for field in class_.fields.values() if field.is_instance_field]
+        primitive_fields = [field.name for field in fields if _type_name(field.datatype) in PRIMITIVE_TYPES]
+        if len(primitive_fields) >= self.MIN_PRIMITIVE_FIELDS and \
+                len(primitive_fields) / len(fields) >= self.MIN_RATIO:
+            self.add_smell(class_, class_.line, metrics={
+                'primitive_fields': primitive_fields, 'fields': len(fields)
+            })
+
+
+class BrokenModularizationDetector(SmellDetector):
+    """
+    A data class: a concrete class with MIN_FIELDS or more instance fields and no methods other than
+    the constructors and the accessors, whose behavior is implemented by the other classes
+    """
+
+    name = 'Broken Modularization'
+    MIN_FIELDS = 2
+
+    def exit_class(self, analyzer, class_):
+        if class_.kind != 'class' or 'abstract' in class_.modifiers:
+            return
+        fields = [field for field in class_.fields.values() if field.is_instance_field]
+        if len(fields) < self.MIN_FIELDS:
+            return
+        if any(not method.is_constructor and not _ACCESSOR_PATTERN.match(method.name) for method in class_.methods):
+            return
+        self.add_smell(class_, class_.line, metrics={
+            'fields': len(fields), 'accessors': sum(1 for method in class_.methods if not method.is_constructor)
+        })
+
+
+class ProjectClasses:
+    """
+
+    The classes of the analyzed files, used to resolve the type names of a file to the project classes
+
+    """
+
+    def __init__(self, analyses: list):
+        # Qualified name -> (FileAnalysis, ClassFacts)
+        self.classes = {}
+        # Simple name -> qualified names
+        self.qualified_names = {}
+        for analysis in analyses:
+            for class_ in analysis.classes:
+                qualified_name = f'{analysis.package_name}.{class_.name}' if analysis.package_name else class_.name
+                self.classes[qualified_name] = (analysis, class_)
+                self.qualified_names.setdefault(class_.simple_name, []).append(qualified_name)
+        self._resolved = {}
+        # Qualified name -> the project classes used by the class
+        self._dependencies = {}
+        self._dependents = None
+        # Qualified name -> the direct subclasses, and the direct subtypes (subclasses and implementations)
+        self._subclasses = None
+        self._subtypes = None
+
+    def resolve(self, type_name, analysis: FileAnalysis):
+        """
+        Returns the qualified name of the project class of a type name used in a file, or None
+        """
+        key = (type_name, analysis.filename)
+        if key not in self._resolved:
+            self._resolved[key] = self._resolve(_type_name(type_name), analysis)
+        return self._resolved[key]
+
+    def _resolve(self, type_name, analysis):
+        if '.' in type_name:
+            return type_name if type_name in self.classes else None
+        candidates = self.qualified_names.get(type_name)
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+        if type_name in analysis.class_imports:
+            imported = analysis.class_imports[type_name]
+            return imported if imported in self.classes else None
+        for package_name in [analysis.package_name] + analysis.package_imports:
+            qualified_name = f'{package_name}.{type_name}' if package_name else type_name
+            if qualified_name in self.classes:
+                return qualified_name
+        return None
+
+    def superclass(self, qualified_name):
+        """
+        Returns the qualified name of the project superclass of a class, or None
+        """
+        analysis, class_ = self.classes[qualified_name]
+        if class_.superclass_name is None:
+            return None
+        return self.resolve(class_.superclass_name, analysis)
+
+    def inheritance_depth(self, qualified_name):
+        """
+        The depth of a class in its inheritance tree (DIT), a superclass outside the project counts as one level
+        """
+        depth, visited = 0, {qualified_name}
+        while self.classes[qualified_name][1].superclass_name is not None:
+            depth += 1
+            qualified_name = self.superclass(qualified_name)
+            if qualified_name is None or qualified_name in visited:
+                break
+            visited.add(qualified_name)
+        return depth
+
+    def inherited_methods(self, qualified_name) -> dict:
+        """
+        Returns the non-private instance methods inherited from the project superclasses of a class,
+        MethodFacts.override_key -> (the qualified name of the superclass, MethodFacts)
+        """
+        methods, visited = {}, {qualified_name}
+        superclass = self.superclass(qualified_name)
+        while superclass is not None and superclass not in visited:
+            visited.add(superclass)
+            for method in self.classes[superclass][1].methods:
+                if method.is_constructor or 'private' in method.modifiers or 'static' in method.modifiers:
+                    continue
+                methods.setdefault(method.override_key, (superclass, method))
+            superclass = self.superclass(superclass)
+        return methods
+
+    def _index_hierarchy(self):
+        self._subclasses, self._subtypes = {}, {}
+        for qualified_name, (analysis, class_) in self.classes.items():
+            superclass = self.superclass(qualified_name)
+            if superclass is not None:
+                self._subclasses.setdefault(superclass, []).append(qualified_name)
+                self._subtypes.setdefault(superclass, []).append(qualified_name)
+            for interface in class_.interfaces:
+                interface = self.resolve(interface, analysis)
+                if interface is not None and interface != qualified_name:
+                    self._subtypes.setdefault(interface, []).append(qualified_name)
+
+    def direct_subclasses(self, qualified_name) -> list:
+        if self._subclasses is None:
+            self._index_hierarchy()
+        return self._subclasses.get(qualified_name, [])
+
+    def direct_subtypes(self, qualified_name) -> list:
+        if self._subtypes is None:
+            self._index_hierarchy()
+        return self._subtypes.get(qualified_name, [])
+
+    def dependencies(self, qualified_name) -> set:
+        """
+        Returns the project classes used by a class in its supertypes, fields, method signatures,
+        local variables, and member accesses
+        """
+        if qualified_name not in self._dependencies:
+            analysis, class_ = self.classes[qualified_name]
+            type_texts = [class_.superclass_name] + class_.interfaces
+            type_texts.extend(field.datatype for field in class_.fields.values())
+            for method in class_.methods:
+                type_texts.append(method.returntype)
+                type_texts.extend(parameter[0] for parameter in method.parameters)
+                type_texts.extend(method.local_types)
+                type_texts.extend(method.foreign_accesses)
+            dependencies = set()
+            for type_text in type_texts:
+                for type_name in _TYPE_NAME_PATTERN.findall(type_text or ''):
+                    dependency = self.resolve(type_name, analysis)
+                    if dependency is not None and dependency != qualified_name:
+                        dependencies.add(dependency)
+            self._dependencies[qualified_name] = dependencies
+        return self._dependencies[qualified_name]
+
+    def dependents(self, qualified_name) -> set:
+        """
+        Returns the project classes which use a class
+        """
+        if self._dependents is None:
+            self._dependents = {}
+            for client in self.classes:
+                for dependency in self.dependencies(client):
+                    self._dependents.setdefault(dependency, set()).add(client)
+        return self._dependents.get(qualified_name, set())
+
+
+class FeatureEnvyDetector(SmellDetector):
+    """
+    A method which uses the members of another class more than the members of its own class
+    (ATFD > MIN_FOREIGN_ACCESSES, LAA < MAX_LOCALITY, and FDP <= MAX_PROVIDERS, Lanza and Marinescu),
+    the target is the project class with the most accesses
+    """
+
+    name = 'Feature Envy'
+    MIN_FOREIGN_ACCESSES = 2
+    MAX_LOCALITY = 1 / 3
+    MAX_PROVIDERS = 3
+
+    @classmethod
+    def detect_in_project(cls, analyses, project):
+        smells = []
+        for analysis in analyses:
+            for class_ in analysis.classes:
+                if class_.kind != 'class':
+                    continue
+                for method in class_.methods:
+                    if method.is_constructor or 'abstract' in method.modifiers:
+                        continue
+                    smell = cls._detect_method(analysis, class_, method, project)
+                    if smell is not None:
+                        smells.append(smell)
+        return smells
+
+    @classmethod
+    def _detect_method(cls, analysis, class_, method, project):
+        own_name = f'{analysis.package_name}.{class_.name}' if analysis.package_name else class_.name
+        accesses = Counter()
+        for type_name, count in method.foreign_accesses.items():
+            qualified_name = project.resolve(type_name, analysis)
+            if qualified_name is not None and qualified_name != own_name:
+                accesses[qualified_name] += count
+        if not accesses:
+            return None
+        target, target_accesses = max(accesses.items(), key=lambda item: (item[1], item[0]))
+        locality = method.own_accesses / (method.own_accesses + sum(method.foreign_accesses.values()))
+        if target_accesses <= cls.MIN_FOREIGN_ACCESSES or locality >= cls.MAX_LOCALITY or \
+                len(accesses) > cls.MAX_PROVIDERS or project.classes[target][1].kind != 'class':
+            return None
+        return Smell(cls.name, analysis.package_name, class_.name, analysis.filename, method.start_line,
+                     method=method.signature, target=target, metrics={
+                         'ATFD': target_accesses, 'LAA': round(locality, 3), 'FDP': len(accesses),
+                         'own_accesses': method.own_accesses
+                     })
+
+
+class GodClassDetector(SmellDetector):
+    """
+    WMC >= MIN_WMC, TCC < MAX_TCC, and ATFD > MIN_ATFD (Lanza and Marinescu).
+    The entities to extract are the groups of methods and fields connected by the field usages,
+    except the largest group, which remains in the class.
+    """
+
+    name = 'God Class'
+    MIN_WMC = 47
+    MAX_TCC = 1 / 3
+    MIN_ATFD = 5
+
+    @classmethod
+    def detect_in_project(cls, analyses, project):
+        smells = []
+        for analysis in analyses:
+            for class_ in analysis.classes:
+                if class_.kind != 'class':
+                    continue
+                methods = [method for method in class_.methods if not method.is_constructor]
+                wmc = sum(method.cyclomatic_complexity for method in class_.methods)
+                tcc = cls.tight_class_cohesion(methods)
+                atfd = len({(project.resolve(type_name, analysis), member)
+                            for method in methods for type_name, member in method.foreign_data
+                            if project.resolve(type_name, analysis) is not None})
+                if wmc < cls.MIN_WMC or tcc >= cls.MAX_TCC or atfd <= cls.MIN_ATFD:
+                    continue
+                metrics = {'WMC': wmc, 'TCC': round(tcc, 3), 'ATFD': atfd}
+                groups = cls.entity_groups(class_, methods)
+                if not groups:
+                    smells.append(Smell(cls.name, analysis.package_name, class_.name, analysis.filename,
+                                        class_.line, metrics=metrics))
+                for group_methods, group_fields in groups:
+                    smells.append(Smell(
+                        cls.name, analysis.package_name, class_.name, analysis.filename, class_.line,
+                        metrics=metrics, entities=cls.entities(analysis, class_, group_methods, group_fields)
+                    ))
+        return smells
+
+    @staticmethod
+    def tight_class_cohesion(methods):
+        """
+        The ratio of the pairs of methods which use a common field of the class
+        """
+        pairs = len(methods) * (len(methods) - 1) / 2
+        if pairs == 0:
+            return 1.
+        connected = sum(1 for i, method in enumerate(methods) for other in methods[i + 1:]
+                        if not method.own_fields.isdisjoint(other.own_fields))
+        return connected / pairs
+
+    @staticmethod
+    def entity_groups(class_, methods):
+        """
+        Returns the (methods, fields) groups of the class connected by the field usages and the calls,
+        except the largest group, the groups without a field or a method are skipped
+        """
+        # Union-find over the method indices and the field names
+        parent = {}
+
+        def find(node):
+            while parent.setdefault(node, node) != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        methods_by_name = {}
+        for k, method in enumerate(methods):
+            methods_by_name.setdefault(method.name, []).append(k)
+        for k, method in enumerate(methods):
+            find(('method', k))
+            for field_name in method.own_fields:
+                parent[find(('method', k))] = find(('field', field_name))
+            for method_name in method.own_methods:
+                for callee in methods_by_name.get(method_name, []):
+                    parent[find(('method', k))] = find(('method', callee))
+        groups = {}
+        for node in list(parent):
+            groups.setdefault(find(node), []).append(node)
+        groups = [([methods[k] for kind, k in members if kind == 'method'],
+                   [class_.fields[name] for kind, name in members if kind == 'field'])
+                  for members in groups.values()]
+        groups = [(group_methods, group_fields) for group_methods, group_fields in groups
+                  if group_methods and group_fields]
+        if len(groups) < 2:
+            return []
+        groups.sort(key=lambda group: len(group[0]) + len(group[1]), reverse=True)
+        return groups[1:]
+
+    @staticmethod
+    def entities(analysis, class_, methods, fields):
+        qualified_name = f'{analysis.package_name}.{class_.name}' if analysis.package_name else class_.name
+        return ([f'{qualified_name}::{method.signature}:{method.returntype}' for method in methods] +
+                [f'{field.datatype} {field.name}' for field in sorted(fields, key=lambda field: field.name)])
+
+
+def _class_smell(name, analysis, class_, line=None, **kwargs):
+    return Smell(name, analysis.package_name, class_.name, analysis.filename,
+                 class_.line if line is None else line, **kwargs)
+
+
+class DataClumpsDetector(SmellDetector):
+    """
+    The same MIN_ITEMS or more data items (parameters or instance fields of the same type and name)
+    which are declared together in MIN_OCCURRENCES or more methods or classes.
+    The triples of items which occur together are counted, and the triples with the same occurrences are
+    merged into one clump; one smell is reported for each occurrence of a clump.
+    """
+
+    name = 'Data Clumps'
+    MIN_ITEMS = 3
+    MIN_OCCURRENCES = 3
+    # The larger parameter lists and classes are skipped to bound the number of triples
+    MAX_ITEMS = 20
+
+    @classmethod
+    def detect_in_project(cls, analyses, project):
+        # (FileAnalysis, ClassFacts, MethodFacts or None for the fields) and the data items of each occurrence
+        occurrences = []
+        for analysis in analyses:
+            for class_ in analysis.classes:
+                fields = [(field.datatype, field.name) for field in class_.fields.values() if field.is_instance_field]
+                occurrences.append(((analysis, class_, None), fields))
+                for method in class_.methods:
+                    occurrences.append(((analysis, class_, method), list(method.parameters)))
+        triples = {}
+        for k, (_, items) in enumerate(occurrences):
+            items = sorted(set(items))
+            if cls.MIN_ITEMS <= len(items) <= cls.MAX_ITEMS:
+                for triple in combinations(items, cls.MIN_ITEMS):
+                    triples.setdefault(triple, []).append(k)
+        clumps = {}
+        for triple, clump_occurrences in triples.items():
+            if len(clump_occurrences) >= cls.MIN_OCCURRENCES:
+                clumps.setdefault(tuple(clump_occurrences), set()).update(triple)
+        smells = []
+        for clump_occurrences, items in clumps.items():
+            clump = [f'{type_} {name}' for type_, name in sorted(items, key=lambda item: item[1])]
+            for k in clump_occurrences:
+                analysis, class_, method = occurrences[k][0]
+                smells.append(_class_smell(
+                    cls.name, analysis, class_, line=method.start_line if method is not None else None,
+                    method=method.signature if method is not None else None,
+                    metrics={'clump': clump, 'occurrences': len(clump_occurrences)}
+                ))
+        return smells
+
+
+class DeepHierarchyDetector(SmellDetector):
+    """
+    A class whose depth of inheritance (DIT) is MIN_DEPTH or more
+    """
+
+    name = 'Deep Hierarchy'
+    MIN_DEPTH = 6
+
+    @classmethod
+    def detect_in_project(cls, analyses, project):
+        smells = []
+        for qualified_name, (analysis, class_) in project.classes.items():
+            if class_.kind != 'class':
+                continue
+            depth = project.inheritance_depth(qualified_name)
+            if depth >= cls.MIN_DEPTH:
+                smells.append(_class_smell(cls.name, analysis, class_, metrics={
+                    'DIT': depth, 'superclass': project.superclass(qualified_name)
+                }))
+        return smells
+
+
+class RefusedBequestDetector(SmellDetector):
+    """
+    A method which overrides a concrete method of a project superclass and refuses to implement it,
+    by an empty body or by throwing UnsupportedOperationException
+    """
+
+    name = 'Refused Bequest'
+
+    @classmethod
+    def detect_in_project(cls, analyses, project):
+        smells = []
+        for qualified_name, (analysis, class_) in project.classes.items():
+            if class_.kind != 'class':
+                continue
+            inherited_methods = None
+            for method in class_.methods:
+                if method.is_constructor or method.rejection is None:
+                    continue
+                if inherited_methods is None:
+                    inherited_methods = project.inherited_methods(qualified_name)
+                superclass, overridden = inherited_methods.get(method.override_key, (None, None))
+                if overridden is None or not overridden.has_body or overridden.rejection is not None:
+                    continue
+                smells.append(_class_smell(
+                    cls.name, analysis, class_, line=method.start_line, method=method.signature,
+                    metrics={'rejection': method.rejection, 'overridden': f'{superclass}::{overridden.signature}'}
+                ))
+        return smells
+
+
+class SpeculativeHierarchyDetector(SmellDetector):
+    """
+    An abstract class or an interface with exactly one direct subtype in the project
+    """
+
+    name = 'Speculative Hierarchy'
+
+    @classmethod
+    def detect_in_project(cls, analyses, project):
+        smells = []
+        for qualified_name, (analysis, class_) in project.classes.items():
+            if class_.kind != 'interface' and not (class_.kind == 'class' and 'abstract' in class_.modifiers):
+                continue
+            subtypes = project.direct_subtypes(qualified_name)
+            if len(subtypes) == 1:
+                smells.append(_class_smell(cls.name, analysis, class_, metrics={'subtype': subtypes[0]}))
+        return smells
+
+
+class UnfactoredHierarchyDetector(SmellDetector):
+    """
+    Two or more sibling classes (the direct subclasses of a project class) which declare the same method
+    (signature and body) or the same field (type and name), which is not declared in their superclass.
+    The smell is reported on the superclass, to which the member can be pulled up.
+    """
+
+    name = 'Unfactored Hierarchy'
+    MIN_SIBLINGS = 2
+
+    @classmethod
+    def detect_in_project(cls, analyses, project):
+        smells = []
+        for qualified_name, (analysis, class_) in project.classes.items():
+            subclasses = project.direct_subclasses(qualified_name)
+            if len(subclasses) < cls.MIN_SIBLINGS:
+                continue
+            declared_methods = {method.override_key for method in class_.methods}
+            # (signature, return type, body hash) -> siblings, and (type, name) -> siblings
+            methods, fields = {}, {}
+            for subclass in subclasses:
+                subclass_ = project.classes[subclass][1]
+                for method in subclass_.methods:
+                    if method.is_constructor or not method.has_body or method.override_key in declared_methods:
+                        continue
+                    methods.setdefault((method.signature, method.returntype, method.body_hash), []).append(subclass)
+                for field in subclass_.fields.values():
+                    if field.name not in class_.fields:
+                        fields.setdefault((field.datatype, field.name), []).append(subclass)
+            for (signature, _, _), siblings in methods.items():
+                if len(siblings) >= cls.MIN_SIBLINGS:
+                    smells.append(_class_smell(cls.name, analysis, class_, method=signature,
+                                               metrics={'siblings': siblings}))
+            for (datatype, field_name), siblings in fields.items():
+                if len(siblings) >= cls.MIN_SIBLINGS:
+                    smells.append(_class_smell(cls.name, analysis, class_, field=field_name,
+                                               metrics={'type': datatype, 'siblings': siblings}))
+        return smells
+
+
+class HubLikeModularizationDetector(SmellDetector):
+    """
+    A class with both a large fan-in and a large fan-out, i.e., which is used by MIN_FAN_IN or more project classes
+    and uses MIN_FAN_OUT or more project classes
+    """
+
+    name = 'Hub-like Modularization'
+    MIN_FAN_IN = 20
+    MIN_FAN_OUT = 20
+
+    @classmethod
+    def detect_in_project(cls, analyses, project):
+        smells = []
+        for qualified_name, (analysis, class_) in project.classes.items():
+            fan_out = len(project.dependencies(qualified_name))
+            if fan_out < cls.MIN_FAN_OUT:
+                continue
+            fan_in = len(project.dependents(qualified_name))
+            if fan_in >= cls.MIN_FAN_IN:
+                smells.append(_class_smell(cls.name, analysis, class_, metrics={'fan_in': fan_in, 'fan_out': fan_out}))
+        return smells
+
+
+class PromiscuousPackageDetector(SmellDetector):
+    """
+    A package with MIN_CLASSES or more classes which implement MIN_FEATURES or more unrelated features.
+    A feature is a group of at least two classes of the package which are connected by their dependencies or
+    by a common client class, and is not connected to the other groups. The package can be split by the features.
+    """
+
+    name = 'Promiscuous Package'
+    MIN_CLASSES = 4
+    MIN_FEATURES = 2
+
+    @classmethod
+    def detect_in_project(cls, analyses, project):
+        packages = {}
+        for qualified_name, (analysis, class_) in project.classes.items():
+            if not class_.is_nested:
+                packages.setdefault(analysis.package_name, []).append(qualified_name)
+        smells = []
+        for package_name, package_classes in sorted(packages.items()):
+            if len(package_classes) < cls.MIN_CLASSES:
+                continue
+            features = cls.features(project, package_name, set(package_classes))
+            if len(features) >= cls.MIN_FEATURES:
+                analysis = project.classes[package_classes[0]][0]
+                smells.append(Smell(cls.name, package_name, '', os.path.dirname(analysis.filename), None,
+                                    metrics={'classes': len(package_classes), 'features': features}))
+        return smells
+
+    @staticmethod
+    def features(project, package_name, package_classes):
+        """
+        Returns the groups of two or more classes of the package connected by the dependencies and the clients
+        """
+        def top_level(qualified_name):
+            analysis, class_ = project.classes[qualified_name]
+            top_level_name = class_.name.split('.')[0]
+            return f'{analysis.package_name}.{top_level_name}' if analysis.package_name else top_level_name
+
+        parent = {qualified_name: qualified_name for qualified_name in package_classes}
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for client in project.classes:
+            client_top_level = top_level(client)
+            used_classes = {top_level(dependency) for dependency in project.dependencies(client)}
+            used_classes = [used for used in used_classes & package_classes if used != client_top_level]
+            if client_top_level in package_classes:
+                # A class of the package is connected to the classes it uses
+                used_classes.append(client_top_level)
+            for used in used_classes[1:]:
+                parent[find(used)] = find(used_classes[0])
+        groups = {}
+        for qualified_name in package_classes:
+            groups.setdefault(find(qualified_name), []).append(qualified_name)
+        return sorted(sorted(group) for group in groups.values() if len(group) >= 2)
+
+
+DETECTORS = (
+    LongMethodDetector,
+    LongParameterListDetector,
+    MessageChainsDetector,
+    RepeatedSwitchesDetector,
+    GlobalDataDetector,
+    DeficientEncapsulationDetector,
+    MiddleManDetector,
+    TemporaryFieldDetector,
+    PrimitiveObsessionDetector,
+    BrokenModularizationDetector,
+    FeatureEnvyDetector,
+    GodClassDetector,
+    DataClumpsDetector,
+    DeepHierarchyDetector,
+    RefusedBequestDetector,
+    SpeculativeHierarchyDetector,
+    UnfactoredHierarchyDetector,
+    HubLikeModularizationDetector,
+    PromiscuousPackageDetector,
+)
+
+
+def analyze_java_file(filename, detector_classes=DETECTORS) -> FileAnalysis:
+    """
+    Parses a Java file and walks the analyzer and the detectors in one traversal
+    """
+    from codart.utility.parsing import create_parse_tree, ParsingBudget
+    try:
+        tree, token_stream = create_parse_tree(
+            FileStream(filename, encoding='utf8', errors='ignore'), budget=ParsingBudget()
+        )
+    except Exception as e:
+        # Including ParsingBudgetExceeded, the file is reported as skipped
+        analysis = FileAnalysis(filename)
+        analysis.error = str(e)
+        return analysis
+    detectors = [detector_class() for detector_class in detector_classes]
+    analyzer = SourceFileAnalyzer(filename, token_stream, detectors)
+    for detector in detectors:
+        detector.analyzer = analyzer
+    CompositeWalker([analyzer] + detectors).walk(tree)
+    return analyzer.analysis
+
+
+def _analyze_chunk(filenames, detector_classes=DETECTORS) -> list:
+    return [analyze_java_file(filename, detector_classes) for filename in filenames]
+
+
+def analyze_project(source_files: list, detector_classes=DETECTORS, n_jobs=None) -> list:
+    """
+    Analyzes the files in a process pool (see codart.utility.project_parser.parse_project)
+
+    Returns:
+
+        list: The FileAnalysis of each file in the order of `source_files`
+
+    """
+
+    n_jobs = config.PARSING_WORKERS if n_jobs is None else n_jobs
+    if n_jobs <= 0:
+        n_jobs = os.cpu_count() or 1
+    chunks = create_chunks(source_files)
+    n_jobs = min(n_jobs, len(chunks))
+
+    analyses = None
+    if n_jobs > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                analyses = [analysis for chunk_analyses in
+                            executor.map(_analyze_chunk, chunks, [detector_classes] * len(chunks))
+                            for analysis in chunk_analyses]
+        except (OSError, BrokenProcessPool, PicklingError) as e:
+            config.logger.debug(f'Analyzing the project sequentially, the process pool failed: {e}')
+    if analyses is None:
+        analyses = _analyze_chunk([filename for chunk in chunks for filename in chunk], detector_classes)
+
+    analyses_dict = {analysis.filename: analysis for analysis in analyses}
+    for analysis in analyses:
+        if analysis.error is not None:
+            config.logger.debug(f'Smell detection skipped the file {analysis.filename}: {analysis.error}')
+    return [analyses_dict[filename] for filename in source_files]
+
+
+def detect_smells(source_files: list, detector_classes=DETECTORS, n_jobs=None) -> dict:
+    """
+    Detects the smells of the source files
+
+    Returns:
+
+        dict: Smell name -> list of Smell
+
+    """
+
+    analyses = analyze_project(source_files, detector_classes, n_jobs=n_jobs)
+    project = ProjectClasses(analyses)
+    return {detector_class.name: detector_class.detect_in_project(analyses, project)
+            for detector_class in detector_classes}
+
+
+# Writers of the CSV files of SmellInitialization
+def write_feature_envy_csv(smells: list, path: str):
+    """
+    One move method candidate per row: the source method (package.Class::method(types)) and the target class
+    """
+    with open(path, mode='w', newline='', encoding='utf-8') as f_:
+        writer = csv.writer(f_, delimiter='\t')
+        writer.writerow(['Refactoring Type', 'Source Entity', 'Target Class', 'ATFD', 'LAA', 'FDP'])
+        for smell in smells:
+            if '.' in smell.class_name:
+                # The refactorings move the methods of the top-level classes
+                continue
+            writer.writerow(['Move Method', f'{smell.qualified_class_name}::{smell.method}', smell.target,
+                             smell.metrics['ATFD'], smell.metrics['LAA'], smell.metrics['FDP']])
+
+
+def escape_entity(entity: str) -> str:
+    """
+    Escapes the commas of an extracted entity, e.g., of the parameter types of a method or of a generic type,
+    which are the separators of the entities in the God Class CSV file
+    """
+    return entity.replace(',', '\\,')
+
+
+def write_god_class_csv(smells: list, path: str):
+    """
+    One extract class candidate per row: the class and the entities to extract, [method, ..., Type field, ...],
+    the commas in the entities are escaped by a backslash (see sbse.initialize.get_extracted_entities)
+    """
+    with open(path, mode='w', newline='', encoding='utf-8') as f_:
+        writer = csv.writer(f_, delimiter='\t')
+        writer.writerow(['Source Class', 'Extracted Entities', 'WMC', 'TCC', 'ATFD'])
+        for smell in smells:
+            if not smell.entities or '.' in smell.class_name:
+                continue
+            entities = ', '.join(escape_entity(entity) for entity in smell.entities)
+            writer.writerow([smell.qualified_class_name, f'[{entities}]', smell.metrics['WMC'],
+                             smell.metrics['TCC'], smell.metrics['ATFD']])
+
+
+def write_long_method_csv(smells: list, path: str):
+    """
+    One extract method candidate per row, the last column is the (character offset, length, F) of the body
+    """
+    with open(path, mode='w', newline='', encoding='utf-8') as f_:
+        writer = csv.writer(f_, delimiter='\t')
+        writer.writerow(['Class', 'Method', 'LOC', 'CYCLO', 'NOP', 'Statements'])
+        for smell in smells:
+            if '.' in smell.class_name:
+                continue
+            start, stop = smell.metrics['body_range']
+            writer.writerow([smell.qualified_class_name, smell.method, smell.metrics['LOC'],
+                             smell.metrics['CYCLO'], smell.metrics['NOP'], f'({start}, {stop - start + 1}, F)'])
+
+
+def save_smells(smells: dict, output_dir: str) -> dict:
+    """
+    Writes the JSON report of all smells and the CSV files of SmellInitialization to the output directory
+
+    Returns:
+
+        dict: The paths of the 'FEATURE_ENVY', 'GOD_CLASS', 'LONG_METHOD' CSV files and the 'REPORT'
+
+    """
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {
+        'FEATURE_ENVY': os.path.join(output_dir, FEATURE_ENVY_FILE),
+        'GOD_CLASS': os.path.join(output_dir, GOD_CLASS_FILE),
+        'LONG_METHOD': os.path.join(output_dir, LONG_METHOD_FILE),
+        'REPORT': os.path.join(output_dir, SMELLS_REPORT_FILE),
+    }
+    write_feature_envy_csv(smells.get(FeatureEnvyDetector.name, []), paths['FEATURE_ENVY'])
+    write_god_class_csv(smells.get(GodClassDetector.name, []), paths['GOD_CLASS'])
+    write_long_method_csv(smells.get(LongMethodDetector.name, []), paths['LONG_METHOD'])
+    with open(paths['REPORT'], mode='w', encoding='utf-8') as f_:
+        json.dump({name: [smell.to_dict() for smell in smells_] for name, smells_ in smells.items()}, f_, indent=2)
+    return paths
+
+
+def main(project_dir, output_dir, n_jobs=None) -> dict:
+    from codart.symbol_table import get_filenames_in_dir
+    smells = detect_smells(get_filenames_in_dir(project_dir), n_jobs=n_jobs)
+    for name, smells_ in smells.items():
+        config.logger.info(f'{name}: {len(smells_)}')
+    return save_smells(smells, output_dir)
+
+
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description='CodART smell detection engine')
+    argparser.add_argument('project_dir')
+    argparser.add_argument('--output-dir', default='smells')
+    argparser.add_argument('--n-jobs', type=int, default=None)
+    args = argparser.parse_args()
+    print(main(args.project_dir, args.output_dir, n_jobs=args.n_jobs))
@@ -7,7 +7,7 @@ An implementation of simple symbol table for the following refactorings:
 """
 
 
-__version__ = '0.2.0'
+__version__ = '0.3.4'
 __author__ = 'Morteza Zakeri'
 
 
@@ -22,20 +22,151 @@ from antlr4.tree import Tree
 from antlr4 import FileStream, ParseTreeWalker, CommonTokenStream
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
 
+from codart.utility.composite_walker import CompositeWalker
 from codart.utility.directory_utils import create_project_parse_tree
+from codart.utility.identifier_index import notify_file_changed
+from codart.utility.parse_cache import get_parse_cache
+from codart.utility.parsing import parse, get_parsing_statistics
 from gen.java.JavaLexer import JavaLexer
 from gen.java.JavaParser import JavaParser
 from gen.java.JavaParserListener import JavaParserListener
 from gen.javaLabeled.JavaLexer import JavaLexer
+from sbse import config
+
+
+def simple_type_name(type_name: str):
+    """
+    Returns the simple name of a type, e.g., 'java.util.List<String>' -> 'List'
+    """
+    return re.sub(r'<.*>|\[\]', '', type_name or '').rsplit('.', 1)[-1]
 
 
 class Program:
     def __init__(self):
         self.packages = {}
+        # Hierarchy indexes, maintained by add_package and index_class
+        # Qualified name (package.Class) -> Class
+        self.classes_by_qualified_name = {}
+        # Simple name -> list of Class
+        self.classes_by_name = {}
+        # Simple name of the superclass -> list of the classes extending a class with this name
+        self.classes_by_superclass_name = {}
+        # Simple name of the interface -> list of the classes implementing an interface with this name
+        self.classes_by_interface_name = {}
 
     def __str__(self):
         return str(self.packages)
 
+    def add_package(self, package, key=None):
+        """
+        Adds the classes of a package to the program (merging the packages with the same name) and indexes them
+        """
+        key = (package.name or "") if key is None else key
+        if key not in self.packages:
+            self.packages[key] = package
+        else:
+            for class_name in package.classes:
+                self.packages[key].classes[class_name] = package.classes[class_name]
+        for class_name in package.classes:
+            self.index_class(package.classes[class_name])
+
+    def index_class(self, class_):
+        qualified_name = class_.get_qualified_name()
+        previous = self.classes_by_qualified_name.get(qualified_name)
+        if previous is class_:
+            return
+        if previous is not None:
+            self._unindex_class(previous)
+        self.classes_by_qualified_name[qualified_name] = class_
+        self.classes_by_name.setdefault(class_.name, []).append(class_)
+        if class_.superclass_name:
+            self.classes_by_superclass_name.setdefault(simple_type_name(class_.superclass_name), []).append(class_)
+        for interface_name in class_.superinterface_names:
+            self.classes_by_interface_name.setdefault(simple_type_name(interface_name), []).append(class_)
+
+    def _unindex_class(self, class_):
+        self.classes_by_name[class_.name].remove(class_)
+        if class_.superclass_name:
+            self.classes_by_superclass_name[simple_type_name(class_.superclass_name)].remove(class_)
+        for interface_name in class_.superinterface_names:
+            self.classes_by_interface_name[simple_type_name(interface_name)].remove(class_)
+
+    def find_class(self, name: str, package_name: str = None):
+        """
+        Returns the class with the qualified name (or the simple name in the package), or None.
+        A simple name without a package matches the first class with the name.
+        """
+        if package_name is not None:
+            return self.classes_by_qualified_name.get(package_name + '.' + name if package_name else name)
+        class_ = self.classes_by_qualified_name.get(name)
+        if class_ is None and self.classes_by_name.get(name):
+            class_ = self.classes_by_name[name][0]
+        return class_
+
+    def resolve_type(self, type_name: str, file_info=None, package_name: str = None):
+        """
+        Resolves a type name used in a file to a class of the program by the qualified name, the single-type imports,
+        the package of the file, and the on-demand imports, in this order. Returns None for the unknown types.
+        """
+        type_name = re.sub(r'<.*>|\[\]', '', type_name or '')
+        if '.' in type_name:
+            return self.classes_by_qualified_name.get(type_name)
+        candidates = self.classes_by_name.get(type_name)
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+        if file_info is not None:
+            for class_import in file_info.class_imports:
+                if class_import.class_name == type_name:
+                    return self.find_class(type_name, class_import.package_name or "")
+        class_ = self.find_class(type_name, package_name or "")
+        if class_ is not None or file_info is None:
+            return class_
+        for package_import in file_info.package_imports:
+            class_ = self.find_class(type_name, package_import.package_name or "")
+            if class_ is not None:
+                return class_
+        return None
+
+    def get_superclass(self, class_):
+        """
+        Returns the superclass of a class, or None if it has no superclass or its superclass is not in the program
+        """
+        if not class_.superclass_name:
+            return None
+        return self.resolve_type(class_.superclass_name, class_.file_info, class_.package_name)
+
+    def get_superclasses(self, class_) -> list:
+        """
+        Returns the chain of the superclasses of a class in the program, which stops before a repeated class
+        """
+        superclasses = []
+        superclass = self.get_superclass(class_)
+        while superclass is not None and superclass is not class_ and superclass not in superclasses:
+            superclasses.append(superclass)
+            superclass = self.get_superclass(superclass)
+        return superclasses
+
+    def get_classes_extending(self, superclass_name: str) -> list:
+        """
+        Returns the classes whose superclass has the simple name, without resolving their superclass
+        """
+        return list(self.classes_by_superclass_name.get(simple_type_name(superclass_name), []))
+
+    def get_subclasses(self, class_) -> list:
+        """
+        Returns the direct subclasses of a class
+        """
+        return [subclass for subclass in self.classes_by_superclass_name.get(class_.name, [])
+                if self.get_superclass(subclass) is class_]
+
+    def get_implementors(self, interface_name: str) -> list:
+        """
+        Returns the classes implementing an interface with the (simple or qualified) name
+        """
+        return list(self.classes_by_interface_name.get(simple_type_name(interface_name), []))
+
 
 class Package:
     def __init__(self):
@@ -97,6 +228,8 @@ class SingleFileElement:
         self.parser_context = parser_context
         self.filename = filename
         self.file_info = _file_info
+        # The (start, stop) token indices of the elements built from the project parser summaries
+        self.token_range = None
 
     def get_token_stream(self) -> CommonTokenStream:
         return self.parser_context.parser.getTokenStream()
@@ -179,13 +312,17 @@ class Class(SingleFileElement):
         self.file_info = file_info
         self.body_context = None
 
+    def get_qualified_name(self) -> str:
+        return self.package_name + '.' + self.name if self.package_name else self.name
+
     def find_methods_with_name(self, name: str) -> list:
-        result = []
-        for mk in self.methods:
-            m = self.methods[mk]
-            if m.name == name:
-                result.append(m)
-        return result
+        # Method name -> methods, rebuilt when methods are added or removed
+        if getattr(self, '_methods_by_name_size', None) != len(self.methods):
+            self._methods_by_name = {}
+            for mk in self.methods:
+                self._methods_by_name.setdefault(self.methods[mk].name, []).append(self.methods[mk])
+            self._methods_by_name_size = len(self.methods)
+        return list(self._methods_by_name.get(name, []))
 
     def __str__(self):
         return str(self.modifiers) + " " + str(self.name) \
@@ -971,7 +1108,16 @@ class PreConditionListener(UtilsListener):
 
 
 
-def get_program(source_files: list, print_status=False) -> Program:
+def get_program(source_files: list, print_status=False, from_summaries=False, n_jobs=None) -> Program:
+    """
+    Parses the source files and returns their symbol table.
+    If `from_summaries` is set, the files are parsed in parallel by `codart.utility.project_parser`
+    and the program is built from the file summaries, therefore its elements have no parser contexts
+    and can not be used to rewrite the files.
+    """
+    if from_summaries:
+        from codart.utility.project_parser import parse_project
+        return get_program_from_summaries(parse_project(source_files, n_jobs=n_jobs))
     program = Program()
     for filename in source_files:
         if print_status:
@@ -980,18 +1126,69 @@ def get_program(source_files: list, print_status=False) -> Program:
         lexer_ = JavaLexer(stream_)
         token_stream_ = CommonTokenStream(lexer_)
         parser_ = JavaParser(token_stream_)
-        tree_ = parser_.compilationUnit()
+        tree_ = parse(parser_)
         listener_ = UtilsListener(filename)
         walker_ = ParseTreeWalker()
         walker_.walk(listener_, tree_)
 
-        listener_package_name = listener_.package.name or ""
+        program.add_package(listener_.package)
+    return program
 
-        if not (listener_package_name in program.packages):
-            program.packages[listener_package_name] = listener_.package
-        else:
-            for classes_name in listener_.package.classes:
-                program.packages[listener_package_name].classes[classes_name] = listener_.package.classes[classes_name]
+
+def get_program_from_summaries(summaries: list) -> Program:
+    """
+    Builds the symbol table of a program from the FileSummary objects of `codart.utility.project_parser`
+    """
+    program = Program()
+    for summary in summaries:
+        if summary.error is not None:
+            continue
+        file_info = FileInfo(filename=summary.filename, package_name=summary.package_name)
+        for import_summary in summary.imports:
+            if import_summary.is_package_import:
+                import_ = PackageImport(package_name=import_summary.package_name, filename=summary.filename,
+                                        file_info=file_info)
+                file_info.package_imports.append(import_)
+            else:
+                import_ = ClassImport(package_name=import_summary.package_name, class_name=import_summary.class_name,
+                                      filename=summary.filename, file_info=file_info)
+                file_info.class_imports.append(import_)
+            import_.token_range = import_summary.token_range
+            file_info.all_imports.append(import_)
+
+        package_name = summary.package_name or ""
+        if package_name not in program.packages:
+            package = Package()
+            package.name = summary.package_name
+            program.packages[package_name] = package
+        package = program.packages[package_name]
+        for class_name, class_summary in summary.classes.items():
+            class_ = Class(name=class_summary.name, package_name=summary.package_name, filename=summary.filename,
+                           file_info=file_info)
+            class_.modifiers = list(class_summary.modifiers)
+            class_.superclass_name = class_summary.superclass_name
+            class_.superinterface_names = list(class_summary.superinterface_names)
+            class_.token_range = class_summary.token_range
+            for field_name, field_summary in class_summary.fields.items():
+                field = Field(datatype=field_summary.datatype, name=field_summary.name,
+                              initializer=field_summary.initializer, package_name=summary.package_name,
+                              class_name=class_summary.name, filename=summary.filename, file_info=file_info)
+                field.modifiers = list(field_summary.modifiers)
+                field.neighbor_names = list(field_summary.neighbor_names)
+                field.index_in_variable_declarators = field_summary.index_in_variable_declarators
+                field.token_range = field_summary.token_range
+                class_.fields[field_name] = field
+            for method_key, method_summary in class_summary.methods.items():
+                method = Method(returntype=method_summary.returntype, name=method_summary.name,
+                                body_text=method_summary.body_text, package_name=summary.package_name,
+                                class_name=class_summary.name, filename=summary.filename, file_info=file_info)
+                method.modifiers = list(method_summary.modifiers)
+                method.parameters = list(method_summary.parameters)
+                method.is_constructor = method_summary.is_constructor
+                method.token_range = method_summary.token_range
+                class_.methods[method_key] = method
+            package.classes[class_name] = class_
+            program.index_class(class_)
     return program
 
 
@@ -1002,7 +1199,7 @@ def get_objects(source_files: str) -> Dict[Any, Any]:
         lexer_ = JavaLexer(stream_)
         token_stream_ = CommonTokenStream(lexer_)
         parser_ = JavaParser(token_stream_)
-        tree_ = parser_.compilationUnit()
+        tree_ = parse(parser_)
         listener_ = UtilsListener(filename)
         walker_ = ParseTreeWalker()
         walker_.walk(listener_, tree_)
@@ -1061,6 +1258,7 @@ class Rewriter:
                 os.makedirs(path)
             with open(new_filename, mode='w', encoding='utf-8', newline='') as file:
                 file.write(token_stream_rewriter.getDefaultText())
+            notify_file_changed(new_filename)
 
 
 def get_program_with_field_usage(source_files: list, field_name: str, source_class: str, print_status=False) -> Program:
@@ -1072,35 +1270,54 @@ def get_program_with_field_usage(source_files: list, field_name: str, source_cla
         lexer_ = JavaLexer(stream_)
         token_stream_ = CommonTokenStream(lexer_)
         parser_ = JavaParser(token_stream_)
-        tree_ = parser_.compilationUnit()
+        tree_ = parse(parser_)
         listener_ = StaticFieldUsageListener(filename, field_name, source_class)
         walker_ = ParseTreeWalker()
         walker_.walk(listener_, tree_)
 
-        if not (listener_.package.name in program.packages):
-            program.packages[listener_.package.name] = listener_.package
-        else:
-            for classes_name in listener_.package.classes:
-                program.packages[listener_.package.name].classes[classes_name] = listener_.package.classes[classes_name]
+        program.add_package(listener_.package, key=listener_.package.name)
     return program
 
 
+def _parse_project_file(file_path: str, use_budget=True):
+    parse_cache = get_parse_cache()
+    if parse_cache is None:
+        return create_project_parse_tree(file_path, use_budget=use_budget)
+    return parse_cache.get(file_path, use_budget=use_budget)
+
+
+def _check_parsing_budget(file_path: str, tree_):
+    """
+    Raises an exception if the file was not parsed because it exceeds the parsing budgets
+    """
+    if tree_ is None and file_path in get_parsing_statistics().skipped_files:
+        raise Exception(f"Skipped walking {file_path}: {get_parsing_statistics().skipped_files[file_path]}")
+
+
 def parse_and_walk(file_path: str, listener_class, has_write=False, debug=False, **kwargs):
-    tree_, rewriter = create_project_parse_tree(file_path)
+    """
+    Walks a listener on the parse tree of a file, and writes its rewriter back to the file if `has_write` is set.
+    The parsing budgets are enforced on the read-only walks only: a file which exceeds them is not walked,
+    and an exception is raised, since the refactorings decide on the state of the read-only listeners
+    (e.g., the cycle checks of move method and move field) and must fail rather than see an empty walk.
+    """
+    tree_, rewriter = _parse_project_file(file_path, use_budget=not has_write)
     if has_write:
         if rewriter is None:
             raise Exception("Failed to create rewriter.")
         kwargs.update({'rewriter': rewriter})
+    _check_parsing_budget(file_path, tree_)
     listener_ = listener_class(**kwargs)
-    ParseTreeWalker().walk(
-        listener_,
-        tree_
-    )
+    CompositeWalker([listener_]).walk(tree_)
 
     if has_write:
         if not debug:
             with open(file_path, mode='w', encoding='utf-8', errors='ignore', newline='') as f_:
                 f_.write(listener_.rewriter.getDefaultText())
+            parse_cache = get_parse_cache()
+            if parse_cache is not None:
+                parse_cache.invalidate(file_path)
+            notify_file_changed(file_path)
         else:
             print(listener_.rewriter.getDefaultText())
 
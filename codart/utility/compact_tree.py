@@ -0,0 +1,311 @@
+"""
+Compact array-backed representation of the `JavaParserLabeled` parse trees for read-only analyses.
+
+The ANTLR context objects keep every node, token, parser, and token stream of a file alive,
+and the parse trees of a whole project do not fit in memory for large projects (see `cpu_ram_usage`).
+`CompactTree` flattens a parse tree into a node table of numpy arrays in pre-order:
+
+1. The kind of each node, i.e., the index of its context class in `KIND_NAMES`
+(the labeled alternatives are kept, e.g., Expression1Context), or a terminal/error kind.
+2. The parent of each node.
+3. The last node of the subtree of each node, i.e., the subtree of a node is a contiguous range of nodes,
+and its children are the first node of the range and the nodes following the subtree of each child.
+4. The first and last token index of each node.
+
+The tokens of the file are kept once in a `TokenTable` of the same layout.
+The tokens conjured by the error recovery of the parser (e.g., `<missing ';'>`) are not in the token stream
+(their token index is -1); they are appended to the token table after the tokens of the stream,
+so that `get_text` returns the same text as `getText()` on the files with syntax errors too.
+Compact trees are about an order of magnitude smaller than the ANTLR trees and can be pickled,
+e.g., to be returned by the worker processes of the project parser.
+
+## Usage
+
+    tree = CompactTree.from_parse_tree(*create_parse_tree(stream))
+    for node in tree.find_all('MethodDeclarationContext'):
+        print(tree.get_text(tree.children(node)[1]))
+
+"""
+
+__author__ = 'Morteza Zakeri'
+__version__ = '0.1.1'
+
+import numpy as np
+from antlr4 import FileStream, Token
+from antlr4.tree.Tree import TerminalNode, ErrorNode
+
+from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
+
+TERMINAL_KIND = 0
+ERROR_KIND = 1
+
+# The kind names of the nodes, shared by all compact trees
+KIND_NAMES = ['<terminal>', '<error>'] + sorted(
+    name for name in vars(JavaParserLabeled) if name.endswith('Context')
+)
+KIND_IDS = {name: kind for kind, name in enumerate(KIND_NAMES)}
+
+# The listener method names of the kinds, e.g., 'enterExpression1' for Expression1Context
+_ENTER_METHOD_NAMES = [None, None] + [f'enter{name[:-len("Context")]}' for name in KIND_NAMES[2:]]
+_EXIT_METHOD_NAMES = [None, None] + [f'exit{name[:-len("Context")]}' for name in KIND_NAMES[2:]]
+
+
+class TokenTable:
+    """
+
+    The tokens of a file as int32 arrays and an interned list of texts
+
+    """
+
+    def __init__(self, tokens):
+        n = len(tokens)
+        self.types = np.fromiter((token.type for token in tokens), dtype=np.int32, count=n)
+        self.channels = np.fromiter((token.channel for token in tokens), dtype=np.int32, count=n)
+        self.lines = np.fromiter((token.line for token in tokens), dtype=np.int32, count=n)
+        self.columns = np.fromiter((token.column for token in tokens), dtype=np.int32, count=n)
+        # Token text -> text id, and text id -> token text
+        vocabulary = dict()
+        self.text_ids = np.fromiter(
+            (vocabulary.setdefault(token.text, len(vocabulary)) for token in tokens), dtype=np.int32, count=n
+        )
+        self.texts = list(vocabulary)
+
+    def __len__(self):
+        return self.types.size
+
+    def text(self, token_index):
+        return self.texts[self.text_ids[token_index]]
+
+    @property
+    def nbytes(self):
+        return (self.types.nbytes + self.channels.nbytes + self.lines.nbytes + self.columns.nbytes +
+                self.text_ids.nbytes + sum(len(text) + 49 for text in self.texts))
+
+
+class CompactTree:
+    """
+
+    Flat pre-order node table of a parse tree, node 0 is the root
+
+    """
+
+    def __init__(self, kinds, parents, subtree_ends, first_tokens, last_tokens, tokens):
+        self.kinds = kinds
+        self.parents = parents
+        # The last node in the subtree of each node
+        self.subtree_ends = subtree_ends
+        self.first_tokens = first_tokens
+        self.last_tokens = last_tokens
+        self.tokens = tokens
+
+    @classmethod
+    def from_parse_tree(cls, tree, token_stream=None):
+        """
+        Converts a JavaParserLabeled parse tree (Python or C++ back-end) into a compact tree
+
+        Args:
+
+            tree (ParserRuleContext): The parse tree
+
+            token_stream (CommonTokenStream): The token stream of the tree, default is the input stream of its parser
+            (required for the trees of the C++ back-end)
+
+        """
+
+        if token_stream is None:
+            token_stream = tree.parser.getInputStream()
+        token_stream.fill()
+
+        kinds, parents, first_tokens, last_tokens = [], [], [], []
+        # The tokens conjured by the error recovery, which are indexed after the tokens of the stream
+        conjured_tokens = []
+        # Iterative pre-order traversal, (node, parent id)
+        stack = [(tree, -1)]
+        while stack:
+            node, parent_id = stack.pop()
+            node_id = len(kinds)
+            parents.append(parent_id)
+            if isinstance(node, TerminalNode):
+                kinds.append(ERROR_KIND if isinstance(node, ErrorNode) else TERMINAL_KIND)
+                token_index = node.symbol.tokenIndex
+                if token_index < 0:
+                    token_index = len(token_stream.tokens) + len(conjured_tokens)
+                    conjured_tokens.append(node.symbol)
+                first_tokens.append(token_index)
+                last_tokens.append(token_index)
+                continue
+            kinds.append(KIND_IDS[type(node).__name__])
+            first_tokens.append(node.start.tokenIndex if node.start is not None else -1)
+            last_tokens.append(node.stop.tokenIndex if node.stop is not None else -1)
+            if node.children:
+                stack.extend((child, node_id) for child in reversed(node.children))
+
+        n = len(kinds)
+        # Pre-order: the subtree of a node ends at its last descendant
+        subtree_ends = list(range(n))
+        for node_id in range(n - 1, 0, -1):
+            parent_id = parents[node_id]
+            if subtree_ends[node_id] > subtree_ends[parent_id]:
+                subtree_ends[parent_id] = subtree_ends[node_id]
+        return cls(
+            kinds=np.array(kinds, dtype=np.int16),
+            parents=np.array(parents, dtype=np.int32),
+            subtree_ends=np.array(subtree_ends, dtype=np.int32),
+            first_tokens=np.array(first_tokens, dtype=np.int32),
+            last_tokens=np.array(last_tokens, dtype=np.int32),
+            tokens=TokenTable(token_stream.tokens + conjured_tokens),
+        )
+
+    @classmethod
+    def from_file(cls, java_file_path):
+        from codart.utility.parsing import create_parse_tree
+        return cls.from_parse_tree(*create_parse_tree(FileStream(java_file_path, encoding='utf8', errors='ignore')))
+
+    def __len__(self):
+        return self.kinds.size
+
+    @property
+    def nbytes(self):
+        """
+        The memory used by the arrays and texts of the tree in bytes
+        """
+        return (self.kinds.nbytes + self.parents.nbytes + self.subtree_ends.nbytes + self.first_tokens.nbytes +
+                self.last_tokens.nbytes + self.tokens.nbytes)
+
+    # Nodes
+    def kind_name(self, node):
+        return KIND_NAMES[self.kinds[node]]
+
+    def is_terminal(self, node):
+        return self.kinds[node] <= ERROR_KIND
+
+    def parent(self, node):
+        parent = int(self.parents[node])
+        return None if parent < 0 else parent
+
+    def children(self, node):
+        children = []
+        child, subtree_end = node + 1, self.subtree_ends[node]
+        while child <= subtree_end:
+            children.append(child)
+            child = self.subtree_ends[child] + 1
+        return np.array(children, dtype=np.int32)
+
+    def descendants(self, node):
+        """
+        The nodes in the subtree of the node (excluding the node) in pre-order
+        """
+        return np.arange(node + 1, self.subtree_ends[node] + 1, dtype=np.int32)
+
+    def ancestors(self, node):
+        parent = self.parents[node]
+        while parent >= 0:
+            yield int(parent)
+            parent = self.parents[parent]
+
+    def enclosing(self, node, kind_names):
+        """
+        Returns the nearest ancestor of one of the kinds, or None
+        """
+        kinds = self._kinds(kind_names)
+        for ancestor in self.ancestors(node):
+            if self.kinds[ancestor] in kinds:
+                return ancestor
+        return None
+
+    # Queries
+    @staticmethod
+    def _kinds(kind_names):
+        if isinstance(kind_names, str):
+            kind_names = (kind_names,)
+        return [KIND_IDS[name] for name in kind_names]
+
+    def find_all(self, kind_names, within=None):
+        """
+        Finds the nodes of the kinds in pre-order
+
+        Args:
+
+            kind_names (str|list): Context class names, e.g., 'ClassDeclarationContext'
+
+            within (int): Limits the search to the subtree of this node
+
+        Returns:
+
+            numpy.ndarray: The node ids
+
+        """
+
+        start, stop = (0, len(self)) if within is None else (within, self.subtree_ends[within] + 1)
+        matches = np.isin(self.kinds[start:stop], self._kinds(kind_names))
+        return np.nonzero(matches)[0].astype(np.int32) + start
+
+    def find_first_child(self, node, kind_names):
+        kinds = self._kinds(kind_names)
+        for child in self.children(node):
+            if self.kinds[child] in kinds:
+                return int(child)
+        return None
+
+    def token_type(self, node):
+        """
+        The token type of a terminal node
+        """
+        return int(self.tokens.types[self.first_tokens[node]])
+
+    def get_text(self, node):
+        """
+        Returns the text of the terminal nodes in the subtree of the node, as `ParserRuleContext.getText()`
+        """
+        subtree = slice(node, self.subtree_ends[node] + 1)
+        token_indices = self.first_tokens[subtree][self.kinds[subtree] <= ERROR_KIND]
+        texts = self.tokens.texts
+        return ''.join(texts[text_id] for text_id in self.tokens.text_ids[token_indices].tolist())
+
+    def get_source_text(self, node):
+        """
+        Returns the source code of the node including the hidden tokens, as `TokenStream.getText(start, stop)`
+        """
+        first, last = self.first_tokens[node], self.last_tokens[node]
+        if first < 0 or last < first:
+            return ''
+        token_indices = np.arange(first, last + 1)
+        token_indices = token_indices[self.tokens.types[first:last + 1] != Token.EOF]
+        texts = self.tokens.texts
+        return ''.join(texts[text_id] for text_id in self.tokens.text_ids[token_indices].tolist())
+
+    def line(self, node):
+        first = self.first_tokens[node]
+        return int(self.tokens.lines[first]) if first >= 0 else None
+
+    # Traversal
+    def walk(self, listener, node=0):
+        """
+        Walks the subtree of the node and calls the enter and exit methods of the listener,
+        named as in JavaParserLabeledListener (e.g., enterClassDeclaration(tree, node)).
+        The terminal nodes are passed to visitTerminal(tree, node) and visitErrorNode(tree, node), if defined.
+        """
+
+        enter_methods = [getattr(listener, name, None) if name else None for name in _ENTER_METHOD_NAMES]
+        exit_methods = [getattr(listener, name, None) if name else None for name in _EXIT_METHOD_NAMES]
+        enter_methods[TERMINAL_KIND] = getattr(listener, 'visitTerminal', None)
+        enter_methods[ERROR_KIND] = getattr(listener, 'visitErrorNode', None)
+        kinds = self.kinds.tolist()
+        subtree_ends = self.subtree_ends.tolist()
+
+        # Pre-order nodes, exit the finished subtrees before entering the next node
+        open_nodes = []
+        for current in range(node, subtree_ends[node] + 1):
+            while open_nodes and subtree_ends[open_nodes[-1]] < current:
+                closed = open_nodes.pop()
+                if exit_methods[kinds[closed]] is not None:
+                    exit_methods[kinds[closed]](self, closed)
+            kind = kinds[current]
+            if enter_methods[kind] is not None:
+                enter_methods[kind](self, current)
+            if kind > ERROR_KIND:
+                open_nodes.append(current)
+        while open_nodes:
+            closed = open_nodes.pop()
+            if exit_methods[kinds[closed]] is not None:
+                exit_methods[kinds[closed]](self, closed)
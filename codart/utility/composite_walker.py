@@ -0,0 +1,112 @@
+"""
+Single-pass walker of several parse tree listeners.
+
+Refactorings and analyses often walk the same parse tree several times with different listeners.
+`CompositeWalker` walks the tree once and dispatches each enter, exit, and visit event to all of its listeners,
+in the order of the listeners, as if each listener had been walked by `ParseTreeWalker` on its own.
+The dispatch tables are computed once per listener set: for each event, only the listener methods that
+override the generated (empty) methods of the listener base classes are called,
+hence a listener which does not handle a rule costs nothing on the nodes of that rule.
+The walk is iterative, so deep trees do not hit the recursion limit of Python.
+
+Only the listeners that do not depend on each other's results (e.g., read-only analyses) should be fused.
+
+## Usage
+
+    walker = CompositeWalker([listener_1, listener_2])
+    walker.walk(tree)
+
+"""
+
+__author__ = 'Morteza Zakeri'
+__version__ = '0.1.0'
+
+from antlr4.tree.Tree import TerminalNode, ErrorNode
+
+# The generated listeners (and the ANTLR base listener) whose methods are empty
+_GENERATED_LISTENER_MODULES = (
+    'antlr4.tree.Tree',
+    'gen.java.JavaParserListener',
+    'gen.javaLabeled.JavaParserLabeledListener',
+    'java8speedy.parser.JavaLabeledParserListener',
+)
+
+# Context class -> (enter method name, exit method name)
+_RULE_METHOD_NAMES = {}
+
+
+def _rule_method_names(context_class):
+    names = _RULE_METHOD_NAMES.get(context_class)
+    if names is None:
+        # E.g., ClassDeclarationContext -> enterClassDeclaration, as in the generated enterRule and exitRule
+        name = context_class.__name__[:-len('Context')]
+        names = _RULE_METHOD_NAMES[context_class] = (f'enter{name}', f'exit{name}')
+    return names
+
+
+def _overridden_method(listener, name):
+    """
+    Returns the bound method of the listener, or None if it is missing or not overridden
+    """
+    function_ = getattr(type(listener), name, None)
+    if function_ is None or getattr(function_, '__module__', None) in _GENERATED_LISTENER_MODULES:
+        return None
+    return getattr(listener, name)
+
+
+class CompositeWalker:
+    """
+
+    Walks a parse tree once for a list of listeners
+
+    """
+
+    def __init__(self, listeners: list):
+        self.listeners = list(listeners)
+        # Method name -> bound methods of the listeners which override it
+        self._dispatch_table = {}
+        self._enter_every_rule = self._methods('enterEveryRule')
+        self._exit_every_rule = self._methods('exitEveryRule')
+        self._visit_terminal = self._methods('visitTerminal')
+        self._visit_error_node = self._methods('visitErrorNode')
+
+    def _methods(self, name):
+        methods = self._dispatch_table.get(name)
+        if methods is None:
+            methods = [method for method in (_overridden_method(listener, name) for listener in self.listeners)
+                       if method is not None]
+            self._dispatch_table[name] = methods
+        return methods
+
+    def walk(self, tree):
+        enter_every_rule, exit_every_rule = self._enter_every_rule, self._exit_every_rule
+        # (node, is_exit)
+        stack = [(tree, False)]
+        while stack:
+            node, is_exit = stack.pop()
+            if isinstance(node, TerminalNode):
+                for method in self._visit_error_node if isinstance(node, ErrorNode) else self._visit_terminal:
+                    method(node)
+                continue
+            enter_name, exit_name = _rule_method_names(type(node))
+            if is_exit:
+                for method in self._methods(exit_name):
+                    method(node)
+                for method in exit_every_rule:
+                    method(node)
+                continue
+            for method in enter_every_rule:
+                method(node)
+            for method in self._methods(enter_name):
+                method(node)
+            stack.append((node, True))
+            if node.children:
+                stack.extend((child, False) for child in reversed(node.children))
+        return self.listeners
+
+
+def walk_listeners(tree, listeners: list) -> list:
+    """
+    Walks the tree once for all listeners and returns the listeners
+    """
+    return CompositeWalker(listeners).walk(tree)
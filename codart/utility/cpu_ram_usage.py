@@ -6,16 +6,19 @@ from antlr4 import FileStream, CommonTokenStream
 
 from gen.java.JavaLexer import JavaLexer
 from gen.java.JavaParser import JavaParser
+from codart.utility.compact_tree import CompactTree
 
 
 class ProjectParseUsage:
-    def __init__(self, project_dir):
+    def __init__(self, project_dir, compact=False):
         """
         This by calling this class you can measure:
             - Total consumed memory for keeping all parse trees
             - Total consumed time for parsing in seconds
+        If compact is True, the JavaParserLabeled trees are kept as compact trees (codart.utility.compact_tree).
         """
         self.project_root = project_dir
+        self.compact = compact
         self.parse_trees = []
         self.counter = 0
 
@@ -47,12 +50,18 @@ class ProjectParseUsage:
             self.counter += 1
             print(f"Parsing {self.counter}: {file_path}")
             start = time.time()
-            tree = self.generate_tree(file_path)
+            if self.compact:
+                tree = CompactTree.from_file(str(file_path))
+            else:
+                tree = self.generate_tree(file_path)
             end = time.time()
             self.parse_trees.append(tree)
             total_time += end - start
         print(f"Execute time is {total_time} seconds.")
-        print(f"Memory used for all trees is {sys.getsizeof(self.parse_trees) / 1000} KB")
+        if self.compact:
+            print(f"Memory used for all trees is {sum(tree.nbytes for tree in self.parse_trees) / 1000} KB")
+        else:
+            print(f"Memory used for all trees is {sys.getsizeof(self.parse_trees) / 1000} KB")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,348 @@
+"""
+Type dependency graph of a Java project and the strongly connected components (SCC) of the graph.
+
+The nodes of the graph are the qualified names of the types of the project, i.e., the classes, interfaces,
+and enums at any nesting level (e.g., `p.Outer.Inner`), and an edge `A -> B` means that type A depends on type B,
+labeled by the kinds of the dependency:
+
+1. `extends` and `implements`: B is the superclass or a superinterface of A (an interface `extends` B).
+2. `field`, `parameter`, and `return`: B is used in the type of a field, a method parameter, or a return type of A.
+3. `reference`: B is referenced by its name in the body of A, e.g., a local variable, `new B()`, or `B.method()`.
+
+The type names are resolved by `DependencyGraph.resolve_type`, i.e., by the nested types of the enclosing types,
+the imports, and the package of each file, and the types outside the project (e.g., the JDK) are not nodes.
+A reference in the body of a nested type is a dependency of the nested type, not of its enclosing types.
+The graph is built from the file summaries of `codart.utility.project_parser`, therefore the project is parsed
+once in parallel, and the cycles are found by an iterative Tarjan algorithm in O(V + E) time,
+which scales to projects with tens of thousands of types (no recursion limit).
+
+## Usage
+
+    dependency_graph = get_dependency_graph(get_filenames_in_dir(project_dir))
+    for component in dependency_graph.cycles():
+        print(component)
+
+"""
+
+__author__ = 'Morteza Zakeri'
+__version__ = '0.2.0'
+
+import bisect
+import csv
+import json
+import re
+
+INHERITANCE_KINDS = ('extends', 'implements')
+DEPENDENCY_KINDS = INHERITANCE_KINDS + ('field', 'parameter', 'return', 'reference')
+
+# The (qualified) type names in a type, e.g., 'Map<String, org.json.JSONObject>[]' -> 'Map', 'String', ...
+_TYPE_NAME_PATTERN = re.compile(r'[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*')
+
+
+def strongly_connected_components(nodes, successors) -> list:
+    """
+    Finds the strongly connected components of a directed graph by the Tarjan algorithm, without recursion
+
+    Args:
+
+        nodes (iterable): The nodes of the graph
+
+        successors (callable): Returns the successors of a node
+
+    Returns:
+
+        list: The components (lists of nodes) in the reverse topological order of the condensed graph
+
+    """
+
+    index = {}
+    low_link = {}
+    stack = []
+    on_stack = set()
+    components = []
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = low_link[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        # (node, iterator over its unvisited successors)
+        work = [(root, iter(successors(root)))]
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = low_link[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors(child))))
+                    break
+                if child in on_stack and index[child] < low_link[node]:
+                    low_link[node] = index[child]
+            else:
+                work.pop()
+                if work and low_link[node] < low_link[work[-1][0]]:
+                    low_link[work[-1][0]] = low_link[node]
+                if low_link[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+
+class TypeNode:
+    """
+
+    A type declaration of the project: a class, an interface, or an enum, at any nesting level
+
+    """
+
+    def __init__(self, type_summary, file_summary):
+        self.kind = type_summary.kind
+        # The name in the file, e.g., 'Outer.Inner'
+        self.name = type_summary.name
+        self.package_name = file_summary.package_name
+        self.qualified_name = f'{self.package_name}.{self.name}' if self.package_name else self.name
+        self.filename = file_summary.filename
+        self.imports = file_summary.imports
+        self.superclass_name = type_summary.superclass_name
+        self.superinterface_names = type_summary.superinterface_names
+        self.member_types = type_summary.member_types
+        self.token_range = type_summary.token_range
+        # The enclosing type node, and the simple name -> node of the nested types
+        self.outer = None
+        self.nested_types = {}
+
+    @property
+    def simple_name(self):
+        return self.name.rsplit('.', 1)[-1]
+
+    def get_qualified_name(self):
+        return self.qualified_name
+
+
+class DependencyGraph:
+    """
+
+    Type dependency graph, qualified type name -> qualified type name -> set of dependency kinds
+
+    """
+
+    def __init__(self, program=None):
+        self.program = program
+        # Qualified name -> TypeNode
+        self.classes = {}
+        # Simple name -> TypeNodes, and the top-level ones only
+        self.types_by_name = {}
+        self.top_level_types_by_name = {}
+        # Qualified name -> {qualified name -> set of kinds}
+        self.edges = {}
+
+    @classmethod
+    def from_summaries(cls, summaries: list, program=None):
+        """
+        Builds the graph of the types in the file summaries of `codart.utility.project_parser.parse_project`
+
+        Args:
+
+            summaries (list): The FileSummary objects of the project
+
+            program (Program): The program of the summaries, default is built by `get_program_from_summaries`
+
+        """
+
+        if program is None:
+            from codart.symbol_table import get_program_from_summaries
+            program = get_program_from_summaries(summaries)
+        graph = cls(program)
+        file_types = []
+        for summary in summaries:
+            if summary.error is not None:
+                continue
+            file_types.append((summary, [graph.add_type(type_summary, summary) for type_summary in summary.types]))
+        # The names are resolved after all types of the project are known
+        for summary, nodes in file_types:
+            for node in nodes:
+                graph._add_declared_dependencies(node)
+            graph._add_references(summary, nodes)
+        return graph
+
+    def add_type(self, type_summary, file_summary) -> TypeNode:
+        """
+        Adds the node of a type declaration, after the declaration of its enclosing type
+        """
+        node = TypeNode(type_summary, file_summary)
+        if type_summary.outer_name is not None:
+            node.outer = self.classes.get(
+                f'{node.package_name}.{type_summary.outer_name}' if node.package_name else type_summary.outer_name
+            )
+            if node.outer is not None:
+                node.outer.nested_types[node.simple_name] = node
+        self.classes[node.qualified_name] = node
+        self.types_by_name.setdefault(node.simple_name, []).append(node)
+        if node.outer is None:
+            self.top_level_types_by_name.setdefault(node.simple_name, []).append(node)
+        self.edges.setdefault(node.qualified_name, {})
+        return node
+
+    def add_edge(self, source: str, target: str, kind: str):
+        self.edges.setdefault(source, {}).setdefault(target, set()).add(kind)
+        self.edges.setdefault(target, {})
+
+    def resolve_type(self, type_name: str, node: TypeNode):
+        """
+        Resolves a (qualified) type name used in a type to a type of the project by the nested types of the type
+        and its enclosing types, the single-type imports, the package, and the on-demand imports of the file,
+        and the qualified names, in this order. Returns None for the unknown types.
+        """
+        first_name, *member_names = type_name.split('.')
+        target = self._resolve_simple_name(first_name, node)
+        for member_name in member_names:
+            if target is None:
+                break
+            target = target.nested_types.get(member_name)
+        if target is None and member_names:
+            return self.classes.get(type_name)
+        return target
+
+    def _resolve_simple_name(self, name: str, node: TypeNode):
+        scope = node
+        while scope is not None:
+            if scope.simple_name == name:
+                return scope
+            if name in scope.nested_types:
+                return scope.nested_types[name]
+            scope = scope.outer
+        for import_ in node.imports:
+            if not import_.is_package_import and import_.class_name == name:
+                target = self.classes.get(f'{import_.package_name}.{name}' if import_.package_name else name)
+                if target is not None:
+                    return target
+        target = self.classes.get(f'{node.package_name}.{name}' if node.package_name else name)
+        if target is not None:
+            return target
+        for import_ in node.imports:
+            if import_.is_package_import:
+                target = self.classes.get(f'{import_.package_name}.{name}')
+                if target is not None:
+                    return target
+        candidates = self.top_level_types_by_name.get(name, [])
+        return candidates[0] if len(candidates) == 1 else None
+
+    def _add_declared_dependencies(self, node: TypeNode):
+        """
+        Adds the declared dependencies of a type: the supertypes, and the types of the fields and methods
+        """
+        if node.superclass_name:
+            self._add_type_dependencies(node, node.superclass_name, 'extends')
+        # The superinterfaces of an interface are extended
+        interface_kind = 'extends' if node.kind == 'interface' else 'implements'
+        for interface_name in node.superinterface_names:
+            self._add_type_dependencies(node, interface_name, interface_kind)
+        for kind, type_name in node.member_types:
+            self._add_type_dependencies(node, type_name, kind)
+
+    def _add_type_dependencies(self, node, type_name, kind):
+        for name in _TYPE_NAME_PATTERN.findall(type_name or ''):
+            target = self.resolve_type(name, node)
+            if target is not None and target is not node:
+                self.add_edge(node.qualified_name, target.qualified_name, kind)
+
+    def _add_references(self, summary, nodes):
+        """
+        Adds the references to the project types inside the token range of each type of a file,
+        from the innermost type which encloses the reference
+        """
+        ranges = sorted((node.token_range, k, node) for k, node in enumerate(nodes) if node.token_range is not None)
+        if not ranges:
+            return
+        starts = [token_range[0] for token_range, _, _ in ranges]
+        resolved = {}
+        for name, token_index, *_ in summary.references:
+            if name not in self.types_by_name:
+                continue
+            k = bisect.bisect_right(starts, token_index) - 1
+            if k < 0:
+                continue
+            node = ranges[k][2]
+            # A nested type which ends before the reference is skipped for its enclosing types
+            while node is not None and token_index > node.token_range[1]:
+                node = node.outer
+            if node is None:
+                continue
+            if (name, node.qualified_name) not in resolved:
+                resolved[name, node.qualified_name] = self.resolve_type(name, node)
+            target = resolved[name, node.qualified_name]
+            if target is not None and target is not node:
+                self.add_edge(node.qualified_name, target.qualified_name, 'reference')
+
+    def successors(self, node: str, kinds=None) -> list:
+        """
+        Returns the classes the node depends on by the kinds of dependency (default is all), excluding the node
+        """
+        return [target for target, edge_kinds in self.edges.get(node, {}).items()
+                if target != node and (kinds is None or not edge_kinds.isdisjoint(kinds))]
+
+    def strongly_connected_components(self, kinds=None) -> list:
+        return strongly_connected_components(sorted(self.edges), lambda node: self.successors(node, kinds))
+
+    def cycles(self, kinds=None) -> list:
+        """
+        Returns the strongly connected components with more than one class, i.e., the dependency cycles,
+        each sorted by the class names, largest components first
+        """
+        components = [sorted(component) for component in self.strongly_connected_components(kinds)
+                      if len(component) > 1]
+        return sorted(components, key=lambda component: (-len(component), component))
+
+    def component_edges(self, component, kinds=None) -> list:
+        """
+        Returns the (source, target, kinds) edges between the classes of a component
+        """
+        members = set(component)
+        return [(source, target, sorted(edge_kinds))
+                for source in sorted(members)
+                for target, edge_kinds in sorted(self.edges.get(source, {}).items())
+                if target in members and target != source and (kinds is None or not edge_kinds.isdisjoint(kinds))]
+
+    def describe_component(self, component, kinds=None) -> dict:
+        """
+        Returns the machine-readable description of a component: its classes, packages, files, and edges
+        """
+        return {
+            'size': len(component),
+            'classes': sorted(component),
+            'packages': sorted({self.classes[node].package_name or '' for node in component if node in self.classes}),
+            'files': sorted({self.classes[node].filename for node in component if node in self.classes}),
+            'edges': [{'source': source, 'target': target, 'kinds': edge_kinds}
+                      for source, target, edge_kinds in self.component_edges(component, kinds)],
+        }
+
+
+def get_dependency_graph(source_files: list, n_jobs=None) -> DependencyGraph:
+    """
+    Parses the source files in parallel and returns their type dependency graph
+    """
+    from codart.utility.project_parser import parse_project
+    return DependencyGraph.from_summaries(parse_project(source_files, n_jobs=n_jobs))
+
+
+def save_cycle_report(smells: list, output_path: str):
+    """
+    Writes the detected cycles to a JSON file, or a CSV file (one row per cycle) if the path ends with '.csv'
+    """
+    if output_path.endswith('.csv'):
+        with open(output_path, mode='w', newline='', encoding='utf-8') as f_:
+            writer = csv.writer(f_)
+            writer.writerow(['smell', 'cycle', 'size', 'classes', 'packages'])
+            for k, smell in enumerate(smells):
+                writer.writerow([smell['smell'], k, smell['size'], ';'.join(smell['classes']),
+                                 ';'.join(smell['packages'])])
+    else:
+        with open(output_path, mode='w', encoding='utf-8') as f_:
+            json.dump({'smells': smells}, f_, indent=2)
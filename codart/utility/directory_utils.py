@@ -3,24 +3,18 @@ Utilities related to project directory.
 """
 
 __author__ = 'Morteza Zakeri'
-__version__ = '0.5.1'
+__version__ = '0.6.6'
 
-import datetime
 import os
 import subprocess
-from multiprocessing.dummy import Pool, Process, Manager
 
-from antlr4 import FileStream, CommonTokenStream
+from antlr4 import FileStream
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
-from joblib import Parallel, delayed
 
 import understand as und
 
-from gen.java.JavaLexer import JavaLexer
-from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
-from java8speedy.parser import sa_javalabeled
-from java8speedy.parser import JavaLabeledLexer
-
+from codart.utility.identifier_index import notify_project_restored
+from codart.utility.snapshot_manager import get_snapshot_manager, get_active_snapshot_manager
 from sbse import config
 
 
@@ -35,16 +29,45 @@ def git_restore(project_dir):
     subprocess.Popen(["git", "clean", "-f", "-d"], cwd=project_dir, stdout=open(os.devnull, 'wb')).wait()
 
 
-def create_understand_database(project_dir):
+def restore_project(project_dir):
+    """
+    This function restores the given project directory to its baseline before evaluating a refactoring sequence.
+    If config.FAST_RESTORE is set, only the files touched since the previous restore are restored
+    by the snapshot manager, and the project is compared with git after every config.FAST_RESTORE_CHECK_INTERVAL
+    restores, otherwise "git restore ." and "git clean -f -d" are executed.
+    :param project_dir: A string and Absolute path of the project's directory.
+    :return: None
+    """
+    if not config.FAST_RESTORE:
+        git_restore(project_dir)
+        notify_project_restored(project_dir)
+        return
+    manager = get_active_snapshot_manager(project_dir)
+    if manager is None:
+        # The first call executes git restore and records the baseline
+        get_snapshot_manager(project_dir)
+        notify_project_restored(project_dir)
+    else:
+        restored_files = [os.path.join(manager.project_dir, path_) for path_ in manager.touched_files()]
+        restored = manager.restore()
+        config.logger.debug(f'{restored} touched files were restored.')
+        if config.FAST_RESTORE_CHECK_INTERVAL > 0 and \
+                manager.number_of_restores % config.FAST_RESTORE_CHECK_INTERVAL == 0:
+            restored_files += [os.path.join(manager.project_dir, path_) for path_ in manager.check_consistency()]
+        notify_project_restored(project_dir, restored_files)
+
+
+def create_understand_database(project_dir, db_dir=None):
     """
     This function creates understand database for the given project directory.
     :param und_path: The path of und binary file for executing understand command-line
     :param project_dir: The absolute path of project's directory.
+    :param db_dir: The directory in which the database is created. Default is the project's directory.
     :return: String path of created database.
     """
     assert os.path.isdir(project_dir)
     db_name = os.path.basename(os.path.normpath(project_dir)) + ".und"
-    db_path = os.path.join(project_dir, db_name)
+    db_path = os.path.join(project_dir if db_dir is None else db_dir, db_name)
     assert os.path.exists(db_path) is False
     # An example of command-line is:
     # und create -languages c++ add @myFiles.txt analyze -all myDb.udb
@@ -88,7 +111,7 @@ def update_understand_database(udb_path):
     trials = 0
     while result.returncode != 0:
         try:
-            db: und.Db = und.open(config.UDB_PATH)
+            db: und.Db = und.open(udb_path)
             db.close()
         except:
             pass
@@ -104,7 +127,18 @@ def update_understand_database(udb_path):
             if trials > 5:
                 break
 
-    # Try to close und.exe process if it has not been killed automatically
+    kill_understand_process()
+
+
+def kill_understand_process():
+    """
+    Try to close und.exe process if it has not been killed automatically.
+    The process is killed by its image name, which also kills the und.exe processes of other evaluation workers.
+    Therefore, nothing is killed when the population is evaluated by more than one worker.
+    :return: None
+    """
+    if config.EVALUATION_WORKERS > 1:
+        return
     result = subprocess.run(['taskkill', '/f', '/im', 'und.exe'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     if result.returncode != 0:
         config.logger.debug('The und.exe process is not running')
@@ -147,12 +181,7 @@ def export_understand_dependencies_csv(csv_path: str, db_path: str):
         if trials > 5:
             break
     config.logger.debug("Modular dependency graph (MDG.csv) was exported.")
-    # Try to close und.exe process if it has not been killed automatically
-    result = subprocess.run(['taskkill', '/f', '/im', 'und.exe'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    if result.returncode != 0:
-        config.logger.debug('The und.exe process is not running')
-    else:
-        config.logger.debug('The und.exe process killed manually')
+    kill_understand_process()
 
 
 def reset_project(quit_=False):
@@ -166,10 +195,6 @@ def reset_project(quit_=False):
     if quit_:
         quit()
 
-# -----------------------------------------------
-# trees = []
-shared_set = set()
-
 
 def get_java_files(directory):
     if not os.path.isdir(directory):
@@ -182,104 +207,42 @@ def get_java_files(directory):
                 # yield FileStream(os.path.join(root, file), encoding="utf8")
 
 
-def create_project_parse_tree(java_file_path):
+def create_project_parse_tree(java_file_path, use_budget=True):
+    """
+    Parses a project file, the parse tree is None if the file cannot be parsed or exceeds the parsing budgets.
+    :param java_file_path: The path of the Java file
+    :param use_budget: Whether the parsing budgets of config are enforced, which is not the case for rewrites
+    :return: The parse tree and a TokenStreamRewriter on its tokens
+    """
+    from codart.utility.parsing import create_parse_tree, ParsingBudget, ParsingBudgetExceeded, get_parsing_statistics
     tree = None
     rewriter = None
     try:
         file_stream = FileStream(java_file_path, encoding='utf-8', errors='ignore')
-        sa_javalabeled.USE_CPP_IMPLEMENTATION = config.USE_CPP_BACKEND
-        tree = sa_javalabeled.parse(file_stream, 'compilationUnit')
-        tokens = tree.parser.getInputStream()
+        tree, tokens = create_parse_tree(
+            file_stream, 'compilationUnit', budget=ParsingBudget() if use_budget else None
+        )
         rewriter = TokenStreamRewriter(tokens)
+    except ParsingBudgetExceeded as e:
+        get_parsing_statistics().record_skipped_file(java_file_path, e)
     except Exception as e:
         print(f'Encounter a parsing error on file {java_file_path}')
         print(e)
     return tree, rewriter
 
 
-def parallel_parsing(directory):
-    trees = list()
-    input_files = [java_file for java_file in get_java_files(directory)]
-    # pool = Pool(processes=8)
-    # x = pool.apply_async(create_project_parse_tree, args=(input_files[0], trees))
-
-    # for java_file in get_java_files(directory):
-    #     res = pool.apply_async(create_project_parse_tree, (java_file,))  # runs in *only* one process
-    #     print(type(res.get(timeout=1)))  #
-
-    # num = Value('d', 0.0)
-    # arr = Array('i', range(500))
-    with Manager() as manager:
-        d = manager.dict()
-        q = manager.Queue(10)
-        p = Process(target=create_project_parse_tree, args=(input_files[0], q))
-        p.start()
-        p.join()
-        print(q)
-
-    # x.ready()
-    # print(len(x.get()))
-    # print(arr[0])
-
-
-def parallel_parsing2(directory):
-    for java_file in get_java_files(directory):
-        print(java_file)
-        p = Process(target=create_project_parse_tree, args=(java_file,))
-        p.start()
-        # p.join()
-
-
-def parallel_parsing3(directory):
-    d1 = datetime.datetime.now()
-    pool = Pool()
-    x = pool.map(create_project_parse_tree, get_java_files(directory))
-    d2 = datetime.datetime.now()
-    print(d2 - d1, len(x))
-    return x
-
-
-# @wrap_non_picklable_objects
-def parallel_parsing4(directory):
-    d1 = datetime.datetime.now()
-    res = Parallel(n_jobs=8, )(
-        delayed(create_project_parse_tree)(java_file) for java_file in get_java_files(directory)
-    )
-    print(res)
-    d2 = datetime.datetime.now()
-    print(d2 - d1)
-    return []
-
-
-def typical_parsing(directory):
-    d1 = datetime.datetime.now()
-    x = []
-    for java_file in get_java_files(directory):
-        x.append(create_project_parse_tree(java_file))
-    d2 = datetime.datetime.now()
-    print(d2 - d1, len(x))
-    return x
+def parallel_parsing(directory, n_jobs=None):
+    """
+    Parses all Java files of the directory in a process pool (see codart.utility.project_parser).
+    :param directory: The absolute path of project's directory.
+    :param n_jobs: The number of worker processes, default is config.PARSING_WORKERS
+    :return: The picklable FileSummary of each Java file.
+    """
+    from codart.utility.project_parser import parse_project
+    return parse_project(list(get_java_files(directory)), n_jobs=n_jobs)
 
 
 # Test methods
-def test_typyical_and_parallel_parsing():
-    # directory = r'D:/IdeaProjects/JSON20201115/'
-    # directory = r'D:/IdeaProjects/jvlt-1.3.2/'
-    # directory = r'D:/IdeaProjects/ganttproject_1_11_1_original/'
-    # directory = r'D:/IdeaProjects/105_freemind/'
-    # directory = r'D:/IdeaProjects/jfreechart-master_original/'
-    directory = r'D:/IdeaProjects/107_weka/'
-    # directory = r'D:/IdeaProjects/104_vuze/'
-    # directory = r'D:/IdeaProjects/Zarebin/'
-
-    # trees = parallel_parsing4(directory)
-    # trees = parallel_parsing3(directory)
-    trees = typical_parsing(directory)
-
-    # trees = typical_parsing(directory)
-    print(f'parse successfully {len(trees)} trees')
-
-
 def test_understand_update():
     db: und.Db = und.open(config.UDB_PATH)
     for i in range(0, 10):
@@ -289,5 +252,4 @@ def test_understand_update():
 
 
 if __name__ == '__main__':
-    # test_typyical_and_parallel_parsing()
     test_understand_update()
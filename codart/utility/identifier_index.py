@@ -0,0 +1,237 @@
+"""
+Inverted index from the identifiers of a Java project to the files which contain them.
+
+Project-wide refactorings parse every Java file of the project, although only the files which mention the
+target identifiers (e.g., the renamed class, or the encapsulated field) can change.
+`IdentifierIndex` lexes each file once (no parser) and maps the text of each IDENTIFIER token to the files
+containing it, such that a refactoring parses only `candidate_files(identifiers)`.
+Comments and string literals are not identifiers, hence they are not indexed.
+
+The index keeps the modification time and size of each file and re-lexes only the changed files.
+The project is walked once, by the first `candidate_files`, and the index is kept up to date without walking it:
+the writers of the refactorings (e.g., `codart.symbol_table`) call `notify_file_changed` after each rewrite,
+which re-lexes the file in the index of its project, `restore_project` calls `notify_project_restored`
+with the restored files, and `candidate_files` re-checks the files touched since the last restore
+(according to the snapshot manager of the project), which covers the writers without a notification.
+The token streams are taken from the persistent parse cache when it is enabled.
+
+## Usage
+
+    identifier_index = get_identifier_index(project_dir)
+    for java_file in identifier_index.candidate_files(['JSONObject', 'toString']):
+        tree, token_stream = create_parse_tree(FileStream(java_file))
+
+## Changelog
+
+### version 0.2.0
+    1. Walk the project once instead of in every `candidate_files`, and add `notify_project_restored`
+
+"""
+
+__author__ = 'Morteza Zakeri'
+__version__ = '0.2.0'
+
+import os
+
+from antlr4 import FileStream
+
+from codart.utility import symbol_index
+from codart.utility.snapshot_manager import get_active_snapshot_manager
+from sbse import config
+
+# Project directory -> IdentifierIndex
+_IDENTIFIER_INDEXES = {}
+
+
+class IdentifierIndex:
+    """
+
+    Identifier text -> set of files, updated incrementally by the modification time and size of the files
+
+    """
+
+    def __init__(self, project_dir):
+        self.project_dir = os.path.normpath(os.path.abspath(project_dir))
+        # Identifier -> set of file paths
+        self.files_by_identifier = {}
+        # File path -> (modification time, size, frozenset of identifiers)
+        self.file_states = {}
+        self.lexed_files = 0
+        # Whether the project has been walked
+        self.is_built = False
+
+    @staticmethod
+    def _key(file_path):
+        return os.path.normpath(os.path.abspath(file_path))
+
+    def _project_files(self):
+        for root, _, files in os.walk(self.project_dir):
+            for file in files:
+                if file.endswith('.java'):
+                    yield os.path.join(root, file)
+
+    def contains(self, file_path) -> bool:
+        """
+        Whether the file is a Java file of the project
+        """
+        return file_path.endswith('.java') and self._key(file_path).startswith(self.project_dir + os.sep)
+
+    def update(self, file_paths=None) -> int:
+        """
+        Re-lexes the new and changed files of the project and drops the deleted ones
+
+        Args:
+
+            file_paths (iterable): The files to check, by default the project is walked
+
+        Returns:
+
+            int: The number of lexed files
+
+        """
+
+        lexed_files = 0
+        if file_paths is not None:
+            for file_path in map(self._key, file_paths):
+                if not self.contains(file_path):
+                    continue
+                if not os.path.isfile(file_path):
+                    self.remove_file(file_path)
+                elif self._is_changed(file_path):
+                    self.update_file(file_path)
+                    lexed_files += 1
+            return lexed_files
+
+        self.is_built = True
+        project_files = set()
+        for file_path in self._project_files():
+            project_files.add(file_path)
+            if self._is_changed(file_path):
+                self.update_file(file_path)
+                lexed_files += 1
+        for file_path in [file_path for file_path in self.file_states if file_path not in project_files]:
+            self.remove_file(file_path)
+        return lexed_files
+
+    def _is_changed(self, file_path):
+        state = self.file_states.get(file_path)
+        if state is None:
+            return True
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return True
+        return (stat.st_mtime_ns, stat.st_size) != state[:2]
+
+    def update_file(self, file_path):
+        """
+        Lexes a file (e.g., after it is rewritten) and updates its identifiers
+        """
+        from java8speedy.parser.JavaLabeledLexer import JavaLabeledLexer
+        from codart.utility.parsing import create_token_stream
+
+        file_path = self._key(file_path)
+        self.remove_file(file_path)
+        try:
+            stat = os.stat(file_path)
+            token_stream = create_token_stream(FileStream(file_path, encoding='utf8', errors='ignore'))
+        except OSError as e:
+            config.logger.debug(f'Cannot index the identifiers of {file_path}: {e}')
+            return
+        identifiers = frozenset(
+            token.text for token in token_stream.tokens if token.type == JavaLabeledLexer.IDENTIFIER
+        )
+        self.file_states[file_path] = (stat.st_mtime_ns, stat.st_size, identifiers)
+        for identifier in identifiers:
+            self.files_by_identifier.setdefault(identifier, set()).add(file_path)
+        self.lexed_files += 1
+
+    def remove_file(self, file_path):
+        state = self.file_states.pop(self._key(file_path), None)
+        if state is None:
+            return
+        for identifier in state[2]:
+            files = self.files_by_identifier[identifier]
+            files.discard(self._key(file_path))
+            if not files:
+                del self.files_by_identifier[identifier]
+
+    def files_with(self, identifier) -> set:
+        """
+        Returns the files containing the identifier, a qualified name (e.g., 'org.json.JSONObject') is matched
+        by its last identifier
+        """
+        return set(self.files_by_identifier.get(identifier.rsplit('.', 1)[-1], ()))
+
+    def candidate_files(self, identifiers, match_all=False) -> list:
+        """
+        Returns the files which may be affected by a refactoring on the identifiers
+
+        Args:
+
+            identifiers (list): The identifiers (or qualified names) of the refactoring
+
+            match_all (bool): Whether a file must contain all identifiers, by default any of them
+
+        Returns:
+
+            list: The sorted paths of the files
+
+        """
+
+        if not self.is_built:
+            self.update()
+        else:
+            manager = get_active_snapshot_manager(self.project_dir)
+            if manager is not None:
+                self.update(os.path.join(manager.project_dir, path_) for path_ in manager.touched_files())
+        file_sets = [self.files_with(identifier) for identifier in identifiers]
+        if not file_sets:
+            return []
+        files = set.intersection(*file_sets) if match_all else set.union(*file_sets)
+        return sorted(files)
+
+
+def get_identifier_index(project_dir=None) -> IdentifierIndex:
+    """
+
+    Returns the identifier index of a project directory (default is `config.PROJECT_PATH`) in the current process
+
+    """
+
+    project_dir = os.path.normpath(os.path.abspath(config.PROJECT_PATH if project_dir is None else project_dir))
+    if project_dir not in _IDENTIFIER_INDEXES:
+        _IDENTIFIER_INDEXES[project_dir] = IdentifierIndex(project_dir)
+    return _IDENTIFIER_INDEXES[project_dir]
+
+
+def notify_file_changed(file_path):
+    """
+    Updates the identifier indexes which contain the file (or its project, for a new file)
+    and marks it as changed in the symbol index, after the file is written or removed
+    """
+    file_path = os.path.normpath(os.path.abspath(file_path))
+    for identifier_index in _IDENTIFIER_INDEXES.values():
+        if file_path in identifier_index.file_states or (identifier_index.is_built and
+                                                         identifier_index.contains(file_path)):
+            if os.path.isfile(file_path):
+                identifier_index.update_file(file_path)
+            else:
+                identifier_index.remove_file(file_path)
+    symbol_index.notify_file_changed(file_path)
+
+
+def notify_project_restored(project_dir, file_paths=None):
+    """
+    Updates the identifier index of the project, if any, after the project is restored
+
+    Args:
+
+        project_dir (str): The project directory
+
+        file_paths (iterable): The restored files, by default the project is walked
+
+    """
+    identifier_index = _IDENTIFIER_INDEXES.get(os.path.normpath(os.path.abspath(project_dir)))
+    if identifier_index is not None and identifier_index.is_built:
+        identifier_index.update(file_paths)
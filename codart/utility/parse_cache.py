@@ -0,0 +1,171 @@
+"""
+Project-wide cache of the parse trees created by `create_project_parse_tree`, to be used by `parse_and_walk`.
+
+A single refactoring parses the same source files several times for different listeners
+(e.g., the precondition, cut, paste, and propagation listeners of Move Field and Move Method).
+The cache keeps the parse tree and the token stream of each file in a bounded LRU with a memory cap,
+keyed by the file path and the hash of its content.
+A file which is rewritten (by `parse_and_walk(has_write=True)` or any other writer) no longer matches its
+cached content hash, and is parsed again at its next use.
+Cached trees are shared between listeners, therefore each use receives a fresh `TokenStreamRewriter`.
+The content hashes of the files which exceed a parsing budget (see codart.utility.parsing) are kept as well,
+so that they are not parsed again until they change, unless they are parsed for a rewrite (without budgets).
+
+"""
+
+__author__ = 'Morteza Zakeri'
+__version__ = '0.1.2'
+
+import os
+from collections import OrderedDict
+
+from antlr4 import InputStream
+from antlr4.TokenStreamRewriter import TokenStreamRewriter
+
+from codart.utility.snapshot_manager import content_hash
+from codart.utility.parsing import create_parse_tree, ParsingBudget, ParsingBudgetExceeded, get_parsing_statistics
+from sbse import config
+
+# The approximate memory used by the parse tree and tokens of one character of source code (Python runtime)
+PARSE_TREE_BYTES_PER_CHAR = 200
+
+_PARSE_CACHE = None
+
+
+class ParseCacheEntry:
+    def __init__(self, hash_, tree, token_stream, size):
+        self.hash_ = hash_
+        self.tree = tree
+        self.token_stream = token_stream
+        # The estimated memory of the entry in bytes
+        self.size = size
+
+
+class ParseTreeCache:
+    """
+
+    Bounded LRU of parse trees and token streams keyed by file path and content hash
+
+    """
+
+    def __init__(self, max_size=256, max_memory_mb=512):
+        """
+
+        Args:
+
+            max_size (int): The maximum number of cached files
+
+            max_memory_mb (int): The maximum estimated memory of the cached trees in megabytes
+
+        """
+
+        self.max_size = max_size
+        self.max_memory = max_memory_mb * 1024 * 1024
+        self._entries = OrderedDict()
+        # Key -> content hash of the files which exceeded a parsing budget
+        self._skipped = dict()
+        self.memory = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(java_file_path):
+        return os.path.normcase(os.path.abspath(java_file_path))
+
+    @staticmethod
+    def _parse(source_code, use_budget=True):
+        """
+        Parses the source code in the same way as `create_project_parse_tree`
+        """
+        return create_parse_tree(
+            InputStream(source_code), 'compilationUnit', budget=ParsingBudget() if use_budget else None
+        )
+
+    def get(self, java_file_path, use_budget=True):
+        """
+
+        Returns:
+
+            tuple: The parse tree of the file and a fresh TokenStreamRewriter on its tokens,
+            or (None, None) if the file cannot be parsed or exceeds the parsing budgets (if `use_budget` is set)
+
+        """
+
+        key = self._key(java_file_path)
+        try:
+            with open(java_file_path, mode='rb') as f_:
+                content = f_.read()
+        except OSError as e:
+            print(f'Encounter a parsing error on file {java_file_path}')
+            print(e)
+            return None, None
+        hash_ = content_hash(content)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.hash_ == hash_:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.tree, TokenStreamRewriter(entry.token_stream)
+
+        if use_budget and self._skipped.get(key) == hash_:
+            return None, None
+
+        self.misses += 1
+        self.invalidate(java_file_path)
+        source_code = content.decode('utf-8', errors='ignore')
+        try:
+            tree, token_stream = self._parse(source_code, use_budget=use_budget)
+        except ParsingBudgetExceeded as e:
+            self._skipped[key] = hash_
+            get_parsing_statistics().record_skipped_file(java_file_path, e)
+            return None, None
+        except Exception as e:
+            print(f'Encounter a parsing error on file {java_file_path}')
+            print(e)
+            return None, None
+        self._remember(key, ParseCacheEntry(hash_, tree, token_stream, len(source_code) * PARSE_TREE_BYTES_PER_CHAR))
+        return tree, TokenStreamRewriter(token_stream)
+
+    def _remember(self, key, entry):
+        if entry.size > self.max_memory:
+            return
+        self._entries[key] = entry
+        self.memory += entry.size
+        while len(self._entries) > self.max_size or self.memory > self.max_memory:
+            _, evicted_entry = self._entries.popitem(last=False)
+            self.memory -= evicted_entry.size
+            self.evictions += 1
+
+    def invalidate(self, java_file_path):
+        """
+        Drops the cached tree of a file, e.g., after the file is rewritten
+        """
+        entry = self._entries.pop(self._key(java_file_path), None)
+        if entry is not None:
+            self.memory -= entry.size
+
+    def clear(self):
+        self._entries.clear()
+        self.memory = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def log_statistics(self):
+        config.logger.info(f'Parse cache hits: {self.hits}, misses: {self.misses}, evictions: {self.evictions}')
+
+
+def get_parse_cache() -> ParseTreeCache:
+    """
+
+    Returns the parse cache of the current process, or None if the cache is disabled
+
+    """
+
+    global _PARSE_CACHE
+    if not config.PARSE_CACHE:
+        return None
+    if _PARSE_CACHE is None:
+        _PARSE_CACHE = ParseTreeCache(max_size=config.PARSE_CACHE_SIZE, max_memory_mb=config.PARSE_CACHE_MEMORY_MB)
+    return _PARSE_CACHE
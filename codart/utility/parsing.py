@@ -0,0 +1,315 @@
+"""
+Two-stage (SLL then LL) parsing of the Java front ends of CodART.
+
+The generated parsers run in the full-LL prediction mode by default.
+In the 'SLL_LL' parsing mode (`config.PARSING_MODE`), each file is first parsed in the SLL prediction mode with
+the bail-out error strategy, which is considerably faster in the Python runtime,
+and the file is re-parsed in the full-LL mode with the default error strategy only if the SLL stage fails.
+Both stages accept the same language, therefore the fallback is only required for the rare inputs
+that SLL cannot decide, and for the files with syntax errors (to keep the default error recovery).
+The number of parses and fallbacks are kept in `ParsingStatistics`.
+
+`create_parse_tree` is the single parser factory of the JavaLabeled grammar,
+which selects the speedy C++ back-end when it is available.
+The speedy grammar modules are imported on the first parse, so that importing this module is cheap.
+
+A few sources (e.g., generated parsers and large data tables) take minutes to parse in the Python runtime.
+The project-wide analyses (`project_parser`, `create_project_parse_tree`, and the read-only walks of
+the evaluation workers) pass a `ParsingBudget` (`config.PARSING_TIME_BUDGET` and `config.PARSING_TOKEN_BUDGET`)
+to `create_parse_tree`, which raises `ParsingBudgetExceeded` if a file exceeds one of them.
+The other entry points, e.g., the refactorings which rewrite a file, parse without a budget.
+The token budget is checked after lexing, before parsing. The time budget interrupts the Python parser by
+a timer signal where available (the main thread of a POSIX process, e.g., a worker process) and by a parse listener
+otherwise; it is not enforced on the C++ back-end, which cannot be interrupted.
+The callers record the skipped files in `ParsingStatistics`.
+
+## Usage
+
+    parser = JavaParserLabeled(CommonTokenStream(JavaLexer(stream)))
+    tree = parse(parser)  # instead of parser.compilationUnit()
+
+    tree, token_stream = create_parse_tree(FileStream(java_file_path))
+    rewriter = TokenStreamRewriter(token_stream)
+
+"""
+
+__author__ = 'Morteza Zakeri'
+__version__ = '0.4.1'
+
+import contextlib
+import functools
+import signal
+import threading
+import time
+import types
+
+from antlr4 import CommonTokenStream, ParseTreeListener
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+from antlr4.atn.PredictionMode import PredictionMode
+
+from codart.utility.persistent_cache import get_persistent_cache
+from sbse import config
+
+PARSING_MODES = ('LL', 'SLL_LL')
+
+
+
+@functools.lru_cache(maxsize=None)
+def cpp_backend_available():
+    """
+    Whether the extension of the speedy C++ back-end could be imported
+    """
+    from java8speedy.parser import sa_javalabeled
+    return sa_javalabeled.USE_CPP_IMPLEMENTATION
+
+
+class ParsingStatistics:
+    def __init__(self):
+        # The number of files parsed in the full-LL mode only
+        self.ll_parses = 0
+        # The number of files parsed in the SLL mode successfully
+        self.sll_parses = 0
+        # The number of files re-parsed in the full-LL mode after the SLL stage failed
+        self.ll_fallbacks = 0
+        # File path -> the message of the parsing budget exceeded by the file
+        self.skipped_files = {}
+
+    @property
+    def fallback_rate(self):
+        attempts = self.sll_parses + self.ll_fallbacks
+        return self.ll_fallbacks / attempts if attempts else 0.
+
+    def record_skipped_file(self, file_path, error):
+        """
+        Records a file which exceeded a parsing budget
+        """
+        if file_path not in self.skipped_files:
+            config.logger.warning(f'Skipped parsing {file_path}: {error}')
+        self.skipped_files[file_path] = str(error)
+
+    def log_statistics(self):
+        config.logger.info(f'Parsing mode {config.PARSING_MODE}: {self.sll_parses} SLL parses, '
+                           f'{self.ll_fallbacks} LL fallbacks ({self.fallback_rate:.2%}), {self.ll_parses} LL parses')
+        if self.skipped_files:
+            config.logger.info(f'{len(self.skipped_files)} files skipped by the parsing budgets:')
+            for file_path, error in sorted(self.skipped_files.items()):
+                config.logger.info(f'  {file_path}: {error}')
+
+
+_STATISTICS = ParsingStatistics()
+
+
+def get_parsing_statistics() -> ParsingStatistics:
+    return _STATISTICS
+
+
+class ParsingBudgetExceeded(Exception):
+    """
+    Raised when parsing a file exceeds its time or token budget
+    """
+
+    def __init__(self, budget_name, limit, value):
+        # 'time' (seconds) or 'tokens'
+        self.budget_name = budget_name
+        self.limit = limit
+        self.value = value
+        super(ParsingBudgetExceeded, self).__init__(
+            f'The parsing {budget_name} budget of {limit} is exceeded ({value})'
+        )
+
+
+class _DeadlineListener(ParseTreeListener):
+    """
+    Parse listener which checks the deadline on every rule and token, used where the timer signal is not available
+    """
+
+    def __init__(self, time_budget):
+        self.start = time.perf_counter()
+        self.time_budget = time_budget
+
+    def _check(self):
+        elapsed = time.perf_counter() - self.start
+        if elapsed > self.time_budget:
+            raise ParsingBudgetExceeded('time', self.time_budget, round(elapsed, 1))
+
+    def enterEveryRule(self, ctx):
+        self._check()
+
+    def visitTerminal(self, node):
+        self._check()
+
+
+class ParsingBudget:
+    """
+
+    The per-file time and token budgets of parsing, zero means unlimited
+
+    """
+
+    def __init__(self, time_budget=None, token_budget=None):
+        self.time_budget = config.PARSING_TIME_BUDGET if time_budget is None else time_budget
+        self.token_budget = config.PARSING_TOKEN_BUDGET if token_budget is None else token_budget
+
+    def check_tokens(self, token_stream):
+        number_of_tokens = len(token_stream.tokens)
+        if 0 < self.token_budget < number_of_tokens:
+            raise ParsingBudgetExceeded('tokens', self.token_budget, number_of_tokens)
+
+    @contextlib.contextmanager
+    def deadline(self, parser):
+        """
+        Raises ParsingBudgetExceeded in the parser if the block takes longer than the time budget
+        """
+        if self.time_budget <= 0:
+            yield
+            return
+        if hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread():
+            start = time.perf_counter()
+
+            def on_alarm(signum, frame):
+                raise ParsingBudgetExceeded('time', self.time_budget, round(time.perf_counter() - start, 1))
+
+            previous_handler = signal.signal(signal.SIGALRM, on_alarm)
+            signal.setitimer(signal.ITIMER_REAL, self.time_budget)
+            try:
+                yield
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, previous_handler)
+        else:
+            listener = _DeadlineListener(self.time_budget)
+            parser.addParseListener(listener)
+            try:
+                yield
+            finally:
+                parser.removeParseListener(listener)
+
+
+def parse(parser, entry_rule_name='compilationUnit', mode=None):
+    """
+    Parses the token stream of the parser from its entry rule
+
+    Args:
+
+        parser (antlr4.Parser): A generated Java parser, e.g., JavaParserLabeled or JavaParser
+
+        entry_rule_name (str): The name of the entry rule
+
+        mode (str): One of PARSING_MODES, default is `config.PARSING_MODE`
+
+    Returns:
+
+        ParserRuleContext: The parse tree
+
+    """
+
+    mode = config.PARSING_MODE if mode is None else mode
+    entry_rule_func = getattr(parser, entry_rule_name, None)
+    if not isinstance(entry_rule_func, types.MethodType):
+        raise ValueError("Invalid entry_rule_name '%s'" % entry_rule_name)
+    if mode != 'SLL_LL':
+        _STATISTICS.ll_parses += 1
+        return entry_rule_func()
+
+    # Stage 1: SLL prediction, bail out at the first syntax error without reporting it
+    error_listeners = list(parser._listeners)
+    parser.removeErrorListeners()
+    parser._interp.predictionMode = PredictionMode.SLL
+    parser._errHandler = BailErrorStrategy()
+    try:
+        tree = entry_rule_func()
+        _STATISTICS.sll_parses += 1
+        return tree
+    except ParseCancellationException:
+        # Stage 2: Full-LL prediction with the default error recovery and reporting
+        _STATISTICS.ll_fallbacks += 1
+        parser.reset()
+        parser._interp.predictionMode = PredictionMode.LL
+        parser._errHandler = DefaultErrorStrategy()
+        for error_listener in error_listeners:
+            parser.addErrorListener(error_listener)
+        return entry_rule_func()
+    finally:
+        if not parser._listeners:
+            for error_listener in error_listeners:
+                parser.addErrorListener(error_listener)
+        parser._interp.predictionMode = PredictionMode.LL
+        parser._errHandler = DefaultErrorStrategy()
+
+
+def use_cpp_backend():
+    """
+    Whether the speedy C++ back-end is enabled (`config.USE_CPP_BACKEND`) and its extension is importable
+    """
+    return bool(config.USE_CPP_BACKEND) and cpp_backend_available()
+
+
+def create_token_stream(stream, lexer_class=None) -> CommonTokenStream:
+    """
+    Returns the filled token stream of an input stream, from the persistent parse cache if it is enabled,
+    the default lexer is JavaLabeledLexer
+    """
+    if lexer_class is None:
+        from java8speedy.parser.JavaLabeledLexer import JavaLabeledLexer as lexer_class
+    persistent_cache = get_persistent_cache()
+    if persistent_cache is None:
+        token_stream = CommonTokenStream(lexer_class(stream))
+    else:
+        token_stream = persistent_cache.get_token_stream(stream, lexer_class)
+    token_stream.fill()
+    return token_stream
+
+
+def create_parse_tree(stream, entry_rule_name='compilationUnit', budget: ParsingBudget = None):
+    """
+    The parser factory of the JavaLabeled grammar used by all CodART parse entry points.
+
+    The speedy C++ back-end is used if it is enabled and available, otherwise (or if the C++ parser fails)
+    the Python parser is run in `config.PARSING_MODE`.
+    The C++ back-end does not translate its token stream, therefore the returned token stream is always
+    created by the Python lexer (or the persistent parse cache). Both lexers implement the same grammar,
+    so the token indices of the tree match the token stream in both cases.
+
+    Args:
+
+        stream (InputStream): The source code, e.g., a FileStream
+
+        entry_rule_name (str): The name of the entry rule
+
+        budget (ParsingBudget): The time and token budgets, e.g., `ParsingBudget()` for the budgets of `config`,
+        default is None (unlimited)
+
+    Returns:
+
+        tuple: The parse tree and its token stream, to be used by `TokenStreamRewriter`
+
+    Raises:
+
+        ParsingBudgetExceeded: If the file exceeds the time or token budget
+
+    """
+
+    budget = ParsingBudget(time_budget=0, token_budget=0) if budget is None else budget
+    token_stream = create_token_stream(stream)
+    budget.check_tokens(token_stream)
+    if use_cpp_backend():
+        from java8speedy.parser import sa_javalabeled
+        sa_javalabeled.USE_CPP_IMPLEMENTATION = True
+        try:
+            stream.reset()
+            return sa_javalabeled.parse(stream, entry_rule_name), token_stream
+        except RuntimeError as e:
+            config.logger.debug(f'The C++ parser failed, falling back to the Python parser: {e}')
+    from java8speedy.parser.JavaLabeledParser import JavaLabeledParser
+    parser = JavaLabeledParser(token_stream)
+    with budget.deadline(parser):
+        tree = parse(parser, entry_rule_name)
+    return tree, token_stream
+
+
+def parse_javalabeled(stream, entry_rule_name='compilationUnit'):
+    """
+    Parses an input stream by the JavaLabeled parser and returns the parse tree (see `create_parse_tree`)
+    """
+    return create_parse_tree(stream, entry_rule_name)[0]
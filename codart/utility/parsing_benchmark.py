@@ -0,0 +1,269 @@
+"""
+Parsing benchmark suite of CodART.
+
+Measures the lex time, parse time, walk time, and peak memory of each Java file for
+the Java9_v2, JavaParser, and JavaParserLabeled grammars, the Python and C++ back-ends, and
+the LL and SLL_LL parsing modes (see codart.utility.parsing),
+over all Java files under `tests/` and, optionally, the configured benchmark project (`config.PROJECT_PATH`).
+The results are written to a CSV file with one row per file and configuration,
+and a JSON file with the totals and percentiles of each measure per configuration and project,
+to catch the performance regressions and to select the grammar and back-end of a deployment.
+
+The C++ back-end is available only for JavaParserLabeled (java8speedy), and it lexes and parses in one call,
+hence its lex time is not measured separately.
+The peak memory is measured by `tracemalloc` in a separate run of each file, so that it does not
+affect the timings.
+The ANTLR runtime caches the prediction DFA of each parser class across files, therefore the first files of
+a configuration include the warm-up cost; with `--repeat 2` or more, the minimum (warm) time is reported.
+The deprecated Java9_v2 grammar is very slow in the Python runtime, use `--grammars` to exclude it.
+
+## Usage
+
+    python -m codart.utility.parsing_benchmark --output parsing_benchmark --grammars JavaParserLabeled
+
+"""
+
+__author__ = 'Morteza Zakeri'
+__version__ = '0.1.0'
+
+import argparse
+import csv
+import gc
+import importlib
+import json
+import os
+import time
+import tracemalloc
+
+import numpy as np
+from antlr4 import FileStream, CommonTokenStream, ParseTreeWalker
+
+from codart.utility.parsing import parse, get_parsing_statistics, cpp_backend_available, PARSING_MODES
+from sbse import config
+
+# Grammar name -> (lexer class path, parser class path, listener class path)
+GRAMMARS = {
+    'Java9_v2': ('gen.java9.Java9_v2Lexer.Java9_v2Lexer',
+                 'gen.java9.Java9_v2Parser.Java9_v2Parser',
+                 'gen.java9.Java9_v2Listener.Java9_v2Listener'),
+    'JavaParser': ('gen.java.JavaLexer.JavaLexer',
+                   'gen.java.JavaParser.JavaParser',
+                   'gen.java.JavaParserListener.JavaParserListener'),
+    'JavaParserLabeled': ('gen.javaLabeled.JavaLexer.JavaLexer',
+                          'gen.javaLabeled.JavaParserLabeled.JavaParserLabeled',
+                          'gen.javaLabeled.JavaParserLabeledListener.JavaParserLabeledListener'),
+}
+BACKENDS = ('python', 'cpp')
+MEASURES = ('lex_time', 'parse_time', 'walk_time', 'total_time', 'peak_memory')
+PERCENTILES = (50, 90, 95, 99)
+
+_FIELDS = ('project', 'file', 'grammar', 'backend', 'mode', 'size', 'tokens', 'll_fallback', 'error') + MEASURES
+
+
+def _import_class(class_path):
+    module_name, class_name = class_path.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def configurations(grammars=None, backends=None, modes=None):
+    """
+    Returns the (grammar, backend, mode) configurations to benchmark, the C++ back-end is only included if available
+    """
+    result = []
+    for grammar in grammars or GRAMMARS:
+        for backend in backends or BACKENDS:
+            if backend == 'cpp':
+                if grammar == 'JavaParserLabeled' and cpp_backend_available():
+                    result.append((grammar, backend, None))
+                continue
+            for mode in modes or PARSING_MODES:
+                result.append((grammar, backend, mode))
+    return result
+
+
+def find_java_files(directories):
+    """
+    Returns (project, file) pairs of the Java files, the project of a file under `tests/` is its top directory
+    """
+    result = []
+    for directory in directories:
+        directory = os.path.normpath(os.path.abspath(directory))
+        for root, _, files in os.walk(directory):
+            relative_root = os.path.relpath(root, directory)
+            if os.path.basename(directory) == 'tests' and relative_root != '.':
+                project = relative_root.split(os.sep)[0]
+            else:
+                project = os.path.basename(directory)
+            result.extend((project, os.path.join(root, f)) for f in sorted(files) if f.endswith('.java'))
+    return result
+
+
+class ParsingBenchmark:
+    """
+
+    Runs the configurations on the files and aggregates the measures
+
+    """
+
+    def __init__(self, java_files, grammars=None, backends=None, modes=None, repeat=1, measure_memory=True):
+        """
+
+        Args:
+
+            java_files (list): (project, file) pairs, see `find_java_files`
+
+            grammars, backends, modes (list): Subsets of GRAMMARS, BACKENDS, and PARSING_MODES, default is all
+
+            repeat (int): The number of timed runs of each file, the minimum time is reported
+
+            measure_memory (bool): Whether to measure the peak memory in an extra run of each file
+
+        """
+
+        self.java_files = java_files
+        self.configurations = configurations(grammars, backends, modes)
+        self.repeat = repeat
+        self.measure_memory = measure_memory
+        self.records = []
+
+    def _run_once(self, java_file, grammar, backend, mode):
+        """
+        Lexes, parses, and walks a file once and returns the times, the number of tokens, and the LL fallback flag
+        """
+        lexer_class, parser_class, listener_class = (_import_class(path) for path in GRAMMARS[grammar])
+        stream = FileStream(java_file, encoding='utf8', errors='ignore')
+        ll_fallback = False
+        if backend == 'cpp':
+            from java8speedy.parser import sa_javalabeled
+            sa_javalabeled.USE_CPP_IMPLEMENTATION = True
+            lex_time = float('nan')
+            start = time.perf_counter()
+            tree = sa_javalabeled.parse(stream, 'compilationUnit')
+            parse_time = time.perf_counter() - start
+            number_of_tokens = 0
+        else:
+            start = time.perf_counter()
+            token_stream = CommonTokenStream(lexer_class(stream))
+            token_stream.fill()
+            lex_time = time.perf_counter() - start
+            number_of_tokens = len(token_stream.tokens)
+
+            fallbacks = get_parsing_statistics().ll_fallbacks
+            start = time.perf_counter()
+            tree = parse(parser_class(token_stream), mode=mode)
+            parse_time = time.perf_counter() - start
+            ll_fallback = get_parsing_statistics().ll_fallbacks > fallbacks
+
+        start = time.perf_counter()
+        ParseTreeWalker().walk(listener_class(), tree)
+        walk_time = time.perf_counter() - start
+        return lex_time, parse_time, walk_time, number_of_tokens, ll_fallback
+
+    def _peak_memory(self, java_file, grammar, backend, mode):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            self._run_once(java_file, grammar, backend, mode)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def run(self, print_status=False):
+        for grammar, backend, mode in self.configurations:
+            for project, java_file in self.java_files:
+                if print_status:
+                    print(f'{grammar} {backend} {mode or ""}: {java_file}')
+                record = {'project': project, 'file': java_file, 'grammar': grammar, 'backend': backend,
+                          'mode': mode or '', 'size': os.path.getsize(java_file), 'error': ''}
+                try:
+                    runs = [self._run_once(java_file, grammar, backend, mode) for _ in range(self.repeat)]
+                    record['lex_time'] = min(run[0] for run in runs)
+                    record['parse_time'] = min(run[1] for run in runs)
+                    record['walk_time'] = min(run[2] for run in runs)
+                    record['tokens'], record['ll_fallback'] = runs[0][3], int(runs[0][4])
+                    record['total_time'] = np.nansum([record['lex_time'], record['parse_time'], record['walk_time']])
+                    record['peak_memory'] = (self._peak_memory(java_file, grammar, backend, mode)
+                                             if self.measure_memory else float('nan'))
+                except Exception as e:
+                    record['error'] = str(e)
+                    for field in ('lex_time', 'parse_time', 'walk_time', 'total_time', 'peak_memory'):
+                        record[field] = float('nan')
+                    record['tokens'], record['ll_fallback'] = 0, 0
+                self.records.append(record)
+        return self.records
+
+    def summary(self) -> list:
+        """
+        Returns the totals and percentiles of the measures per configuration, per project and over all projects
+        """
+        groups = {}
+        for record in self.records:
+            configuration = (record['grammar'], record['backend'], record['mode'])
+            for project in (record['project'], '*'):
+                groups.setdefault(configuration + (project,), []).append(record)
+
+        result = []
+        for (grammar, backend, mode, project), records in groups.items():
+            row = {'grammar': grammar, 'backend': backend, 'mode': mode, 'project': project,
+                   'files': len(records), 'errors': sum(1 for record in records if record['error']),
+                   'size': sum(record['size'] for record in records),
+                   'tokens': sum(record['tokens'] for record in records),
+                   'll_fallbacks': sum(record['ll_fallback'] for record in records)}
+            for measure in MEASURES:
+                values = np.array([record[measure] for record in records], dtype=float)
+                values = values[~np.isnan(values)]
+                if values.size == 0:
+                    row[measure] = None
+                    continue
+                row[measure] = {
+                    'total': float(values.sum()) if measure != 'peak_memory' else None,
+                    'mean': float(values.mean()),
+                    'max': float(values.max()),
+                    **{f'p{p}': float(np.percentile(values, p)) for p in PERCENTILES}
+                }
+            result.append(row)
+        return result
+
+    def save(self, output_path):
+        """
+        Writes the per-file records to `output_path`.csv and the summary to `output_path`.json
+        """
+        with open(f'{output_path}.csv', mode='w', newline='', encoding='utf-8') as f_:
+            writer = csv.DictWriter(f_, fieldnames=_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.records)
+        with open(f'{output_path}.json', mode='w', encoding='utf-8') as f_:
+            json.dump({'configurations': self.summary()}, f_, indent=2)
+
+
+def main(args):
+    directories = list(args.directories)
+    if args.benchmark_project:
+        directories.append(config.PROJECT_PATH)
+    java_files = find_java_files([directory for directory in directories if os.path.isdir(directory)])
+    if args.max_files:
+        java_files = java_files[:args.max_files]
+    benchmark = ParsingBenchmark(java_files, grammars=args.grammars, backends=args.backends, modes=args.modes,
+                                 repeat=args.repeat, measure_memory=not args.no_memory)
+    benchmark.run(print_status=args.verbose)
+    benchmark.save(args.output)
+    for row in benchmark.summary():
+        if row['project'] == '*' and row['total_time'] is not None:
+            print(f"{row['grammar']:18} {row['backend']:6} {row['mode']:6} files={row['files']} "
+                  f"total={row['total_time']['total']:.2f}s p50={row['total_time']['p50'] * 1000:.1f}ms "
+                  f"p95={row['total_time']['p95'] * 1000:.1f}ms errors={row['errors']}")
+
+
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description='CodART parsing benchmark')
+    argparser.add_argument('directories', nargs='*', default=[os.path.normpath(os.path.join(os.path.dirname(__file__), '../../tests'))])
+    argparser.add_argument('--benchmark-project', action='store_true', help='Include config.PROJECT_PATH')
+    argparser.add_argument('--grammars', nargs='+', choices=list(GRAMMARS))
+    argparser.add_argument('--backends', nargs='+', choices=list(BACKENDS))
+    argparser.add_argument('--modes', nargs='+', choices=list(PARSING_MODES))
+    argparser.add_argument('--repeat', type=int, default=1)
+    argparser.add_argument('--max-files', type=int, default=0)
+    argparser.add_argument('--no-memory', action='store_true')
+    argparser.add_argument('--output', default='parsing_benchmark')
+    argparser.add_argument('--verbose', action='store_true')
+    main(argparser.parse_args())
@@ -0,0 +1,242 @@
+"""
+Persistent on-disk cache of the token streams and the declaration summaries of Java files across runs.
+
+Every run re-lexes and re-parses the same baseline benchmark projects.
+The cache directory (`config.PARSE_DISK_CACHE_DIR`) keeps, for each file content hash:
+
+1. The token stream of each lexer as a compact int32 array with one (type, channel, start, stop, line, column)
+row per token, from which the tokens are rebuilt on the source text without running the lexer.
+The arrays are keyed by the module and the name of the lexer class,
+since the lexers generated from different grammars (e.g., gen.java and gen.javaLabeled) have the same class name.
+2. The picklable `FileSummary` produced by `UtilsListener` (see codart.utility.project_parser),
+such that a warm start skips lexing, parsing, and symbol extraction of the unchanged files.
+
+Entries are written atomically, so the cache can be shared by the worker processes of the project parser.
+The cold start cost is paid once per version of each file rather than once per process.
+
+Every parse goes through the cache, including the short-lived versions of the files rewritten by the refactorings
+during the search, hence the cache is bounded by `config.PARSE_DISK_CACHE_MAX_MB`: the modification time of
+an entry is updated on each hit, and the least recently used entries are removed when a process has written
+the cache beyond its cap, down to `PRUNE_RATIO` of the cap, such that the baseline files which are read
+in every evaluation stay in the cache.
+
+"""
+
+__author__ = 'Morteza Zakeri'
+__version__ = '0.1.2'
+
+import os
+import pickle
+import tempfile
+
+import numpy as np
+from antlr4 import CommonTokenStream, InputStream
+from antlr4.Token import CommonToken
+from antlr4.ListTokenSource import ListTokenSource
+
+from codart.utility.snapshot_manager import content_hash
+from sbse import config
+
+# Must be increased when the summaries produced by the project parser change
+SUMMARY_FORMAT_VERSION = 4
+
+_TOKEN_FIELDS = 6
+
+# The fraction of the size cap kept by pruning, such that the cache is not pruned on every write
+PRUNE_RATIO = 0.8
+
+_PERSISTENT_CACHE = None
+
+
+class PersistentParseCache:
+    """
+
+    Token arrays and declaration summaries on disk, keyed by the content hash of the files
+
+    """
+
+    def __init__(self, cache_dir, max_size_mb=None):
+        self.cache_dir = cache_dir
+        self.max_size = (config.PARSE_DISK_CACHE_MAX_MB if max_size_mb is None else max_size_mb) * 2 ** 20
+        # The size of the entries on disk, scanned on the first write and then counted by the writes
+        self._size = None
+        self.token_hits = 0
+        self.token_misses = 0
+        self.summary_hits = 0
+        self.summary_misses = 0
+        self.evictions = 0
+
+    def _path(self, kind, hash_, extension):
+        return os.path.join(self.cache_dir, kind, hash_[:2], f'{hash_}.{extension}')
+
+    def _entries(self):
+        """
+        Returns the (modification time, size, path) of the entries on disk
+        """
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for file in files:
+                if file.endswith('.tmp'):
+                    continue
+                path_ = os.path.join(root, file)
+                try:
+                    stat = os.stat(path_)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path_))
+        return entries
+
+    def size(self) -> int:
+        """
+        Returns the size of the entries on disk in bytes
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def prune(self, max_size=None) -> int:
+        """
+        Removes the least recently used entries until the cache is not larger than `max_size` bytes,
+        default is `PRUNE_RATIO` of the size cap
+
+        Returns:
+
+            int: The number of removed entries
+
+        """
+
+        max_size = int(self.max_size * PRUNE_RATIO) if max_size is None else max_size
+        entries = sorted(self._entries())
+        self._size = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path_ in entries:
+            if self._size <= max_size:
+                break
+            try:
+                os.remove(path_)
+            except OSError:
+                continue
+            self._size -= size
+            removed += 1
+        self.evictions += removed
+        if removed:
+            config.logger.debug(f'Removed {removed} least recently used entries of the parse cache {self.cache_dir}')
+        return removed
+
+    def _add_size(self, size):
+        if self.max_size <= 0:
+            return
+        self._size = self.size() if self._size is None else self._size + size
+        if self._size > self.max_size:
+            self.prune()
+
+    @staticmethod
+    def _mark_used(path_):
+        try:
+            os.utime(path_)
+        except OSError:
+            pass
+
+    def _write_atomic(self, path_, content: bytes):
+        os.makedirs(os.path.dirname(path_), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path_), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f_:
+                f_.write(content)
+            os.replace(temp_path, path_)
+            self._add_size(len(content))
+        except OSError as e:
+            config.logger.debug(f'Cannot write the parse cache entry {path_}: {e}')
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    # Token streams
+    def get_token_stream(self, input_stream: InputStream, lexer_class) -> CommonTokenStream:
+        """
+        Returns the token stream of the input stream, rebuilt from the cached token array
+        or created by the lexer and cached
+        """
+        hash_ = content_hash(input_stream.strdata.encode('utf-8', errors='ignore'))
+        lexer_name = f'{lexer_class.__module__}.{lexer_class.__name__}'
+        path_ = self._path(f'tokens_{lexer_name}', hash_, 'npy')
+        if os.path.exists(path_):
+            try:
+                token_array = np.load(path_, allow_pickle=False)
+                self._mark_used(path_)
+                self.token_hits += 1
+                return CommonTokenStream(ListTokenSource(self._tokens_from_array(token_array, input_stream)))
+            except (OSError, ValueError) as e:
+                config.logger.debug(f'Cannot read the parse cache entry {path_}: {e}')
+
+        self.token_misses += 1
+        lexer = lexer_class(input_stream)
+        token_stream = CommonTokenStream(lexer)
+        token_stream.fill()
+        with tempfile.TemporaryFile() as f_:
+            np.save(f_, self._tokens_to_array(token_stream.tokens), allow_pickle=False)
+            f_.seek(0)
+            self._write_atomic(path_, f_.read())
+        input_stream.reset()
+        token_stream.reset()
+        return token_stream
+
+    @staticmethod
+    def _tokens_to_array(tokens) -> np.ndarray:
+        token_array = np.empty((len(tokens), _TOKEN_FIELDS), dtype=np.int32)
+        for i, token in enumerate(tokens):
+            token_array[i] = (token.type, token.channel, token.start, token.stop, token.line, token.column)
+        return token_array
+
+    @staticmethod
+    def _tokens_from_array(token_array: np.ndarray, input_stream: InputStream) -> list:
+        source = (None, input_stream)
+        tokens = []
+        for type_, channel, start, stop, line, column in token_array.tolist():
+            token = CommonToken(source, type_, channel, start, stop)
+            token.line = line
+            token.column = column
+            tokens.append(token)
+        return tokens
+
+    # Declaration summaries
+    def get_summary(self, filename, content: bytes):
+        """
+        Returns the cached FileSummary of the file content, or None
+        """
+        path_ = self._path(f'summaries_v{SUMMARY_FORMAT_VERSION}', content_hash(content), 'pkl')
+        if os.path.exists(path_):
+            try:
+                with open(path_, 'rb') as f_:
+                    summary = pickle.load(f_)
+                self._mark_used(path_)
+                summary.filename = filename
+                self.summary_hits += 1
+                return summary
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+                config.logger.debug(f'Cannot read the parse cache entry {path_}: {e}')
+        self.summary_misses += 1
+        return None
+
+    def put_summary(self, content: bytes, summary):
+        if summary.error is not None:
+            return
+        path_ = self._path(f'summaries_v{SUMMARY_FORMAT_VERSION}', content_hash(content), 'pkl')
+        self._write_atomic(path_, pickle.dumps(summary, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def log_statistics(self):
+        config.logger.info(f'Persistent parse cache tokens hits: {self.token_hits}, misses: {self.token_misses}, '
+                           f'summaries hits: {self.summary_hits}, misses: {self.summary_misses}, '
+                           f'evictions: {self.evictions}')
+
+
+def get_persistent_cache() -> PersistentParseCache:
+    """
+
+    Returns the persistent parse cache of the current process, or None if the cache is disabled
+
+    """
+
+    global _PERSISTENT_CACHE
+    if not config.PARSE_DISK_CACHE:
+        return None
+    if _PERSISTENT_CACHE is None:
+        _PERSISTENT_CACHE = PersistentParseCache(config.PARSE_DISK_CACHE_DIR)
+    return _PERSISTENT_CACHE
@@ -0,0 +1,353 @@
+"""
+Parallel front end of the project parser.
+
+Each Java file is parsed and walked by `UtilsListener` in a worker process of a process pool.
+The ANTLR parse trees are not picklable, hence each worker returns a compact picklable summary of its file:
+the package, the imports, the class, method, and field declarations with their token ranges,
+the occurrences of the identifiers (see codart.utility.symbol_index), and all type declarations of the file
+(classes, interfaces, and enums at any nesting level, see codart.utility.dependency_graph),
+since `UtilsListener` collects the top-level classes only.
+The files are scheduled in chunks balanced by their size (largest files first),
+and the files are parsed sequentially when only one worker is available or the pool cannot be used.
+`codart.symbol_table.get_program(..., from_summaries=True)` builds a `Program` from the summaries.
+The summaries and token streams of unchanged files are reused across runs (see codart.utility.persistent_cache).
+The parsing budgets (see codart.utility.parsing.ParsingBudget) are enforced in the workers:
+a file which exceeds its time or token budget is degraded to a token-only summary (its identifiers and
+number of tokens, without declarations), and the skipped files are reported at the end of `parse_project`.
+
+"""
+
+__author__ = 'Morteza Zakeri'
+__version__ = '0.3.1'
+
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pickle import PicklingError
+
+from antlr4 import FileStream, InputStream, CommonTokenStream, Token
+
+from gen.java.JavaLexer import JavaLexer
+from gen.java.JavaParser import JavaParser
+from gen.java.JavaParserListener import JavaParserListener
+from codart.symbol_table import UtilsListener, PackageImport
+from codart.utility.composite_walker import CompositeWalker
+from codart.utility.parsing import parse, ParsingBudget, ParsingBudgetExceeded, get_parsing_statistics
+from codart.utility.persistent_cache import get_persistent_cache
+from sbse import config
+
+# The number of bytes of source code scheduled on a worker at once
+CHUNK_SIZE_BYTES = 256 * 1024
+
+
+class ImportSummary:
+    def __init__(self, package_name, class_name, is_package_import, token_range):
+        self.package_name = package_name
+        # None for package imports (import package_name.*;)
+        self.class_name = class_name
+        self.is_package_import = is_package_import
+        self.token_range = token_range
+
+
+class FieldSummary:
+    def __init__(self, field):
+        self.name = field.name
+        self.datatype = field.datatype
+        self.initializer = field.initializer
+        self.modifiers = list(field.modifiers)
+        self.neighbor_names = list(field.neighbor_names)
+        self.index_in_variable_declarators = field.index_in_variable_declarators
+        self.token_range = _token_range(field.parser_context)
+
+
+class MethodSummary:
+    def __init__(self, method):
+        self.name = method.name
+        self.returntype = method.returntype
+        self.parameters = list(method.parameters)
+        self.body_text = method.body_text
+        self.modifiers = list(method.modifiers)
+        self.is_constructor = method.is_constructor
+        self.token_range = _token_range(method.parser_context)
+
+
+class ClassSummary:
+    def __init__(self, class_):
+        self.name = class_.name
+        self.modifiers = list(class_.modifiers)
+        self.superclass_name = class_.superclass_name
+        self.superinterface_names = list(class_.superinterface_names)
+        self.token_range = _token_range(class_.parser_context)
+        # Field name -> FieldSummary
+        self.fields = {name: FieldSummary(field) for name, field in class_.fields.items()}
+        # Method key, i.e., name(parameter types) -> MethodSummary
+        self.methods = {key: MethodSummary(method) for key, method in class_.methods.items()}
+
+
+class TypeSummary:
+    def __init__(self, kind, name, outer_name, token_range):
+        # 'class', 'interface', or 'enum'
+        self.kind = kind
+        # The name of the type in its file, e.g., 'Outer.Inner' for a nested type
+        self.name = name
+        # The name of the enclosing type, None for the top-level types
+        self.outer_name = outer_name
+        self.superclass_name = None
+        # The implemented interfaces of the classes and enums, and the extended interfaces of the interfaces
+        self.superinterface_names = []
+        # (kind, type) of the field, parameter, and return types declared in the type (not in its nested types)
+        self.member_types = []
+        self.token_range = token_range
+
+
+class TypeDeclarationListener(JavaParserListener):
+    """
+    Collects the type declarations of a file, including the interfaces, enums, and nested types
+    """
+
+    def __init__(self):
+        self.types = []
+        self._enclosing_types = []
+
+    def _enter_type(self, kind, ctx):
+        outer = self._enclosing_types[-1] if self._enclosing_types else None
+        name = ctx.IDENTIFIER().getText()
+        type_ = TypeSummary(kind=kind, name=name if outer is None else f'{outer.name}.{name}',
+                            outer_name=None if outer is None else outer.name, token_range=_token_range(ctx))
+        self.types.append(type_)
+        self._enclosing_types.append(type_)
+        return type_
+
+    def _exit_type(self, ctx):
+        self._enclosing_types.pop()
+
+    def _add_member_type(self, kind, type_context):
+        if self._enclosing_types and type_context is not None:
+            self._enclosing_types[-1].member_types.append((kind, type_context.getText()))
+
+    def enterClassDeclaration(self, ctx: JavaParser.ClassDeclarationContext):
+        type_ = self._enter_type('class', ctx)
+        if ctx.EXTENDS() is not None:
+            type_.superclass_name = ctx.typeType().getText()
+        if ctx.IMPLEMENTS() is not None:
+            type_.superinterface_names = [type_type.getText() for type_type in ctx.typeList().typeType()]
+
+    def enterInterfaceDeclaration(self, ctx: JavaParser.InterfaceDeclarationContext):
+        type_ = self._enter_type('interface', ctx)
+        if ctx.EXTENDS() is not None:
+            type_.superinterface_names = [type_type.getText() for type_type in ctx.typeList().typeType()]
+
+    def enterEnumDeclaration(self, ctx: JavaParser.EnumDeclarationContext):
+        type_ = self._enter_type('enum', ctx)
+        if ctx.IMPLEMENTS() is not None:
+            type_.superinterface_names = [type_type.getText() for type_type in ctx.typeList().typeType()]
+
+    exitClassDeclaration = exitInterfaceDeclaration = exitEnumDeclaration = _exit_type
+
+    def enterFieldDeclaration(self, ctx: JavaParser.FieldDeclarationContext):
+        self._add_member_type('field', ctx.typeType())
+
+    def enterConstDeclaration(self, ctx: JavaParser.ConstDeclarationContext):
+        self._add_member_type('field', ctx.typeType())
+
+    def enterMethodDeclaration(self, ctx: JavaParser.MethodDeclarationContext):
+        self._add_member_type('return', ctx.typeTypeOrVoid())
+
+    def enterInterfaceMethodDeclaration(self, ctx: JavaParser.InterfaceMethodDeclarationContext):
+        self._add_member_type('return', ctx.typeTypeOrVoid())
+
+    def enterFormalParameter(self, ctx: JavaParser.FormalParameterContext):
+        self._add_member_type('parameter', ctx.typeType())
+
+    def enterLastFormalParameter(self, ctx: JavaParser.LastFormalParameterContext):
+        self._add_member_type('parameter', ctx.typeType())
+
+
+class FileSummary:
+    """
+
+    The picklable summary of a parsed Java file
+
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.package_name = None
+        self.imports = []
+        # Class name -> ClassSummary, only the top-level classes (as collected by UtilsListener)
+        self.classes = {}
+        # TypeSummary of all type declarations, in the order of the file
+        self.types = []
+        # Identifier -> indices of its tokens
+        self.identifiers = {}
+        # (identifier, token index, line, column, is_call, qualifier) of each identifier token,
+        # is_call is set if the identifier is followed by '(', and qualifier is the identifier before '.', if any
+        self.references = []
+        self.number_of_tokens = 0
+        # The error message if the file could not be parsed
+        self.error = None
+        # Whether the file exceeded a parsing budget, i.e., the summary is token-only
+        self.budget_exceeded = False
+
+
+def _token_range(parser_context):
+    if parser_context is None or parser_context.start is None or parser_context.stop is None:
+        return None
+    return parser_context.start.tokenIndex, parser_context.stop.tokenIndex
+
+
+def _summarize_tokens(summary, token_stream_):
+    identifiers = defaultdict(list)
+    references = []
+    default_tokens = [token for token in token_stream_.tokens if token.channel == Token.DEFAULT_CHANNEL]
+    for k, token in enumerate(default_tokens):
+        if token.type != JavaLexer.IDENTIFIER:
+            continue
+        identifiers[token.text].append(token.tokenIndex)
+        is_call = k + 1 < len(default_tokens) and default_tokens[k + 1].type == JavaLexer.LPAREN
+        qualifier = None
+        if k > 1 and default_tokens[k - 1].type == JavaLexer.DOT and \
+                default_tokens[k - 2].type in (JavaLexer.IDENTIFIER, JavaLexer.THIS, JavaLexer.SUPER):
+            qualifier = default_tokens[k - 2].text
+        references.append((token.text, token.tokenIndex, token.line, token.column, is_call, qualifier))
+    summary.identifiers = dict(identifiers)
+    summary.references = references
+    summary.number_of_tokens = len(token_stream_.tokens)
+
+
+def summarize_java_file(filename) -> FileSummary:
+    """
+    Parses and walks a Java file by UtilsListener and returns its summary
+    """
+    persistent_cache = get_persistent_cache()
+    content = None
+    if persistent_cache is not None:
+        try:
+            with open(filename, mode='rb') as f_:
+                content = f_.read()
+        except OSError as e:
+            summary = FileSummary(filename)
+            summary.error = str(e)
+            return summary
+        summary = persistent_cache.get_summary(filename, content)
+        if summary is not None:
+            return summary
+
+    summary = FileSummary(filename)
+    budget = ParsingBudget()
+    try:
+        if persistent_cache is None:
+            stream_ = FileStream(filename, encoding='utf8', errors='ignore')
+            token_stream_ = CommonTokenStream(JavaLexer(stream_))
+        else:
+            stream_ = InputStream(content.decode('utf8', errors='ignore'))
+            token_stream_ = persistent_cache.get_token_stream(stream_, JavaLexer)
+        token_stream_.fill()
+        budget.check_tokens(token_stream_)
+        parser_ = JavaParser(token_stream_)
+        with budget.deadline(parser_):
+            tree_ = parse(parser_)
+        listener_ = UtilsListener(filename)
+        type_listener = TypeDeclarationListener()
+        CompositeWalker([listener_, type_listener]).walk(tree_)
+    except ParsingBudgetExceeded as e:
+        summary.error = str(e)
+        summary.budget_exceeded = True
+        _summarize_tokens(summary, token_stream_)
+        return summary
+    except Exception as e:
+        summary.error = str(e)
+        return summary
+
+    summary.package_name = listener_.package.name
+    for import_ in listener_.file_info.all_imports:
+        is_package_import = isinstance(import_, PackageImport)
+        summary.imports.append(ImportSummary(
+            package_name=import_.package_name,
+            class_name=None if is_package_import else import_.class_name,
+            is_package_import=is_package_import,
+            token_range=_token_range(import_.parser_context)
+        ))
+    summary.classes = {name: ClassSummary(class_) for name, class_ in listener_.package.classes.items()}
+    summary.types = type_listener.types
+    _summarize_tokens(summary, token_stream_)
+    if persistent_cache is not None:
+        persistent_cache.put_summary(content, summary)
+    return summary
+
+
+def _summarize_chunk(filenames) -> list:
+    return [summarize_java_file(filename) for filename in filenames]
+
+
+def _file_size(filename):
+    try:
+        return os.path.getsize(filename)
+    except OSError:
+        return 0
+
+
+def create_chunks(source_files: list, chunk_size_bytes=CHUNK_SIZE_BYTES) -> list:
+    """
+    Splits the files into chunks of about `chunk_size_bytes` bytes, the largest files are scheduled first
+    """
+    chunks, chunk, chunk_bytes = [], [], 0
+    for filename in sorted(source_files, key=_file_size, reverse=True):
+        chunk.append(filename)
+        chunk_bytes += _file_size(filename)
+        if chunk_bytes >= chunk_size_bytes:
+            chunks.append(chunk)
+            chunk, chunk_bytes = [], 0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def parse_project(source_files: list, n_jobs=None, chunk_size_bytes=CHUNK_SIZE_BYTES) -> list:
+    """
+
+    Args:
+
+        source_files (list): The Java files to parse
+
+        n_jobs (int): The number of worker processes, default is `config.PARSING_WORKERS` (0 means all CPUs)
+
+        chunk_size_bytes (int): The number of bytes of source code scheduled on a worker at once
+
+    Returns:
+
+        list: The FileSummary of each file in the order of `source_files`
+
+    """
+
+    n_jobs = config.PARSING_WORKERS if n_jobs is None else n_jobs
+    if n_jobs <= 0:
+        n_jobs = os.cpu_count() or 1
+    chunks = create_chunks(source_files, chunk_size_bytes)
+    n_jobs = min(n_jobs, len(chunks))
+
+    summaries = None
+    if n_jobs > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                summaries = [summary for chunk_summaries in executor.map(_summarize_chunk, chunks)
+                             for summary in chunk_summaries]
+        except (OSError, BrokenProcessPool, PicklingError) as e:
+            config.logger.debug(f'Parsing the project sequentially, the process pool failed: {e}')
+    if summaries is None:
+        summaries = _summarize_chunk([filename for chunk in chunks for filename in chunk])
+
+    summaries_dict = {summary.filename: summary for summary in summaries}
+    parsing_statistics = get_parsing_statistics()
+    skipped_files = 0
+    for summary in summaries:
+        if summary.budget_exceeded:
+            parsing_statistics.record_skipped_file(summary.filename, summary.error)
+            skipped_files += 1
+        elif summary.error is not None:
+            config.logger.debug(f'Encounter a parsing error on file {summary.filename}: {summary.error}')
+    if skipped_files:
+        config.logger.info(f'{skipped_files} of {len(summaries)} files exceeded the parsing budgets '
+                           f'and were summarized by their tokens only')
+    return [summaries_dict[filename] for filename in source_files]
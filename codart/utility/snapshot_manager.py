@@ -0,0 +1,341 @@
+"""
+Copy-on-write snapshot of a project directory, to be used instead of "git restore" and "git clean"
+after evaluating each refactoring sequence.
+
+The baseline content hashes are recorded once.
+File writes, creations, renames and removals inside the project, performed by refactorings through
+`open(..., 'w')`, `parse_and_walk(has_write=True)` or the `os` module, are tracked with a Python audit hook,
+and the baseline content of each file is saved in a content store just before its first modification.
+Restoring the project only rewrites the touched files, so it scales with the number of touched files
+rather than the size of the project.
+A write which is not seen by the audit hook (e.g., by a subprocess or a C extension) is not restored,
+hence `check_consistency` compares the project with git (`git ls-files`, as `git status`) after every
+`config.FAST_RESTORE_CHECK_INTERVAL` restores (once per generation by default, since the check scans
+the whole working tree), and restores the missed files by git.
+
+"""
+
+__author__ = 'Morteza Zakeri'
+__version__ = '0.2.1'
+
+import os
+import sys
+import hashlib
+import subprocess
+
+from sbse import config
+
+_WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_APPEND | os.O_CREAT | os.O_TRUNC
+# os.replace raises os.rename, and os.unlink raises os.remove
+_TRACKED_EVENTS = frozenset((
+    'open', 'os.remove', 'os.rename', 'os.truncate', 'os.link', 'os.symlink', 'os.mkdir', 'os.rmdir', 'shutil.rmtree'
+))
+
+# Project directory -> SnapshotManager, for all the projects tracked in the current process
+_MANAGERS = {}
+_HOOK_INSTALLED = False
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha1(content).hexdigest()
+
+
+class SnapshotManager:
+    """
+
+    Tracks the files touched in a project since its baseline and restores them from a content store
+
+    """
+
+    def __init__(self, project_dir, store_dir=None):
+        """
+
+        Args:
+
+            project_dir (str): The project directory, which must be in its baseline state
+
+            store_dir (str): Optional directory to keep the content store on disk, in addition to the memory
+
+        """
+
+        self.project_dir = os.path.normcase(os.path.abspath(project_dir))
+        self.store_dir = store_dir
+        # Relative path -> content hash of the baseline files
+        self.baseline = {}
+        # Content hash -> content of the baseline files saved before their first modification
+        self._store = {}
+        self._touched = set()
+        self._created_dirs = set()
+        # Files written, created, or removed since the last call of pop_modified, including the restored files
+        self._modified = set()
+        self._in_hook = False
+        self.number_of_restores = 0
+
+    def record_baseline(self):
+        self.baseline.clear()
+        for root, dirs, files in os.walk(self.project_dir):
+            if '.git' in dirs:
+                dirs.remove('.git')
+            for file in files:
+                path_ = os.path.join(root, file)
+                with open(path_, 'rb') as f:
+                    self.baseline[os.path.relpath(path_, self.project_dir)] = content_hash(f.read())
+        self._touched.clear()
+        self._created_dirs.clear()
+
+    def _relative_path(self, path_):
+        if isinstance(path_, int):  # File descriptors are not tracked
+            return None
+        path_ = os.path.normcase(os.path.abspath(os.fsdecode(path_)))
+        if not path_.startswith(self.project_dir + os.sep):
+            return None
+        relative_path = os.path.relpath(path_, self.project_dir)
+        if relative_path.split(os.sep)[0] == '.git':
+            return None
+        return relative_path
+
+    def touch(self, path_, is_directory=False):
+        """
+
+        Records a file (or directory) which is going to be modified, created, or removed
+
+        """
+
+        relative_path = self._relative_path(path_)
+        if relative_path is None:
+            return
+        if is_directory:
+            if not os.path.exists(os.path.join(self.project_dir, relative_path)):
+                self._created_dirs.add(relative_path)
+            return
+        self._modified.add(relative_path)
+        if relative_path in self._touched:
+            return
+        self._touched.add(relative_path)
+        hash_ = self.baseline.get(relative_path)
+        if hash_ is not None and not self._has_content(hash_):
+            # The file is untouched since the baseline, so its current content is the baseline content
+            with open(os.path.join(self.project_dir, relative_path), 'rb') as f:
+                self._save_content(hash_, f.read())
+
+    def touch_tree(self, path_):
+        for root, dirs, files in os.walk(path_):
+            for file in files:
+                self.touch(os.path.join(root, file))
+
+    def _has_content(self, hash_):
+        return hash_ in self._store or (
+                self.store_dir is not None and os.path.exists(os.path.join(self.store_dir, hash_))
+        )
+
+    def _save_content(self, hash_, content):
+        self._store[hash_] = content
+        if self.store_dir is not None:
+            if not os.path.exists(self.store_dir):
+                os.makedirs(self.store_dir)
+            with open(os.path.join(self.store_dir, hash_), 'wb') as f:
+                f.write(content)
+
+    def _load_content(self, hash_):
+        if hash_ not in self._store:
+            with open(os.path.join(self.store_dir, hash_), 'rb') as f:
+                self._store[hash_] = f.read()
+        return self._store[hash_]
+
+    def changes(self):
+        """
+
+        Returns:
+
+            tuple: The changed (modified or created) and deleted files since the baseline, relative to the project
+
+        """
+
+        changed_files, deleted_files = [], []
+        for relative_path in sorted(self._touched):
+            path_ = os.path.join(self.project_dir, relative_path)
+            if os.path.isfile(path_):
+                changed_files.append(relative_path)
+            elif relative_path in self.baseline:
+                deleted_files.append(relative_path)
+        return changed_files, deleted_files
+
+    def touched_files(self):
+        """
+
+        Returns:
+
+            list: The files written, created, or removed since the last restore, relative to the project
+
+        """
+
+        return sorted(self._touched)
+
+    def pop_modified(self):
+        """
+
+        Returns:
+
+            set: The files modified since the previous call, relative to the project
+
+        """
+
+        modified, self._modified = self._modified, set()
+        return modified
+
+    def restore(self):
+        """
+
+        Restores the touched files to their baseline contents and removes the created files and directories
+
+        Returns:
+
+            int: Number of restored or removed files
+
+        """
+
+        restored = 0
+        self._in_hook = True  # Writes of the restore itself are not tracked
+        try:
+            for relative_path in self._touched:
+                path_ = os.path.join(self.project_dir, relative_path)
+                hash_ = self.baseline.get(relative_path)
+                if hash_ is None:
+                    if os.path.isfile(path_):
+                        os.remove(path_)
+                        self._modified.add(relative_path)
+                        restored += 1
+                    continue
+                if os.path.isfile(path_):
+                    with open(path_, 'rb') as f:
+                        if content_hash(f.read()) == hash_:
+                            continue
+                elif not os.path.exists(os.path.dirname(path_)):
+                    os.makedirs(os.path.dirname(path_))
+                with open(path_, 'wb') as f:
+                    f.write(self._load_content(hash_))
+                self._modified.add(relative_path)
+                restored += 1
+
+            # Remove the created directories, the deepest ones first, if they are empty
+            for relative_path in sorted(self._created_dirs, key=len, reverse=True):
+                path_ = os.path.join(self.project_dir, relative_path)
+                if os.path.isdir(path_) and not os.listdir(path_):
+                    os.rmdir(path_)
+        finally:
+            self._in_hook = False
+        self._touched.clear()
+        self._created_dirs.clear()
+        self.number_of_restores += 1
+        return restored
+
+    def find_unrestored_files(self) -> list:
+        """
+
+        Returns:
+
+            list: The files which differ from git after a restore, i.e., the writes missed by the audit hook
+
+        """
+
+        try:
+            # The paths of ls-files are relative to the project, even if the project is a subdirectory of the repository
+            result = subprocess.run(
+                ['git', 'ls-files', '--modified', '--deleted', '--others', '--exclude-standard'],
+                cwd=self.project_dir, capture_output=True, text=True, check=True
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            config.logger.debug(f'Snapshot manager could not run git ls-files: {e}')
+            return []
+        return sorted({os.path.normcase(os.path.normpath(path_)) for path_ in result.stdout.splitlines() if path_})
+
+    def check_consistency(self) -> list:
+        """
+
+        Restores the files missed by the audit hook by git, which must be called after `restore`
+
+        Returns:
+
+            list: The files restored by git, relative to the project
+
+        """
+
+        unrestored_files = self.find_unrestored_files()
+        if unrestored_files:
+            config.logger.warning(f'{len(unrestored_files)} files were modified without being tracked and are '
+                                  f'restored by git: {unrestored_files[:10]}')
+            from codart.utility.directory_utils import git_restore
+            self._in_hook = True
+            try:
+                git_restore(self.project_dir)
+            finally:
+                self._in_hook = False
+            self._modified.update(unrestored_files)
+        return unrestored_files
+
+
+def _audit_hook(event, args):
+    if event not in _TRACKED_EVENTS or not _MANAGERS:
+        return
+    for manager in _MANAGERS.values():
+        if manager._in_hook:
+            continue
+        manager._in_hook = True
+        try:
+            if event == 'open':
+                path_, mode, flags = args
+                if isinstance(mode, str):
+                    is_write = any(c in mode for c in 'wax+')
+                else:
+                    is_write = bool(flags & _WRITE_FLAGS)
+                if is_write:
+                    manager.touch(path_)
+            elif event == 'os.remove':
+                manager.touch(args[0])
+            elif event == 'os.rename':
+                manager.touch(args[0])
+                manager.touch(args[1])
+            elif event == 'os.truncate':
+                manager.touch(args[0])
+            elif event in ('os.link', 'os.symlink'):
+                manager.touch(args[1])
+            elif event == 'os.mkdir':
+                manager.touch(args[0], is_directory=True)
+            elif event in ('os.rmdir', 'shutil.rmtree'):
+                manager.touch_tree(args[0])
+        except Exception as e:
+            config.logger.debug(f'Snapshot manager could not track {event} {args}: {e}')
+        finally:
+            manager._in_hook = False
+
+
+def get_snapshot_manager(project_dir) -> SnapshotManager:
+    """
+
+    Returns the snapshot manager of the project, the manager is created and the baseline is recorded once
+
+    """
+
+    global _HOOK_INSTALLED
+    key = os.path.normcase(os.path.abspath(project_dir))
+    if key not in _MANAGERS:
+        from codart.utility.directory_utils import git_restore
+        # The baseline is the git state of the project
+        git_restore(project_dir)
+        manager = SnapshotManager(project_dir)
+        manager.record_baseline()
+        _MANAGERS[key] = manager
+        if not _HOOK_INSTALLED:
+            sys.addaudithook(_audit_hook)
+            _HOOK_INSTALLED = True
+    return _MANAGERS[key]
+
+
+def get_active_snapshot_manager(project_dir):
+    """
+
+    Returns the snapshot manager of the project if the project is already tracked, otherwise None
+
+    """
+
+    return _MANAGERS.get(os.path.normcase(os.path.abspath(project_dir)))
@@ -0,0 +1,519 @@
+"""
+## Introduction
+
+Persistent SQLite symbol index of a Java project, built from the `UtilsListener` summaries of
+the project parser (see codart.utility.project_parser).
+
+The refactorings and candidate finders answer "where is X declared or used" by a full project parse
+(`get_program`) or by Understand queries. The index keeps, for each source file:
+
+1. The file (path relative to the project directory, modification time, size, and content hash) and its package.
+2. The imports of the file.
+3. The types (the top-level classes collected by UtilsListener) with their modifiers and supertypes.
+4. The members (methods, constructors, and fields) with their signatures, types, and modifiers.
+5. The identifier reference sites with their token index, line, and column, the enclosing type and member,
+whether the identifier is called, and its qualifier (e.g., `obj` in `obj.f()`).
+
+`SymbolIndex.update()` re-parses only the new and changed files (by modification time and size, then by
+content hash), removes the deleted files, and re-resolves the supertype names against the indexed types.
+The writers of `codart.symbol_table` call `notify_file_changed` after each rewrite
+(through codart.utility.identifier_index), which makes the next `update()` re-hash the file
+even if its modification time and size did not change.
+The lookups (`declarations`, `subclasses`, `callers`, `field_usages`, ...) are single indexed SQL queries.
+The references are lexical: `callers` and `field_usages` return the sites of the name in the files which can see
+the declaring class (its package, or the files importing it or its package), without type inference.
+
+## Usage
+
+    symbol_index = get_symbol_index()
+    symbol_index.update()
+    for site in symbol_index.callers('toString', 'org.json.JSONObject'):
+        print(site.path, site.line, site.enclosing_member)
+
+
+## Changelog
+
+### version 0.1.1
+    1. Add `notify_file_changed` for the rewrites which keep the modification time and size of a file
+
+### version 0.1.0
+    1. Add the persistent symbol index
+
+
+"""
+
+__version__ = '0.1.1'
+__author__ = 'Morteza Zakeri'
+
+import os
+import re
+import bisect
+import hashlib
+import sqlite3
+
+from codart.utility.snapshot_manager import content_hash
+from sbse import config
+
+# Must be increased when the schema or the content of the index changes
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, mtime INTEGER, size INTEGER, hash TEXT,
+    package TEXT, number_of_tokens INTEGER, error TEXT
+);
+CREATE TABLE IF NOT EXISTS imports (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    package TEXT, class_name TEXT, is_package_import INTEGER
+);
+CREATE TABLE IF NOT EXISTS types (
+    id INTEGER PRIMARY KEY, file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    package TEXT, name TEXT NOT NULL, qualified_name TEXT NOT NULL, modifiers TEXT,
+    start_token INTEGER, stop_token INTEGER
+);
+CREATE TABLE IF NOT EXISTS supertypes (
+    type_id INTEGER NOT NULL REFERENCES types(id) ON DELETE CASCADE,
+    relation TEXT NOT NULL, name TEXT NOT NULL, resolved_name TEXT
+);
+CREATE TABLE IF NOT EXISTS members (
+    id INTEGER PRIMARY KEY, type_id INTEGER NOT NULL REFERENCES types(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL, name TEXT NOT NULL, signature TEXT NOT NULL, datatype TEXT, modifiers TEXT,
+    start_token INTEGER, stop_token INTEGER
+);
+CREATE TABLE IF NOT EXISTS refs (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    name TEXT NOT NULL, token_index INTEGER, line INTEGER, column_ INTEGER, is_call INTEGER, qualifier TEXT,
+    type_id INTEGER, member_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS imports_file ON imports(file_id);
+CREATE INDEX IF NOT EXISTS types_name ON types(name);
+CREATE INDEX IF NOT EXISTS types_qualified_name ON types(qualified_name);
+CREATE INDEX IF NOT EXISTS types_file ON types(file_id);
+CREATE INDEX IF NOT EXISTS supertypes_type ON supertypes(type_id);
+CREATE INDEX IF NOT EXISTS supertypes_resolved_name ON supertypes(resolved_name);
+CREATE INDEX IF NOT EXISTS members_name ON members(name);
+CREATE INDEX IF NOT EXISTS members_type ON members(type_id);
+CREATE INDEX IF NOT EXISTS refs_name ON refs(name);
+CREATE INDEX IF NOT EXISTS refs_file ON refs(file_id);
+"""
+
+_SYMBOL_INDEX = None
+
+
+class Declaration:
+    """
+    A type or member declaration of the index
+    """
+
+    def __init__(self, row):
+        # 'class', 'method', 'constructor', or 'field'
+        self.kind = row['kind']
+        self.name = row['name']
+        # The qualified name of the type, or of the type declaring the member
+        self.class_name = row['class_name']
+        # The method key, e.g., 'f(int,String)', the field name, or the qualified name of the type
+        self.signature = row['signature']
+        # The return type of the methods and the type of the fields
+        self.datatype = row['datatype']
+        self.modifiers = row['modifiers'].split() if row['modifiers'] else []
+        self.path = row['path']
+        self.token_range = (row['start_token'], row['stop_token'])
+
+    def __repr__(self):
+        return f'Declaration({self.kind} {self.class_name}:{self.signature} in {self.path})'
+
+
+class ReferenceSite:
+    """
+    An occurrence of an identifier in a source file
+    """
+
+    def __init__(self, row):
+        self.name = row['name']
+        self.path = row['path']
+        self.token_index = row['token_index']
+        self.line = row['line']
+        self.column = row['column_']
+        self.is_call = bool(row['is_call'])
+        self.qualifier = row['qualifier']
+        # The qualified name of the enclosing type and the signature of the enclosing member, if any
+        self.enclosing_class = row['enclosing_class']
+        self.enclosing_member = row['enclosing_member']
+
+    def __repr__(self):
+        return f'ReferenceSite({self.name} at {self.path}:{self.line}:{self.column})'
+
+
+def _type_name(type_text):
+    """
+    Drops the type arguments and array dimensions of a type, e.g., 'java.util.List<String>' -> 'java.util.List'
+    """
+    return re.sub(r'<.*>|\[\]', '', type_text or '')
+
+
+def _qualified_name(package_name, name):
+    return f'{package_name}.{name}' if package_name else name
+
+
+class SymbolIndex:
+    """
+
+    Incrementally updated SQLite index of the declarations and identifier references of a project
+
+    """
+
+    def __init__(self, db_path, project_dir):
+        """
+
+        Args:
+
+            db_path (str): The path of the SQLite file, ':memory:' for a temporary index
+
+            project_dir (str): The project directory, the paths in the index are relative to it
+
+        """
+
+        self.project_dir = os.path.normpath(os.path.abspath(project_dir))
+        self.db_path = db_path
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._connection = sqlite3.connect(db_path)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute('PRAGMA foreign_keys = ON')
+        if self._connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            for (table,) in self._connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall():
+                self._connection.execute(f'DROP TABLE {table}')
+            self._connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self._connection.executescript(_SCHEMA)
+        self._connection.commit()
+
+    # Paths
+    def _relative_path(self, file_path):
+        return os.path.relpath(os.path.abspath(file_path), self.project_dir).replace('\\', '/')
+
+    def _absolute_path(self, relative_path):
+        return os.path.normpath(os.path.join(self.project_dir, relative_path))
+
+    # Update
+    def update(self, source_files=None, n_jobs=None):
+        """
+        Indexes the new and changed source files and drops the deleted ones
+
+        Args:
+
+            source_files (list): The Java files of the project, default is all Java files in the project directory
+
+            n_jobs (int): The number of parser processes, see `codart.utility.project_parser.parse_project`
+
+        Returns:
+
+            int: The number of (re-)indexed files
+
+        """
+
+        from codart.utility.project_parser import parse_project
+        if source_files is None:
+            source_files = [os.path.join(root, f) for root, _, files in os.walk(self.project_dir)
+                            for f in files if f.endswith('.java')]
+        indexed = {row['path']: row for row in self._connection.execute('SELECT path, mtime, size, hash FROM files')}
+
+        changed_files, file_states = [], {}
+        for file_path in source_files:
+            path_ = self._relative_path(file_path)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            row = indexed.get(path_)
+            if row is not None and row['mtime'] == stat.st_mtime_ns and row['size'] == stat.st_size:
+                file_states[path_] = None
+                continue
+            with open(file_path, mode='rb') as f_:
+                hash_ = content_hash(f_.read())
+            file_states[path_] = (stat.st_mtime_ns, stat.st_size, hash_)
+            if row is not None and row['hash'] == hash_:
+                self._connection.execute('UPDATE files SET mtime = ?, size = ? WHERE path = ?',
+                                         (stat.st_mtime_ns, stat.st_size, path_))
+            else:
+                changed_files.append(file_path)
+
+        deleted_paths = [path_ for path_ in indexed if path_ not in file_states]
+        self._connection.executemany('DELETE FROM files WHERE path = ?', [(path_,) for path_ in deleted_paths])
+        for summary in parse_project(changed_files, n_jobs=n_jobs) if changed_files else []:
+            path_ = self._relative_path(summary.filename)
+            self._connection.execute('DELETE FROM files WHERE path = ?', (path_,))
+            self._insert_summary(path_, file_states[path_], summary)
+        if changed_files or deleted_paths:
+            self._resolve_supertypes()
+        self._connection.commit()
+        config.logger.debug(f'Symbol index: {len(changed_files)} files indexed, {len(deleted_paths)} files dropped')
+        return len(changed_files)
+
+    def notify_file_changed(self, file_path):
+        """
+        Marks a file as changed after it is written, such that the next `update()` compares its content hash
+        """
+        self._connection.execute('UPDATE files SET mtime = NULL WHERE path = ?', (self._relative_path(file_path),))
+        self._connection.commit()
+
+    def _insert_summary(self, path_, file_state, summary):
+        mtime, size, hash_ = file_state
+        file_id = self._connection.execute(
+            'INSERT INTO files (path, mtime, size, hash, package, number_of_tokens, error) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (path_, mtime, size, hash_, summary.package_name, summary.number_of_tokens, summary.error)
+        ).lastrowid
+        self._connection.executemany(
+            'INSERT INTO imports (file_id, package, class_name, is_package_import) VALUES (?, ?, ?, ?)',
+            [(file_id, import_.package_name, import_.class_name, int(import_.is_package_import))
+             for import_ in summary.imports]
+        )
+
+        # (start token, stop token, type id or member id) sorted by the start token, to find the enclosing ones
+        type_ranges, member_ranges = [], []
+        for class_ in summary.classes.values():
+            qualified_name = _qualified_name(summary.package_name, class_.name)
+            start_token, stop_token = class_.token_range or (None, None)
+            type_id = self._connection.execute(
+                'INSERT INTO types (file_id, package, name, qualified_name, modifiers, start_token, stop_token) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (file_id, summary.package_name, class_.name, qualified_name, ' '.join(class_.modifiers),
+                 start_token, stop_token)
+            ).lastrowid
+            if class_.token_range is not None:
+                type_ranges.append((start_token, stop_token, type_id))
+            supertypes = [('extends', class_.superclass_name)] if class_.superclass_name else []
+            supertypes.extend(('implements', name) for name in class_.superinterface_names)
+            self._connection.executemany(
+                'INSERT INTO supertypes (type_id, relation, name) VALUES (?, ?, ?)',
+                [(type_id, relation, _type_name(name)) for relation, name in supertypes]
+            )
+
+            members = [('field', name, name, field.datatype, field.modifiers, field.token_range)
+                       for name, field in class_.fields.items()]
+            for key, method in class_.methods.items():
+                if method.is_constructor:
+                    members.append(('constructor', class_.name, class_.name + key, None, method.modifiers,
+                                    method.token_range))
+                else:
+                    members.append(('method', method.name, key, method.returntype, method.modifiers,
+                                    method.token_range))
+            for kind, name, signature, datatype, modifiers, token_range in members:
+                start_token, stop_token = token_range or (None, None)
+                member_id = self._connection.execute(
+                    'INSERT INTO members (type_id, kind, name, signature, datatype, modifiers, start_token, stop_token) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (type_id, kind, name, signature, datatype, ' '.join(modifiers), start_token, stop_token)
+                ).lastrowid
+                if token_range is not None:
+                    member_ranges.append((start_token, stop_token, member_id))
+
+        type_ranges.sort()
+        member_ranges.sort()
+        self._connection.executemany(
+            'INSERT INTO refs (file_id, name, token_index, line, column_, is_call, qualifier, type_id, member_id) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [(file_id, name, token_index, line, column, int(is_call), qualifier,
+              self._enclosing(type_ranges, token_index), self._enclosing(member_ranges, token_index))
+             for name, token_index, line, column, is_call, qualifier in summary.references]
+        )
+
+    @staticmethod
+    def _enclosing(ranges, token_index):
+        """
+        Returns the id of the range containing the token, the ranges are sorted and do not overlap partially
+        """
+        i = bisect.bisect_right(ranges, (token_index, float('inf'))) - 1
+        if i >= 0 and ranges[i][0] <= token_index <= ranges[i][1]:
+            return ranges[i][2]
+        return None
+
+    def _resolve_supertypes(self):
+        """
+        Resolves the supertype names to the qualified names of the indexed types,
+        by the single-type imports, the package of the file, and the on-demand imports of the file, in this order
+        """
+        known_types = {row[0] for row in self._connection.execute('SELECT qualified_name FROM types')}
+        rows = self._connection.execute(
+            'SELECT supertypes.rowid AS id, supertypes.name AS name, types.file_id AS file_id, types.package AS package '
+            'FROM supertypes JOIN types ON supertypes.type_id = types.id'
+        ).fetchall()
+        imports = {}
+        for row in self._connection.execute('SELECT file_id, package, class_name, is_package_import FROM imports'):
+            imports.setdefault(row['file_id'], []).append(row)
+
+        resolved_names = []
+        for row in rows:
+            name, resolved_name = row['name'], None
+            if '.' in name:
+                resolved_name = name
+            else:
+                file_imports = imports.get(row['file_id'], [])
+                candidates = [_qualified_name(import_['package'], name) for import_ in file_imports
+                              if not import_['is_package_import'] and import_['class_name'] == name]
+                candidates.append(_qualified_name(row['package'], name))
+                candidates.extend(_qualified_name(import_['package'], name) for import_ in file_imports
+                                  if import_['is_package_import'])
+                resolved_name = next((candidate for candidate in candidates if candidate in known_types), None)
+                if resolved_name is None and candidates[0] != _qualified_name(row['package'], name):
+                    # An imported class which is not in the project
+                    resolved_name = candidates[0]
+            resolved_names.append((resolved_name or name, row['id']))
+        self._connection.executemany('UPDATE supertypes SET resolved_name = ? WHERE rowid = ?', resolved_names)
+
+    # Queries
+    def _declarations(self, where, params):
+        query = (
+            "SELECT 'class' AS kind, types.name AS name, types.qualified_name AS class_name, "
+            "types.qualified_name AS signature, NULL AS datatype, types.modifiers AS modifiers, files.path AS path, "
+            "types.start_token AS start_token, types.stop_token AS stop_token "
+            "FROM types JOIN files ON types.file_id = files.id WHERE {types_where} "
+            "UNION ALL "
+            "SELECT members.kind, members.name, types.qualified_name, members.signature, members.datatype, "
+            "members.modifiers, files.path, members.start_token, members.stop_token "
+            "FROM members JOIN types ON members.type_id = types.id JOIN files ON types.file_id = files.id "
+            "WHERE {members_where}"
+        ).format(types_where=where.format(table='types'), members_where=where.format(table='members'))
+        return [Declaration(row) for row in self._connection.execute(query, params + params)]
+
+    def declarations(self, name, kind=None) -> list:
+        """
+        Returns the declarations of the types and members with the name, optionally of a kind
+        ('class', 'method', 'constructor', or 'field')
+        """
+        result = self._declarations('{table}.name = ?', (name,))
+        return [declaration for declaration in result if kind is None or declaration.kind == kind]
+
+    def type_declarations(self, qualified_name) -> list:
+        """
+        Returns the declaration of the type and the declarations of its members
+        """
+        return self._declarations('types.qualified_name = ?', (qualified_name,))
+
+    def find_type(self, qualified_name):
+        """
+        Returns the declaration of the type, or None if it is not indexed
+        """
+        result = self.declarations(qualified_name.rsplit('.', 1)[-1], kind='class')
+        return next((declaration for declaration in result if declaration.class_name == qualified_name), None)
+
+    def supertypes(self, qualified_name) -> list:
+        """
+        Returns the resolved names of the direct supertypes of the type
+        """
+        return [row[0] for row in self._connection.execute(
+            'SELECT supertypes.resolved_name FROM supertypes JOIN types ON supertypes.type_id = types.id '
+            'WHERE types.qualified_name = ?', (qualified_name,)
+        )]
+
+    def subclasses(self, qualified_name, transitive=False) -> list:
+        """
+        Returns the qualified names of the indexed types which extend or implement the type,
+        and of their subclasses if `transitive` is set
+        """
+        result, queue = [], [qualified_name]
+        while queue:
+            for (subclass_name,) in self._connection.execute(
+                    'SELECT DISTINCT types.qualified_name FROM supertypes JOIN types ON supertypes.type_id = types.id '
+                    'WHERE supertypes.resolved_name = ?', (queue.pop(0),)
+            ).fetchall():
+                if subclass_name not in result and subclass_name != qualified_name:
+                    result.append(subclass_name)
+                    if transitive:
+                        queue.append(subclass_name)
+        return result
+
+    def _reference_sites(self, name, is_call, class_name=None) -> list:
+        query = (
+            'SELECT refs.*, files.path AS path, types.qualified_name AS enclosing_class, '
+            'members.signature AS enclosing_member '
+            'FROM refs JOIN files ON refs.file_id = files.id '
+            'LEFT JOIN types ON refs.type_id = types.id LEFT JOIN members ON refs.member_id = members.id '
+            'WHERE refs.name = ? AND refs.is_call = ?'
+        )
+        params = [name, int(is_call)]
+        if class_name is not None:
+            # The files which can see the class: its package, and the files importing it or its package
+            package_name, _, simple_name = class_name.rpartition('.')
+            query += (
+                ' AND (files.package IS ? OR EXISTS (SELECT 1 FROM imports WHERE imports.file_id = refs.file_id AND '
+                'imports.package IS ? AND (imports.is_package_import OR imports.class_name = ?)))'
+            )
+            params.extend([package_name or None, package_name or None, simple_name])
+        query += ' ORDER BY files.path, refs.token_index'
+        return [ReferenceSite(row) for row in self._connection.execute(query, params)]
+
+    def references(self, name) -> list:
+        """
+        Returns all occurrences of the identifier
+        """
+        return self._reference_sites(name, False) + self._reference_sites(name, True)
+
+    def callers(self, method_name, class_name=None) -> list:
+        """
+        Returns the call sites of the method name, in the files which can see `class_name` if it is given
+        """
+        return self._reference_sites(method_name, True, class_name)
+
+    def field_usages(self, field_name, class_name=None) -> list:
+        """
+        Returns the non-call occurrences of the field name, except its declarations,
+        in the files which can see `class_name` if it is given
+        """
+        declaration_ranges = [
+            (row['path'], row['start_token'], row['stop_token']) for row in self._connection.execute(
+                "SELECT files.path AS path, members.start_token, members.stop_token "
+                "FROM members JOIN types ON members.type_id = types.id JOIN files ON types.file_id = files.id "
+                "WHERE members.kind = 'field' AND members.name = ?", (field_name,)
+            )
+        ]
+        # The declarator of a field is the first occurrence of its name in its declaration
+        declaration_sites = set()
+        sites = self._reference_sites(field_name, False, class_name)
+        for path_, start_token, stop_token in declaration_ranges:
+            declarators = [site.token_index for site in sites
+                           if site.path == path_ and start_token <= site.token_index <= stop_token]
+            if declarators:
+                declaration_sites.add((path_, min(declarators)))
+        return [site for site in sites if (site.path, site.token_index) not in declaration_sites]
+
+    def files(self) -> list:
+        """
+        Returns the absolute paths of the indexed files
+        """
+        return [self._absolute_path(row[0]) for row in self._connection.execute('SELECT path FROM files ORDER BY path')]
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def get_symbol_index() -> SymbolIndex:
+    """
+
+    Returns the symbol index of `config.PROJECT_PATH` under `config.PARSE_DISK_CACHE_DIR`,
+    which is updated on its first use; call `update()` after the source files change
+
+    """
+
+    global _SYMBOL_INDEX
+    project_dir = os.path.normpath(os.path.abspath(config.PROJECT_PATH))
+    if _SYMBOL_INDEX is None or _SYMBOL_INDEX.project_dir != project_dir:
+        if _SYMBOL_INDEX is not None:
+            _SYMBOL_INDEX.close()
+        project_id = hashlib.sha1(project_dir.encode('utf-8')).hexdigest()[:8]
+        _SYMBOL_INDEX = SymbolIndex(
+            db_path=os.path.join(config.PARSE_DISK_CACHE_DIR, 'symbol_index',
+                                 f'{os.path.basename(project_dir)}_{project_id}.sqlite3'),
+            project_dir=project_dir
+        )
+        _SYMBOL_INDEX.update()
+    return _SYMBOL_INDEX
+
+
+def notify_file_changed(file_path):
+    """
+    Marks the file as changed in the symbol index of the current process, if any, after the file is written
+    """
+    if _SYMBOL_INDEX is not None:
+        _SYMBOL_INDEX.notify_file_changed(file_path)
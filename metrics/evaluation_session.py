@@ -0,0 +1,243 @@
+"""
+
+## Introduction
+
+This module contains the evaluation-scoped session of the understand database shared by
+the objective modules (QMOOD, testability, and modularity).
+
+Each objective module used to open the database by itself, and QMOOD re-enumerated all the class entities once
+per design metric. The session opens the database once per evaluation, materializes the class entities,
+their kinds, metrics, and the reference lists required by the QMOOD design metrics into plain Python structures,
+and indexes the type entities and packages used by the testability and modularity modules.
+
+## Usage
+
+    with EvaluationSession(udb_path) as session:
+        qmood = DesignQualityAttributes(udb_path, session=session)
+        testability = testability_main(udb_path, session=session)
+        modularity = modularity_main(udb_path, session=session)
+
+## Changelog
+### v0.1.1
+- Add the lexicon metrics of the project classes (see metrics.lexical_metrics)
+### v0.1.0
+- Add evaluation session
+
+
+"""
+
+__version__ = '0.1.1'
+__author__ = 'Morteza Zakeri'
+
+import re
+
+import understand as und
+
+from metrics.lexical_metrics import LexicalMetrics
+from metrics.metrics_coverability import UnderstandUtility
+
+# Filters of the class entities used by the QMOOD design metrics
+ALL_CLASSES_FILTER = "Java Class ~TypeVariable ~Anonymous ~Enum, Java Interface"
+KNOWN_CLASSES_FILTER = "Java Class ~Unresolved ~Unknown ~TypeVariable ~Anonymous ~Enum, Java Interface"
+USER_DEFINED_CLASSES_FILTER = "Java Class ~Unresolved ~Unknown ~TypeVariable ~Anonymous ~Enum ~Jar ~Library " \
+                              "~Standard, Java Interface"
+MEASURED_CLASSES_FILTER = "Java Class ~Unknown ~TypeVariable ~Anonymous ~Enum, Java Interface"
+PROJECT_FILES_FILTER = "Java File ~Jar ~Library ~Unknown ~Unresolved"
+
+QMOOD_CLASS_METRICS = ['MaxInheritanceTree', 'PercentLackOfCohesion', 'CountDeclMethod', 'CountDeclMethodAll',
+                       'CountDeclMethodPublic', 'SumCyclomaticModified']
+
+_MEMBER_METHODS_FILTER = "Method ~Unknown ~Jar ~Library ~Constructor ~Implicit ~Lambda ~External"
+_POLYMORPHIC_METHODS_FILTER = 'Java Method ~Jar ~Library ~Constructor ~Implicit ~Lambda ~External'
+
+
+class ClassRecord:
+    """
+
+    Plain snapshot of a class entity holding the data required by the QMOOD design metrics
+
+    """
+
+    def __init__(self, longname, simplename, kindname, is_known=True):
+        self.longname = longname
+        self.simplename = simplename
+        self.kindname = kindname
+        # Whether the class matches KNOWN_CLASSES_FILTER
+        self.is_known = is_known
+        self.metrics = dict()
+        # Whether the class is extended or implemented by any other class (NOH)
+        self.has_descendants = False
+        # Types of the attributes, and the variables and parameters of the methods (MOA)
+        self.aggregation_types = []
+        # Number of the private, protected, default and public attributes (DAM)
+        self.variable_visibilities = {'Private': 0, 'Protected': 0, 'Default': 0, 'Public': 0}
+        # Types of the attributes, method parameters, and method returns (DCC)
+        self.coupling_types = []
+        # CountDeclMethodAll of the implemented interfaces (MFA)
+        self.implemented_interfaces_methods = []
+        # Kind names of the declared methods (NOP)
+        self.method_kindnames = []
+
+    @property
+    def is_interface(self):
+        return "Interface" in self.kindname
+
+    def metric(self, name, default=0):
+        value = self.metrics.get(name, default)
+        return default if value is None else value
+
+
+class EvaluationSession:
+    """
+
+    Opens the understand database once and materializes the entities used by all objective computations
+
+    """
+
+    def __init__(self, udb_path, materialize=True):
+        """
+        :param udb_path: The understand database path
+        :param materialize: Whether the class records of QMOOD are materialized when the session is opened
+        """
+        self.udb_path = udb_path
+        self.materialize_classes = materialize
+        self.db = None
+        self.all_classes = set()
+        self.user_defined_classes = set()
+        self.classes = []
+        self._java_class_longnames = None
+        self._type_entities = None
+        self._class_packages = dict()
+        self._lexical_metrics = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def open(self):
+        if self.db is None:
+            self.db = und.open(self.udb_path)
+            if self.materialize_classes:
+                self.materialize()
+        return self
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def materialize(self):
+        """
+        Enumerates the class entities once and materializes the QMOOD data of each class
+        """
+        self.all_classes = {ent.simplename() for ent in self.db.ents(ALL_CLASSES_FILTER)}
+        self.user_defined_classes = {ent.simplename() for ent in self.db.ents(USER_DEFINED_CLASSES_FILTER)}
+        known_ids = {ent.id() for ent in self.db.ents(KNOWN_CLASSES_FILTER)}
+        self.classes = [
+            self._materialize_class(ent, is_known=ent.id() in known_ids)
+            for ent in self.db.ents(MEASURED_CLASSES_FILTER)
+        ]
+
+    @classmethod
+    def _materialize_class(cls, class_entity: und.Ent, is_known=True) -> ClassRecord:
+        record = ClassRecord(
+            longname=class_entity.longname(),
+            simplename=class_entity.simplename(),
+            kindname=class_entity.kindname(),
+            is_known=is_known
+        )
+        record.metrics = class_entity.metric(QMOOD_CLASS_METRICS)
+        record.has_descendants = any(class_entity.refs("Coupleby Extendby, Coupleby Implementby"))
+
+        for ref in class_entity.refs("Define, Typed, Set, Create", "Java Variable, Parameter"):
+            record.aggregation_types.append(ref.ent().type())
+        for ref in class_entity.refs("Define, Typed, Set, Create", _MEMBER_METHODS_FILTER):
+            for ref2 in ref.ent().refs("Define, Typed, Set, Create", "Java Variable ~Unknown, Java Parameter"):
+                record.aggregation_types.append(ref2.ent().type())
+
+        for visibility in record.variable_visibilities:
+            record.variable_visibilities[visibility] = len(
+                class_entity.ents("Define", f"Java Variable {visibility} Member")
+            )
+
+        for ref in class_entity.refs('Define', _POLYMORPHIC_METHODS_FILTER):
+            record.method_kindnames.append(ref.ent().kindname())
+
+        if record.is_interface:
+            # Interfaces do not contribute to DCC and MFA
+            return record
+
+        for ref in class_entity.refs("Define", "Variable"):
+            record.coupling_types.append(ref.ent().type())
+        for ref in class_entity.refs("Define", _MEMBER_METHODS_FILTER):
+            method_entity = ref.ent()
+            for ref2 in method_entity.refs("Java Define", "Java Parameter"):
+                record.coupling_types.append(ref2.ent().type())
+            for ref2 in method_entity.refs("Java Use Return"):
+                record.coupling_types.append(ref2.ent().type())
+
+        for interface_entity in class_entity.ents('Java Implement Couple', '~Unknown'):
+            record.implemented_interfaces_methods.append(
+                interface_entity.metric(['CountDeclMethodAll']).get('CountDeclMethodAll', 0)
+            )
+        return record
+
+    @property
+    def java_class_longnames(self):
+        """
+        The long names of the classes whose testability is predicted
+        """
+        if self._java_class_longnames is None:
+            self._java_class_longnames = UnderstandUtility.get_project_classes_longnames_java(db=self.db)
+        return self._java_class_longnames
+
+    @property
+    def lexical_metrics(self) -> LexicalMetrics:
+        """
+        The lexicon metrics of the classes, computed by lexing the project files once
+        """
+        if self._lexical_metrics is None:
+            self._lexical_metrics = LexicalMetrics.from_files(
+                file_entity.longname() for file_entity in self.db.ents(PROJECT_FILES_FILTER)
+            )
+        return self._lexical_metrics
+
+    def get_type_entity(self, longname):
+        """
+        Returns the first type entity with the given long name, equivalent to
+        `UnderstandUtility.get_class_entity_by_name` without enumerating the types once per class
+        """
+        if self._type_entities is None:
+            self._type_entities = dict()
+            for entity_ in self.db.ents('Type'):
+                self._type_entities.setdefault(entity_.longname(), entity_)
+        return self._type_entities.get(longname)
+
+    def get_class_package(self, class_longname):
+        """
+        Returns the package long name of a class in the modularity dependency graph,
+        'default' for the classes without package, and None if the class is not found
+        """
+        if class_longname not in self._class_packages:
+            class_longname2 = class_longname.replace('$', '.')
+            entities = self.db.lookup(re.compile(class_longname2 + r'$'), )
+            if entities is None or len(entities) == 0:  # Nested classes
+                package = None
+            else:
+                package = self.get_entity_package(entities[0])
+            self._class_packages[class_longname] = package
+        return self._class_packages[class_longname]
+
+    @staticmethod
+    def get_entity_package(class_entity):
+        """
+        Returns the package long name of a class entity (or its enclosing entities), or 'default'
+        """
+        package_list = class_entity.ents('Containin', 'Java Package')
+        while not package_list and class_entity.parent() is not None:
+            package_list = class_entity.parent().ents('Containin', 'Java Package')
+            class_entity = class_entity.parent()
+        return 'default' if len(package_list) < 1 else package_list[0].longname()
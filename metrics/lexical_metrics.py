@@ -0,0 +1,269 @@
+"""
+
+## Introduction
+
+This module contains the lexer-only engine of the class lexicon metrics (`metrics_names.class_lexicon_metrics_names`)
+used by the testability prediction modules.
+
+The testability modules used to walk `entity.lexer()` of each class lexeme by lexeme
+with a chain of `in list` checks for every lexeme.
+The engine lexes each source file once with `gen.javaLabeled.JavaLexer`,
+maps the token range of each class declaration (found by the class keywords and the matching braces) to
+the long name of the class, and computes all lexicon metrics of a class from the integer token-type and
+token-text arrays of its range with `numpy.bincount` and `numpy.unique`.
+
+The tokens of the lexer are mapped to the lexemes of `entity.lexer()`, i.e., the Java lexical grammar:
+each whitespace token is split into its line breaks (Newline lexemes) and blanks (Whitespace lexemes),
+which are counted by NumberOfTokens and NumberOfUniqueTokens as the comments are,
+the adjacent '<' and '>' tokens which the parser grammar splits for the type arguments are merged into
+the shift operators ('<<', '>>', and '>>>'), the literals true, false, and null are not keywords,
+and the operators are the operators of the Java lexical grammar (not the separators, e.g., '::').
+The metrics are compared with `compute_java_class_metrics_lexicon` on the recorded understand lexemes of
+a fixture by tests/metrics/test_lexical_metrics.py.
+The engine is off by default (`config.LEXER_METRICS`), since the testability models were trained on
+the understand metrics.
+
+## Usage
+
+    lexical_metrics = LexicalMetrics.from_files(java_files)
+    class_lexicon_metrics_dict = lexical_metrics.get_class_metrics('org.json.JSONObject')
+
+## Changelog
+### v0.2.0
+- Map the lexer tokens to the understand lexemes (whitespaces, shift operators, literals, and separators)
+### v0.1.1
+- Turn the engine off by default, until its metrics are validated against the understand lexer
+### v0.1.0
+- Add the lexer-only lexical metrics engine
+
+
+"""
+
+__version__ = '0.2.0'
+__author__ = 'Morteza Zakeri'
+
+import re
+
+import numpy as np
+from antlr4 import FileStream, CommonTokenStream, Token
+
+from gen.javaLabeled.JavaLexer import JavaLexer
+
+from codart.utility.persistent_cache import get_persistent_cache
+from metrics import metrics_names
+
+_NUMBER_OF_TYPES = len(JavaLexer.symbolicNames) + 1
+
+_KEYWORD_TYPES = list(range(JavaLexer.ABSTRACT, JavaLexer.WHILE + 1))
+_OPERATOR_TYPES = list(range(JavaLexer.ASSIGN, JavaLexer.URSHIFT_ASSIGN + 1)) + [JavaLexer.ARROW]
+# The longest shift operator of the '<' and '>' tokens
+_SHIFT_LENGTHS = {JavaLexer.LT: 2, JavaLexer.GT: 3}
+# The line breaks and the blanks of a whitespace token
+_WHITESPACE_PATTERN = re.compile(r'\r\n|\n|\r|[^\r\n]+')
+_CLASS_KEYWORD_TYPES = (JavaLexer.CLASS, JavaLexer.INTERFACE, JavaLexer.ENUM)
+_CLASS_MODIFIER_TYPES = (JavaLexer.ABSTRACT, JavaLexer.FINAL, JavaLexer.PUBLIC, JavaLexer.PRIVATE,
+                         JavaLexer.PROTECTED, JavaLexer.STATIC, JavaLexer.STRICTFP)
+
+# Lookup tables of the token types
+_IS_KEYWORD = np.zeros(_NUMBER_OF_TYPES, dtype=bool)
+_IS_KEYWORD[_KEYWORD_TYPES] = True
+_IS_OPERATOR = np.zeros(_NUMBER_OF_TYPES, dtype=bool)
+_IS_OPERATOR[_OPERATOR_TYPES] = True
+
+# Lexeme texts counted by the statement metrics, in the order of _TEXT_GROUPS_METRICS
+_TEXT_GROUPS = [
+    ['return', 'print', 'printf', 'println', 'write', 'writeln'],
+    ['if', 'for', 'while', 'switch', '?', 'assert', ],
+    ['break', 'continue', ],
+    ['try', 'catch', 'throw', 'throws', 'finally', ],
+    ['new'],
+    ['super'],
+    ['.'],
+    [';'],
+]
+_TEXT_GROUPS_METRICS = [
+    'NumberOfReturnAndPrintStatements',
+    'NumberOfConditionalJumpStatements',
+    'NumberOfUnConditionalJumpStatements',
+    'NumberOfExceptionStatements',
+    'NumberOfNewStatements',
+    'NumberOfSuperStatements',
+    'NumberOfDots',
+    'NumberOfSemicolons',
+]
+
+
+class LexicalMetrics:
+    """
+
+    Lexes the source files once and computes the class lexicon metrics of all classes on token arrays
+
+    """
+
+    def __init__(self):
+        # Token text -> text id, shared by all files
+        self.vocabulary = dict()
+        # Text id -> index of its group in _TEXT_GROUPS (the last index for the other texts)
+        self._text_groups = []
+        for group_index, texts in enumerate(_TEXT_GROUPS):
+            for text in texts:
+                self._text_id(text)
+                self._text_groups[-1] = group_index
+        # Class long name -> class lexicon metrics dict
+        self.classes = dict()
+
+    @classmethod
+    def from_files(cls, java_files):
+        lexical_metrics = cls()
+        for java_file in java_files:
+            lexical_metrics.add_file(java_file)
+        return lexical_metrics
+
+    def _text_id(self, text):
+        text_id = self.vocabulary.get(text)
+        if text_id is None:
+            text_id = len(self.vocabulary)
+            self.vocabulary[text] = text_id
+            self._text_groups.append(len(_TEXT_GROUPS))
+        return text_id
+
+    def add_file(self, java_file):
+        """
+        Lexes a source file and computes the lexicon metrics of its classes
+
+        Returns:
+
+            list: The long names of the classes of the file
+
+        """
+
+        stream = FileStream(java_file, encoding='utf8', errors='ignore')
+        persistent_cache = get_persistent_cache()
+        if persistent_cache is None:
+            token_stream = CommonTokenStream(JavaLexer(stream))
+        else:
+            token_stream = persistent_cache.get_token_stream(stream, JavaLexer)
+        token_stream.fill()
+        tokens = [token for token in token_stream.tokens if token.type != Token.EOF]
+        lexemes, lexeme_starts = self.get_lexemes(tokens)
+        types = np.fromiter((type_ for type_, _ in lexemes), dtype=np.int32, count=len(lexemes))
+        text_ids = np.fromiter((self._text_id(text) for _, text in lexemes), dtype=np.int32, count=len(lexemes))
+
+        class_ranges = self.find_class_ranges(tokens)
+        text_groups = np.array(self._text_groups, dtype=np.int32)
+        for class_longname, start, stop in class_ranges:
+            start, stop = lexeme_starts[start], lexeme_starts[stop + 1]
+            self.classes[class_longname] = self._compute_metrics(types[start:stop], text_ids[start:stop], text_groups)
+        return [class_longname for class_longname, _, _ in class_ranges]
+
+    @staticmethod
+    def get_lexemes(tokens):
+        """
+        Maps the tokens of the lexer to the lexemes of the understand lexer
+
+        Returns:
+
+            tuple: The (token type, text) of the lexemes, and the index of the first lexeme of each token
+            (and of the end of the file)
+
+        """
+
+        lexemes = []
+        lexeme_starts = []
+        previous_token = None
+        for token in tokens:
+            lexeme_starts.append(len(lexemes))
+            if token.type == JavaLexer.WS:
+                lexemes.extend((token.type, text) for text in _WHITESPACE_PATTERN.findall(token.text))
+            elif token.type in _SHIFT_LENGTHS and previous_token is not None and \
+                    previous_token.type == token.type and previous_token.stop + 1 == token.start and \
+                    len(lexemes[-1][1]) < _SHIFT_LENGTHS[token.type]:
+                # The second (and third) '>' of a shift operator, e.g., '>>' in 'List<List<T>>'
+                lexeme_starts[-1] -= 1
+                lexemes[-1] = (token.type, lexemes[-1][1] + token.text)
+            else:
+                lexemes.append((token.type, token.text))
+            previous_token = token
+        lexeme_starts.append(len(lexemes))
+        return lexemes, lexeme_starts
+
+    @staticmethod
+    def find_class_ranges(tokens):
+        """
+        Finds the class, interface, and enum declarations by their keywords and matching braces
+
+        Returns:
+
+            list: (class long name, first token index, last token index) of the classes in the file
+
+        """
+
+        default_tokens = [(i, token) for i, token in enumerate(tokens) if token.channel == Token.DEFAULT_CHANNEL]
+        package_name = None
+        class_ranges = []
+        # For each open brace, the (class name, first token index) of its class, or None
+        braces = []
+        pending_class = None
+        for k, (i, token) in enumerate(default_tokens):
+            if token.type == JavaLexer.PACKAGE and package_name is None and not braces:
+                names = []
+                for _, next_token in default_tokens[k + 1:]:
+                    if next_token.type == JavaLexer.SEMI:
+                        break
+                    names.append(next_token.text)
+                package_name = ''.join(names)
+            elif token.type in _CLASS_KEYWORD_TYPES and k + 1 < len(default_tokens):
+                # Ignore class literals, e.g., Foo.class
+                if k > 0 and default_tokens[k - 1][1].type == JavaLexer.DOT:
+                    continue
+                if default_tokens[k + 1][1].type != JavaLexer.IDENTIFIER:
+                    continue
+                first = k
+                if first > 0 and default_tokens[first - 1][1].type == JavaLexer.AT:  # Annotation types
+                    first -= 1
+                while first > 0 and default_tokens[first - 1][1].type in _CLASS_MODIFIER_TYPES:
+                    first -= 1
+                pending_class = (default_tokens[k + 1][1].text, default_tokens[first][0])
+            elif token.type == JavaLexer.LBRACE:
+                braces.append(pending_class)
+                pending_class = None
+            elif token.type == JavaLexer.RBRACE and braces:
+                class_ = braces.pop()
+                if class_ is not None:
+                    names = [package_name] if package_name else []
+                    names.extend(brace[0] for brace in braces if brace is not None)
+                    names.append(class_[0])
+                    class_ranges.append(('.'.join(names), class_[1], i))
+        return class_ranges
+
+    @staticmethod
+    def _compute_metrics(types, text_ids, text_groups) -> dict:
+        is_identifier = types == JavaLexer.IDENTIFIER
+        is_keyword = _IS_KEYWORD[types]
+        is_operator = _IS_OPERATOR[types]
+        is_assignment = types == JavaLexer.ASSIGN
+        group_counts = np.bincount(text_groups[text_ids], minlength=len(_TEXT_GROUPS) + 1)
+
+        number_of_operators = int(is_operator.sum())
+        number_of_assignments = int(is_assignment.sum())
+        class_lexicon_metrics_dict = {
+            'NumberOfTokens': int(types.size),
+            'NumberOfUniqueTokens': int(np.unique(text_ids).size),
+            'NumberOfIdentifies': int(is_identifier.sum()),
+            'NumberOfUniqueIdentifiers': int(np.unique(text_ids[is_identifier]).size),
+            'NumberOfKeywords': int(is_keyword.sum()),
+            'NumberOfUniqueKeywords': int(np.unique(text_ids[is_keyword]).size),
+            'NumberOfAssignments': number_of_assignments,
+            'NumberOfOperatorsWithoutAssignments': number_of_operators - number_of_assignments,
+            'NumberOfUniqueOperators': int(np.unique(text_ids[is_operator & ~is_assignment]).size),
+        }
+        for metric_name, count in zip(_TEXT_GROUPS_METRICS, group_counts.tolist()):
+            class_lexicon_metrics_dict[metric_name] = count
+        return {metric_name: class_lexicon_metrics_dict[metric_name]
+                for metric_name in metrics_names.class_lexicon_metrics_names}
+
+    def get_class_metrics(self, class_longname):
+        """
+        Returns the class lexicon metrics of a class, or None if the class is not found in the lexed files
+        """
+        return self.classes.get(class_longname)
@@ -4,6 +4,18 @@ This module contains modularity measurement script at package-level
 to be used in refactoring process in addition to QMOOD metrics
 
 ## Changelog
+### v0.3.3
+- Apply the Move Method and Move Field refactorings to the incremental modularity by re-reading the dependencies
+of their source, target, and dependent classes only
+### v0.3.2
+- Build the baseline graph of each project copy explicitly (build_baseline_graph)
+- Exclude the nested classes from the incremental modularity graph, as the MDG-based Modularity does
+### v0.3.1
+- Import networkx only in the MDG-based Modularity, the incremental modularity does not need it
+### v0.3.0
+- Add the in-process incremental modularity (IncrementalModularity), without exporting MDG.csv
+### v0.2.2
+- Find the packages of classes on the database of a shared evaluation session
 ### v0.2.1
 - Improve performance
 - Improve accuracy
@@ -17,28 +29,25 @@ to be used in refactoring process in addition to QMOOD metrics
 
 """
 
-__version__ = '0.2.1'
+__version__ = '0.3.3'
 __author__ = 'Morteza Zakeri'
 
 import os
-import re
 import time
 from collections import defaultdict
 
 import pandas
-import networkx as nx
-import networkx.algorithms.community as nx_comm
-
-import understand
 
 from sbse import config
 from codart.utility.directory_utils import export_understand_dependencies_csv
+from metrics.evaluation_session import EvaluationSession
 
 
 class Modularity:
-    def __init__(self, graph_path, project_db_path, **kwargs):
+    def __init__(self, graph_path, project_db_path, session: EvaluationSession = None, **kwargs):
         self.mdg_df = pandas.read_csv(graph_path)
         self.project_db_path = project_db_path
+        self.session = session
         # Delete nested classes
         # Dropping the rows of "(" or ")"
         # print('Before delete nested classes', self.mdg_df.shape)
@@ -48,6 +57,7 @@ class Modularity:
         self.class_package_dict = dict()
         self.create_class_package_dict()
 
+        import networkx as nx
         self.mdg_graph = nx.from_pandas_edgelist(
             self.mdg_df, source='From Class',
             target='To Class',
@@ -63,27 +73,20 @@ class Modularity:
         # print(len(classes), )
         # print(classes)
         # print(self.mdg_df.shape)
-        db = understand.open(self.project_db_path)
+        session = self.session
+        if session is None:
+            session = EvaluationSession(self.project_db_path, materialize=False).open()
         for class_longname in classes:
             # print('Processing ',class_longname )
-            class_longname2 = class_longname.replace('$', '.')
-            entities = db.lookup(re.compile(class_longname2 + r'$'), )
-            if entities is None or len(entities) == 0:  # Nested classes
+            package = session.get_class_package(class_longname)
+            if package is None:  # Nested classes
                 self.mdg_df = self.mdg_df[~self.mdg_df["From Class"].str.contains(class_longname)]
                 self.mdg_df = self.mdg_df[~self.mdg_df["To Class"].str.contains(class_longname)]
                 # print('Removed rows with class', class_longname, self.mdg_df.shape)
             else:
-                class_entity = entities[0]
-                package_list = class_entity.ents('Containin', 'Java Package')
-                while not package_list and class_entity.parent() is not None:
-                    package_list = class_entity.parent().ents('Containin', 'Java Package')
-                    class_entity = class_entity.parent()
-                # print(package_list)
-                if len(package_list) < 1:
-                    self.class_package_dict.update({class_longname: 'default'})
-                else:
-                    self.class_package_dict.update({class_longname: package_list[0].longname()})
-        db.close()
+                self.class_package_dict.update({class_longname: package})
+        if self.session is None:
+            session.close()
 
     def compute_modularity_newman_leicht(self, ):
         """
@@ -93,6 +96,7 @@ class Modularity:
 
         :return:
         """
+        import networkx.algorithms.community as nx_comm
         q = 0
         if self.mdg_graph is not None and self.mdg_graph.number_of_edges() > 0:
             # communities = {v: k for k, v in self.class_package_dict.items()}
@@ -104,14 +108,317 @@ class Modularity:
         return q
 
 
+class IncrementalModularity:
+    """
+    In-process class dependency graph with the per-package aggregates of the directed Newman modularity:
+
+        Q = sum_c (L_c / m - out_c * in_c / m^2)
+
+    where L_c is the number of dependencies inside package c, out_c and in_c are the sums of out- and in-degrees
+    of the classes in package c, and m is the number of dependencies.
+    It returns the same Q as `Modularity.compute_modularity_newman_leicht` (unweighted networkx modularity),
+    on the same classes: the nested classes (enclosed in a class or a method) are not in the graph.
+    It updates Q with a delta-Q bookkeeping in O(degree) when a class moves between packages or
+    a dependency is added or removed.
+
+    """
+
+    class_filter = "Java Class ~Unknown ~Unresolved ~Jar ~Library ~Anonymous ~TypeVariable, " \
+                   "Java Interface ~Unknown ~Unresolved ~Jar ~Library"
+
+    def __init__(self, dependencies=(), class_package_dict=None):
+        """
+        :param dependencies: Iterable of (from class, to class) pairs
+        :param class_package_dict: Class long name to package long name
+        """
+        self.class_package = dict(class_package_dict or {})
+        self.successors = defaultdict(set)
+        self.predecessors = defaultdict(set)
+        self.m = 0
+        self.internal_dependencies = defaultdict(int)
+        self.out_degrees = defaultdict(int)
+        self.in_degrees = defaultdict(int)
+        self._sum_internal = 0
+        self._sum_out_in = 0
+        for from_class, to_class in dependencies:
+            self.add_dependency(from_class, to_class)
+
+    @staticmethod
+    def is_nested_class(class_entity):
+        """
+        Whether a class is enclosed in another class or a method (e.g., local and anonymous classes).
+        The MDG-based Modularity drops these classes, since their long names contain "(" or ")",
+        or they are not found by their long names in the database.
+        """
+        if ')' in class_entity.longname():
+            return True
+        parent = class_entity.parent()
+        return parent is not None and not parent.kind().check('Java File, Java Package')
+
+    @classmethod
+    def from_database(cls, db):
+        """
+        Builds the class dependency graph of the project from the dependencies of the top-level class entities
+        """
+        class_entities = {ent.id(): ent for ent in db.ents(cls.class_filter) if not cls.is_nested_class(ent)}
+        class_package_dict = {
+            ent.longname(): EvaluationSession.get_entity_package(ent) for ent in class_entities.values()
+        }
+        dependencies = []
+        for ent in class_entities.values():
+            for dependency_entity in ent.depends().keys():
+                if dependency_entity.id() in class_entities:
+                    dependencies.append((ent.longname(), dependency_entity.longname()))
+        return cls(dependencies, class_package_dict)
+
+    def copy(self):
+        other = IncrementalModularity(class_package_dict=self.class_package)
+        for class_longname, successors in self.successors.items():
+            other.successors[class_longname] = set(successors)
+        for class_longname, predecessors in self.predecessors.items():
+            other.predecessors[class_longname] = set(predecessors)
+        other.m = self.m
+        other.internal_dependencies.update(self.internal_dependencies)
+        other.out_degrees.update(self.out_degrees)
+        other.in_degrees.update(self.in_degrees)
+        other._sum_internal = self._sum_internal
+        other._sum_out_in = self._sum_out_in
+        return other
+
+    @property
+    def q(self):
+        if self.m == 0:
+            return 0.
+        return self._sum_internal / self.m - self._sum_out_in / self.m ** 2
+
+    def _package(self, class_longname):
+        return self.class_package.setdefault(class_longname, 'default')
+
+    def _update_degrees(self, package, out_delta, in_delta):
+        self._sum_out_in -= self.out_degrees[package] * self.in_degrees[package]
+        self.out_degrees[package] += out_delta
+        self.in_degrees[package] += in_delta
+        self._sum_out_in += self.out_degrees[package] * self.in_degrees[package]
+
+    def add_dependency(self, from_class, to_class):
+        if to_class in self.successors[from_class]:
+            return
+        self.successors[from_class].add(to_class)
+        self.predecessors[to_class].add(from_class)
+        self.m += 1
+        self._update_degrees(self._package(from_class), 1, 0)
+        self._update_degrees(self._package(to_class), 0, 1)
+        if self._package(from_class) == self._package(to_class):
+            self.internal_dependencies[self._package(from_class)] += 1
+            self._sum_internal += 1
+
+    def remove_dependency(self, from_class, to_class):
+        if to_class not in self.successors[from_class]:
+            return
+        self.successors[from_class].discard(to_class)
+        self.predecessors[to_class].discard(from_class)
+        self.m -= 1
+        self._update_degrees(self._package(from_class), -1, 0)
+        self._update_degrees(self._package(to_class), 0, -1)
+        if self._package(from_class) == self._package(to_class):
+            self.internal_dependencies[self._package(from_class)] -= 1
+            self._sum_internal -= 1
+
+    def set_successors(self, class_longname, successors):
+        """
+        Replaces the dependencies of a class and updates Q incrementally
+        """
+        for to_class in self.successors[class_longname] - successors:
+            self.remove_dependency(class_longname, to_class)
+        for to_class in successors - self.successors[class_longname]:
+            self.add_dependency(class_longname, to_class)
+
+    def update_from_database(self, db, class_longnames, db_longnames=None):
+        """
+        Re-reads the dependencies of some classes from the database, instead of rebuilding the graph
+
+        :param db: The understand database of the refactored project
+        :param class_longnames: The classes whose dependencies are changed
+        :param db_longnames: Class long name in the graph to its long name in the database, for the moved classes
+        :return: False if a class is not found in the database
+        """
+        db_longnames = db_longnames or {}
+        graph_longnames = {db_longnames.get(class_longname, class_longname): class_longname
+                           for class_longname in self.class_package}
+        class_entities = {ent.longname(): ent for ent in db.ents(self.class_filter)}
+        for class_longname in class_longnames:
+            ent = class_entities.get(db_longnames.get(class_longname, class_longname))
+            if ent is None:
+                return False
+            self.set_successors(class_longname, {
+                graph_longnames[dependency_entity.longname()] for dependency_entity in ent.depends().keys()
+                if dependency_entity.longname() in graph_longnames
+            })
+        return True
+
+    def move_class(self, class_longname, target_package):
+        """
+        Moves a class to another package and updates Q incrementally (delta-Q)
+        """
+        source_package = self._package(class_longname)
+        if source_package == target_package:
+            return
+        successors = self.successors[class_longname]
+        predecessors = self.predecessors[class_longname]
+        self_dependency = 1 if class_longname in successors else 0
+        source_dependencies, target_dependencies = self_dependency, self_dependency
+        for other in successors | predecessors:
+            if other == class_longname:
+                continue
+            weight = (other in successors) + (other in predecessors)
+            if self.class_package.get(other) == source_package:
+                source_dependencies += weight
+            elif self.class_package.get(other) == target_package:
+                target_dependencies += weight
+
+        self.internal_dependencies[source_package] -= source_dependencies
+        self.internal_dependencies[target_package] += target_dependencies
+        self._sum_internal += target_dependencies - source_dependencies
+        self._update_degrees(source_package, -len(successors), -len(predecessors))
+        self._update_degrees(target_package, len(successors), len(predecessors))
+        self.class_package[class_longname] = target_package
+
+    def find_class(self, package, class_name):
+        """
+        Returns the long name of a class in the graph by its package and simple name
+        """
+        if package in (None, '', '(Unnamed_Package)', 'default'):
+            class_longname = class_name
+        else:
+            class_longname = f'{package}.{class_name}'
+        return class_longname if class_longname in self.class_package else None
+
+
+# Refactoring operations which do not change the class dependency graph nor the packages of classes
+DEPENDENCY_PRESERVING_REFACTORINGS = frozenset((
+    'Increase Field Visibility', 'Increase Method Visibility',
+    'Decrease Field Visibility', 'Decrease Method Visibility',
+))
+
+# Refactoring operations which move a member between two classes:
+# only the source class, the target class, and the users of the member (which depend on the source class) change
+MEMBER_MOVING_REFACTORINGS = frozenset(('Move Method', 'Move Field'))
+
+# Understand database path -> IncrementalModularity of the project before applying any refactoring.
+# Each project copy (the main project and the copy of each evaluation worker) has its own database and baseline.
+_BASELINE_GRAPHS = {}
+
+
+def _baseline_key(project_db_path):
+    return os.path.normcase(os.path.abspath(project_db_path))
+
+
+def build_baseline_graph(project_db_path, session: EvaluationSession = None):
+    """
+    Builds the graph of a project copy at its baseline, i.e., the start point of its incremental modularity.
+    It must be called when the project is restored and its understand database is up-to-date.
+
+    :param project_db_path: The understand database path of the project copy
+    :param session: An open evaluation session on the database
+    :return: The baseline IncrementalModularity
+    """
+    if session is None or session.db is None:
+        with EvaluationSession(project_db_path, materialize=False) as session_:
+            graph = IncrementalModularity.from_database(session_.db)
+    else:
+        graph = IncrementalModularity.from_database(session.db)
+    _BASELINE_GRAPHS[_baseline_key(project_db_path)] = graph
+    return graph
+
+
+def has_baseline_graph(project_db_path):
+    return _baseline_key(project_db_path) in _BASELINE_GRAPHS
+
+
+def _open_database_graph(project_db_path, session, update):
+    if session is None or session.db is None:
+        with EvaluationSession(project_db_path, materialize=False) as session_:
+            return update(session_.db)
+    return update(session.db)
+
+
+def incremental_modularity(project_db_path, session: EvaluationSession = None, refactoring_operations=None):
+    """
+    Computes the modularity in-process, incrementally from the baseline graph if the refactoring operations
+    only move classes, methods, and fields, otherwise from the dependencies in the understand database.
+    The class moves are applied by delta-Q, and the dependencies of the source, target, and dependent classes of
+    the method and field moves are re-read from the database.
+
+    :param project_db_path: The understand database path
+    :param session: The evaluation session shared with the other objectives
+    :param refactoring_operations: The refactoring operations applied on the project since its baseline,
+    or None if they are unknown
+    :return: Q of the current design
+    """
+    graph = None
+    baseline_graph = _BASELINE_GRAPHS.get(_baseline_key(project_db_path))
+    if refactoring_operations is not None and baseline_graph is not None:
+        graph = baseline_graph.copy()
+        # Long name in the database -> long name in the graph, and the reverse, of the moved classes
+        graph_longnames = {}
+        db_longnames = {}
+        changed_classes = set()
+
+        def find_class(package, class_name):
+            class_longname = graph.find_class(package, class_name)
+            if class_longname is None:
+                class_longname = graph_longnames.get(f'{package}.{class_name}' if package else class_name)
+            return class_longname
+
+        for refactoring_operation in refactoring_operations:
+            if refactoring_operation.name in DEPENDENCY_PRESERVING_REFACTORINGS:
+                continue
+            params = refactoring_operation.params
+            if refactoring_operation.name == 'Move Class':
+                class_longname = find_class(params.get('source_package'), params.get('class_name'))
+                if class_longname is None:
+                    graph = None
+                    break
+                target_package = params.get('target_package')
+                graph.move_class(class_longname, target_package)
+                db_longname = f'{target_package}.{params.get("class_name")}' if target_package \
+                    else params.get('class_name')
+                graph_longnames[db_longname] = class_longname
+                db_longnames[class_longname] = db_longname
+            elif refactoring_operation.name in MEMBER_MOVING_REFACTORINGS:
+                source_class = find_class(params.get('source_package'), params.get('source_class'))
+                target_class = find_class(params.get('target_package'), params.get('target_class'))
+                if source_class is None or target_class is None:
+                    graph = None
+                    break
+                changed_classes.update((source_class, target_class))
+                changed_classes.update(graph.predecessors[source_class])
+            else:
+                graph = None
+                break
+
+        if graph is not None and changed_classes and not _open_database_graph(
+                project_db_path, session, lambda db: graph.update_from_database(db, changed_classes, db_longnames)):
+            graph = None
+
+    if graph is None:
+        graph = _open_database_graph(project_db_path, session, IncrementalModularity.from_database)
+    return graph.q
+
+
 # Modularity API
-def main(project_db_path=None, initial_value=1.0):
+def main(project_db_path=None, initial_value=1.0, session: EvaluationSession = None, refactoring_operations=None):
     """
     A demo of using modularity module to measure modularity quality attribute based on graph-analysis
     """
 
+    if config.INCREMENTAL_MODULARITY:
+        q = incremental_modularity(project_db_path, session=session, refactoring_operations=refactoring_operations)
+        return round(q / initial_value, 5)
+
     # csv_path = os.path.abspath('../metrics/mdg/MDG.csv')
-    csv_path = os.path.join(os.path.dirname(__file__), 'mdg/MDG.csv')
+    # Each process exports its own graph since evaluation workers may compute modularity at the same time
+    csv_path = os.path.join(os.path.dirname(__file__), f'mdg/MDG_{os.getpid()}.csv')
     export_understand_dependencies_csv(
         csv_path=csv_path,
         db_path=project_db_path
@@ -121,7 +428,7 @@ def main(project_db_path=None, initial_value=1.0):
 
     if not os.path.exists(csv_path):
         return initial_value
-    modulo = Modularity(graph_path=csv_path, project_db_path=project_db_path)
+    modulo = Modularity(graph_path=csv_path, project_db_path=project_db_path, session=session)
     q = modulo.compute_modularity_newman_leicht()
     os.remove(csv_path)
     return round(q / initial_value, 5)
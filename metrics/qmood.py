@@ -6,14 +6,23 @@ to be used as six objectives in search-based refactoring
 [1] J. Bansiya and C. G. Davis, “A hierarchical model for object-oriented design quality assessment,”
 IEEE Trans. Softw. Eng., vol. 28, no. 1, pp. 4–17, 2002.
 
+## Changelog
+### v0.5.0
+- Add QMOODEngine, computing all design metrics in a single pass over a class feature matrix
+### v0.4.0
+- Compute the design metrics on the class records of a shared evaluation session
+
 """
 
-__version__ = '0.3.0'
+__version__ = '0.5.0'
 __author__ = 'Morteza Zakeri'
 
 
+import numpy
+import pandas
 import understand as und
 
+from metrics.evaluation_session import EvaluationSession, ClassRecord
 from sbse import config
 
 
@@ -35,13 +44,20 @@ class DesignMetrics:
 
     """
 
-    def __init__(self, udb_path):
+    def __init__(self, udb_path, session: EvaluationSession = None):
+        """
+        :param udb_path: The understand database path
+        :param session: The evaluation session shared with the other objectives, if None a session is opened
+        """
         self.udb_path = udb_path
+        if session is None:
+            # The class records are materialized, so the database is not required after opening the session
+            session = EvaluationSession(udb_path).open()
+            session.close()
+        self.session = session
 
-        filter1 = "Java Class ~TypeVariable ~Anonymous ~Enum, Java Interface"
-        filter3 = "Java Class ~Unresolved ~Unknown ~TypeVariable ~Anonymous ~Enum ~Jar ~Library ~Standard, Java Interface"
-        self.all_classes = self.get_classes_simple_names(filter1)
-        self.user_defined_classes = self.get_classes_simple_names(filter3)
+        self.all_classes = session.all_classes
+        self.user_defined_classes = session.user_defined_classes
 
     def __del__(self):
         # self.db.close()
@@ -65,20 +81,12 @@ class DesignMetrics:
         :return: Total number of 'root' classes in the design.
         """
         count = 0
-        dbx: und.Db = und.open(self.udb_path)
-        filter2 = "Java Class ~Unresolved ~Unknown ~TypeVariable ~Anonymous ~Enum, Java Interface"
-        known_class_entities = dbx.ents(filter2)
-        for ent in known_class_entities:
-            is_tree = False
-            for ref in ent.refs("Coupleby Extendby, Coupleby Implementby"):
-                if ref:
-                    is_tree = True
-                    break
-            mit = ent.metric(['MaxInheritanceTree'])['MaxInheritanceTree']
-            if ("Interface" in ent.kindname() or mit == 1) and is_tree:
+        for class_record in self.session.classes:
+            if not class_record.is_known:
+                continue
+            mit = class_record.metrics['MaxInheritanceTree']
+            if (class_record.is_interface or mit == 1) and class_record.has_descendants:
                 count += 1
-
-        dbx.close()
         return count
 
     @property
@@ -89,17 +97,10 @@ class DesignMetrics:
         :return: Average number of classes in the inheritance tree for each class
         """
         MITs = []
-        dbx: und.Db = und.open(self.udb_path)
-        filter2 = "Java Class ~Unresolved ~Unknown ~TypeVariable ~Anonymous ~Enum, Java Interface"
-        known_class_entities = dbx.ents(filter2)
-
-        for class_entity in known_class_entities:
-            if "Interface" in class_entity.kindname():
+        for class_record in self.session.classes:
+            if not class_record.is_known or class_record.is_interface:
                 continue
-            mit = class_entity.metric(['MaxInheritanceTree'])['MaxInheritanceTree']
-            MITs.append(mit)
-
-        dbx.close()
+            MITs.append(class_record.metrics['MaxInheritanceTree'])
         return sum(MITs) / len(MITs)
 
     @property
@@ -174,37 +175,31 @@ class DesignMetrics:
         """
         return self.get_class_average(self.NOP_class_level)
 
-    def MOA_class_level(self, class_entity: und.Ent):
+    def MOA_class_level(self, class_record: ClassRecord):
         """
         MOA - Class Level Measure of Aggregation
-        :param class_entity: The class entity.
+        :param class_record: The class record.
         :return: Count of number of attributes whose type is user defined class(es).
         """
         counter = 0
-        for ref in class_entity.refs("Define, Typed, Set, Create", "Java Variable, Parameter"):
-            if ref.ent().type() in self.user_defined_classes:
+        for type_ in class_record.aggregation_types:
+            if type_ in self.user_defined_classes:
                 counter += 1
-        filter_ = "Method ~Unknown ~Jar ~Library ~Constructor ~Implicit ~Lambda ~External"
-        for ref in class_entity.refs("Define, Typed, Set, Create", filter_):
-            for ref2 in ref.ent().refs("Define, Typed, Set, Create", "Java Variable ~Unknown, Java Parameter"):
-                if ref2.ent().type() in self.user_defined_classes:
-                    counter += 1
-
         return counter
 
-    def DAM_class_level(self, class_entity: und.Ent):
+    def DAM_class_level(self, class_record: ClassRecord):
         """
         DAM - Class Level Direct Access Metric
-        :param class_entity: The class entity.
+        :param class_record: The class record.
         :return: Ratio of the number of private and protected attributes to the total number of attributes in a class.
         """
-        if "Interface" in class_entity.kindname():
+        if class_record.is_interface:
             return 2.0
 
-        private_variables = len(class_entity.ents("Define", "Java Variable Private Member"))
-        protected_variables = len(class_entity.ents("Define", "Java Variable Protected Member"))
-        default_variables = len(class_entity.ents("Define", "Java Variable Default Member"))
-        public_variables = len(class_entity.ents("Define", "Java Variable Public Member"))
+        private_variables = class_record.variable_visibilities['Private']
+        protected_variables = class_record.variable_visibilities['Protected']
+        default_variables = class_record.variable_visibilities['Default']
+        public_variables = class_record.variable_visibilities['Public']
 
         try:
             enum_ = private_variables + protected_variables
@@ -215,145 +210,99 @@ class DesignMetrics:
             ratio = 2.0
         return 1. + ratio
 
-    def CAMC_class_level(self, class_entity: und.Ent):
+    def CAMC_class_level(self, class_record: ClassRecord):
         """
         CAMC - Class Level Cohesion Among Methods of class
         Measures of how related methods are in a class in terms of used parameters.
         It can also be computed by: 1 - LackOfCohesionOfMethods()
-        :param class_entity: The class entity.
+        :param class_record: The class record.
         :return:  A float number between 0 (1) and 1 (2).
         """
-        if "Interface" in class_entity.kindname():
+        if class_record.is_interface:
             return 2.
 
-        percentage = class_entity.metric(['PercentLackOfCohesion']).get('PercentLackOfCohesion', 0)
-
-        if percentage is None:
-            percentage = 0
+        percentage = class_record.metric('PercentLackOfCohesion')
         cohesion_ = 1. - (percentage / 100.)
-        # print(class_entity.longname(), cohesion_)
         return 1. + round(cohesion_, 5)
 
-    def CIS_class_level(self, class_entity: und.Ent):
+    def CIS_class_level(self, class_record: ClassRecord):
         """
         CIS - Class Level Class Interface Size
-        :param class_entity: The class entity
+        :param class_record: The class record
         :return: Number of public methods in class
         """
-        if "Interface" in class_entity.kindname():
-            value = class_entity.metric(['CountDeclMethodAll']).get('CountDeclMethodAll', 0)
+        if class_record.is_interface:
+            value = class_record.metric('CountDeclMethodAll', 0.)
         else:
-            value = class_entity.metric(['CountDeclMethodPublic']).get('CountDeclMethodPublic', 0)
-            # public_methods = len(class_entity.ents("Define", "Java Method Public Member"))
-
-        if value is None:
-            value = 0.
-        # print(class_entity.longname(), value)
+            value = class_record.metric('CountDeclMethodPublic', 0.)
         return value
 
-    def NOM_class_level(self, class_entity: und.Ent):
+    def NOM_class_level(self, class_record: ClassRecord):
         """
         NOM - Class Level Number of Methods (WMC)
-        :param class_entity: The class entity
+        :param class_record: The class record
         :return: Number of methods declared in a class.
         """
-        if class_entity is not None:
-            # print(class_entity.metric(['CountDeclMethod']).get('CountDeclMethod', 0))
-            # kind_filter = 'Java Method ~Unknown ~Unresolved ~Jar ~Library ~Constructor ~Implicit ~Lambda ~External'
-            # method_list = class_entity.ents('Define', kind_filter)
-            # counter = 0
-            # for method_ in method_list:
-            #     if method_.metric(['Cyclomatic']).get('Cyclomatic', 0) > 1:
-            #         counter += 1
-            # return counter
-            if "Interface" in class_entity.kindname():
+        if class_record is not None:
+            if class_record.is_interface:
                 return 0
-            # wmc = class_entity.metric(['SumCyclomatic']).get('SumCyclomatic', 0)
-            wmc2 = class_entity.metric(['SumCyclomaticModified']).get('SumCyclomaticModified', 0)
-            # print(class_entity.longname(), wmc, wmc2)
+            wmc2 = class_record.metrics.get('SumCyclomaticModified', 0)
             return wmc2
         return 0
 
-    def DCC_class_level(self, class_entity: und.Ent):
+    def DCC_class_level(self, class_record: ClassRecord):
         """
         DCC - Class Level Direct Class Coupling
-        :param class_entity: The class entity
+        :param class_record: The class record
         :return: Number of other classes a class relates to, either through a shared attribute or
         a parameter in a method.
         """
-        others = list()
-        if "Interface" in class_entity.kindname():
+        if class_record.is_interface:
             return 0
+        others = {type_ for type_ in class_record.coupling_types if type_ in self.all_classes}
+        return len(others)
 
-        for ref in class_entity.refs("Define", "Variable"):
-            if ref.ent().type() in self.all_classes:
-                others.append(ref.ent().type())
-
-        kind_filter = "Method ~Unknown ~Jar ~Library ~Constructor ~Implicit ~Lambda ~External"
-        for ref in class_entity.refs("Define", kind_filter):
-            for ref2 in ref.ent().refs("Java Define", "Java Parameter"):
-                if ref2.ent().type() in self.all_classes:
-                    others.append(ref2.ent().type())
-
-        for ref in class_entity.refs("Define", kind_filter):
-            for ref2 in ref.ent().refs("Java Use Return"):
-                if ref2.ent().type() in self.all_classes:
-                    others.append(ref2.ent().type())
-
-        return len(set(others))
-
-    def MFA_class_level(self, class_entity: und.Ent):
+    def MFA_class_level(self, class_record: ClassRecord):
         """
         MFA - Class Level Measure of Functional Abstraction
-        :param class_entity: The class entity
+        :param class_record: The class record
         :return: Ratio of the number of inherited methods per the total number of methods within a class.
         """
-        metrics = class_entity.metric(['CountDeclMethod', 'CountDeclMethodAll'])
-        local_methods = metrics.get('CountDeclMethod')
-        all_methods = metrics.get('CountDeclMethodAll')
-        # print(class_entity.longname(), metrics)
+        local_methods = class_record.metrics.get('CountDeclMethod')
+        all_methods = class_record.metrics.get('CountDeclMethodAll')
 
-        if "Interface" in class_entity.kindname():
+        if class_record.is_interface:
             return 2.
         else:
-            implemented_interfaces = class_entity.ents('Java Implement Couple', '~Unknown')
-            if len(implemented_interfaces) == 0:
+            if len(class_record.implemented_interfaces_methods) == 0:
                 if all_methods == 0:
                     mfa = 0
                 else:
-                     mfa = round((all_methods - local_methods) / all_methods, 5)
+                    mfa = round((all_methods - local_methods) / all_methods, 5)
             else:
-                implemented_methods = 0
-                for interface_entity in implemented_interfaces:
-                    implemented_methods += interface_entity.metric(['CountDeclMethodAll']).get('CountDeclMethodAll', 0)
+                implemented_methods = sum(class_record.implemented_interfaces_methods)
                 mfa = round((all_methods - implemented_methods) / all_methods, 5)
-        # print(class_entity.longname(), mfa)
         return 1. + mfa if mfa >= 0 else 1
 
-    def NOP_class_level(self, class_entity: und.Ent):
+    def NOP_class_level(self, class_record: ClassRecord):
         """
         NOP - Class Level Number of Polymorphic Methods
         Any method that can be used by a class and its descendants.
-       :param class_entity: The class entity
+        :param class_record: The class record
         :return: Counts of the number of methods in a class excluding private, static and final ones.
         """
-        if "Final" in class_entity.kindname():
+        if "Final" in class_record.kindname:
             return 0
 
-        all_methods = class_entity.metric(['CountDeclMethodAll']).get('CountDeclMethodAll', 0)
-        # private_methods = class_entity.metric(['CountDeclMethodPrivate']).get('CountDeclMethodPrivate', 0)
-        # static_methods = class_entity.metric(['CountDeclClassMethod']).get('CountDeclClassMethod', 0)
-        # final_methods = 0
-        if "Interface" in class_entity.kindname():
+        all_methods = class_record.metrics.get('CountDeclMethodAll', 0)
+        if class_record.is_interface:
             return all_methods
 
         private_or_static_or_final = 0
-        kind_filter = 'Java Method ~Jar ~Library ~Constructor ~Implicit ~Lambda ~External'
-        for ref in class_entity.refs('Define', kind_filter):
-            if "Final" in ref.ent().kindname() or "Private" in ref.ent().kindname() or "Static" in ref.ent().kindname():
+        for kindname in class_record.method_kindnames:
+            if "Final" in kindname or "Private" in kindname or "Static" in kindname:
                 private_or_static_or_final += 1
         number_of_polymorphic_methods = all_methods - private_or_static_or_final
-        # print(class_entity.longname(), number_of_polymorphic_methods)
         return number_of_polymorphic_methods if number_of_polymorphic_methods >= 0 else 0
 
     def get_classes_simple_names(self, filter_string: str = None) -> set:
@@ -369,14 +318,9 @@ class DesignMetrics:
 
     def get_class_average(self, class_level_design_metric):
         scores = []
-        dbx: und.Db = und.open(self.udb_path)
-        filter2 = "Java Class ~Unknown ~TypeVariable ~Anonymous ~Enum, Java Interface"
-        known_class_entities = dbx.ents(filter2)
-        for class_entity in known_class_entities:
-            class_metric = class_level_design_metric(class_entity)
+        for class_record in self.session.classes:
+            class_metric = class_level_design_metric(class_record)
             scores.append(class_metric)
-
-        dbx.close()
         return round(sum(scores) / len(scores), 5)
         # return sum(scores)
 
@@ -388,6 +332,153 @@ class DesignMetrics:
         dbx.close()
 
 
+class QMOODEngine:
+    """
+    Single-pass QMOOD engine, which extracts one row of raw counts per class into a feature matrix,
+    and computes the 11 design metrics with vectorized column operations and normalizes them as a vector.
+    It returns the same numbers as the properties of DesignMetrics and DesignQualityAttributes.
+
+    """
+
+    design_metrics_names = ['DSC', 'NOH', 'ANA', 'MOA', 'DAM', 'CAMC', 'CIS', 'NOM', 'DCC', 'MFA', 'NOP']
+    quality_attributes_names = ['reusability', 'flexibility', 'understandability', 'functionality',
+                                'extendability', 'effectiveness']
+
+    def __init__(self, session: EvaluationSession):
+        self.session = session
+        self.feature_frame = self.create_feature_frame(session)
+
+    @classmethod
+    def create_feature_frame(cls, session: EvaluationSession) -> pandas.DataFrame:
+        """
+        Extracts the raw counts of all class records in a single traversal
+        :param session: The evaluation session holding the class records
+        :return: A data frame with one row per class
+        """
+        user_defined_classes = session.user_defined_classes
+        all_classes = session.all_classes
+        rows = []
+        for class_record in session.classes:
+            private_or_static_or_final = 0
+            for kindname in class_record.method_kindnames:
+                if "Final" in kindname or "Private" in kindname or "Static" in kindname:
+                    private_or_static_or_final += 1
+            rows.append((
+                class_record.is_known,
+                class_record.is_interface,
+                "Final" in class_record.kindname,
+                class_record.has_descendants,
+                class_record.metric('MaxInheritanceTree'),
+                class_record.metric('PercentLackOfCohesion'),
+                class_record.metric('CountDeclMethod'),
+                class_record.metric('CountDeclMethodAll'),
+                class_record.metric('CountDeclMethodPublic'),
+                class_record.metric('SumCyclomaticModified'),
+                sum(1 for type_ in class_record.aggregation_types if type_ in user_defined_classes),
+                class_record.variable_visibilities['Private'] + class_record.variable_visibilities['Protected'],
+                sum(class_record.variable_visibilities.values()),
+                len({type_ for type_ in class_record.coupling_types if type_ in all_classes}),
+                len(class_record.implemented_interfaces_methods),
+                sum(value or 0 for value in class_record.implemented_interfaces_methods),
+                private_or_static_or_final,
+            ))
+        columns = ['is_known', 'is_interface', 'is_final', 'has_descendants',
+                   'MaxInheritanceTree', 'PercentLackOfCohesion', 'CountDeclMethod', 'CountDeclMethodAll',
+                   'CountDeclMethodPublic', 'SumCyclomaticModified',
+                   'aggregations', 'hidden_variables', 'variables', 'coupled_classes',
+                   'implemented_interfaces', 'implemented_methods', 'non_polymorphic_methods']
+        return pandas.DataFrame(rows, columns=columns)
+
+    @staticmethod
+    def _average(values):
+        # Summed in the class order, as the class-level metrics are summed by DesignMetrics.get_class_average
+        return round(sum(values.tolist()) / len(values), 5)
+
+    def raw_design_metrics(self) -> numpy.ndarray:
+        """
+        :return: The vector of the 11 design metrics before normalization
+        """
+        df = self.feature_frame
+        is_known = df['is_known'].to_numpy(dtype=bool)
+        is_interface = df['is_interface'].to_numpy(dtype=bool)
+        is_final = df['is_final'].to_numpy(dtype=bool)
+        mit = df['MaxInheritanceTree'].to_numpy(dtype=float)
+        local_methods = df['CountDeclMethod'].to_numpy(dtype=float)
+        all_methods = df['CountDeclMethodAll'].to_numpy(dtype=float)
+
+        dsc = len(self.session.user_defined_classes)
+        noh = int(numpy.sum(is_known & (is_interface | (mit == 1)) & df['has_descendants'].to_numpy(dtype=bool)))
+        ana = float(numpy.sum(mit[is_known & ~is_interface])) / numpy.sum(is_known & ~is_interface)
+
+        moa = df['aggregations'].to_numpy(dtype=float)
+
+        variables = df['variables'].to_numpy(dtype=float)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            dam = numpy.where(variables == 0, 2.0, df['hidden_variables'].to_numpy(dtype=float) / variables)
+        dam = numpy.where(is_interface, 2.0, 1. + dam)
+
+        cohesion = numpy.round(1. - df['PercentLackOfCohesion'].to_numpy(dtype=float) / 100., 5)
+        camc = numpy.where(is_interface, 2., 1. + cohesion)
+
+        cis = numpy.where(is_interface, all_methods, df['CountDeclMethodPublic'].to_numpy(dtype=float))
+
+        nom = numpy.where(is_interface, 0., df['SumCyclomaticModified'].to_numpy(dtype=float))
+
+        dcc = numpy.where(is_interface, 0., df['coupled_classes'].to_numpy(dtype=float))
+
+        inherited_methods = numpy.where(
+            df['implemented_interfaces'].to_numpy() == 0,
+            all_methods - local_methods,
+            all_methods - df['implemented_methods'].to_numpy(dtype=float)
+        )
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            mfa = numpy.round(inherited_methods / all_methods, 5)
+        mfa = numpy.where((df['implemented_interfaces'].to_numpy() == 0) & (all_methods == 0), 0., mfa)
+        mfa = numpy.where(mfa >= 0, 1. + mfa, 1.)
+        mfa = numpy.where(is_interface, 2., mfa)
+
+        polymorphic_methods = numpy.maximum(all_methods - df['non_polymorphic_methods'].to_numpy(dtype=float), 0)
+        nop = numpy.where(is_interface, all_methods, polymorphic_methods)
+        nop = numpy.where(is_final, 0., nop)
+
+        return numpy.array([
+            dsc, noh, ana,
+            self._average(moa), self._average(dam), self._average(camc), self._average(cis),
+            self._average(nom), self._average(dcc), self._average(mfa), self._average(nop),
+        ], dtype=float)
+
+    def design_metrics(self) -> dict:
+        """
+        :return: The 11 design metrics divided by their initial values (divide_by_initial_value as a vector)
+        """
+        initial_values = numpy.array(
+            [config.CURRENT_METRICS.get(name) for name in self.design_metrics_names], dtype=float
+        )
+        initial_values[initial_values == 0] = 1.
+        values = self.raw_design_metrics() / initial_values
+        return {name: round(float(value), 5) for name, value in zip(self.design_metrics_names, values)}
+
+    def quality_attributes(self, design_metrics: dict = None) -> dict:
+        """
+        :param design_metrics: The normalized design metrics, if None they are computed
+        :return: The six QMOOD quality attributes
+        """
+        if design_metrics is None:
+            design_metrics = self.design_metrics()
+        m = design_metrics
+        # The terms are added in the same order as in DesignQualityAttributes, to get the same rounded values
+        attributes = {
+            'reusability': -0.25 * m['DCC'] + 0.25 * m['CAMC'] + 0.5 * m['CIS'] + 0.5 * m['DSC'],
+            'flexibility': 0.25 * m['DAM'] - 0.25 * m['DCC'] + 0.5 * m['MOA'] + 0.5 * m['NOP'],
+            'understandability': - 0.33 * m['ANA'] + 0.66 * m['DAM'] - 0.33 * m['DCC'] + 0.66 * m['CAMC']
+                                 - 0.33 * m['NOP'] - 0.33 * m['NOM'],
+            'functionality': 0.12 * m['CAMC'] + 0.22 * m['NOP'] + 0.22 * m['CIS'] + 0.22 * m['DSC'] + 0.22 * m['NOH'],
+            'extendability': 0.50 * m['ANA'] - 0.50 * m['DCC'] + 0.50 * m['MFA'] + 0.50 * m['NOP'],
+            'effectiveness': 0.20 * m['ANA'] + 0.20 * m['DAM'] + 0.20 * m['MOA'] + 0.20 * m['MFA'] + 0.20 * m['NOP'],
+        }
+        return {name: round(float(value), 5) for name, value in attributes.items()}
+
+
 class DesignQualityAttributes:
     """
     Class to compute six quality attribute proposed by J. J. Bansiya et G. Davis, 2002
@@ -400,25 +491,30 @@ class DesignQualityAttributes:
         6. Effectiveness
     """
 
-    def __init__(self, udb_path):
+    def __init__(self, udb_path, session: EvaluationSession = None):
         """
         Implements Project Objectives due to QMOOD design metrics
         :param udb_path: The understand database path
+        :param session: The evaluation session shared with the other objectives
         """
         self.udb_path = udb_path
-        self.__qmood = DesignMetrics(udb_path=udb_path)
+        if session is None:
+            session = EvaluationSession(udb_path).open()
+            session.close()
+        self.__qmood = QMOODEngine(session=session)
         # Calculating once and using multiple times
-        self.DSC = self.__qmood.DSC  # Design Size
-        self.NOH = self.__qmood.NOH  # Hierarchies
-        self.ANA = self.__qmood.ANA  # Abstraction
-        self.MOA = self.__qmood.MOA  # Composition, Aggregation
-        self.DAM = self.__qmood.DAM  # Encapsulation
-        self.CAMC = self.__qmood.CAMC  # Cohesion, CAM
-        self.CIS = self.__qmood.CIS  # Messaging
-        self.NOM = self.__qmood.NOM  # Complexity
-        self.DCC = self.__qmood.DCC  # Coupling
-        self.MFA = self.__qmood.MFA  # Inheritance
-        self.NOP = self.__qmood.NOP  # Polymorphism
+        design_metrics = self.__qmood.design_metrics()
+        self.DSC = design_metrics['DSC']  # Design Size
+        self.NOH = design_metrics['NOH']  # Hierarchies
+        self.ANA = design_metrics['ANA']  # Abstraction
+        self.MOA = design_metrics['MOA']  # Composition, Aggregation
+        self.DAM = design_metrics['DAM']  # Encapsulation
+        self.CAMC = design_metrics['CAMC']  # Cohesion, CAM
+        self.CIS = design_metrics['CIS']  # Messaging
+        self.NOM = design_metrics['NOM']  # Complexity
+        self.DCC = design_metrics['DCC']  # Coupling
+        self.MFA = design_metrics['MFA']  # Inheritance
+        self.NOP = design_metrics['NOP']  # Polymorphism
 
         # For caching results
         self._reusability = None
@@ -0,0 +1,134 @@
+"""
+
+## Introduction
+
+This module contains the load-once registry of the testability inference pipelines
+used by testability_prediction, testability_prediction2, and testability_prediction3.
+
+An inference pipeline is the fitted scaler and the voting regressor of a testability model in one
+scikit-learn Pipeline, compiled once into a single joblib file under `data_model`.
+Each process loads a pipeline at its first use and keeps it in a module-level registry,
+so loading the model and fitting the scaler is not repeated in the evaluation of individuals.
+
+## Usage
+
+    pipeline = get_testability_pipeline('testability_prediction2')
+    predicted_testability = pipeline.predict(feature_frame)
+
+The compiled pipeline files can be (re)created with:
+
+    python -m metrics.testability_pipeline
+
+## Changelog
+### v0.1.0
+- Add the testability inference pipeline registry
+
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+import os
+
+import joblib
+import pandas as pd
+from sklearn.pipeline import Pipeline
+
+from sbse import config
+
+# Pipeline name -> (scaler, model, compiled pipeline) paths relative to the metrics package
+# The scaler of testability_prediction is fitted on the training dataset instead of being loaded
+TESTABILITY_PIPELINES = {
+    'testability_prediction': ('data_model/DS07012.csv', 'data_model/VR1_DS1.joblib',
+                               'data_model/testability_pipeline_DS1.joblib'),
+    'testability_prediction2': ('data_model/DS07510.joblib', 'sklearn_models7/VR1_DS5.joblib',
+                                'data_model/testability_pipeline_DS5.joblib'),
+    'testability_prediction3': ('data_model/DS07710.joblib', 'sklearn_models7/VR1_DS7.joblib',
+                                'data_model/testability_pipeline_DS7.joblib'),
+}
+
+# Pipeline name -> TestabilityPipeline, for the pipelines loaded in the current process
+_PIPELINES = {}
+
+
+def _metrics_path(relative_path):
+    return os.path.join(os.path.dirname(__file__), relative_path)
+
+
+class TestabilityPipeline:
+    """
+
+    Batched inference of a fitted scaler and testability model
+
+    """
+
+    def __init__(self, pipeline: Pipeline):
+        self.pipeline = pipeline
+
+    def predict(self, feature_frame: pd.DataFrame):
+        """
+
+        Args:
+
+            feature_frame (pandas.DataFrame): One row of metrics per class, the 'Class' column is ignored if exists
+
+        Returns:
+
+            numpy.ndarray: The predicted testability of each row
+
+        """
+
+        if 'Class' in feature_frame.columns:
+            feature_frame = feature_frame.drop(columns=['Class'])
+        return self.pipeline.predict(feature_frame.fillna(0))
+
+
+def fit_quantile_scaler(df_path):
+    """
+    Fits the scaler of testability_prediction in the same way as testability_prediction.TestabilityModel
+    """
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import QuantileTransformer
+
+    df = pd.read_csv(df_path, delimiter=',', index_col=False)
+    x_train, _, _, _ = train_test_split(df.iloc[:, 1:-1], df.iloc[:, -1], test_size=0.25, random_state=117, )
+    scaler = QuantileTransformer(n_quantiles=1000, random_state=11)
+    scaler.fit(x_train)
+    return scaler
+
+
+def compile_testability_pipeline(name) -> Pipeline:
+    """
+    Combines the scaler and the model of a testability pipeline and saves them as a single joblib file
+    """
+    scaler_path, model_path, pipeline_path = TESTABILITY_PIPELINES[name]
+    if scaler_path.endswith('.csv'):
+        scaler = fit_quantile_scaler(_metrics_path(scaler_path))
+    else:
+        scaler = joblib.load(_metrics_path(scaler_path))
+    model = joblib.load(_metrics_path(model_path))
+    pipeline = Pipeline([('scaler', scaler), ('model', model)])
+    joblib.dump(pipeline, _metrics_path(pipeline_path))
+    config.logger.info(f'Testability pipeline {name} was compiled to {_metrics_path(pipeline_path)}')
+    return pipeline
+
+
+def get_testability_pipeline(name='testability_prediction2') -> TestabilityPipeline:
+    """
+    Returns the inference pipeline of a testability prediction module, loaded (or compiled) once per process
+    """
+    if name not in _PIPELINES:
+        pipeline_path = _metrics_path(TESTABILITY_PIPELINES[name][2])
+        if os.path.exists(pipeline_path):
+            pipeline = joblib.load(pipeline_path)
+        else:
+            pipeline = compile_testability_pipeline(name)
+        _PIPELINES[name] = TestabilityPipeline(pipeline)
+    return _PIPELINES[name]
+
+
+# Compiles all testability pipelines
+if __name__ == '__main__':
+    for pipeline_name in TESTABILITY_PIPELINES:
+        compile_testability_pipeline(pipeline_name)
@@ -3,6 +3,10 @@
 This module contains testability prediction script
 to be used in refactoring process in addition to QMOOD metrics
 
+## Changelog
+### v0.1.2
+- Predict with the compiled testability pipeline instead of refitting the scaler in each call
+
 ## Reference
 [1] ADAFEST2 paper
 [2] TsDD paper
@@ -10,7 +14,7 @@ to be used in refactoring process in addition to QMOOD metrics
 
 """
 
-__version__ = '0.1.1'
+__version__ = '0.1.2'
 __author__ = 'Morteza Zakeri'
 
 import math
@@ -35,6 +39,7 @@ import metrics
 from metrics import metrics_names
 from metrics.metrics_jcode_odor import JCodeOdorMetric
 from metrics.metrics_coverability import UnderstandUtility
+from metrics.testability_pipeline import get_testability_pipeline
 
 
 # patch_sklearn()
@@ -555,13 +560,18 @@ class TestabilityMetrics:
         return class_metrics
 
     @classmethod
-    def compute_java_class_metrics_lexicon(cls, db=None, entity=None):
+    def compute_java_class_metrics_lexicon(cls, db=None, entity=None, lexical_metrics=None):
         """
 
         :param db:
         :param entity:
+        :param lexical_metrics: If given, the lexer-only metrics of the class are used instead of the understand lexer
         :return:
         """
+        if lexical_metrics is not None:
+            class_lexicon_metrics_dict = lexical_metrics.get_class_metrics(entity.longname())
+            if class_lexicon_metrics_dict is not None:
+                return class_lexicon_metrics_dict
         class_lexicon_metrics_dict = dict()
 
         # for ib in entity.ib():
@@ -1237,8 +1247,8 @@ def main(project_path, initial_value=1.0):
     # classes_longnames_list = p.extract_project_classes(db=db)
     df = p.compute_metrics_by_class_list(project_path, n_jobs=7)  # n_job must be set to number of CPU cores
     # db.close()
-    model = TestabilityModel(df_path=r'../metrics/data_model/DS07012.csv')
-    testability_ = model.inference(model_path='../metrics/data_model/VR1_DS1.joblib', df_predict_data=df)
+    # The scaler fitted on DS07012.csv and the VR1_DS1 model are loaded once per process
+    testability_ = get_testability_pipeline('testability_prediction').predict(df).mean()
     # print('testability=', testability_)
     return testability_ / initial_value
 
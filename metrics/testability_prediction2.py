@@ -6,6 +6,12 @@ This module contains light-weight version of testability prediction script (with
 to be used in refactoring process in addition to QMOOD metrics.
 
 ## Changelog
+### v0.2.6
+- Compute the class lexicon metrics by the lexer-only engine (metrics.lexical_metrics) in evaluation sessions
+### v0.2.5
+- Load the scaler and model once per process from the testability pipeline registry
+### v0.2.4
+- Compute the metrics of all classes on the database of a shared evaluation session
 ### v0.2.3
 - Remove dependency to metrics_jcode_odor
 ### v0.2.2
@@ -19,12 +25,11 @@ to be used in refactoring process in addition to QMOOD metrics.
 
 """
 
-__version__ = '0.2.3'
+__version__ = '0.2.6'
 __author__ = 'Morteza Zakeri'
 
 import os
 import pandas as pd
-import joblib
 from joblib import Parallel, delayed
 
 import understand as und
@@ -32,10 +37,7 @@ import understand as und
 from sbse import config
 from metrics import metrics_names
 from metrics.metrics_coverability import UnderstandUtility
-
-
-scaler1 = joblib.load(os.path.join(os.path.dirname(__file__), 'data_model/DS07510.joblib'))
-model5 = joblib.load(os.path.join(os.path.dirname(__file__), 'sklearn_models7/VR1_DS5.joblib'))
+from metrics.testability_pipeline import get_testability_pipeline
 
 
 class TestabilityMetrics:
@@ -136,17 +138,25 @@ class TestabilityMetrics:
         return package_metrics
 
     @classmethod
-    def compute_java_class_metrics_lexicon(cls, entity=None):
+    def compute_java_class_metrics_lexicon(cls, entity=None, lexical_metrics=None):
         """
         Args:
 
             entity (understand.Ent):
 
+            lexical_metrics (metrics.lexical_metrics.LexicalMetrics): If given, the lexer-only metrics of the class
+            are used instead of the understand lexer
+
         Returns:
              dict: class-level metrics
 
         """
 
+        if lexical_metrics is not None:
+            class_lexicon_metrics_dict = lexical_metrics.get_class_metrics(entity.longname())
+            if class_lexicon_metrics_dict is not None:
+                return class_lexicon_metrics_dict
+
         class_lexicon_metrics_dict = dict()
         tokens_list = list()
         identifiers_list = list()
@@ -312,10 +322,23 @@ class TestabilityMetrics:
         return class_metrics
 
 
-def do(class_entity_long_name, project_db_path):
+def do(class_entity_long_name, project_db_path, session=None):
+    if session is not None:
+        return compute_class_metrics_values(
+            session.db, session.get_type_entity(class_entity_long_name),
+            lexical_metrics=session.lexical_metrics if config.LEXER_METRICS else None
+        )
+
     import understand as und
     db = und.open(project_db_path)
     class_entity = UnderstandUtility.get_class_entity_by_name(class_name=class_entity_long_name, db=db)
+    one_class_metrics_value = compute_class_metrics_values(db, class_entity)
+    db.close()
+    del db
+    return one_class_metrics_value
+
+
+def compute_class_metrics_values(db, class_entity, lexical_metrics=None):
     one_class_metrics_value = [class_entity.longname()]
 
     # print('Calculating package metrics')
@@ -324,7 +347,9 @@ def do(class_entity_long_name, project_db_path):
         return None
 
     # print('Calculating class lexicon metrics')
-    class_lexicon_metrics_dict = TestabilityMetrics.compute_java_class_metrics_lexicon(entity=class_entity)
+    class_lexicon_metrics_dict = TestabilityMetrics.compute_java_class_metrics_lexicon(
+        entity=class_entity, lexical_metrics=lexical_metrics
+    )
     if class_lexicon_metrics_dict is None or len(class_lexicon_metrics_dict) == 0:
         return None
 
@@ -342,8 +367,6 @@ def do(class_entity_long_name, project_db_path):
     one_class_metrics_value.extend([class_ordinary_metrics_dict[metric_name] for
                                     metric_name in TestabilityMetrics.get_class_ordinary_metrics_names()])
 
-    db.close()
-    del db
     # print(one_class_metrics_value)
     # quit()
     return one_class_metrics_value
@@ -358,12 +381,27 @@ class PreProcess:
     """
 
     @classmethod
-    def compute_metrics_by_class_list(cls, project_db_path, n_jobs):
+    def compute_metrics_by_class_list(cls, project_db_path, n_jobs, session=None):
         """
 
+        If an evaluation session is given, all classes are computed sequentially on its database
 
         """
 
+        if session is not None:
+            res = [do(class_entity_long_name, project_db_path, session=session)
+                   for class_entity_long_name in session.java_class_longnames]
+        else:
+            res = cls._compute_metrics_by_class_list(project_db_path, n_jobs)
+        res = list(filter(None, res))
+
+        columns = ['Class']
+        columns.extend(TestabilityMetrics.get_all_primary_metrics_names())
+        df = pd.DataFrame(data=res, columns=columns)
+        return df
+
+    @classmethod
+    def _compute_metrics_by_class_list(cls, project_db_path, n_jobs):
         # class_entities = cls.read_project_classes(db=db, classes_names_list=class_list, )
         # print(project_db_path)
         db = und.open(project_db_path)
@@ -377,15 +415,7 @@ class PreProcess:
             res = Parallel(n_jobs=n_jobs, )(
                 delayed(do)(class_entity_long_name, project_db_path) for class_entity_long_name in class_list
             )
-        res = list(filter(None, res))
-
-        columns = ['Class']
-        columns.extend(TestabilityMetrics.get_all_primary_metrics_names())
-        df = pd.DataFrame(data=res, columns=columns)
-        # print('df for class {0} with shape {1}'.format(project_name, df.shape))
-        # df.to_csv(csv_path + project_name + '.csv', index=False)
-        # print(df)
-        return df
+        return res
 
 
 class TestabilityModel:
@@ -395,14 +425,10 @@ class TestabilityModel:
 
     """
     def __init__(self, ):
-        self.scaler = scaler1
-        self.model = model5
+        self.pipeline = get_testability_pipeline('testability_prediction2')
 
     def inference(self, df_predict_data=None, verbose=False, log_path=None):
-        df_predict_data = df_predict_data.fillna(0)
-        X_test1 = df_predict_data.iloc[:, 1:]
-        X_test = self.scaler.transform(X_test1)
-        y_pred = self.model.predict(X_test)
+        y_pred = self.pipeline.predict(df_predict_data)
         df_new = pd.DataFrame(df_predict_data.iloc[:, 0], columns=['Class'])
         df_new['PredictedTestability'] = list(y_pred)
 
@@ -429,14 +455,15 @@ class TestabilityModel:
 
 
 # API
-def main(project_db_path, initial_value=1.0, verbose=False, log_path=None):
+def main(project_db_path, initial_value=1.0, verbose=False, log_path=None, session=None):
     """
 
     testability_prediction module API
 
     """
 
-    df = PreProcess().compute_metrics_by_class_list(project_db_path, n_jobs=0)  # n_job must be set to number of CPU cores
+    # n_job must be set to number of CPU cores
+    df = PreProcess().compute_metrics_by_class_list(project_db_path, n_jobs=0, session=session)
     testability_ = TestabilityModel().inference(df_predict_data=df, verbose=verbose, log_path=log_path)
     # print('testability=', testability_)
     return round(testability_ / initial_value, 5)
@@ -4,29 +4,33 @@ This module contains light-weight version of testability prediction script (with
 The top 10 metrics are selected based on the permutation importance scoring techniques.
 to be used in refactoring process in addition to QMOOD metrics.
 
+## Changelog
+### v0.1.4
+- Compute the lexical metrics by the lexer-only engine (metrics.lexical_metrics)
+### v0.1.3
+- Load the scaler and model once per process from the testability pipeline registry
+
 """
 
-__version__ = '0.1.2'
+__version__ = '0.1.4'
 __author__ = 'Morteza Zakeri'
 
 import os
 import pandas as pd
-import joblib
 
 import understand as und
 
 from sbse import config
-
-scaler1 = joblib.load(os.path.join(os.path.dirname(__file__), 'data_model/DS07710.joblib'))
-model5 = joblib.load(os.path.join(os.path.dirname(__file__), 'sklearn_models7/VR1_DS7.joblib'))
+from metrics.evaluation_session import PROJECT_FILES_FILTER
+from metrics.lexical_metrics import LexicalMetrics
+from metrics.testability_pipeline import get_testability_pipeline
 
 condition_kw_list = ['if', 'for', 'while', 'switch', '?', 'assert', ]
 
 
 class TestabilityPredicator:
     def __init__(self, db_path):
-        self.scaler = scaler1
-        self.model = model5
+        self.pipeline = get_testability_pipeline('testability_prediction3')
         self.db_path = db_path
         self.df_all = pd.DataFrame()
 
@@ -34,6 +38,11 @@ class TestabilityPredicator:
         dbx = und.open(self.db_path)
         kind_filter = 'Java Class ~TypeVariable ~Anonymous ~Enum ~Unknown ~Unresolved ~Jar ~Library, Java Interface'
         class_entities = dbx.ents(kind_filter)
+        lexical_metrics = None
+        if config.LEXER_METRICS:
+            lexical_metrics = LexicalMetrics.from_files(
+                file_entity.longname() for file_entity in dbx.ents(PROJECT_FILES_FILTER)
+            )
         for class_entity in class_entities:
             # print (class_entity.kind().name())
 
@@ -54,18 +63,27 @@ class TestabilityPredicator:
                 nim = number_of_local_methods_all - number_of_local_methods
 
             # Compute lexical metrics
-            identifiers_list = list()
-            condition_count = 0
-            dots_count = 0
-            lexeme_ = class_entity.lexer(show_inactive=False).first()
-            while lexeme_ is not None:
-                if lexeme_.token() == 'Identifier':
-                    identifiers_list.append(lexeme_.text())
-                elif lexeme_.text() in condition_kw_list:
-                    condition_count += 1
-                elif lexeme_.text() == '.':
-                    dots_count += 1
-                lexeme_ = lexeme_.next()
+            class_lexicon_metrics_dict = None
+            if lexical_metrics is not None:
+                class_lexicon_metrics_dict = lexical_metrics.get_class_metrics(class_entity.longname())
+            if class_lexicon_metrics_dict is not None:
+                condition_count = class_lexicon_metrics_dict['NumberOfConditionalJumpStatements']
+                number_of_unique_identifiers = class_lexicon_metrics_dict['NumberOfUniqueIdentifiers']
+                dots_count = class_lexicon_metrics_dict['NumberOfDots']
+            else:
+                identifiers_list = list()
+                condition_count = 0
+                dots_count = 0
+                lexeme_ = class_entity.lexer(show_inactive=False).first()
+                while lexeme_ is not None:
+                    if lexeme_.token() == 'Identifier':
+                        identifiers_list.append(lexeme_.text())
+                    elif lexeme_.text() in condition_kw_list:
+                        condition_count += 1
+                    elif lexeme_.text() == '.':
+                        dots_count += 1
+                    lexeme_ = lexeme_.next()
+                number_of_unique_identifiers = len(set(identifiers_list))
 
             dfx = pd.DataFrame()
             dfx['Class'] = [class_entity.longname()]
@@ -73,7 +91,7 @@ class TestabilityPredicator:
             dfx['CSLEX_NumberOfConditionalJumpStatements'] = [condition_count]
             dfx['CSORD_AvgLineCode'] = [avg_loc]
             dfx['CSORD_NumberOfDepends'] = [len(class_entity.depends())]
-            dfx['CSLEX_NumberOfUniqueIdentifiers'] = [len(set(identifiers_list))]
+            dfx['CSLEX_NumberOfUniqueIdentifiers'] = [number_of_unique_identifiers]
             dfx['CSLEX_NumberOfDots'] = [dots_count]  # 6
             dfx['CSORD_CountDeclInstanceMethod'] = [
                 class_entity.metric(['CountDeclInstanceMethod'])['CountDeclInstanceMethod']]  # 7
@@ -88,9 +106,7 @@ class TestabilityPredicator:
 
     def inference(self, verbose=False, log_path=None):
         self.df_all = self.df_all.fillna(0)
-        X_test1 = self.df_all.iloc[:, 1:]
-        X_test = self.scaler.transform(X_test1)
-        y_pred = self.model.predict(X_test)
+        y_pred = self.pipeline.predict(self.df_all)
         df_new = pd.DataFrame(self.df_all.iloc[:, 0], columns=['Class'])
         df_new['PredictedTestability'] = list(y_pred)
 
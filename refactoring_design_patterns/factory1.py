@@ -13,9 +13,9 @@ import argparse
 from antlr4 import *
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
 
-from gen.javaLabeled.JavaLexer import JavaLexer
 from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+from codart.utility.parsing import create_parse_tree
 
 
 class FactoryMethodRefactoringListener(JavaParserLabeledListener):
@@ -155,16 +155,9 @@ def main(args):
     stream = FileStream(args.file, encoding='utf8', errors='ignore')
     # input_stream = StdinStream()
 
-    # Step 2: Create an instance of AssignmentStLexer
-    lexer = JavaLexer(stream)
-    # Step 3: Convert the input source into a list of tokens
-    token_stream = CommonTokenStream(lexer)
-    # Step 4: Create an instance of the AssignmentStParser
-    parser = JavaParserLabeled(token_stream)
-    parser.getTokenStream()
-    # Step 5: Create parse tree
-    parse_tree = parser.compilationUnit()
-    # Step 6: Create an instance of the refactoringListener, and send as a parameter the list of tokens to the class
+    # Step 2: Create parse tree and its token stream
+    parse_tree, token_stream = create_parse_tree(stream)
+    # Step 3: Create an instance of the refactoringListener, and send as a parameter the list of tokens to the class
     my_listener = FactoryMethodRefactoringListener(common_token_stream=token_stream,
                                                    creator_identifier='FactoryMethod',
                                                    products_identifier=['JpegReader', 'GifReader'])
@@ -9,9 +9,9 @@ __author__ = 'IUST-Students'
 from antlr4 import *
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
 
-from gen.javaLabeled.JavaLexer import JavaLexer
 from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+from codart.utility.parsing import create_parse_tree
 from refactorings.remove_class import RemoveClassRefactoringListener
 
 # from utility.setup_understand import *
@@ -325,11 +325,7 @@ def main(udb, child, parent):
     propagate_classes = list(propagate_classes)
 
     stream = FileStream(child_path_file, encoding='utf8', errors='ignore')
-    lexer = JavaLexer(stream)
-    token_stream = CommonTokenStream(lexer)
-    parser = JavaParserLabeled(token_stream)
-    parser.getTokenStream()
-    parse_tree = parser.compilationUnit()
+    parse_tree, token_stream = create_parse_tree(stream)
     my_listener_field_text = CollapseHierarchyRefactoringGetFieldTextListener(common_token_stream=token_stream,
                                                                               child_class=child)
     walker = ParseTreeWalker()
@@ -351,11 +347,7 @@ def main(udb, child, parent):
         f.write(my_listener_remove_child_class.token_stream_rewriter.getDefaultText())
     # Refactor
     stream = FileStream(father_path_file, encoding='utf8', errors='ignore')
-    lexer = JavaLexer(stream)
-    token_stream = CommonTokenStream(lexer)
-    parser = JavaParserLabeled(token_stream)
-    parser.getTokenStream()
-    parse_tree = parser.compilationUnit()
+    parse_tree, token_stream = create_parse_tree(stream)
     my_listener_refactor_action = CollapseHierarchyRefactoringListener(common_token_stream=token_stream,
                                                                        parent_class=parent,
                                                                        child_class=child,
@@ -369,11 +361,7 @@ def main(udb, child, parent):
     # Propagate
     for file in file_list_to_be_propagate:
         stream = FileStream(file, encoding='utf8', errors='ignore')
-        lexer = JavaLexer(stream)
-        token_stream = CommonTokenStream(lexer)
-        parser = JavaParserLabeled(token_stream)
-        parser.getTokenStream()
-        parse_tree = parser.compilationUnit()
+        parse_tree, token_stream = create_parse_tree(stream)
         my_listener_propagate = PropagationCollapseHierarchyListener(token_stream_rewriter=token_stream,
                                                                      old_class_name=child,
                                                                      new_class_name=parent,
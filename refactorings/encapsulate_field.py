@@ -13,16 +13,15 @@ The module implements encapsulate field refactoring in response to `Deficient En
 """
 
 __author__ = "Morteza Zakeri"
-__version__ = '0.2.0'
-
-import os
+__version__ = '0.2.1'
 
 from antlr4 import *
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
 
 from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
-from gen.javaLabeled.JavaLexer import JavaLexer
+from codart.utility.parsing import create_parse_tree
+from codart.utility.identifier_index import get_identifier_index, notify_file_changed
 from sbse.config import logger
 
 
@@ -281,30 +280,27 @@ class InstancePropagationEncapsulateFieldListener(JavaParserLabeledListener):
 
 
 def main(directory_path, package_name, source_class, field_name):
-    for root, dirs, files in os.walk(directory_path):
-        for file in files:
-            if file.endswith('.java'):
-                stream = FileStream(os.path.join(root, file), encoding='utf8', errors='ignore')
-                lexer = JavaLexer(stream)
-                token_stream = CommonTokenStream(lexer)
-                parser = JavaParserLabeled(token_stream)
-                ef_listener = EncapsulateFiledRefactoringListener(token_stream,
+    # Only the files which mention the field can change
+    for java_file in get_identifier_index(directory_path).candidate_files([field_name]):
+        stream = FileStream(java_file, encoding='utf8', errors='ignore')
+        tree, token_stream = create_parse_tree(stream)
+        ef_listener = EncapsulateFiledRefactoringListener(token_stream,
+                                                          package_name,
+                                                          source_class,
+                                                          field_name)
+        walker = ParseTreeWalker()
+        walker.walk(t=tree, listener=ef_listener)
+
+        ip_listener = InstancePropagationEncapsulateFieldListener(ef_listener.token_stream_rewriter,
                                                                   package_name,
                                                                   source_class,
                                                                   field_name)
-                tree = parser.compilationUnit()
-                walker = ParseTreeWalker()
-                walker.walk(t=tree, listener=ef_listener)
-
-                ip_listener = InstancePropagationEncapsulateFieldListener(ef_listener.token_stream_rewriter,
-                                                                          package_name,
-                                                                          source_class,
-                                                                          field_name)
-                walker.walk(t=tree, listener=ip_listener)
-
-                refactored = open(os.path.join(root, file), 'w', newline='')
-                refactored.write(ip_listener.token_stream_rewriter.getDefaultText())
-                refactored.close()
+        walker.walk(t=tree, listener=ip_listener)
+
+        refactored = open(java_file, 'w', newline='')
+        refactored.write(ip_listener.token_stream_rewriter.getDefaultText())
+        refactored.close()
+        notify_file_changed(java_file)
 
     return True
 
@@ -38,9 +38,9 @@ except ImportError as e:
 from antlr4 import *
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
 
-from gen.javaLabeled.JavaLexer import JavaLexer
 from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+from codart.utility.parsing import create_parse_tree
 
 from sbse.config import logger
 
@@ -444,10 +444,7 @@ class ExtractClassAPI:
         self.moved_fields = moved_fields
         self.moved_methods = moved_methods
         self.stream = FileStream(self.file_path, encoding="utf-8", errors='ignore')
-        self.lexer = JavaLexer(self.stream)
-        self.token_stream = CommonTokenStream(self.lexer)
-        self.parser = JavaParserLabeled(self.token_stream)
-        self.tree = self.parser.compilationUnit()
+        self.tree, self.token_stream = create_parse_tree(self.stream)
         self.walker = ParseTreeWalker()
         self.method_usage_map = {}
         self.pass_this = False
@@ -493,10 +490,7 @@ class ExtractClassAPI:
         for usage in usages:
             file_path = usage.pop('file_path')
             stream = FileStream(file_path, encoding='utf-8', errors='ignore')
-            lexer = JavaLexer(stream)
-            token_stream = CommonTokenStream(lexer)
-            parser = JavaParserLabeled(token_stream)
-            parse_tree = parser.compilationUnit()
+            parse_tree, token_stream = create_parse_tree(stream)
             my_listener = PropagateFieldUsageListener(common_token_stream=token_stream, object_name=self.object_name,
                                                       **usage)
             walker = ParseTreeWalker()
@@ -548,11 +542,7 @@ class ExtractClassAPI:
         # print("=" * 25)
         # print(listener.code)
         stream = InputStream(listener.code)
-        lexer = JavaLexer(stream)
-        token_stream = CommonTokenStream(lexer)
-        parser = JavaParserLabeled(token_stream)
-        parser.getTokenStream()
-        parse_tree = parser.compilationUnit()
+        parse_tree, token_stream = create_parse_tree(stream)
         my_listener = NewClassPropagation(
             common_token_stream=token_stream,
             method_map=self.method_usage_map,
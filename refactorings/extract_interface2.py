@@ -30,9 +30,9 @@ import os
 from antlr4 import *
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
 
-from gen.javaLabeled.JavaLexer import JavaLexer
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
 from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
+from codart.utility.parsing import create_parse_tree
 from sbse import config
 
 
@@ -180,11 +180,7 @@ class InterfaceCreator:
 
     def add_implement_statement_to_class(self, ):
         stream = FileStream(self.class_path, encoding='utf8', errors='ignore')
-        lexer = JavaLexer(stream)
-        token_stream = CommonTokenStream(lexer)
-        parser = JavaParserLabeled(token_stream)
-        parser.getTokenStream()
-        parse_tree = parser.compilationUnit()
+        parse_tree, token_stream = create_parse_tree(stream)
         listener = AddingImplementStatementToClass(
             common_token_stream=token_stream,
             class_name=os.path.splitext(os.path.basename(self.class_path))[0],
@@ -228,10 +224,7 @@ def main(class_path):
         return False
 
     stream = FileStream(class_path, encoding='utf-8', errors='ignore')
-    lexer = JavaLexer(stream)
-    tokens = CommonTokenStream(lexer)
-    parser = JavaParserLabeled(tokens)
-    tree = parser.compilationUnit()
+    tree, tokens = create_parse_tree(stream)
 
     listener = InterfaceInfoListener()
 
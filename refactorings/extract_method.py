@@ -44,10 +44,12 @@ import logging
 import numpy as np
 from antlr4 import *
 
-from gen.javaLabeled.JavaLexer import JavaLexer
-from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
+# The context classes of the trees created by create_parse_tree (same grammar as gen.javaLabeled)
+from java8speedy.parser.JavaLabeledParser import JavaLabeledParser as JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
 
+from codart.utility.parsing import create_parse_tree
+
 # Config logging
 logger = logging.getLogger()
 
@@ -424,10 +426,7 @@ def get_tabs(line: str):
 # extract method function
 def extract_method(conf):
     stream = FileStream(conf['target_file'], encoding="utf-8", errors='ignore')
-    lexer = JavaLexer(stream)
-    tokens = CommonTokenStream(lexer)
-    parser = JavaParserLabeled(tokens)
-    tree = parser.compilationUnit()
+    tree, tokens = create_parse_tree(stream)
     listener = ExtractMethodRefactoring(list(map(int, list(conf['lines'].keys()))))
     walker = ParseTreeWalker()
     walker.walk(
@@ -14,9 +14,10 @@ from antlr4 import *
 from antlr4.tree import Tree
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
 
-from gen.javaLabeled.JavaLexer import JavaLexer
-from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
+# The context classes of the trees created by create_parse_tree (same grammar as gen.javaLabeled)
+from java8speedy.parser.JavaLabeledParser import JavaLabeledParser as JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+from codart.utility.parsing import create_parse_tree
 
 files_to_refactor = []
 
@@ -553,11 +554,7 @@ def main():
     # new_class_file = "C:\\Users\\asus\\Desktop\\benchmark_projects\\Chess_master\\src\\game\\Pieceextracted.java"
 
     stream = FileStream(father_path_file, encoding='utf8', errors='ignore')
-    lexer = JavaLexer(stream)
-    token_stream = CommonTokenStream(lexer)
-    parser = JavaParserLabeled(token_stream)
-    parser.getTokenStream()
-    parse_tree = parser.compilationUnit()
+    parse_tree, token_stream = create_parse_tree(stream)
     my_listener = ExtractSubClassRefactoringListener(common_token_stream=token_stream,
                                                      source_class=source_class,
                                                      new_class=source_class + "extracted",
@@ -573,11 +570,7 @@ def main():
 
     for file in files_to_refactor:
         stream = FileStream(file, encoding='utf8', errors='ignore')
-        lexer = JavaLexer(stream)
-        token_stream = CommonTokenStream(lexer)
-        parser = JavaParserLabeled(token_stream)
-        parser.getTokenStream()
-        parse_tree = parser.compilationUnit()
+        parse_tree, token_stream = create_parse_tree(stream)
 
         my_listener = FindUsagesListener(common_token_stream=token_stream,
                                          source_class=source_class,
@@ -599,11 +592,7 @@ def main():
 
         try:
             stream = FileStream(file, encoding='utf8', errors='ignore')
-            lexer = JavaLexer(stream)
-            token_stream = CommonTokenStream(lexer)
-            parser = JavaParserLabeled(token_stream)
-            parser.getTokenStream()
-            parse_tree = parser.compilationUnit()
+            parse_tree, token_stream = create_parse_tree(stream)
 
             my_listener = PropagationListener(common_token_stream=token_stream,
                                               source_class=source_class,
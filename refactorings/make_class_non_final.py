@@ -17,9 +17,9 @@ except ImportError as e:
 from antlr4 import *
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
 
-from gen.javaLabeled.JavaLexer import JavaLexer
 from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+from codart.utility.parsing import create_parse_tree
 
 
 class MakeNonFinalClassRefactoringListener(JavaParserLabeledListener):
@@ -118,11 +118,7 @@ if __name__ == '__main__':
             main_file = cls.parent().longname()
     db.close()
     stream = FileStream(main_file, encoding='utf8', errors='ignore')
-    lexer = JavaLexer(stream)
-    token_stream = CommonTokenStream(lexer)
-    parser = JavaParserLabeled(token_stream)
-    parser.getTokenStream()
-    parse_tree = parser.compilationUnit()
+    parse_tree, token_stream = create_parse_tree(stream)
     my_listener = MakeNonFinalClassRefactoringListener(common_token_stream=token_stream,
                                                        class_name=source_class)
     walker = ParseTreeWalker()
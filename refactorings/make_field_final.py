@@ -33,10 +33,9 @@ except ModuleNotFoundError:
 from antlr4 import *
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
 
-from gen.java.JavaParser import JavaParser
-from gen.javaLabeled.JavaLexer import JavaLexer
 from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+from codart.utility.parsing import create_parse_tree
 
 
 class MakeFieldFinalRefactoringListener(JavaParserLabeledListener):
@@ -131,17 +130,7 @@ if __name__ == '__main__':
                 main_file = cls.parent().longname()
 
     stream = FileStream(main_file_, encoding='utf8', errors='ignore')
-
-    # Step 2: Create an instance of AssignmentStLexer
-    lexer = JavaLexer(stream)
-
-    # Step 3: Convert the input source into a list of tokens
-    token_stream = CommonTokenStream(lexer)
-
-    # Step 4: Create an instance of the AssignmentStParser
-    parser = JavaParser(token_stream)
-    parser.getTokenStream()
-    parse_tree = parser.compilationUnit()
+    parse_tree, token_stream = create_parse_tree(stream)
 
     my_listener = MakeFieldFinalRefactoringListener(
         common_token_stream=token_stream,
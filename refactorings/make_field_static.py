@@ -30,9 +30,9 @@ except ImportError as e:
 from antlr4 import *
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
 
-from gen.javaLabeled.JavaLexer import JavaLexer
 from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+from codart.utility.parsing import create_parse_tree
 
 
 class MakeFieldStaticRefactoringListener(JavaParserLabeledListener):
@@ -123,11 +123,7 @@ def main(udb_path, source_class, field_name, *args, **kwargs):
 
     db.close()
     stream = FileStream(main_file, encoding='utf-8', errors='ignore')
-    lexer = JavaLexer(stream)
-    token_stream = CommonTokenStream(lexer)
-    parser = JavaParserLabeled(token_stream)
-    parser.getTokenStream()
-    parse_tree = parser.compilationUnit()
+    parse_tree, token_stream = create_parse_tree(stream)
     my_listener = MakeFieldStaticRefactoringListener(
         common_token_stream=token_stream,
         source_class=source_class,
@@ -28,9 +28,9 @@ except ImportError as e:
 
 from antlr4 import *
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
-from gen.javaLabeled.JavaLexer import JavaLexer
 from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+from codart.utility.parsing import create_parse_tree
 
 
 class Parameter:
@@ -183,11 +183,7 @@ def main(udb_path, target_class, target_methods):
 
     db.close()
     stream = FileStream(main_file, encoding='utf8', errors='ignore')
-    lexer = JavaLexer(stream)
-    token_stream = CommonTokenStream(lexer)
-    parser = JavaParserLabeled(token_stream)
-    parser.getTokenStream()
-    parse_tree = parser.compilationUnit()
+    parse_tree, token_stream = create_parse_tree(stream)
     my_listener = MakeMethodNonStaticRefactoringListener(common_token_stream=token_stream, target_class=target_class,
                                                          target_methods=target_methods)
     walker = ParseTreeWalker()
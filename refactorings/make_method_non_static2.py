@@ -29,9 +29,9 @@ try:
 except ImportError as e:
     print(e)
 
-from gen.javaLabeled.JavaLexer import JavaLexer
 from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+from codart.utility.parsing import create_parse_tree
 
 
 class MakeMethodNonStaticRefactoringListener(JavaParserLabeledListener):
@@ -117,11 +117,7 @@ def main(udb_path=None, source_class=None, method_name=None, *args, **kwargs):
     db.close()
 
     stream = FileStream(main_file, encoding='utf8', errors='ignore')
-    lexer = JavaLexer(stream)
-    token_stream = CommonTokenStream(lexer)
-    parser = JavaParserLabeled(token_stream)
-    parser.getTokenStream()
-    parse_tree = parser.compilationUnit()
+    parse_tree, token_stream = create_parse_tree(stream)
     my_listener = MakeMethodNonStaticRefactoringListener(
         common_token_stream=token_stream,
         source_class=source_class,
@@ -23,7 +23,7 @@ Pull up field refactoring removes the repetitive field from subclasses and moves
 
 """
 
-__version__ = '0.2.0'
+__version__ = '0.2.1'
 __author__ = 'Morteza Zakeri'
 
 from codart import symbol_table
@@ -103,22 +103,20 @@ class PullUpFieldRefactoring:
         datatype = _class.fields[self.field_name].datatype
 
         fields_to_remove = []
-        for pn in program.packages:
-            p: symbol_table.Package = program.packages[pn]
-            for cn in p.classes:
-                c: symbol_table.Class = p.classes[cn]
-                if (
-                        (
-                        (
-                                c.superclass_name == superclass_name
-                                and c.file_info.has_imported_class(self.package_name, superclass_name)
-                        )
-                        or (self.package_name is not None and c.superclass_name == superclass_name)
-                        )
-                        and
-                        self.field_name in c.fields and c.fields[self.field_name].datatype == datatype
-                ):
-                    fields_to_remove.append(c.fields[self.field_name])
+        for c in program.get_classes_extending(superclass_name):
+            c: symbol_table.Class = c
+            if (
+                    (
+                    (
+                            c.superclass_name == superclass_name
+                            and c.file_info.has_imported_class(self.package_name, superclass_name)
+                    )
+                    or (self.package_name is not None and c.superclass_name == superclass_name)
+                    )
+                    and
+                    self.field_name in c.fields and c.fields[self.field_name].datatype == datatype
+            ):
+                fields_to_remove.append(c.fields[self.field_name])
 
         if len(fields_to_remove) == 0:
             logger.error("No fields to remove.")
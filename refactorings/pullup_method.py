@@ -15,7 +15,7 @@ Todo: Add post-conditions
 
 """
 
-__version__ = '0.2.0'
+__version__ = '0.2.1'
 __author__ = 'Morteza Zakeri'
 
 import os.path
@@ -30,9 +30,9 @@ except ImportError as e:
 from antlr4 import *
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
 
-from gen.javaLabeled.JavaLexer import JavaLexer
 from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+from codart.utility.parsing import create_parse_tree
 from sbse.config import logger
 
 
@@ -211,14 +211,9 @@ def get_removed_methods(program: Program, packagename: str, superclassname: str,
     returntypeofmethod = met.returntype
     nameofmethod = met.name
     # print(program)
-    for package_name in program.packages:
-        package = program.packages[package_name]
-        # print(package)
-        for class_name in package.classes:
-            _class = package.classes[class_name]
-
-            if _class.superclass_name == superclassname:
-                extendedclass.append(_class)
+    for _class in program.get_classes_extending(superclassname):
+        if _class.superclass_name == superclassname:
+            extendedclass.append(_class)
 
     i = 0
     for d in extendedclass:
@@ -309,11 +304,7 @@ def main(udb_path: str, children_classes: list, method_name: str, *args, **kwarg
             stream = FileStream(file, encoding='utf-8', errors='ignore')
         except:
             continue
-        lexer = JavaLexer(stream)
-        token_stream = CommonTokenStream(lexer)
-        parser = JavaParserLabeled(token_stream)
-        parser.getTokenStream()
-        parse_tree = parser.compilationUnit()
+        parse_tree, token_stream = create_parse_tree(stream)
         my_listener_refactor = PullUpMethodRefactoringListener(common_token_stream=token_stream,
                                                                destination_class=destination_class,
                                                                children_class=children_classes,
@@ -331,11 +322,7 @@ def main(udb_path: str, children_classes: list, method_name: str, *args, **kwarg
         if not os.path.exists(file):
             continue
         stream = FileStream(file, encoding='utf-8', errors='ignore')
-        lexer = JavaLexer(stream)
-        token_stream = CommonTokenStream(lexer)
-        parser = JavaParserLabeled(token_stream)
-        parser.getTokenStream()
-        parse_tree = parser.compilationUnit()
+        parse_tree, token_stream = create_parse_tree(stream)
         my_listener_propagate = PropagationPullUpMethodRefactoringListener(token_stream_rewriter=token_stream,
                                                                            old_class_name=children_classes,
                                                                            new_class_name=destination_class,
@@ -25,9 +25,9 @@ except ImportError as e:
 
 from antlr4 import *
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
-from gen.javaLabeled.JavaLexer import JavaLexer
 from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+from codart.utility.parsing import create_parse_tree
 
 from sbse.config import logger
 
@@ -306,11 +306,7 @@ def main(udb_path, source_package, source_class, method_name, target_classes: li
 
     # Delete source method
     stream = FileStream(main_file, encoding='utf8', errors='ignore')
-    lexer = JavaLexer(stream)
-    token_stream = CommonTokenStream(lexer)
-    parser = JavaParserLabeled(token_stream)
-    parser.getTokenStream()
-    parse_tree = parser.compilationUnit()
+    parse_tree, token_stream = create_parse_tree(stream)
     my_listener = DeleteSourceListener(common_token_stream=token_stream, source_method=source_method)
     walker = ParseTreeWalker()
     walker.walk(t=parse_tree, listener=my_listener)
@@ -321,11 +317,7 @@ def main(udb_path, source_package, source_class, method_name, target_classes: li
     # Do the push down
     for child_file, child_class in zip(children_files, children_classes):
         stream = FileStream(child_file, encoding='utf8', errors='ignore')
-        lexer = JavaLexer(stream)
-        token_stream = CommonTokenStream(lexer)
-        parser = JavaParserLabeled(token_stream)
-        parser.getTokenStream()
-        parse_tree = parser.compilationUnit()
+        parse_tree, token_stream = create_parse_tree(stream)
         my_listener = PushDownMethodRefactoringListener(common_token_stream=token_stream,
                                                         source_class=child_class,
                                                         source_method_text=method_text)
@@ -338,11 +330,7 @@ def main(udb_path, source_package, source_class, method_name, target_classes: li
     # Propagation
     for file, _class, line in zip(propagation_files, propagation_classes, propagation_lines):
         stream = FileStream(file, encoding='utf8', errors='ignore')
-        lexer = JavaLexer(stream)
-        token_stream = CommonTokenStream(lexer)
-        parser = JavaParserLabeled(token_stream)
-        parser.getTokenStream()
-        parse_tree = parser.compilationUnit()
+        parse_tree, token_stream = create_parse_tree(stream)
         if is_static:
             my_listener = PropagationStaticListener(common_token_stream=token_stream, source_class=source_class,
                                                     child_class=children_classes[0], class_name=_class,
@@ -11,7 +11,7 @@ from antlr4.TokenStreamRewriter import TokenStreamRewriter
 
 from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
-from gen.javaLabeled.JavaLexer import JavaLexer
+from codart.utility.parsing import create_parse_tree
 
 
 # This is the class for detecting all of the types.
@@ -397,16 +397,7 @@ def main():
             EachFile = FileStream(str(EachFilePath))
 
             # Step 2: Create an instance of AssignmentStLexer
-            Lexer = JavaLexer(EachFile)
-
-            # Step 3: Convert the input source into a list of tokens
-            TokenStream = CommonTokenStream(Lexer)
-
-            # Step 4: Create an instance of the AssignmentStParser
-            Parser = JavaParserLabeled(TokenStream)
-
-            # Step 5: Create parse tree
-            Tree = Parser.compilationUnit()
+            Tree, TokenStream = create_parse_tree(EachFile)
 
             # ListenerForDetection = DetectCodeClass()
             # ListenerForDeadCodeDetection = DetectDeadCodeClass()
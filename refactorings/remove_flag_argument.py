@@ -10,9 +10,9 @@ except ImportError as e:
 from antlr4 import *
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
 
-from gen.javaLabeled.JavaLexer import JavaLexer
 from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+from codart.utility.parsing import create_parse_tree
 
 
 class RemoveFlagArgumentListener(JavaParserLabeledListener):
@@ -193,11 +193,7 @@ class RemoveFlagArgument:
         self.main_file = main_file
 
         self.stream = FileStream(self.main_file, encoding='utf8', errors='ignore')
-        self.lexer = JavaLexer(self.stream)
-        self.token_stream = CommonTokenStream(self.lexer)
-        self.parser = JavaParserLabeled(self.token_stream)
-        self.parser.getTokenStream()
-        self.parse_tree = self.parser.compilationUnit()
+        self.parse_tree, self.token_stream = create_parse_tree(self.stream)
         self.my_listener = RemoveFlagArgumentListener(common_token_stream=self.token_stream,
                                                       source_class=self.source_class,
                                                       source_method=self.source_method,
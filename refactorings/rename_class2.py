@@ -10,7 +10,7 @@ from antlr4.TokenStreamRewriter import TokenStreamRewriter
 
 from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
-from gen.javaLabeled.JavaLexer import JavaLexer
+from codart.utility.parsing import create_parse_tree
 
 sys.path.append('../')
 
@@ -129,13 +129,7 @@ def main():
             FileName = File.split(".")[0]
             Refactored = open(Path + "/refactoredFiles/" + FileName + "_Refactored.java", 'w', newline='')
 
-            Lexer = JavaLexer(EachFile)
-
-            TokenStream = CommonTokenStream(Lexer)
-
-            Parser = JavaParserLabeled(TokenStream)
-
-            Tree = Parser.compilationUnit()
+            Tree, TokenStream = create_parse_tree(EachFile)
 
             ListenerForReRenameClass = \
                 RenameClassRefactoringListener(TokenStream, Package_name, class_identifier, new_class_name)
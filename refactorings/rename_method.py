@@ -13,9 +13,9 @@ except ModuleNotFoundError:
 from antlr4 import *
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
 
-from gen.javaLabeled.JavaLexer import JavaLexer
 from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+from codart.utility.parsing import create_parse_tree
 
 
 class RenameMethodListener(JavaParserLabeledListener):
@@ -176,10 +176,7 @@ def rename_method(java_file_path, scope_class_name, target_method_name, new_name
         No Returns
    """
     stream = FileStream(java_file_path)
-    lexer = JavaLexer(stream)
-    tokens = CommonTokenStream(lexer)
-    parser = JavaParserLabeled(tokens)
-    tree = parser.compilationUnit()
+    tree, tokens = create_parse_tree(stream)
     listener = RenameMethodListener(
         java_file_path=java_file_path,
         common_token_stream=tokens,
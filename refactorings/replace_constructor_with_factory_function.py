@@ -8,7 +8,7 @@ from antlr4 import *
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
 from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
-from gen.javaLabeled.JavaLexer import JavaLexer
+from codart.utility.parsing import create_parse_tree
 
 
 class ReplaceConstructorWithFactoryFunctionRefactoringListener(JavaParserLabeledListener):
@@ -130,10 +130,7 @@ def main():
         if file.endswith('.java') and not file.endswith('_refactored.java'):
             each = folder_path + "\\" + file
             stream = FileStream(str(each))
-            lexer = JavaLexer(stream)
-            tokens = CommonTokenStream(lexer)
-            parser = JavaParserLabeled(tokens)
-            tree = parser.compilationUnit()
+            tree, tokens = create_parse_tree(stream)
             new_file = open(os.path.join(folder_path, file + "_refactored.java"), mode='w', newline='')
             listener = ReplaceConstructorWithFactoryFunctionRefactoringListener(common_token_stream=tokens,
                                                                                 target_class=target_class)
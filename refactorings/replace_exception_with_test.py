@@ -11,6 +11,7 @@ from antlr4.TokenStreamRewriter import TokenStreamRewriter as TSR
 from gen.javaLabeled.JavaLexer import *
 from gen.javaLabeled.JavaParserLabeled import *
 from gen.javaLabeled.JavaParserLabeledListener import *
+from codart.utility.parsing import create_parse_tree
 
 
 class ReplaceExceptionWithTestClassRefactoringListener(JavaParserLabeledListener):
@@ -331,20 +332,12 @@ def main(args):
     stream = FileStream(args.file, encoding='utf8', errors='ignore')
     # input_stream = StdinStream()
 
-    # Step 2: Create an instance of AssignmentStLexer
-    lexer = JavaLexer(stream)
-    # Step 3: Convert the input source into a list of tokens
-    token_stream = CommonTokenStream(lexer)
-    # Step 4: Create an instance of the AssignmentStParser
-    parser = JavaParserLabeled(token_stream)
-    parser.getTokenStream()
-
     print("=====Enter Create ParseTree=====")
-    # Step 5: Create parse tree
-    parse_tree = parser.compilationUnit()
+    # Step 2: Create parse tree and its token stream
+    parse_tree, token_stream = create_parse_tree(stream)
     print("=====Create ParseTree Finished=====")
 
-    # Step 6: Create an instance of AssignmentStListener
+    # Step 3: Create an instance of AssignmentStListener
     my_listener = ReplaceExceptionWithTestClassRefactoringListener(common_token_stream=token_stream,
                                                                    class_identifier='CDL', filename=args.file)
 
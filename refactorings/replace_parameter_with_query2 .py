@@ -14,9 +14,10 @@ Parameter in method call are from expressionList/expression
 from antlr4 import *
 from antlr4.TokenStreamRewriter import TokenStreamRewriter
 
-from gen.java.JavaLexer import JavaLexer
-from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
+# The context classes of the trees created by create_parse_tree (same grammar as gen.javaLabeled)
+from java8speedy.parser.JavaLabeledParser import JavaLabeledParser as JavaParserLabeled
 from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+from codart.utility.parsing import create_parse_tree
 
 
 class ReplaceParameterWithQueryListener(JavaParserLabeledListener):
@@ -221,10 +222,7 @@ class ReplaceParameterWithQueryAPI:
         self.target_method = target_method
         self.target_parameters = target_parameters
         self.stream = FileStream(self.file_path, encoding="utf8", errors='ignore')
-        self.lexer = JavaLexer(self.stream)
-        self.token_stream = CommonTokenStream(self.lexer)
-        self.parser = JavaParserLabeled(self.token_stream)
-        self.tree = self.parser.compilationUnit()
+        self.tree, self.token_stream = create_parse_tree(self.stream)
         self.walker = ParseTreeWalker()
 
     def do_refactor(self):
@@ -0,0 +1,224 @@
+"""
+## Introduction
+
+This module implements the refresh scheduler of the understand database during the evaluation of
+refactoring sequences.
+
+Updating the database (`und analyze -changed`) after every refactoring operation is the most expensive part of
+the evaluation, while most of the refactorings only rewrite the project files and never read the database.
+The scheduler tracks the dirty files (through the snapshot manager of the project),
+and refreshes the database lazily:
+only before a refactoring whose preconditions query the database, and once before computing the objectives.
+Refactorings that did not change any file do not make the database dirty at all.
+
+### Classes
+
+AnalysisRefreshScheduler: Tracks dirty files and coalesces the database refreshes of one project copy
+
+
+## Changelog
+
+### version 0.1.2
+    1. Build the baseline graph of the incremental modularity after the first restore of each project copy
+
+### version 0.1.1
+    1. Keep the refactorings applied since the last restore (used by the incremental modularity)
+
+### version 0.1.0
+    1. Add the lazy analysis refresh scheduler
+
+
+"""
+
+__version__ = '0.1.2'
+__author__ = 'Morteza Zakeri'
+
+import os
+
+from codart.utility.directory_utils import update_understand_database
+from codart.utility.snapshot_manager import get_active_snapshot_manager
+from sbse import config
+from sbse.config import logger
+
+# Refactorings whose main function opens the understand database (the other ones only parse the source files)
+DATABASE_REFACTORINGS = frozenset((
+    'Make Field Non-Static', 'Make Field Static', 'Make Method Static', 'Make Method Non-Static',
+    'Push Down Field', 'Pull Up Method', 'Pull Up Constructor', 'Push Down Method',
+    'Move Field', 'Move Method', 'Move Class',
+    'Extract Class',
+    'Increase Field Visibility', 'Increase Method Visibility',
+    'Decrease Field Visibility', 'Decrease Method Visibility',
+))
+
+# (project_dir, udb_path) -> AnalysisRefreshScheduler, for all the project copies of the current process
+_SCHEDULERS = {}
+
+
+class AnalysisRefreshScheduler:
+    """
+
+    Tracks the files changed since the last database refresh, and refreshes the database only if it is required
+
+    """
+
+    def __init__(self, project_dir, udb_path):
+        """
+
+        Args:
+
+            project_dir (str): The project directory
+
+            udb_path (str): The understand database path of the project
+
+        """
+
+        self.project_dir = project_dir
+        self.udb_path = udb_path
+        self.dirty_files = set()
+        # Set when the changes cannot be tracked file by file, e.g., after a git restore
+        self._dirty_unknown = False
+        # The number of refreshes of the eager policy (one after each restore and each refactoring)
+        self.requested_refreshes = 0
+        self.performed_refreshes = 0
+        # The refactorings applied since the last restore, which changed at least one file
+        self.applied_refactorings = []
+
+    @property
+    def avoided_refreshes(self):
+        return self.requested_refreshes - self.performed_refreshes
+
+    @property
+    def is_dirty(self):
+        self._collect_dirty_files()
+        return self._dirty_unknown or bool(self.dirty_files)
+
+    def _collect_dirty_files(self):
+        manager = get_active_snapshot_manager(self.project_dir)
+        if manager is not None:
+            self.dirty_files.update(manager.pop_modified())
+
+    def notify_restored(self):
+        """
+
+        Must be called after the project is restored to its baseline
+
+        """
+
+        self.requested_refreshes += 1
+        self.applied_refactorings = []
+        # The restored files are dirty, but they must not be attributed to the next refactoring
+        self._collect_dirty_files()
+        if get_active_snapshot_manager(self.project_dir) is None:
+            self._dirty_unknown = True
+        if not config.LAZY_DB_REFRESH:
+            self.refresh()
+        if config.INCREMENTAL_MODULARITY:
+            from metrics.modularity import build_baseline_graph, has_baseline_graph
+            if not has_baseline_graph(self.udb_path):
+                # The baseline graph of this project copy is built once, on the database of the restored project
+                self.refresh()
+                build_baseline_graph(self.udb_path)
+
+    def notify_refactoring_applied(self, refactoring_operation):
+        """
+
+        Must be called after each refactoring operation is applied on the project
+
+        """
+
+        self.requested_refreshes += 1
+        manager = get_active_snapshot_manager(self.project_dir)
+        if manager is None:
+            self._dirty_unknown = True
+            self.applied_refactorings.append(refactoring_operation)
+        else:
+            modified_files = manager.pop_modified()
+            self.dirty_files.update(modified_files)
+            if modified_files:
+                self.applied_refactorings.append(refactoring_operation)
+        if not config.LAZY_DB_REFRESH:
+            self.refresh()
+
+    def before_refactoring(self, refactoring_operation):
+        """
+
+        Refreshes the database if the refactoring operation is going to read it and the database is dirty
+
+        """
+
+        if refactoring_operation.name in DATABASE_REFACTORINGS:
+            self.refresh()
+
+    def before_metrics(self):
+        """
+
+        Refreshes the database once before computing the objectives
+
+        """
+
+        self.refresh()
+
+    def refresh(self, force=False):
+        """
+
+        Updates the database if it is dirty, or if `force` is set
+
+        Returns:
+
+            bool: Whether the database was updated
+
+        """
+
+        if not force and not self.is_dirty:
+            return False
+        logger.debug(f"Updating understand database for {len(self.dirty_files)} dirty files.")
+        update_understand_database(self.udb_path)
+        self.performed_refreshes += 1
+        self.dirty_files.clear()
+        self._dirty_unknown = False
+        return True
+
+    def mark_clean(self):
+        """
+
+        Must be called when the database is replaced by a copy which is consistent with the project files
+
+        """
+
+        self._collect_dirty_files()
+        self.dirty_files.clear()
+        self._dirty_unknown = False
+
+    def log_statistics(self):
+        logger.info(f'Understand database refreshes: {self.performed_refreshes} performed, '
+                    f'{self.avoided_refreshes} avoided of {self.requested_refreshes} requested.')
+
+
+def get_applied_refactorings(udb_path):
+    """
+
+    Returns the refactorings applied on the project of the understand database since its last restore,
+    or None if the project is not evaluated in the current process
+
+    """
+
+    udb_path = os.path.normcase(os.path.abspath(udb_path))
+    for (_, scheduler_udb_path), scheduler in _SCHEDULERS.items():
+        if scheduler_udb_path == udb_path:
+            return scheduler.applied_refactorings
+    return None
+
+
+def get_refresh_scheduler(project_dir=None, udb_path=None) -> AnalysisRefreshScheduler:
+    """
+
+    Returns the refresh scheduler of the project copy, by default `config.PROJECT_PATH` and `config.UDB_PATH`
+
+    """
+
+    project_dir = config.PROJECT_PATH if project_dir is None else project_dir
+    udb_path = config.UDB_PATH if udb_path is None else udb_path
+    key = (os.path.normcase(os.path.abspath(project_dir)), os.path.normcase(os.path.abspath(udb_path)))
+    if key not in _SCHEDULERS:
+        _SCHEDULERS[key] = AnalysisRefreshScheduler(project_dir, udb_path)
+    return _SCHEDULERS[key]
@@ -22,10 +22,35 @@ CROSSOVER_PROBABILITY = float(os.environ.get("CROSSOVER_PROBABILITY"))
 
 WARM_START = bool(int(os.environ.get("WARM_START")))
 
-USE_CPP_BACKEND = bool(int(os.environ.get("USE_CPP_BACKEND")))
+USE_CPP_BACKEND = bool(int(os.environ.get("USE_CPP_BACKEND", 1)))  # Used only if the extension is available
+
+EVALUATION_WORKERS = int(os.environ.get("EVALUATION_WORKERS", 1))  # Number of parallel population evaluation workers
+FAST_RESTORE = bool(int(os.environ.get("FAST_RESTORE", 1)))  # Restore only touched files instead of git restore
+# Restores per full-tree git check of the fast restore, 0: off. The check scans the whole working tree,
+# hence it runs once per generation (POPULATION_SIZE restores) by default rather than after every individual
+FAST_RESTORE_CHECK_INTERVAL = int(os.environ.get("FAST_RESTORE_CHECK_INTERVAL", POPULATION_SIZE))
+LAZY_DB_REFRESH = bool(int(os.environ.get("LAZY_DB_REFRESH", 1)))  # Refresh understand db only when it is read
+# In-process delta-Q modularity of the Move Class, Move Method, and Move Field refactorings,
+# the other refactorings rebuild the class dependency graph from the understand database
+INCREMENTAL_MODULARITY = bool(int(os.environ.get("INCREMENTAL_MODULARITY", 0)))
+PREFIX_SHARING = bool(int(os.environ.get("PREFIX_SHARING", 0)))  # Apply common prefixes of sequences only once
+
+FITNESS_CACHE = bool(int(os.environ.get("FITNESS_CACHE", 1)))  # Memoize objective values of refactoring sequences
+FITNESS_CACHE_SIZE = int(os.environ.get("FITNESS_CACHE_SIZE", 1024))  # Number of objective vectors held in memory
+LEXER_METRICS = bool(int(os.environ.get("LEXER_METRICS", 0)))  # Lexicon metrics by ANTLR lexer instead of understand
+PARSING_WORKERS = int(os.environ.get("PARSING_WORKERS", 0))  # Project parser processes, 0: number of CPUs
+PARSING_MODE = os.environ.get("PARSING_MODE", "SLL_LL")  # LL: full-LL only, SLL_LL: SLL first, LL on failure
+PARSING_TIME_BUDGET = float(os.environ.get("PARSING_TIME_BUDGET", 120))  # Max seconds to parse a file, 0: unlimited
+PARSING_TOKEN_BUDGET = int(os.environ.get("PARSING_TOKEN_BUDGET", 250000))  # Max tokens of a parsed file, 0: unlimited
+PARSE_DISK_CACHE = bool(int(os.environ.get("PARSE_DISK_CACHE", 1)))  # Persist tokens and summaries across runs
+PARSE_DISK_CACHE_MAX_MB = int(os.environ.get("PARSE_DISK_CACHE_MAX_MB", 1024))  # LRU size cap on disk, 0: unlimited
+PARSE_CACHE = bool(int(os.environ.get("PARSE_CACHE", 1)))  # Reuse parse trees of unchanged files in parse_and_walk
+PARSE_CACHE_SIZE = int(os.environ.get("PARSE_CACHE_SIZE", 256))  # Number of parse trees held in memory
+PARSE_CACHE_MEMORY_MB = int(os.environ.get("PARSE_CACHE_MEMORY_MB", 512))  # Estimated memory cap of parse trees
+NATIVE_SMELL_DETECTION = bool(int(os.environ.get("NATIVE_SMELL_DETECTION", 0)))  # Detect smells instead of CSV files
 
 PROJECT_ROOT_DIR = os.environ.get("PROJECT_ROOT_DIR")
-CSV_ROOT_DIR = os.environ.get("CSV_ROOT_DIR")
+CSV_ROOT_DIR = os.environ.get("CSV_ROOT_DIR", "")
 UDB_ROOT_DIR = os.environ.get("UDB_ROOT_DIR")
 INIT_POP_FILE = os.environ.get("INIT_POP_FILE")
 NGEN = int(os.environ.get("NGEN"))
@@ -143,6 +168,10 @@ LONG_METHOD_PATH = os.path.join(CSV_ROOT_DIR, BENCHMARKS['LONG_METHOD'][BENCHMAR
 
 PROJECT_NAME = os.path.basename(PROJECT_PATH)
 
+# Each evaluation worker holds a private copy of the project and its understand database in this directory
+WORKERS_ROOT_DIR = os.environ.get("WORKERS_ROOT_DIR", f'{PROJECT_PATH}_CodART_Workers')
+PARSE_DISK_CACHE_DIR = os.environ.get("PARSE_DISK_CACHE_DIR", os.path.join(PROJECT_ROOT_DIR, '_CodART_Parse_Cache'))
+
 # Initial value of QMOOD design metrics, testability and modularity used in objective-normalization process
 INITIAL_METRICS = {
     "10_water-simulator": {  # 0
@@ -357,7 +386,11 @@ INITIAL_METRICS = {
 
 CURRENT_METRICS = INITIAL_METRICS.get(PROJECT_NAME)
 if NGEN == 0:
-    global_execution_start_time = dt.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    # Evaluation worker processes inherit the start time of the main process through the environment
+    global_execution_start_time = os.environ.get(
+        "EXECUTION_START_TIME",
+        dt.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    )
 elif NGEN > MAX_ITERATIONS:
     quit()
 else:
@@ -424,6 +457,19 @@ def log_experiment_info():
     logger.info(f"Mutation probability: {MUTATION_PROBABILITY}")
     logger.info(f"Warm start mode: {WARM_START}")
     logger.info(f"CPP back-end mode: {USE_CPP_BACKEND}")
+    logger.info(f"Evaluation workers: {EVALUATION_WORKERS}")
+    logger.info(f"Fitness cache: {FITNESS_CACHE}")
+    logger.info(f"Lexer-only lexicon metrics: {LEXER_METRICS}")
+    logger.info(f"Parsing mode: {PARSING_MODE}")
+    logger.info(f"Project parsing workers: {PARSING_WORKERS}")
+    logger.info(f"Parsing budgets: {PARSING_TIME_BUDGET}s, {PARSING_TOKEN_BUDGET} tokens per file")
+    logger.info(f"Parse cache: {PARSE_CACHE}")
+    logger.info(f"Persistent parse cache: {PARSE_DISK_CACHE} ({PARSE_DISK_CACHE_DIR}, {PARSE_DISK_CACHE_MAX_MB} MB)")
+    logger.info(f"Native smell detection: {NATIVE_SMELL_DETECTION}")
+    logger.info(f"Prefix-sharing evaluation: {PREFIX_SHARING}")
+    logger.info(f"Fast restore: {FAST_RESTORE} (git check every {FAST_RESTORE_CHECK_INTERVAL} restores)")
+    logger.info(f"Lazy understand database refresh: {LAZY_DB_REFRESH}")
+    logger.info(f"Incremental modularity: {INCREMENTAL_MODULARITY}")
     logger.info(f"Experimenter: {EXPERIMENTER}")
     logger.info(f"Main script running the experiments: {SCRIPT}")
     logger.info(f"Experiment description: {DESCRIPTION}")
@@ -0,0 +1,223 @@
+"""
+## Introduction
+
+This module implements the fitness memoization cache of the search-based refactoring.
+
+Elites and duplicate offspring carry the same refactoring sequences from one generation to the next.
+The cache maps a stable hash of the ordered (name, params) list of a sequence and the baseline revision
+of the project to the objective vector computed for that sequence, so each sequence is evaluated only once.
+
+The cache has two levels:
+an in-memory LRU and an on-disk SQLite store under `config.PROJECT_LOG_DIR`,
+which makes resumed executions (`RESUME_EXECUTION`) nearly free for already-seen individuals.
+
+
+## Changelog
+
+### version 0.1.1
+    1. Make the paths inside the worker copies of the project relative as well
+
+### version 0.1.0
+    1. Add in-memory and on-disk fitness cache
+
+
+"""
+
+__version__ = '0.1.1'
+__author__ = 'Morteza Zakeri'
+
+import os
+import json
+import sqlite3
+import hashlib
+import subprocess
+from collections import OrderedDict
+
+from sbse import config
+from sbse.config import logger
+
+# Parameters which only locate the project and do not change the refactoring
+_LOCATION_PARAMS = ('udb_path', 'project_dir',)
+
+_FITNESS_CACHE = None
+
+
+def get_baseline_revision(project_dir):
+    """
+
+    Returns the git revision of the project being refactored, or an empty string if it is not available
+
+    """
+
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=project_dir,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError:
+        return ''
+    if result.returncode != 0:
+        return ''
+    return result.stdout.decode('utf-8').strip()
+
+
+def _project_relative_path(path_):
+    """
+
+    Returns the path relative to the project directory, or to the worker copy of the project
+    (see sbse.parallel_evaluation) which contains it, or None if the path is outside the project
+
+    """
+
+    project_dir = os.path.normpath(config.PROJECT_PATH)
+    if path_.startswith(project_dir + os.sep):
+        return os.path.relpath(path_, project_dir)
+    workers_root_dir = os.path.normpath(config.WORKERS_ROOT_DIR)
+    if path_.startswith(workers_root_dir + os.sep):
+        # <workers root>/worker_<id>/<project name>/<relative path>
+        parts = os.path.relpath(path_, workers_root_dir).split(os.sep)
+        if len(parts) > 2 and parts[0].startswith('worker_') and parts[1] == config.PROJECT_NAME:
+            return os.path.join(*parts[2:])
+    return None
+
+
+def canonical_params(params: dict) -> dict:
+    """
+
+    Drops the location parameters and makes the paths inside the project (or a worker copy of it) relative to
+    the project directory, such that the same refactoring has the same parameters on every machine and worker
+
+    """
+
+    canonical = {}
+    for key, value in params.items():
+        if key in _LOCATION_PARAMS:
+            continue
+        if isinstance(value, str):
+            relative_path = _project_relative_path(os.path.normpath(value))
+            if relative_path is not None:
+                value = relative_path.replace('\\', '/')
+        canonical[key] = value
+    return canonical
+
+
+def sequence_hash(refactoring_operations, baseline_revision='', namespace='') -> str:
+    """
+
+    Args:
+
+        refactoring_operations (list): Ordered list of RefactoringOperation
+
+        baseline_revision (str): The revision of the project the sequence is applied to
+
+        namespace (str): Distinguishes the objective functions of different problems
+
+    Returns:
+
+        str: The hex digest of the canonical sequence
+
+    """
+
+    sequence = [[ro.name, canonical_params(ro.params)] for ro in refactoring_operations]
+    content = json.dumps([namespace, baseline_revision, sequence], sort_keys=True, default=str)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class FitnessCache:
+    """
+
+    Two-level (memory and SQLite) cache of objective vectors keyed by refactoring sequence hashes
+
+    """
+
+    def __init__(self, db_path=None, max_size=1024, baseline_revision=None):
+        """
+
+        Args:
+
+            db_path (str): The path of SQLite file, if None only the in-memory cache is used
+
+            max_size (int): The maximum number of entries held in memory
+
+            baseline_revision (str): The revision of the project, by default, the HEAD of `config.PROJECT_PATH`
+
+        """
+
+        self.max_size = max_size
+        self.baseline_revision = get_baseline_revision(config.PROJECT_PATH) \
+            if baseline_revision is None else baseline_revision
+        self._memory = OrderedDict()
+        self._connection = None
+        if db_path is not None:
+            self._connection = sqlite3.connect(db_path)
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS fitness (key TEXT PRIMARY KEY, objectives TEXT NOT NULL)'
+            )
+            self._connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, refactoring_operations, namespace='') -> str:
+        return sequence_hash(refactoring_operations, self.baseline_revision, namespace)
+
+    def get(self, key):
+        """
+
+        Returns:
+
+            list: The cached objective vector or None
+
+        """
+
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return list(self._memory[key])
+        if self._connection is not None:
+            row = self._connection.execute('SELECT objectives FROM fitness WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                objectives = json.loads(row[0])
+                self._remember(key, objectives)
+                self.hits += 1
+                return list(objectives)
+        self.misses += 1
+        return None
+
+    def put(self, key, objectives):
+        objectives = [float(value) for value in objectives]
+        self._remember(key, objectives)
+        if self._connection is not None:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO fitness (key, objectives) VALUES (?, ?)', (key, json.dumps(objectives))
+            )
+            self._connection.commit()
+
+    def _remember(self, key, objectives):
+        self._memory[key] = objectives
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def log_statistics(self):
+        logger.info(f'Fitness cache hits: {self.hits}, misses: {self.misses}')
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def get_fitness_cache() -> FitnessCache:
+    """
+
+    Returns the fitness cache of the current execution, or None if the cache is disabled
+
+    """
+
+    global _FITNESS_CACHE
+    if not config.FITNESS_CACHE:
+        return None
+    if _FITNESS_CACHE is None:
+        _FITNESS_CACHE = FitnessCache(
+            db_path=os.path.join(config.PROJECT_LOG_DIR, 'fitness_cache.sqlite3'),
+            max_size=config.FITNESS_CACHE_SIZE
+        )
+    return _FITNESS_CACHE
@@ -7,6 +7,17 @@ Initialization: The abstract class and common utility functions.
 RandomInitialization: For initialling random candidates.
 
 ## Changelog
+### Version 0.6.1
+* The extracted entities of the God Class candidates are split at the unescaped top-level commas
+(see get_extracted_entities), which keeps the methods and the fields with generic types.
+
+### Version 0.6.0
+* SmellInitialization detects the smells by codart.smells.detection_engine if `config.NATIVE_SMELL_DETECTION` is set
+or the CSV files of the benchmark are missing.
+
+### Version 0.5.0
+* The refactoring modules are imported on the first call of their main functions (see LazyRefactoringMain).
+
 ### Version 0.4.0
 * Enhances module's design.
 
@@ -16,7 +27,7 @@ RandomInitialization: For initialling random candidates.
 
 """
 
-__version__ = '0.4.0'
+__version__ = '0.6.1'
 __author__ = 'Morteza Zakeri'
 
 import os
@@ -24,27 +35,78 @@ import re
 import codecs
 import random
 import json
+import importlib
 from collections import Counter
 from pathlib import Path
 
-import pandas
-
 import understand as und
 
 from codart.utility.directory_utils import reset_project, update_understand_database
 
-from refactorings import (
-    make_field_static, make_field_non_static, make_method_static2, make_method_non_static2,
-    move_field, move_method, move_class,
-    extract_method, extract_class, extract_interface2,
-    pullup_field, pushdown_field2, pullup_method, pushdown_method, pullup_constructor,
-    increase_field_visibility, decrease_field_visibility, increase_method_visibility, decrease_method_visibility
-)
-
 from sbse import config
 
 logger = config.logger
 
+
+class LazyRefactoringMain:
+    """
+
+    The main function of a refactoring module, the module (and its grammar) is imported on the first call.
+    The objects are picklable and can be sent to the worker processes without importing the module.
+
+    """
+
+    def __init__(self, module_name):
+        self.module_name = module_name
+        self.__name__ = 'main'
+        self._main = None
+
+    def resolve(self):
+        if self._main is None:
+            self._main = importlib.import_module(self.module_name).main
+        return self._main
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __reduce__(self):
+        return LazyRefactoringMain, (self.module_name,)
+
+    def __eq__(self, other):
+        return isinstance(other, LazyRefactoringMain) and other.module_name == self.module_name
+
+    def __hash__(self):
+        return hash(self.module_name)
+
+    def __repr__(self):
+        return f'{self.module_name}.main'
+
+
+class LazyRefactoringModule:
+    def __init__(self, module_name):
+        self.main = LazyRefactoringMain(module_name)
+
+
+make_field_static = LazyRefactoringModule('refactorings.make_field_static')
+make_field_non_static = LazyRefactoringModule('refactorings.make_field_non_static')
+make_method_static2 = LazyRefactoringModule('refactorings.make_method_static2')
+make_method_non_static2 = LazyRefactoringModule('refactorings.make_method_non_static2')
+move_field = LazyRefactoringModule('refactorings.move_field')
+move_method = LazyRefactoringModule('refactorings.move_method')
+move_class = LazyRefactoringModule('refactorings.move_class')
+extract_method = LazyRefactoringModule('refactorings.extract_method')
+extract_class = LazyRefactoringModule('refactorings.extract_class')
+extract_interface2 = LazyRefactoringModule('refactorings.extract_interface2')
+pullup_field = LazyRefactoringModule('refactorings.pullup_field')
+pushdown_field2 = LazyRefactoringModule('refactorings.pushdown_field2')
+pullup_method = LazyRefactoringModule('refactorings.pullup_method')
+pushdown_method = LazyRefactoringModule('refactorings.pushdown_method')
+pullup_constructor = LazyRefactoringModule('refactorings.pullup_constructor')
+increase_field_visibility = LazyRefactoringModule('refactorings.increase_field_visibility')
+decrease_field_visibility = LazyRefactoringModule('refactorings.decrease_field_visibility')
+increase_method_visibility = LazyRefactoringModule('refactorings.increase_method_visibility')
+decrease_method_visibility = LazyRefactoringModule('refactorings.decrease_method_visibility')
+
 REFACTORING_MAIN_MAP = {
     'Make Field Non-Static': make_field_non_static.main,  # RO1
     'Make Field Static': make_field_static.main,  # RO2
@@ -1089,6 +1151,34 @@ def get_move_method_location(row):
     return source_package, source_class, method_name
 
 
+def get_extracted_entities(row):
+    """
+    Splits the extracted entities of a God Class candidate, e.g., '[p.A::m(int, String):void, Map<K\\, V> map]',
+    at the commas which are neither escaped by a backslash nor inside the parentheses or angle brackets of an entity
+    """
+    data = row.strip()
+    if data.startswith('[') and data.endswith(']'):
+        data = data[1:-1]  # skip [ and ]
+    entities, entity, depth, escaped = [], '', 0, False
+    for char in data:
+        if escaped:
+            entity += char
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == ',' and depth == 0:
+            entities.append(entity.strip())
+            entity = ''
+        else:
+            if char in '(<':
+                depth += 1
+            elif char in ')>' and depth > 0:
+                depth -= 1
+            entity += char
+    entities.append(entity.strip())
+    return [entity for entity in entities if entity]
+
+
 class SmellInitialization(RandomInitialization):
     """
 
@@ -1106,6 +1196,13 @@ class SmellInitialization(RandomInitialization):
         """
 
         super(SmellInitialization, self).__init__(*args, **kwargs)
+        self.smell_paths = {
+            'FEATURE_ENVY': config.FEATURE_ENVY_PATH,
+            'GOD_CLASS': config.GOD_CLASS_PATH,
+            'LONG_METHOD': config.LONG_METHOD_PATH,
+        }
+        if config.NATIVE_SMELL_DETECTION or not all(os.path.isfile(path_) for path_ in self.smell_paths.values()):
+            self.smell_paths = self.detect_smells()
         # Load csv files
         self.move_method_candidates = self.load_move_method_candidates()
         self.extract_class_candidates = self.load_extract_class_candidates()
@@ -1157,30 +1254,42 @@ class SmellInitialization(RandomInitialization):
         config.logger.debug(f'Generating a biased initial population was finished.')
         return self.population
 
+    def detect_smells(self):
+        """
+        Detects the smells of the project and writes their CSV files to the log directory
+
+        Returns:
+
+            dict: The paths of the 'FEATURE_ENVY', 'GOD_CLASS', and 'LONG_METHOD' CSV files
+
+        """
+
+        from codart.smells import detection_engine
+        config.logger.debug(f'Detecting the smells of {config.PROJECT_PATH} ...')
+        return detection_engine.main(config.PROJECT_PATH, os.path.join(config.PROJECT_LOG_DIR, 'smells'))
+
     def load_extract_class_candidates(self):
         _db = und.open(self.udb_path)
-        god_classes = pandas.read_csv(config.GOD_CLASS_PATH, sep="\t")
+        import pandas
+        god_classes = pandas.read_csv(self.smell_paths['GOD_CLASS'], sep="\t")
         candidates = []
         for index, row in god_classes.iterrows():
             moved_fields, moved_methods = [], []
             # print(row[0].strip())
             try:
-                class_file = _db.lookup(re.compile(row[0].strip() + r'$'), "Class")[0].parent().longname()
+                class_file = _db.lookup(re.compile(row.iloc[0].strip() + r'$'), "Class")[0].parent().longname()
                 # print(class_file)
             except:
                 # print('Class file not found')
                 continue
-            source_class = row[0].split(".")[-1]
-            data = row[1][1:-1]  # skip [ and ]
-            data = data.split(",")
-            for field_or_method in data:
-                field_or_method = field_or_method.strip()
+            source_class = row.iloc[0].split(".")[-1]
+            for field_or_method in get_extracted_entities(row.iloc[1]):
                 if "(" in field_or_method:
                     # Method
                     moved_methods.append(
-                        field_or_method.split("::")[1].split("(")[0]
+                        field_or_method.split("::")[-1].split("(")[0]
                     )
-                elif len(field_or_method.split(" ")) == 2:
+                elif " " in field_or_method:
                     # Field
                     moved_fields.append(
                         field_or_method.split(" ")[-1]
@@ -1199,13 +1308,14 @@ class SmellInitialization(RandomInitialization):
         return candidates
 
     def load_move_method_candidates(self):
+        import pandas
         feature_envies = pandas.read_csv(
-            config.FEATURE_ENVY_PATH, sep=None, engine='python'
+            self.smell_paths['FEATURE_ENVY'], sep=None, engine='python'
         )
         candidates = []
         for index, row in feature_envies.iterrows():
-            source_package, source_class, method_name = get_move_method_location(row[1])
-            target_info = row[2].split(".")
+            source_package, source_class, method_name = get_move_method_location(row.iloc[1])
+            target_info = row.iloc[2].split(".")
             target_package = ".".join(target_info[:-1])
             target_class = target_info[-1]
             candidates.append({
@@ -1219,13 +1329,14 @@ class SmellInitialization(RandomInitialization):
 
     def load_extract_method_candidates(self):
         _db = und.open(self.udb_path)
+        import pandas
         long_methods = pandas.read_csv(
-            config.LONG_METHOD_PATH, sep='\t', engine='python'
+            self.smell_paths['LONG_METHOD'], sep='\t', engine='python'
         )
         candidates = []
         for index, row in long_methods.iterrows():
             lines = {}
-            class_info = row[0].strip().split(".")[-1]
+            class_info = row.iloc[0].strip().split(".")[-1]
             class_file = _db.lookup(class_info + ".java", "File")
             if class_file:
                 class_file = class_file[0].longname()
@@ -1233,7 +1344,7 @@ class SmellInitialization(RandomInitialization):
                 continue
             _bytes = open(class_file, mode='rb').read()
             file_content = codecs.decode(_bytes, errors='strict')
-            lines_info = row[5]
+            lines_info = row.iloc[5]
             for i in lines_info.split(")"):
                 if i == '':
                     continue
@@ -0,0 +1,271 @@
+"""
+## Introduction
+
+This module implements the parallel evaluation of a population of refactoring sequences.
+
+Evaluating an individual restores the project, applies its refactoring operations one by one, and
+computes the objectives on the refactored project.
+Since all these steps change the project files and the understand database, only one individual
+can be evaluated on `config.PROJECT_PATH` at a time.
+Therefore, each evaluation worker owns a private copy of the project (a detached git worktree or a copied tree)
+plus its own understand database, and individuals are dispatched to free workers.
+
+### Classes
+
+EvaluationWorkerPool: A pool of processes, each bound to one worker copy of the project.
+
+The pool is a `ProcessPoolExecutor`, which does not replace a worker that dies (e.g., by a crash of understand or
+of a refactoring): the pending evaluations fail with `BrokenProcessPool`, and the pool is recreated on its next use,
+instead of the whole search waiting forever for the lost evaluation.
+
+
+## Changelog
+
+### version 0.1.2
+    1. Use a ProcessPoolExecutor, such that a dead worker fails the evaluation instead of blocking it
+
+### version 0.1.1
+    1. Refresh the understand database of the worker copies lazily
+
+### version 0.1.0
+    1. Add worker-pool evaluation mode
+
+
+"""
+
+__version__ = '0.1.2'
+__author__ = 'Morteza Zakeri'
+
+import os
+import queue
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import Queue
+
+from codart.utility.directory_utils import (
+    create_understand_database, git_restore, restore_project
+)
+from sbse import config
+from sbse.analysis_refresh import get_refresh_scheduler
+from sbse.config import logger
+
+# (project_dir, udb_path) of the worker copy owned by the current worker process
+_WORKER_COPY = None
+
+_WORKER_POOL = None
+
+# Seconds a starting worker process waits for a free worker copy of the project
+WORKER_COPY_TIMEOUT = 60
+
+
+def create_worker_copy(worker_id: int, use_worktree=True):
+    """
+
+    Creates (or reuses) the private copy of the project and the understand database for a worker.
+
+    Args:
+
+        worker_id (int): The worker number
+
+        use_worktree (bool): Whether the copy is created as a detached git worktree or a copied tree
+
+    Returns:
+
+        tuple: The project directory and the understand database path of the worker copy
+
+    """
+
+    worker_dir = os.path.join(config.WORKERS_ROOT_DIR, f'worker_{worker_id}')
+    project_dir = os.path.join(worker_dir, config.PROJECT_NAME)
+    udb_path = os.path.join(worker_dir, config.PROJECT_NAME + '.und')
+    if not os.path.exists(worker_dir):
+        os.makedirs(worker_dir)
+
+    if not os.path.isdir(project_dir):
+        git_restore(config.PROJECT_PATH)
+        result = None
+        if use_worktree:
+            result = subprocess.run(['git', 'worktree', 'add', '--detach', project_dir, 'HEAD'],
+                                    cwd=config.PROJECT_PATH,
+                                    stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE)
+        if result is None or result.returncode != 0:
+            # Fall back to a plain copy which also contains the git directory required by git_restore
+            shutil.copytree(config.PROJECT_PATH, project_dir)
+        logger.info(f'Worker {worker_id} project copy was created in {project_dir}')
+
+    if not os.path.exists(udb_path):
+        # The database of the main project refers to the main project files, so it cannot be copied
+        udb_path = create_understand_database(project_dir, db_dir=worker_dir)
+        logger.info(f'Worker {worker_id} understand database was created in {udb_path}')
+
+    return project_dir, udb_path
+
+
+def relocate_refactoring_params(params: dict, project_dir: str, udb_path: str) -> dict:
+    """
+
+    Maps the paths in the parameters of a refactoring operation from the main project to a worker copy
+
+    """
+
+    relocated_params = dict(params)
+    main_project_dir = os.path.normpath(config.PROJECT_PATH)
+    main_udb_path = os.path.normpath(config.UDB_PATH)
+    for key, value in params.items():
+        if not isinstance(value, str):
+            continue
+        path_ = os.path.normpath(value)
+        if path_ == main_udb_path:
+            relocated_params[key] = udb_path
+        elif path_ == main_project_dir or path_.startswith(main_project_dir + os.sep):
+            relocated_params[key] = project_dir + path_[len(main_project_dir):]
+    return relocated_params
+
+
+def _initialize_worker(worker_copies: Queue, timeout=WORKER_COPY_TIMEOUT):
+    """
+
+    Binds the current worker process to one of the worker copies,
+    the worker fails (and so the pool) if no copy is free, rather than blocking forever
+
+    """
+
+    global _WORKER_COPY
+    try:
+        _WORKER_COPY = worker_copies.get(timeout=timeout)
+    except queue.Empty:
+        raise RuntimeError(f'No free worker copy of the project after {timeout} seconds')
+
+
+def _evaluate_individual(task):
+    """
+
+    Executes one refactoring sequence on the worker copy and computes its objectives
+
+    Args:
+
+        task (tuple): Index of the individual, list of RefactoringOperation, and the objective function
+
+    Returns:
+
+        tuple: Index of the individual and the output of the objective function
+
+    """
+
+    k, refactoring_operations, objective_function = task
+    project_dir, udb_path = _WORKER_COPY
+
+    # Stage 0: Restore the project
+    logger.debug(f"Restoring the project {project_dir}.")
+    restore_project(project_dir)
+    refresh_scheduler = get_refresh_scheduler(project_dir, udb_path)
+    refresh_scheduler.notify_restored()
+
+    # Stage 1: Execute all refactoring operations in the sequence x
+    # Refactorings that read the project or database path from config must see the worker copy
+    main_project_dir, main_udb_path = config.PROJECT_PATH, config.UDB_PATH
+    logger.debug(f"Reached an Individual with size {len(refactoring_operations)}")
+    for refactoring_operation in refactoring_operations:
+        refactoring_operation.params = relocate_refactoring_params(
+            refactoring_operation.params, project_dir, udb_path
+        )
+        refresh_scheduler.before_refactoring(refactoring_operation)
+        config.PROJECT_PATH, config.UDB_PATH = project_dir, udb_path
+        try:
+            refactoring_operation.do_refactoring()
+        finally:
+            config.PROJECT_PATH, config.UDB_PATH = main_project_dir, main_udb_path
+        refresh_scheduler.notify_refactoring_applied(refactoring_operation)
+    refresh_scheduler.before_metrics()
+    refresh_scheduler.log_statistics()
+
+    # Stage 2: Computing quality attributes
+    return k, objective_function(udb_path)
+
+
+class EvaluationWorkerPool:
+    """
+
+    A pool of processes, each of which evaluates individuals on its own copy of the project.
+    Individuals are dispatched to the first free worker, and results are gathered in population order.
+
+    """
+
+    def __init__(self, n_workers: int, use_worktree=True):
+        """
+
+        Args:
+
+            n_workers (int): The number of workers (and project copies)
+
+            use_worktree (bool): Whether the project copies are created as git worktrees or copied trees
+
+        """
+
+        self.n_workers = n_workers
+        # Set when a worker process died, the pool cannot evaluate anymore
+        self.is_broken = False
+        worker_copies = Queue()
+        for worker_id in range(n_workers):
+            worker_copies.put(create_worker_copy(worker_id, use_worktree=use_worktree))
+
+        # Spawned workers must log in the directory of the current execution
+        os.environ['EXECUTION_START_TIME'] = config.global_execution_start_time
+        self._executor = ProcessPoolExecutor(max_workers=n_workers, initializer=_initialize_worker,
+                                             initargs=(worker_copies,))
+
+    def evaluate(self, population, objective_function) -> list:
+        """
+
+        Args:
+
+            population (list): A list of individuals, each a list of RefactoringOperation
+
+            objective_function (function): A picklable function receiving the worker understand database path
+
+        Returns:
+
+            list: The outputs of the objective function in the order of the population
+
+        """
+
+        results = [None] * len(population)
+        futures = [self._executor.submit(_evaluate_individual, (k, list(individual_), objective_function))
+                   for k, individual_ in enumerate(population)]
+        try:
+            for future in as_completed(futures):
+                k, result = future.result()
+                results[k] = result
+        except BrokenProcessPool as e:
+            self.is_broken = True
+            logger.error(f'An evaluation worker process died: {e}')
+            raise
+        return results
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def get_worker_pool(n_workers: int) -> EvaluationWorkerPool:
+    """
+
+    Returns the worker pool of the current execution, the pool is created once and reused for all generations,
+    and recreated if one of its workers died
+
+    """
+
+    global _WORKER_POOL
+    if _WORKER_POOL is None or _WORKER_POOL.n_workers != n_workers or _WORKER_POOL.is_broken:
+        shutdown_worker_pool()
+        _WORKER_POOL = EvaluationWorkerPool(n_workers=n_workers)
+    return _WORKER_POOL
+
+
+def shutdown_worker_pool():
+    global _WORKER_POOL
+    if _WORKER_POOL is not None:
+        _WORKER_POOL.close()
+        _WORKER_POOL = None
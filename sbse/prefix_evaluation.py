@@ -0,0 +1,298 @@
+"""
+## Introduction
+
+This module implements the prefix-sharing evaluation of a population of refactoring sequences.
+
+Offspring produced by the single-point crossover and the mutation operators share long refactoring prefixes
+with their parents and siblings.
+Instead of replaying every sequence from a clean project, the sequences are organized into a prefix trie,
+each trie node (refactoring operation) is applied once, and the project state (changed files and
+understand database) is checkpointed at branching nodes, such that the divergent suffixes start from the snapshot.
+This turns O(sum of sequence lengths) refactoring applications into O(unique trie nodes).
+
+### Classes
+
+RefactoringTrie: The prefix trie of the refactoring sequences in a population
+
+ProjectSnapshot: A checkpoint of the project files which differ from the baseline and the understand database
+
+PrefixSharingEvaluator: Evaluates a population by a depth-first traversal of its prefix trie
+
+
+## Changelog
+
+### version 0.1.3
+    1. Update the identifier index of the project with the files of a restored snapshot
+
+### version 0.1.2
+    1. Checkpoint the refactorings applied since the baseline with the snapshots (used by the incremental modularity)
+
+### version 0.1.1
+    1. Refresh the understand database lazily, and only before checkpointing it
+
+### version 0.1.0
+    1. Add prefix-sharing evaluation
+
+
+"""
+
+__version__ = '0.1.3'
+__author__ = 'Morteza Zakeri'
+
+import os
+import json
+import shutil
+import subprocess
+
+from codart.utility.directory_utils import restore_project
+from codart.utility.identifier_index import notify_project_restored
+from codart.utility.snapshot_manager import get_active_snapshot_manager
+from sbse import config
+from sbse.analysis_refresh import get_refresh_scheduler
+from sbse.config import logger
+from sbse.fitness_cache import canonical_params
+
+
+class TrieNode:
+    def __init__(self, refactoring_operation=None):
+        self.refactoring_operation = refactoring_operation
+        self.children = {}
+        # Indices of the individuals whose sequence ends at this node
+        self.individuals = []
+
+
+class RefactoringTrie:
+    """
+
+    The prefix trie of refactoring sequences, two operations share a node if they have the same name
+    and the same canonical parameters, and all previous operations in their sequences are shared too
+
+    """
+
+    def __init__(self, population=None):
+        self.root = TrieNode()
+        self.number_of_nodes = 0
+        self.sum_of_lengths = 0
+        for k, refactoring_operations in enumerate(population or []):
+            self.insert(k, refactoring_operations)
+
+    @staticmethod
+    def operation_key(refactoring_operation) -> str:
+        return json.dumps(
+            [refactoring_operation.name, canonical_params(refactoring_operation.params)], sort_keys=True, default=str
+        )
+
+    def insert(self, k, refactoring_operations):
+        node = self.root
+        for refactoring_operation in refactoring_operations:
+            key = self.operation_key(refactoring_operation)
+            if key not in node.children:
+                node.children[key] = TrieNode(refactoring_operation)
+                self.number_of_nodes += 1
+            node = node.children[key]
+        node.individuals.append(k)
+        self.sum_of_lengths += len(refactoring_operations)
+
+
+class ProjectSnapshot:
+    """
+
+    Checkpoints the files of the project which differ from the git baseline and the understand database
+
+    """
+
+    def __init__(self, project_dir, udb_path, snapshot_dir):
+        self.project_dir = project_dir
+        self.udb_path = udb_path
+        self.snapshot_dir = snapshot_dir
+        self.changed_files = []
+        self.deleted_files = []
+        self.applied_refactorings = []
+
+    def _git_changes(self):
+        """
+
+        Returns:
+
+            tuple: The changed (modified or untracked) and deleted files, relative to the project directory
+
+        """
+
+        manager = get_active_snapshot_manager(self.project_dir)
+        if manager is not None:
+            return manager.changes()
+
+        result = subprocess.run(['git', 'status', '--porcelain', '-uall', '--no-renames', '.'],
+                                cwd=self.project_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        top_level = subprocess.run(['git', 'rev-parse', '--show-toplevel'],
+                                   cwd=self.project_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        repository_dir = top_level.stdout.decode('utf-8').strip()
+        changed_files, deleted_files = [], []
+        for line in result.stdout.decode('utf-8').splitlines():
+            status, path_ = line[:2], line[3:].strip('"')
+            path_ = os.path.relpath(os.path.join(repository_dir, path_), self.project_dir)
+            if 'D' in status:
+                deleted_files.append(path_)
+            else:
+                changed_files.append(path_)
+        return changed_files, deleted_files
+
+    def take(self):
+        if os.path.exists(self.snapshot_dir):
+            shutil.rmtree(self.snapshot_dir)
+        self.changed_files, self.deleted_files = self._git_changes()
+        self.applied_refactorings = list(get_refresh_scheduler(self.project_dir, self.udb_path).applied_refactorings)
+        for path_ in self.changed_files:
+            _copy_path(os.path.join(self.project_dir, path_), os.path.join(self.snapshot_dir, 'files', path_))
+        _copy_path(self.udb_path, os.path.join(self.snapshot_dir, 'db', os.path.basename(self.udb_path)))
+
+    def restore(self):
+        restore_project(self.project_dir)
+        # Contents are copied with their modification times, thus the restored database is consistent with them
+        for path_ in self.changed_files:
+            _copy_path(os.path.join(self.snapshot_dir, 'files', path_), os.path.join(self.project_dir, path_))
+        for path_ in self.deleted_files:
+            if os.path.exists(os.path.join(self.project_dir, path_)):
+                os.remove(os.path.join(self.project_dir, path_))
+        notify_project_restored(self.project_dir, [os.path.join(self.project_dir, path_)
+                                                   for path_ in self.changed_files + self.deleted_files])
+        _copy_path(os.path.join(self.snapshot_dir, 'db', os.path.basename(self.udb_path)), self.udb_path)
+        refresh_scheduler = get_refresh_scheduler(self.project_dir, self.udb_path)
+        refresh_scheduler.mark_clean()
+        refresh_scheduler.applied_refactorings = list(self.applied_refactorings)
+
+    def discard(self):
+        if os.path.exists(self.snapshot_dir):
+            shutil.rmtree(self.snapshot_dir)
+
+
+def _copy_path(source, destination):
+    """
+
+    Copies a file or a directory (understand 6.x databases are directories) with the modification times
+
+    """
+
+    if os.path.isdir(destination):
+        shutil.rmtree(destination)
+    elif not os.path.exists(os.path.dirname(destination)):
+        os.makedirs(os.path.dirname(destination))
+    if os.path.isdir(source):
+        shutil.copytree(source, destination)
+    else:
+        shutil.copy2(source, destination)
+
+
+class PrefixSharingEvaluator:
+    """
+
+    Evaluates a population by a depth-first traversal of its prefix trie
+
+    """
+
+    def __init__(self, project_dir=None, udb_path=None, snapshots_dir=None):
+        """
+
+        Args:
+
+            project_dir (str): The project directory, default is `config.PROJECT_PATH`
+
+            udb_path (str): The understand database path, default is `config.UDB_PATH`
+
+            snapshots_dir (str): The directory to keep the snapshots in, default is under `config.PROJECT_LOG_DIR`
+
+        """
+
+        self.project_dir = config.PROJECT_PATH if project_dir is None else project_dir
+        self.udb_path = config.UDB_PATH if udb_path is None else udb_path
+        self.snapshots_dir = os.path.join(config.PROJECT_LOG_DIR, 'snapshots') if snapshots_dir is None \
+            else snapshots_dir
+        self.applied_refactorings = 0
+        self.snapshots = 0
+
+    def evaluate(self, population, objective_function) -> list:
+        """
+
+        Args:
+
+            population (list): A list of individuals, each a list of RefactoringOperation
+
+            objective_function (function): A function receiving the understand database path
+
+        Returns:
+
+            list: The outputs of the objective function in the order of the population
+
+        """
+
+        trie = RefactoringTrie(population)
+        results = [None] * len(population)
+        self.applied_refactorings = 0
+        self.snapshots = 0
+        refresh_scheduler = get_refresh_scheduler(self.project_dir, self.udb_path)
+
+        # Stage 0: Restore the project
+        logger.debug("Restoring the project.")
+        restore_project(self.project_dir)
+        refresh_scheduler.notify_restored()
+
+        self._visit(trie.root, results, objective_function, depth=0)
+        logger.info(f'Prefix-sharing evaluation applied {self.applied_refactorings} refactorings '
+                    f'instead of {trie.sum_of_lengths} with {self.snapshots} snapshots.')
+        return results
+
+    def _visit(self, node: TrieNode, results, objective_function, depth):
+        # Stage 2: Computing quality attributes of the sequences ending at this node
+        refresh_scheduler = get_refresh_scheduler(self.project_dir, self.udb_path)
+        if node.individuals:
+            refresh_scheduler.before_metrics()
+            objectives = objective_function(self.udb_path)
+            for k in node.individuals:
+                results[k] = objectives
+
+        children = list(node.children.values())
+        snapshot = None
+        if len(children) > 1:
+            if depth == 0:
+                snapshot = _BaselineSnapshot(self.project_dir, self.udb_path)
+            else:
+                snapshot = ProjectSnapshot(self.project_dir, self.udb_path,
+                                           os.path.join(self.snapshots_dir, f'depth_{depth}'))
+                # The database is checkpointed with the files, so it must be fresh
+                refresh_scheduler.refresh()
+                snapshot.take()
+                self.snapshots += 1
+
+        for i, child in enumerate(children):
+            if i > 0:
+                logger.debug(f"Restoring the snapshot at depth {depth}.")
+                snapshot.restore()
+
+            # Stage 1: Execute the refactoring operation of the child node
+            refresh_scheduler.before_refactoring(child.refactoring_operation)
+            child.refactoring_operation.do_refactoring()
+            self.applied_refactorings += 1
+            refresh_scheduler.notify_refactoring_applied(child.refactoring_operation)
+            self._visit(child, results, objective_function, depth + 1)
+
+        if snapshot is not None:
+            snapshot.discard()
+
+
+class _BaselineSnapshot:
+    """
+
+    The snapshot of the root node is the baseline itself
+
+    """
+
+    def __init__(self, project_dir, udb_path):
+        self.project_dir = project_dir
+        self.udb_path = udb_path
+
+    def restore(self):
+        restore_project(self.project_dir)
+        get_refresh_scheduler(self.project_dir, self.udb_path).notify_restored()
+
+    def discard(self):
+        pass
@@ -23,6 +23,30 @@ PureRandomInitialization: Population, list of Individual
 
 ## Changelog
 
+### version 0.3.1
+    1. Build the baseline graph of the incremental modularity when the initial metrics reset the project
+
+### version 0.3.0
+    1. Pass the applied refactorings to the incremental modularity (see metrics.modularity.IncrementalModularity)
+
+### version 0.2.9
+    1. Compute all objectives on one shared evaluation session (see metrics.evaluation_session)
+
+### version 0.2.8
+    1. Refresh the understand database lazily (see sbse.analysis_refresh)
+
+### version 0.2.7
+    1. Restore only the touched files before evaluating each individual (see codart.utility.snapshot_manager)
+
+### version 0.2.6
+    1. Add prefix-sharing evaluation (see sbse.prefix_evaluation)
+
+### version 0.2.5
+    1. Add fitness memoization cache (see sbse.fitness_cache)
+
+### version 0.2.4
+    1. Add worker-pool evaluation mode (see sbse.parallel_evaluation)
+
 ### version 0.2.3
     1. Fix PEP 8 warnings
 
@@ -48,7 +72,7 @@ PureRandomInitialization: Population, list of Individual
 
 """
 
-__version__ = '0.2.3'
+__version__ = '0.3.1'
 __author__ = 'Morteza Zakeri'
 
 import os
@@ -56,6 +80,7 @@ import random
 import json
 from copy import deepcopy
 from datetime import datetime
+from functools import partial
 from multiprocessing import Process, Array
 from typing import List
 
@@ -79,11 +104,17 @@ from pymoo.optimize import minimize
 from pymoo.util.termination.default import MultiObjectiveDefaultTermination
 
 from metrics.qmood import DesignQualityAttributes
-from metrics.modularity import main as modularity_main
+from metrics.evaluation_session import EvaluationSession
+from metrics.modularity import main as modularity_main, build_baseline_graph
 from metrics.testability_prediction2 import main as testability_main
 
-from codart.utility.directory_utils import update_understand_database, git_restore, reset_project
+from codart.utility.directory_utils import restore_project, reset_project
 from sbse.initialize import RandomInitialization, SmellInitialization, Initialization
+from sbse.parallel_evaluation import get_worker_pool, shutdown_worker_pool
+from sbse.fitness_cache import get_fitness_cache
+from sbse.prefix_evaluation import PrefixSharingEvaluator
+from sbse.analysis_refresh import get_refresh_scheduler, get_applied_refactorings
+from codart.utility.parsing import get_parsing_statistics
 from sbse import config
 from sbse.config import logger
 
@@ -254,6 +285,143 @@ def calc_modularity_objective(path_, arr_):
     )
 
 
+# ---------------------- Defines objective functions used by evaluation workers -----------------------
+def single_objective_function(udb_path, mode='single'):
+    """
+
+    Returns:
+
+        tuple: The objective vector of ProblemSingleObjective and None (no design metrics)
+
+    """
+
+    with EvaluationSession(udb_path, materialize=mode != 'single') as session:
+        if mode == 'single':
+            score = testability_main(udb_path, initial_value=config.CURRENT_METRICS.get("TEST", 1.0), session=session)
+        else:
+            qmood_quality_attributes = DesignQualityAttributes(udb_path=udb_path, session=session)
+            o1, _ = qmood_quality_attributes.average_sum
+            o2 = testability_main(udb_path, initial_value=config.CURRENT_METRICS.get("TEST", 1.0), session=session)
+            o3 = modularity_main(
+                udb_path, initial_value=config.CURRENT_METRICS.get("MODULE", 1.0), session=session,
+                refactoring_operations=get_applied_refactorings(udb_path)
+            )
+            score = (o1 * 6. + o2 + o3) / 8.
+    return [-1 * score], None
+
+
+def multi_objective_function(udb_path):
+    """
+
+    Returns:
+
+        tuple: The objective vector of ProblemMultiObjective and None (no design metrics)
+
+    """
+
+    with EvaluationSession(udb_path) as session:
+        qmood_quality_attributes = DesignQualityAttributes(udb_path=udb_path, session=session)
+        o1, _ = qmood_quality_attributes.average_sum
+        o2 = testability_main(udb_path, initial_value=config.CURRENT_METRICS.get("TEST", 1.0), session=session)
+        o3 = modularity_main(
+            udb_path, initial_value=config.CURRENT_METRICS.get("MODULE", 1.0), session=session,
+            refactoring_operations=get_applied_refactorings(udb_path)
+        )
+    return [-1 * o1, -1 * o2, -1 * o3], None
+
+
+def many_objective_function(udb_path):
+    """
+
+    Returns:
+
+        tuple: The objective vector of ProblemManyObjective and the QMOOD design metrics
+
+    """
+
+    with EvaluationSession(udb_path) as session:
+        qmood_quality_attributes = DesignQualityAttributes(udb_path=udb_path, session=session)
+        arr = [
+            qmood_quality_attributes.reusability,
+            qmood_quality_attributes.understandability,
+            qmood_quality_attributes.flexibility,
+            qmood_quality_attributes.functionality,
+            qmood_quality_attributes.effectiveness,
+            qmood_quality_attributes.extendability,
+            testability_main(udb_path, initial_value=config.CURRENT_METRICS.get("TEST", 1.0), session=session),
+            modularity_main(
+                udb_path, initial_value=config.CURRENT_METRICS.get("MODULE", 1.0), session=session,
+                refactoring_operations=get_applied_refactorings(udb_path)
+            ),
+        ]
+    design_metrics = {
+        "DSC": [qmood_quality_attributes.DSC],
+        "NOH": [qmood_quality_attributes.NOH],
+        "ANA": [qmood_quality_attributes.ANA],
+        "MOA": [qmood_quality_attributes.MOA],
+        "DAM": [qmood_quality_attributes.DAM],
+        "CAMC": [qmood_quality_attributes.CAMC],
+        "CIS": [qmood_quality_attributes.CIS],
+        "NOM": [qmood_quality_attributes.NOM],
+        "DCC": [qmood_quality_attributes.DCC],
+        "MFA": [qmood_quality_attributes.MFA],
+        "NOP": [qmood_quality_attributes.NOP]
+    }
+    return [-1 * i for i in arr], design_metrics
+
+
+def lookup_fitness_cache(x, namespace):
+    """
+
+    Consults the fitness cache for all individuals of the population x
+
+    Returns:
+
+        tuple: The cache keys and the cached objective vectors (None for the individuals not seen before)
+
+    """
+
+    fitness_cache = get_fitness_cache()
+    if fitness_cache is None:
+        return [None] * len(x), [None] * len(x)
+    keys = [fitness_cache.key(individual_[0], namespace=namespace) for individual_ in x]
+    return keys, [fitness_cache.get(key) for key in keys]
+
+
+def store_fitness(key, objective_vector):
+    fitness_cache = get_fitness_cache()
+    if fitness_cache is not None and key is not None:
+        fitness_cache.put(key, objective_vector)
+
+
+def evaluate_population(x, objective_function, n_workers, namespace):
+    """
+
+    Evaluates the individuals of the population x which are not in the fitness cache,
+    either on n_workers private copies of the project or by sharing the common prefixes of the sequences
+
+    Returns:
+
+        list: The objective vector and design metrics (None for cached individuals) in the order of x
+
+    """
+
+    keys, results = lookup_fitness_cache(x, namespace)
+    results = [None if objective_vector is None else (objective_vector, None) for objective_vector in results]
+    missed = [k for k, result in enumerate(results) if result is None]
+    population = [x[k][0] for k in missed]
+    if n_workers > 1:
+        evaluator = get_worker_pool(n_workers)
+    else:
+        evaluator = PrefixSharingEvaluator()
+    for k, result in zip(missed, evaluator.evaluate(population, objective_function)):
+        results[k] = result
+        store_fitness(keys[k], result[0])
+    for k, (objective_vector, _) in enumerate(results):
+        logger.info(f"Objective values for individual {k}: {objective_vector}")
+    return results
+
+
 # ---------------------- Defines problems ----------------------------
 class ProblemSingleObjective(Problem):
     """
@@ -265,7 +433,8 @@ class ProblemSingleObjective(Problem):
     def __init__(self, n_refactorings_lowerbound=10,
                  n_refactorings_upperbound=50,
                  evaluate_in_parallel=False,
-                 mode='single'  # 'multi'
+                 mode='single',  # 'multi'
+                 n_workers=1,
                  ):
         """
 
@@ -277,6 +446,8 @@ class ProblemSingleObjective(Problem):
 
             mode (str): 'single' or 'multi'
 
+            n_workers (int): The number of workers evaluating the population, each on its own project copy
+
         """
 
         super(ProblemSingleObjective, self).__init__(n_var=1,
@@ -286,6 +457,7 @@ class ProblemSingleObjective(Problem):
         self.n_refactorings_upperbound = n_refactorings_upperbound
         self.evaluate_in_parallel = evaluate_in_parallel
         self.mode = mode
+        self.n_workers = n_workers
 
     def _evaluate(self,
                   x,  #
@@ -303,26 +475,42 @@ class ProblemSingleObjective(Problem):
 
         """
 
+        if self.n_workers > 1 or config.PREFIX_SHARING:
+            results = evaluate_population(
+                x, partial(single_objective_function, mode=self.mode), self.n_workers, f'single-{self.mode}'
+            )
+            out['F'] = np.array([objective_vector for objective_vector, _ in results], dtype=float)
+            return
+
+        keys, cached_objective_values = lookup_fitness_cache(x, f'single-{self.mode}')
         objective_values = []
+        refresh_scheduler = get_refresh_scheduler()
         for k, individual_ in enumerate(x):
+            if cached_objective_values[k] is not None:
+                objective_values.append(cached_objective_values[k])
+                logger.info(f"Objective values for individual {k} (cached): {cached_objective_values[k]}")
+                continue
+
             # Stage 0: Git restore
-            logger.debug("Executing git restore.")
-            git_restore(config.PROJECT_PATH)
-            logger.debug("Updating understand database after git restore.")
-            update_understand_database(config.UDB_PATH)
+            logger.debug("Restoring the project.")
+            restore_project(config.PROJECT_PATH)
+            refresh_scheduler.notify_restored()
 
             # Stage 1: Execute all refactoring operations in the sequence x
             logger.debug(f"Reached Individual with Size {len(individual_[0])}")
             for refactoring_operation in individual_[0]:
+                refresh_scheduler.before_refactoring(refactoring_operation)
                 refactoring_operation.do_refactoring()
-                # Update Understand DB
-                logger.debug(f"Updating understand database after {refactoring_operation.name}.")
-                update_understand_database(config.UDB_PATH)
+                refresh_scheduler.notify_refactoring_applied(refactoring_operation)
+            refresh_scheduler.before_metrics()
 
             # Stage 2:
             if self.mode == 'single':
                 # Stage 2 (Single objective mode): Considering only one quality attribute, e.g., testability
-                score = testability_main(config.UDB_PATH, initial_value=config.CURRENT_METRICS.get("TEST", 1.0))
+                with EvaluationSession(config.UDB_PATH, materialize=False) as session:
+                    score = testability_main(
+                        config.UDB_PATH, initial_value=config.CURRENT_METRICS.get("TEST", 1.0), session=session
+                    )
             else:
                 # Stage 2 (Multi-objective mode): Considering one objective based on average of 8 objective
                 arr = Array('d', range(8))
@@ -336,15 +524,22 @@ class ProblemSingleObjective(Problem):
                     score = sum([i for i in arr]) / 8.
                 else:
                     # Stage 2 (Multi-objective mode, sequential): Computing quality attributes
-                    qmood_quality_attributes = DesignQualityAttributes(udb_path=config.UDB_PATH)
-                    o1 = qmood_quality_attributes.average_sum
-                    o2 = testability_main(config.UDB_PATH, initial_value=config.CURRENT_METRICS.get("TEST", 1.0))
-                    o3 = modularity_main(config.UDB_PATH, initial_value=config.CURRENT_METRICS.get("MODULE", 1.0))
+                    with EvaluationSession(config.UDB_PATH) as session:
+                        qmood_quality_attributes = DesignQualityAttributes(udb_path=config.UDB_PATH, session=session)
+                        o1, _ = qmood_quality_attributes.average_sum
+                        o2 = testability_main(
+                            config.UDB_PATH, initial_value=config.CURRENT_METRICS.get("TEST", 1.0), session=session
+                        )
+                        o3 = modularity_main(
+                            config.UDB_PATH, initial_value=config.CURRENT_METRICS.get("MODULE", 1.0), session=session,
+                            refactoring_operations=get_applied_refactorings(config.UDB_PATH)
+                        )
                     del qmood_quality_attributes
                     score = (o1 * 6. + o2 + o3) / 8.
 
             # Stage 3: Marshal objectives into vector
             objective_values.append([-1 * score])
+            store_fitness(keys[k], objective_values[-1])
             logger.info(f"Objective values for individual {k} in mode {self.mode}: {[-1 * score]}")
 
         # Stage 4: Marshal all objectives into out dictionary
@@ -364,13 +559,15 @@ class ProblemMultiObjective(Problem):
 
     """
 
-    def __init__(self, n_refactorings_lowerbound=10, n_refactorings_upperbound=50, evaluate_in_parallel=False):
+    def __init__(self, n_refactorings_lowerbound=10, n_refactorings_upperbound=50, evaluate_in_parallel=False,
+                 n_workers=1):
         super(ProblemMultiObjective, self).__init__(n_var=1,
                                                     n_obj=3,
                                                     n_constr=0)
         self.n_refactorings_lowerbound = n_refactorings_lowerbound
         self.n_refactorings_upperbound = n_refactorings_upperbound
         self.evaluate_in_parallel = evaluate_in_parallel
+        self.n_workers = n_workers
 
     def _evaluate(self,
                   x,  #
@@ -389,21 +586,32 @@ class ProblemMultiObjective(Problem):
 
 
         """
+        if self.n_workers > 1 or config.PREFIX_SHARING:
+            results = evaluate_population(x, multi_objective_function, self.n_workers, 'multi')
+            out['F'] = np.array([objective_vector for objective_vector, _ in results], dtype=float)
+            return
+
+        keys, cached_objective_values = lookup_fitness_cache(x, 'multi')
         objective_values = []
+        refresh_scheduler = get_refresh_scheduler()
         for k, individual_ in enumerate(x):
+            if cached_objective_values[k] is not None:
+                objective_values.append(cached_objective_values[k])
+                logger.info(f"Objective values for individual {k} (cached): {cached_objective_values[k]}")
+                continue
+
             # Stage 0: Git restore
-            logger.debug("Executing git restore.")
-            git_restore(config.PROJECT_PATH)
-            logger.debug("Updating understand database after git restore.")
-            update_understand_database(config.UDB_PATH)
+            logger.debug("Restoring the project.")
+            restore_project(config.PROJECT_PATH)
+            refresh_scheduler.notify_restored()
 
             # Stage 1: Execute all refactoring operations in the sequence x
             logger.debug(f"Reached Individual with Size {len(individual_[0])}")
             for refactoring_operation in individual_[0]:
+                refresh_scheduler.before_refactoring(refactoring_operation)
                 refactoring_operation.do_refactoring()
-                # Update Understand DB
-                logger.debug(f"Updating understand database after {refactoring_operation.name}.")
-                update_understand_database(config.UDB_PATH)
+                refresh_scheduler.notify_refactoring_applied(refactoring_operation)
+            refresh_scheduler.before_metrics()
 
             # Stage 2:
             arr = Array('d', range(8))
@@ -419,14 +627,21 @@ class ProblemMultiObjective(Problem):
                 o3 = arr[8]
             else:
                 # Stage 2 (sequential mood): Computing quality attributes
-                qmood_quality_attributes = DesignQualityAttributes(udb_path=config.UDB_PATH)
-                o1 = qmood_quality_attributes.average_sum
-                o2 = testability_main(config.UDB_PATH, initial_value=config.CURRENT_METRICS.get("TEST", 1.0))
-                o3 = modularity_main(config.UDB_PATH, initial_value=config.CURRENT_METRICS.get("MODULE", 1.0))
+                with EvaluationSession(config.UDB_PATH) as session:
+                    qmood_quality_attributes = DesignQualityAttributes(udb_path=config.UDB_PATH, session=session)
+                    o1, _ = qmood_quality_attributes.average_sum
+                    o2 = testability_main(
+                        config.UDB_PATH, initial_value=config.CURRENT_METRICS.get("TEST", 1.0), session=session
+                    )
+                    o3 = modularity_main(
+                        config.UDB_PATH, initial_value=config.CURRENT_METRICS.get("MODULE", 1.0), session=session,
+                        refactoring_operations=get_applied_refactorings(config.UDB_PATH)
+                    )
                 del qmood_quality_attributes
 
             # Stage 3: Marshal objectives into vector
             objective_values.append([-1 * o1, -1 * o2, -1 * o3])
+            store_fitness(keys[k], objective_values[-1])
             logger.info(f"Objective values for individual {k}: {[-1 * o1, -1 * o2, -1 * o3]}")
 
         # Stage 4: Marshal all objectives into out dictionary
@@ -447,7 +662,7 @@ class ProblemManyObjective(Problem):
     """
 
     def __init__(self, n_refactorings_lowerbound=10, n_refactorings_upperbound=50,
-                 evaluate_in_parallel=False, verbose_design_metrics=False,
+                 evaluate_in_parallel=False, verbose_design_metrics=False, n_workers=1,
                  ):
         """
 
@@ -461,12 +676,15 @@ class ProblemManyObjective(Problem):
 
             verbose_design_metrics (bool): Whether log the design metrics for each refactoring sequences or not
 
+            n_workers (int): The number of workers evaluating the population, each on its own project copy
+
         """
         super(ProblemManyObjective, self).__init__(n_var=1, n_obj=8, n_constr=0, )
         self.n_refactorings_lowerbound = n_refactorings_lowerbound
         self.n_refactorings_upperbound = n_refactorings_upperbound
         self.evaluate_in_parallel = evaluate_in_parallel
         self.verbose_design_metrics = verbose_design_metrics
+        self.n_workers = n_workers
 
     def _evaluate(self, x, out, *args, **kwargs):
         """
@@ -483,21 +701,36 @@ class ProblemManyObjective(Problem):
 
         """
 
+        if self.n_workers > 1 or config.PREFIX_SHARING:
+            results = evaluate_population(x, many_objective_function, self.n_workers, 'many')
+            if self.verbose_design_metrics:
+                for _, design_metrics in results:
+                    if design_metrics is not None:
+                        self.log_design_metrics(design_metrics)
+            out['F'] = np.array([objective_vector for objective_vector, _ in results], dtype=float)
+            return
+
+        keys, cached_objective_values = lookup_fitness_cache(x, 'many')
         objective_values = []
+        refresh_scheduler = get_refresh_scheduler()
         for k, individual_ in enumerate(x):
+            if cached_objective_values[k] is not None:
+                objective_values.append(cached_objective_values[k])
+                logger.info(f"Objective values for individual {k} (cached): {cached_objective_values[k]}")
+                continue
+
             # Stage 0: Git restore
-            logger.debug("Executing git restore.")
-            git_restore(config.PROJECT_PATH)
-            logger.debug("Updating understand database after git restore.")
-            update_understand_database(config.UDB_PATH)
+            logger.debug("Restoring the project.")
+            restore_project(config.PROJECT_PATH)
+            refresh_scheduler.notify_restored()
 
             # Stage 1: Execute all refactoring operations in the sequence x
             logger.debug(f"Reached an Individual with size {len(individual_[0])}")
             for refactoring_operation in individual_[0]:
+                refresh_scheduler.before_refactoring(refactoring_operation)
                 res = refactoring_operation.do_refactoring()
-                # Update Understand DB
-                logger.debug(f"Updating understand database after {refactoring_operation.name}.")
-                update_understand_database(config.UDB_PATH)
+                refresh_scheduler.notify_refactoring_applied(refactoring_operation)
+            refresh_scheduler.before_metrics()
 
             # Stage 2:
             arr = Array('d', range(8))
@@ -510,15 +743,21 @@ class ProblemManyObjective(Problem):
                 p1.join(), p2.join(), p3.join()
             else:
                 # Stage 2 (sequential mood): Computing quality attributes
-                qmood_quality_attributes = DesignQualityAttributes(udb_path=config.UDB_PATH)
-                arr[0] = qmood_quality_attributes.reusability
-                arr[1] = qmood_quality_attributes.understandability
-                arr[2] = qmood_quality_attributes.flexibility
-                arr[3] = qmood_quality_attributes.functionality
-                arr[4] = qmood_quality_attributes.effectiveness
-                arr[5] = qmood_quality_attributes.extendability
-                arr[6] = testability_main(config.UDB_PATH, initial_value=config.CURRENT_METRICS.get("TEST", 1.0))
-                arr[7] = modularity_main(config.UDB_PATH, initial_value=config.CURRENT_METRICS.get("MODULE", 1.0))
+                with EvaluationSession(config.UDB_PATH) as session:
+                    qmood_quality_attributes = DesignQualityAttributes(udb_path=config.UDB_PATH, session=session)
+                    arr[0] = qmood_quality_attributes.reusability
+                    arr[1] = qmood_quality_attributes.understandability
+                    arr[2] = qmood_quality_attributes.flexibility
+                    arr[3] = qmood_quality_attributes.functionality
+                    arr[4] = qmood_quality_attributes.effectiveness
+                    arr[5] = qmood_quality_attributes.extendability
+                    arr[6] = testability_main(
+                        config.UDB_PATH, initial_value=config.CURRENT_METRICS.get("TEST", 1.0), session=session
+                    )
+                    arr[7] = modularity_main(
+                        config.UDB_PATH, initial_value=config.CURRENT_METRICS.get("MODULE", 1.0), session=session,
+                        refactoring_operations=get_applied_refactorings(config.UDB_PATH)
+                    )
                 if self.verbose_design_metrics:
                     design_metrics = {
                         "DSC": [qmood_quality_attributes.DSC],
@@ -539,6 +778,7 @@ class ProblemManyObjective(Problem):
 
             # Stage 3: Marshal objectives into vector
             objective_values.append([-1 * i for i in arr])
+            store_fitness(keys[k], objective_values[-1])
             logger.info(f"Objective values for individual {k}: {[i for i in arr]}")
 
         # Stage 4: Marshal all objectives into out dictionary
@@ -923,6 +1163,8 @@ def log_project_info(reset_=True, design_metrics_path=None, quality_attributes_p
 
     if reset_:
         reset_project()
+        if config.INCREMENTAL_MODULARITY:
+            build_baseline_graph(config.UDB_PATH)
     if quality_attributes_path is None:
         quality_attributes_path = os.path.join(config.PROJECT_LOG_DIR, 'quality_attrs_initial_values.csv')
     if design_metrics_path is None:
@@ -938,7 +1180,8 @@ def log_project_info(reset_=True, design_metrics_path=None, quality_attributes_p
     )
     mdg_modularity = modularity_main(
         config.UDB_PATH,
-        initial_value=config.CURRENT_METRICS.get("MODULE", 1.0)
+        initial_value=config.CURRENT_METRICS.get("MODULE", 1.0),
+        refactoring_operations=[] if reset_ else None
     )
 
     design_metrics = {
@@ -1063,6 +1306,7 @@ def main():
             n_refactorings_lowerbound=config.LOWER_BAND,
             n_refactorings_upperbound=config.UPPER_BAND,
             evaluate_in_parallel=False,
+            n_workers=config.EVALUATION_WORKERS,
         )
     )
     problems.append(
@@ -1070,6 +1314,7 @@ def main():
             n_refactorings_lowerbound=config.LOWER_BAND,
             n_refactorings_upperbound=config.UPPER_BAND,
             evaluate_in_parallel=False,
+            n_workers=config.EVALUATION_WORKERS,
         )
     )
     problems.append(
@@ -1078,6 +1323,7 @@ def main():
             n_refactorings_upperbound=config.UPPER_BAND,
             evaluate_in_parallel=False,
             verbose_design_metrics=True,
+            n_workers=config.EVALUATION_WORKERS,
         )
     )
 
@@ -1103,6 +1349,11 @@ def main():
                    save_history=False,
                    callback=LogCallback(),
                    )
+    shutdown_worker_pool()
+    if get_fitness_cache() is not None:
+        get_fitness_cache().log_statistics()
+    get_refresh_scheduler().log_statistics()
+    get_parsing_statistics().log_statistics()
     # np.save('checkpoint', res.algorithm)
 
     # Log results
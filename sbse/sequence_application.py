@@ -17,7 +17,6 @@ import pandas as pd
 import sbse.config as config
 from codart.utility.directory_utils import reset_project, update_understand_database
 from sbse.initialize import REFACTORING_MAIN_MAP
-from sbse.search_based_refactoring2 import log_project_info
 
 from metrics import qmood
 from metrics.modularity import main as modularity_main
@@ -91,6 +90,8 @@ class RefactoringSequenceEvaluation:
         if input_file_path is None:
             input_file_path = glob.glob(os.path.join(self.log_directory, 'best_refactoring_sequences*.json'))[0]
 
+        # Imports pymoo, only required to log the quality of the applied sequences
+        from sbse.search_based_refactoring2 import log_project_info
         log_project_info(reset_=True,)
 
         population = []
@@ -0,0 +1,56 @@
+"""
+    Compares the texts of the compact trees (codart.utility.compact_tree.CompactTree) with `getText()` of
+    the ANTLR parse trees on the Java fixtures of the tests, including the files with syntax errors.
+
+    test status: pass
+"""
+
+import glob
+import os
+
+from antlr4 import FileStream
+from antlr4.tree.Tree import TerminalNode
+
+from codart.utility.compact_tree import CompactTree
+from codart.utility.parsing import create_parse_tree
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def fixture_files():
+    return sorted(glob.glob(os.path.join(TESTS_DIR, '**', '*.java'), recursive=True))
+
+
+def pre_order(tree):
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        yield node
+        if not isinstance(node, TerminalNode) and node.children:
+            stack.extend(reversed(node.children))
+
+
+def test_get_text():
+    for java_file_path in fixture_files():
+        tree, token_stream = create_parse_tree(FileStream(java_file_path, encoding='utf8', errors='ignore'))
+        compact_tree = CompactTree.from_parse_tree(tree, token_stream)
+        assert compact_tree.get_text(0) == tree.getText(), java_file_path
+        # The top-level declarations, i.e., the children of the root
+        for node, compact_node in zip(tree.children or [], compact_tree.children(0)):
+            assert compact_tree.get_text(compact_node) == node.getText(), java_file_path
+
+
+def test_get_text_of_all_nodes():
+    # A file whose syntax errors are recovered by conjuring missing tokens
+    source_file = os.path.join(TESTS_DIR, 'replace_constructor_with_factory_function_tests', 'test5.java_refactored.java')
+    tree, token_stream = create_parse_tree(FileStream(source_file, encoding='utf8', errors='ignore'))
+    compact_tree = CompactTree.from_parse_tree(tree, token_stream)
+    nodes = list(pre_order(tree))
+    assert len(nodes) == len(compact_tree)
+    for compact_node, node in enumerate(nodes):
+        assert compact_tree.get_text(compact_node) == node.getText()
+
+
+if __name__ == '__main__':
+    test_get_text()
+    test_get_text_of_all_nodes()
@@ -0,0 +1,192 @@
+"""
+    Incremental update tests of the identifier index (codart.utility.identifier_index).
+
+    Each test changes a small project and checks that the index re-lexes only the changed files,
+    drops the deleted ones, and returns the same candidate files as a fresh index.
+    After the first walk, candidate_files sees the notified files, the files touched since the last restore
+    of the snapshot manager, and the files restored by restore_project, without walking the project.
+
+    test status: pass
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+
+from codart.utility import identifier_index as identifier_index_module
+from codart.utility import snapshot_manager
+from codart.utility.directory_utils import restore_project
+from codart.utility.identifier_index import IdentifierIndex, get_identifier_index, notify_file_changed
+from sbse import config
+
+PROJECT_FILES = {
+    os.path.join('p', 'A.java'): 'package p;\npublic class A {\n    int x;\n    public void f() { }\n}\n',
+    os.path.join('p', 'B.java'): 'package p;\nclass B extends A {\n    void g() { f(); x = 1; }\n}\n',
+    os.path.join('q', 'C.java'): 'package q;\nimport p.A;\n// A comment with y\nclass C {\n'
+                                 '    String s = "z";\n    void h(A a) { a.f(); }\n}\n',
+}
+
+
+def create_project():
+    project_dir = tempfile.mkdtemp(prefix='identifier_index_test_')
+    for relative_path, content in PROJECT_FILES.items():
+        write_file(project_dir, relative_path, content)
+    return project_dir
+
+
+def write_file(project_dir, relative_path, content):
+    file_path = os.path.join(project_dir, relative_path)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, 'w') as f:
+        f.write(content)
+    return file_path
+
+
+def relative_paths(project_dir, files):
+    return sorted(os.path.relpath(file_path, project_dir) for file_path in files)
+
+
+def assert_same_as_fresh_index(identifier_index):
+    fresh_index = IdentifierIndex(identifier_index.project_dir)
+    fresh_index.update()
+    assert identifier_index.files_by_identifier == fresh_index.files_by_identifier
+
+
+def test_update():
+    project_dir = create_project()
+    try:
+        identifier_index = IdentifierIndex(project_dir)
+        assert identifier_index.update() == 3
+        assert relative_paths(project_dir, identifier_index.files_with('f')) == [
+            os.path.join('p', 'A.java'), os.path.join('p', 'B.java'), os.path.join('q', 'C.java')]
+        # Qualified names are matched by their last identifier
+        assert identifier_index.files_with('p.A') == identifier_index.files_with('A')
+        # Comments and string literals are not indexed
+        assert identifier_index.files_with('y') == set() and identifier_index.files_with('z') == set()
+        assert relative_paths(project_dir, identifier_index.candidate_files(['g', 'h'])) == [
+            os.path.join('p', 'B.java'), os.path.join('q', 'C.java')]
+        assert identifier_index.candidate_files(['g', 'h'], match_all=True) == []
+        assert identifier_index.candidate_files([]) == []
+        # Nothing changed
+        assert identifier_index.update() == 0
+
+        # A changed file is re-lexed, a deleted file is dropped, and a new file is lexed
+        write_file(project_dir, os.path.join('p', 'B.java'), 'package p;\nclass B {\n    void k() { }\n}\n')
+        os.remove(os.path.join(project_dir, 'q', 'C.java'))
+        write_file(project_dir, os.path.join('q', 'D.java'), 'package q;\nclass D {\n    void h() { }\n}\n')
+        assert identifier_index.update() == 2
+        assert identifier_index.files_with('g') == set()
+        assert relative_paths(project_dir, identifier_index.candidate_files(['k', 'h'])) == [
+            os.path.join('p', 'B.java'), os.path.join('q', 'D.java')]
+        assert_same_as_fresh_index(identifier_index)
+
+        # remove_file drops the identifiers which are not in other files
+        identifier_index.remove_file(os.path.join(project_dir, 'q', 'D.java'))
+        assert 'D' not in identifier_index.files_by_identifier
+        assert identifier_index.update() == 1
+        assert_same_as_fresh_index(identifier_index)
+    finally:
+        shutil.rmtree(project_dir, ignore_errors=True)
+
+
+def test_notify_file_changed():
+    project_dir = create_project()
+    try:
+        identifier_index = get_identifier_index(project_dir)
+        assert get_identifier_index(os.path.join(project_dir, 'p', '..')) is identifier_index
+        identifier_index.update()
+
+        # A rewrite which keeps the size and the modification time of the file is seen after the notification only
+        file_path = os.path.join(project_dir, 'q', 'C.java')
+        stat = os.stat(file_path)
+        write_file(project_dir, os.path.join('q', 'C.java'), PROJECT_FILES[os.path.join('q', 'C.java')].replace(
+            'h(A a)', 'e(A a)'))
+        os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert identifier_index.update() == 0
+        assert identifier_index.files_with('e') == set()
+
+        lexed_files = identifier_index.lexed_files
+        notify_file_changed(file_path)
+        assert identifier_index.lexed_files == lexed_files + 1
+        assert relative_paths(project_dir, identifier_index.files_with('e')) == [os.path.join('q', 'C.java')]
+        assert identifier_index.files_with('h') == set()
+        assert_same_as_fresh_index(identifier_index)
+
+        # The files which are not indexed are not lexed
+        notify_file_changed(os.path.join(tempfile.gettempdir(), 'NotIndexed.java'))
+        assert identifier_index.lexed_files == lexed_files + 1
+    finally:
+        shutil.rmtree(project_dir, ignore_errors=True)
+
+
+def test_candidate_files_without_walk():
+    project_dir = create_project()
+    try:
+        identifier_index = IdentifierIndex(project_dir)
+        # The first call walks the project
+        assert relative_paths(project_dir, identifier_index.candidate_files(['g'])) == [os.path.join('p', 'B.java')]
+        assert identifier_index.is_built and identifier_index.lexed_files == 3
+        identifier_index.update = None  # Walks and checks of the project files would fail from now on
+
+        # A new file is seen after its notification, and the project is not walked
+        file_path = write_file(project_dir, os.path.join('q', 'D.java'), 'package q;\nclass D {\n    void g() { }\n}\n')
+        assert relative_paths(project_dir, identifier_index.candidate_files(['g'])) == [os.path.join('p', 'B.java')]
+        identifier_index_module._IDENTIFIER_INDEXES[project_dir] = identifier_index
+        try:
+            notify_file_changed(file_path)
+            assert relative_paths(project_dir, identifier_index.candidate_files(['g'])) == [
+                os.path.join('p', 'B.java'), os.path.join('q', 'D.java')]
+            os.remove(file_path)
+            notify_file_changed(file_path)
+            assert relative_paths(project_dir, identifier_index.candidate_files(['g'])) == [os.path.join('p', 'B.java')]
+        finally:
+            identifier_index_module._IDENTIFIER_INDEXES.pop(project_dir, None)
+        del identifier_index.update
+        assert_same_as_fresh_index(identifier_index)
+    finally:
+        shutil.rmtree(project_dir, ignore_errors=True)
+
+
+def test_restore_project():
+    project_dir = create_project()
+    for command in (['git', 'init', '-q'], ['git', 'add', '.'],
+                    ['git', '-c', 'user.name=test', '-c', 'user.email=test@test', 'commit', '-q', '-m', 'baseline']):
+        subprocess.run(command, cwd=project_dir, check=True)
+    fast_restore = config.FAST_RESTORE
+    try:
+        for config.FAST_RESTORE in (True, False):
+            restore_project(project_dir)
+            identifier_index = get_identifier_index(project_dir)
+            assert relative_paths(project_dir, identifier_index.candidate_files(['g'])) == [os.path.join('p', 'B.java')]
+
+            # The writes of a refactoring without notifications
+            write_file(project_dir, os.path.join('p', 'B.java'), 'package p;\nclass B {\n    void k() { }\n}\n')
+            write_file(project_dir, os.path.join('q', 'D.java'), 'package q;\nclass D {\n    void g() { }\n}\n')
+            os.remove(os.path.join(project_dir, 'q', 'C.java'))
+            if config.FAST_RESTORE:
+                # The files touched since the last restore are checked by candidate_files
+                assert relative_paths(project_dir, identifier_index.candidate_files(['g', 'h'])) == [
+                    os.path.join('q', 'D.java')]
+                assert_same_as_fresh_index(identifier_index)
+
+            # The restored files are checked by restore_project
+            restore_project(project_dir)
+            lexed_files = identifier_index.lexed_files
+            assert relative_paths(project_dir, identifier_index.candidate_files(['g', 'h'])) == [
+                os.path.join('p', 'B.java'), os.path.join('q', 'C.java')]
+            assert identifier_index.lexed_files == lexed_files
+            assert_same_as_fresh_index(identifier_index)
+            identifier_index_module._IDENTIFIER_INDEXES.pop(identifier_index.project_dir)
+    finally:
+        config.FAST_RESTORE = fast_restore
+        identifier_index_module._IDENTIFIER_INDEXES.pop(os.path.normpath(project_dir), None)
+        snapshot_manager._MANAGERS.pop(os.path.normcase(os.path.abspath(project_dir)), None)
+        shutil.rmtree(project_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_update()
+    test_notify_file_changed()
+    test_candidate_files_without_walk()
+    test_restore_project()
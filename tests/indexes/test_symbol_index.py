@@ -0,0 +1,117 @@
+"""
+    Incremental update tests of the symbol index (codart.utility.symbol_index).
+
+    Each test changes a small project, updates the index, and checks that only the changed files are re-indexed
+    and that the lookups see the change. The rewrites which keep the modification time and size of a file
+    are seen after `notify_file_changed`.
+
+    test status: pass
+"""
+
+import os
+import shutil
+import tempfile
+
+from codart.utility import symbol_index as symbol_index_module
+from codart.utility.identifier_index import notify_file_changed
+from codart.utility.symbol_index import SymbolIndex
+
+PROJECT_FILES = {
+    os.path.join('p', 'A.java'): 'package p;\npublic class A {\n    int x;\n    public void f() { }\n}\n',
+    os.path.join('p', 'B.java'): 'package p;\nclass B extends A {\n    void g() { f(); x = 1; }\n}\n',
+    os.path.join('q', 'C.java'): 'package q;\nimport p.A;\nclass C {\n    void h(A a) { a.f(); }\n}\n',
+}
+
+
+def create_project():
+    project_dir = tempfile.mkdtemp(prefix='symbol_index_test_')
+    for relative_path, content in PROJECT_FILES.items():
+        write_file(project_dir, relative_path, content)
+    return project_dir
+
+
+def write_file(project_dir, relative_path, content):
+    file_path = os.path.join(project_dir, relative_path)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, 'w') as f:
+        f.write(content)
+    return file_path
+
+
+def caller_paths(symbol_index, method_name, class_name=None):
+    # The call sites are lexical, i.e., they include the declaration of the method
+    return sorted({site.path for site in symbol_index.callers(method_name, class_name)})
+
+
+def test_update():
+    project_dir = create_project()
+    symbol_index = SymbolIndex(':memory:', project_dir)
+    try:
+        assert symbol_index.update(n_jobs=1) == 3
+        assert [declaration.class_name for declaration in symbol_index.declarations('f', kind='method')] == ['p.A']
+        assert symbol_index.subclasses('p.A') == ['p.B']
+        assert caller_paths(symbol_index, 'f', 'p.A') == ['p/A.java', 'p/B.java', 'q/C.java']
+        assert [site.enclosing_member for site in symbol_index.field_usages('x', 'p.A')] == ['g()']
+        # Nothing changed
+        assert symbol_index.update(n_jobs=1) == 0
+
+        # A changed file is re-indexed
+        write_file(project_dir, os.path.join('p', 'B.java'), 'package p;\nclass B {\n    void g() { }\n}\n')
+        assert symbol_index.update(n_jobs=1) == 1
+        assert symbol_index.subclasses('p.A') == []
+        assert caller_paths(symbol_index, 'f', 'p.A') == ['p/A.java', 'q/C.java']
+
+        # A deleted file is dropped, and a new file is indexed
+        os.remove(os.path.join(project_dir, 'q', 'C.java'))
+        write_file(project_dir, os.path.join('q', 'D.java'),
+                   'package q;\nimport p.*;\nclass D extends A {\n    void k() { f(); }\n}\n')
+        assert symbol_index.update(n_jobs=1) == 1
+        assert [os.path.relpath(f, project_dir) for f in symbol_index.files()] == [
+            os.path.join('p', 'A.java'), os.path.join('p', 'B.java'), os.path.join('q', 'D.java')]
+        assert symbol_index.subclasses('p.A') == ['q.D']
+        assert caller_paths(symbol_index, 'f', 'p.A') == ['p/A.java', 'q/D.java']
+
+        # A touched file with the same content is not re-parsed
+        os.utime(os.path.join(project_dir, 'p', 'A.java'))
+        assert symbol_index.update(n_jobs=1) == 0
+    finally:
+        symbol_index.close()
+        shutil.rmtree(project_dir, ignore_errors=True)
+
+
+def test_notify_file_changed():
+    project_dir = create_project()
+    symbol_index = SymbolIndex(':memory:', project_dir)
+    previous_index = symbol_index_module._SYMBOL_INDEX
+    symbol_index_module._SYMBOL_INDEX = symbol_index
+    try:
+        symbol_index.update(n_jobs=1)
+        # A rewrite which keeps the size and the modification time of the file,
+        # e.g., a rename to a name of equal length
+        file_path = os.path.join(project_dir, 'q', 'C.java')
+        stat = os.stat(file_path)
+        write_file(project_dir, os.path.join('q', 'C.java'), PROJECT_FILES[os.path.join('q', 'C.java')].replace(
+            'a.f()', 'a.e()'))
+        os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert symbol_index.update(n_jobs=1) == 0
+        assert caller_paths(symbol_index, 'f', 'p.A') == ['p/A.java', 'p/B.java', 'q/C.java']
+
+        # The writers notify the indexes through the identifier index module
+        notify_file_changed(file_path)
+        assert symbol_index.update(n_jobs=1) == 1
+        assert caller_paths(symbol_index, 'f', 'p.A') == ['p/A.java', 'p/B.java']
+        assert caller_paths(symbol_index, 'e') == ['q/C.java']
+
+        # A notified file with the same content is re-hashed, but not re-parsed
+        symbol_index.notify_file_changed(os.path.join(project_dir, 'p', 'A.java'))
+        assert symbol_index.update(n_jobs=1) == 0
+        assert symbol_index.update(n_jobs=1) == 0
+    finally:
+        symbol_index_module._SYMBOL_INDEX = previous_index
+        symbol_index.close()
+        shutil.rmtree(project_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_update()
+    test_notify_file_changed()
@@ -0,0 +1,47 @@
+package lexicon;
+
+import java.util.List;
+import java.util.Map;
+
+public final class Lexicon<T> implements Comparable<Lexicon<T>> {
+    private static final int LIMIT = 1 << 4; // shifted; not a statement
+    private Map<String, List<List<T>>> groups = null;
+    protected boolean enabled = true;
+
+    /* A block comment: if (x) return; */
+    public int size(List<T> items) throws IllegalStateException {
+        int count = 0;
+        for (int i = 0; i < items.size(); i++) {
+            if (items.get(i) == null || !enabled) {
+                continue;
+            }
+            count += (i >> 1) + (i >>> 2) - LIMIT % 3;
+        }
+        try {
+            assert count >= 0 : "negative";
+            System.out.println("return " + count);
+        } catch (RuntimeException e) {
+            throw new IllegalStateException(e);
+        } finally {
+            enabled = count > 0 ? true : false;
+        }
+        items.forEach(System.out::println);
+        items.removeIf(item -> item == null);
+        return count;
+    }
+
+    @Override
+    public int compareTo(Lexicon<T> other) {
+        switch (other.size(null)) {
+            case 0:
+                break;
+            default:
+                return super.hashCode() & 0xff;
+        }
+        return 'x';
+    }
+
+    static class Entry {
+        int key = -1;
+    }
+}
@@ -0,0 +1,45 @@
+"""
+    Records the understand lexemes of the classes of a database, as read by
+    `TestabilityMetrics.compute_java_class_metrics_lexicon`, to a JSON fixture of test_lexical_metrics.py
+
+    ## Usage
+
+        python tests/metrics/record_lexemes.py Lexicon.und lexicon.Lexicon lexicon.Lexicon.Entry \
+            --output tests/metrics/Lexicon.lexemes.json
+
+"""
+
+import argparse
+import json
+
+import understand as und
+
+
+def record_lexemes(udb_path, class_longnames):
+    db = und.open(udb_path)
+    recorded = {}
+    try:
+        for class_longname in class_longnames:
+            entity = db.lookup(class_longname, 'Class')[0]
+            lexemes = []
+            lexeme = entity.lexer(show_inactive=False).first()
+            while lexeme is not None:
+                lexemes.append([lexeme.token(), lexeme.text()])
+                lexeme = lexeme.next()
+            recorded[class_longname] = {
+                'CountSemicolon': entity.metric(['CountSemicolon'])['CountSemicolon'],
+                'lexemes': lexemes,
+            }
+    finally:
+        db.close()
+    return recorded
+
+
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description='Records the understand lexemes of classes')
+    argparser.add_argument('udb_path')
+    argparser.add_argument('class_longnames', nargs='+')
+    argparser.add_argument('--output', default='lexemes.json')
+    args = argparser.parse_args()
+    with open(args.output, 'w') as f:
+        json.dump(record_lexemes(args.udb_path, args.class_longnames), f, indent=2)
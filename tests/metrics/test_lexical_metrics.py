@@ -0,0 +1,82 @@
+"""
+    Compares the lexer-only class lexicon metrics (metrics.lexical_metrics) with the understand-based
+    `TestabilityMetrics.compute_java_class_metrics_lexicon` on the classes of Lexicon.java, column by column.
+
+    The understand lexemes of the classes are read from Lexicon.lexemes.json, in the format of `entity.lexer()`
+    (token kind and text of each lexeme) and `entity.metric(['CountSemicolon'])`,
+    as written by record_lexemes.py from an understand database of the fixture.
+
+    test status: pass
+"""
+
+import json
+import os
+
+from metrics import metrics_names
+from metrics.lexical_metrics import LexicalMetrics
+from metrics.testability_prediction2 import TestabilityMetrics
+
+FIXTURE_DIR = os.path.dirname(os.path.abspath(__file__))
+JAVA_FILE = os.path.join(FIXTURE_DIR, 'Lexicon.java')
+LEXEMES_FILE = os.path.join(FIXTURE_DIR, 'Lexicon.lexemes.json')
+
+
+class RecordedLexeme:
+    def __init__(self, lexemes, index):
+        self._lexemes = lexemes
+        self._index = index
+
+    def token(self):
+        return self._lexemes[self._index][0]
+
+    def text(self):
+        return self._lexemes[self._index][1]
+
+    def next(self):
+        return RecordedLexeme(self._lexemes, self._index + 1) if self._index + 1 < len(self._lexemes) else None
+
+
+class RecordedLexer:
+    def __init__(self, lexemes):
+        self._lexemes = lexemes
+
+    def first(self):
+        return RecordedLexeme(self._lexemes, 0) if self._lexemes else None
+
+
+class RecordedEntity:
+    """
+    An understand class entity replayed from the recorded lexemes and metrics
+    """
+
+    def __init__(self, longname, recorded):
+        self._longname = longname
+        self._recorded = recorded
+
+    def longname(self):
+        return self._longname
+
+    def lexer(self, show_inactive=False):
+        return RecordedLexer(self._recorded['lexemes'])
+
+    def metric(self, metric_names):
+        return {metric_name: self._recorded[metric_name] for metric_name in metric_names}
+
+
+def test_lexical_metrics_match_understand():
+    with open(LEXEMES_FILE) as f:
+        recorded_classes = json.load(f)
+    lexical_metrics = LexicalMetrics.from_files([JAVA_FILE])
+    assert sorted(lexical_metrics.classes) == sorted(recorded_classes)
+    for class_longname, recorded in recorded_classes.items():
+        expected = TestabilityMetrics.compute_java_class_metrics_lexicon(
+            entity=RecordedEntity(class_longname, recorded))
+        actual = lexical_metrics.get_class_metrics(class_longname)
+        mismatches = {metric_name: (actual[metric_name], expected[metric_name])
+                      for metric_name in metrics_names.class_lexicon_metrics_names
+                      if actual[metric_name] != expected[metric_name]}
+        assert not mismatches, f'{class_longname} (lexer, understand): {mismatches}'
+
+
+if __name__ == '__main__':
+    test_lexical_metrics_match_understand()
@@ -0,0 +1,211 @@
+"""
+    Checks the incremental modularity (metrics.modularity.IncrementalModularity) against the networkx modularity
+    which is used by the MDG-based Modularity, before and after moving classes between packages,
+    and against a rebuilt graph after moving methods and fields between classes.
+
+    test status: pass
+"""
+
+import random
+from collections import defaultdict
+
+import networkx as nx
+import networkx.algorithms.community as nx_comm
+
+from metrics import modularity
+from metrics.modularity import IncrementalModularity
+
+DEPENDENCIES = [
+    ('p1.A', 'p1.B'), ('p1.B', 'p1.C'), ('p1.C', 'p1.A'), ('p1.A', 'p2.D'),
+    ('p2.D', 'p2.E'), ('p2.E', 'p2.D'), ('p2.E', 'p3.F'), ('p3.F', 'p1.A'),
+    ('p3.F', 'p3.G'), ('p3.G', 'p3.G'), ('p1.C', 'p3.G'), ('p2.D', 'p1.B'),
+]
+
+
+def networkx_modularity(dependencies, class_package_dict):
+    graph = nx.DiGraph()
+    graph.add_edges_from(dependencies)
+    communities = defaultdict(list)
+    for class_longname, package in class_package_dict.items():
+        communities[package].append(class_longname)
+    return nx_comm.modularity(graph, communities=communities.values())
+
+
+def class_packages(dependencies):
+    return {class_longname: class_longname.rsplit('.', 1)[0]
+            for dependency in dependencies for class_longname in dependency}
+
+
+def test_baseline_modularity():
+    class_package_dict = class_packages(DEPENDENCIES)
+    graph = IncrementalModularity(DEPENDENCIES, class_package_dict)
+    assert abs(graph.q - networkx_modularity(DEPENDENCIES, class_package_dict)) < 1e-12
+
+
+def test_move_class():
+    class_package_dict = class_packages(DEPENDENCIES)
+    graph = IncrementalModularity(DEPENDENCIES, class_package_dict)
+    for class_longname, target_package in [('p2.D', 'p1'), ('p3.G', 'p1'), ('p1.A', 'p4'), ('p2.D', 'p2')]:
+        copy_ = graph.copy()
+        graph.move_class(class_longname, target_package)
+        class_package_dict[class_longname] = target_package
+        assert abs(graph.q - networkx_modularity(DEPENDENCIES, class_package_dict)) < 1e-12
+        # Moving a class does not change the copies of the graph
+        assert copy_.class_package[class_longname] != target_package
+
+
+def test_random_moves():
+    random_ = random.Random(7)
+    classes = [f'p{i % 4}.C{i}' for i in range(30)]
+    dependencies = {(random_.choice(classes), random_.choice(classes)) for _ in range(90)}
+    class_package_dict = class_packages(dependencies)
+    graph = IncrementalModularity(dependencies, class_package_dict)
+    for _ in range(50):
+        class_longname = random_.choice(sorted(class_package_dict))
+        target_package = f'p{random_.randrange(6)}'
+        graph.move_class(class_longname, target_package)
+        class_package_dict[class_longname] = target_package
+        assert abs(graph.q - networkx_modularity(dependencies, class_package_dict)) < 1e-12
+
+
+class Kind:
+    def __init__(self, name):
+        self.name = name
+
+    def check(self, kind_filter):
+        return any(self.name == kind.strip() for kind in kind_filter.split(','))
+
+
+class Entity:
+    def __init__(self, id_, longname, kind, parent=None, package=None):
+        self.id_, self.longname_, self.kind_, self.parent_, self.package = id_, longname, Kind(kind), parent, package
+        self.dependencies = []
+
+    def id(self):
+        return self.id_
+
+    def longname(self):
+        return self.longname_
+
+    def kind(self):
+        return self.kind_
+
+    def parent(self):
+        return self.parent_
+
+    def depends(self):
+        return {dependency: [] for dependency in self.dependencies}
+
+    def ents(self, ref_kind, ent_kind):
+        return [self.package] if self.package is not None else []
+
+
+class Database:
+    def __init__(self, entities):
+        self.entities = entities
+
+    def ents(self, kind_filter):
+        return [ent for ent in self.entities if ent.kind().name in ('Java Class', 'Java Interface')]
+
+
+def test_from_database_excludes_nested_classes():
+    package = Entity(1, 'p1', 'Java Package')
+    file = Entity(2, 'A.java', 'Java File')
+    class_a = Entity(3, 'p1.A', 'Java Class', parent=file, package=package)
+    class_b = Entity(4, 'p1.B', 'Java Interface', parent=file, package=package)
+    inner = Entity(5, 'p1.A.Inner', 'Java Class', parent=class_a)
+    method = Entity(6, 'p1.A.m', 'Java Method', parent=class_a)
+    local = Entity(7, 'p1.A.m().Local', 'Java Class', parent=method)
+    class_a.dependencies = [class_b, inner, local]
+    inner.dependencies = [class_b]
+    local.dependencies = [class_a]
+    graph = IncrementalModularity.from_database(Database([package, file, class_a, class_b, inner, method, local]))
+    assert graph.class_package == {'p1.A': 'p1', 'p1.B': 'p1'}
+    assert graph.m == 1
+    assert graph.q == networkx_modularity([('p1.A', 'p1.B')], graph.class_package)
+
+
+class Session:
+    def __init__(self, db):
+        self.db = db
+
+
+class RefactoringOperation:
+    def __init__(self, name, **params):
+        self.name, self.params = name, params
+
+
+def create_database(class_longnames, dependencies):
+    """
+    A database of top-level classes in one file per package
+    """
+    packages = {}
+    entities = {}
+    for class_longname in class_longnames:
+        package_name = class_longname.rsplit('.', 1)[0]
+        if package_name not in packages:
+            packages[package_name] = Entity(len(entities) + 100, package_name, 'Java Package')
+        file = Entity(len(entities) + 200, f'{package_name}.java', 'Java File')
+        entities[class_longname] = Entity(len(entities), class_longname, 'Java Class', parent=file,
+                                          package=packages[package_name])
+    for from_class, to_class in dependencies:
+        entities[from_class].dependencies.append(entities[to_class])
+    return Database(list(entities.values()))
+
+
+def incremental_modularity(session, refactoring_operations):
+    """
+    The incremental modularity, which must not rebuild the graph from the database
+    """
+    from_database = IncrementalModularity.from_database
+    IncrementalModularity.from_database = None
+    try:
+        return modularity.incremental_modularity('project.und', session=session,
+                                                 refactoring_operations=refactoring_operations)
+    finally:
+        IncrementalModularity.from_database = from_database
+
+
+def test_move_members():
+    classes = ['p1.S', 'p1.X', 'p1.Z', 'p2.T', 'p2.Y']
+    baseline_dependencies = [('p1.S', 'p2.Y'), ('p1.X', 'p1.S'), ('p1.Z', 'p1.S'), ('p2.Y', 'p2.T')]
+    baseline_graph = modularity.build_baseline_graph('project.und', session=Session(
+        create_database(classes, baseline_dependencies)))
+    try:
+        # Move S.m, which uses Y and is called by X, to T
+        moved_dependencies = [('p2.T', 'p2.Y'), ('p1.X', 'p2.T'), ('p1.Z', 'p1.S'), ('p2.Y', 'p2.T')]
+        session = Session(create_database(classes, moved_dependencies))
+        move_method = RefactoringOperation('Move Method', source_package='p1', source_class='S',
+                                           target_package='p2', target_class='T', method_name='m')
+        q = incremental_modularity(session, [move_method])
+        assert abs(q - IncrementalModularity.from_database(session.db).q) < 1e-12
+        assert abs(q - networkx_modularity(moved_dependencies, class_packages(moved_dependencies))) < 1e-12
+        # The baseline graph is not changed
+        assert baseline_graph.successors['p1.X'] == {'p1.S'}
+
+        # Move T to p1, then move the field T.f, which is used by Z, to the moved class
+        classes_ = ['p1.S', 'p1.X', 'p1.Z', 'p1.T', 'p2.Y']
+        moved_dependencies = [('p1.S', 'p2.Y'), ('p1.X', 'p1.S'), ('p1.Z', 'p1.T'), ('p2.Y', 'p1.T')]
+        session = Session(create_database(classes_, moved_dependencies))
+        move_class = RefactoringOperation('Move Class', source_package='p2', class_name='T', target_package='p1')
+        move_field = RefactoringOperation('Move Field', source_package='p1', source_class='S',
+                                          target_package='p1', target_class='T', field_name='f')
+        visibility = RefactoringOperation('Increase Field Visibility', source_package='p1', source_class='T')
+        q = incremental_modularity(session, [move_class, visibility, move_field])
+        assert abs(q - IncrementalModularity.from_database(session.db).q) < 1e-12
+        assert abs(q - networkx_modularity(moved_dependencies, class_packages(moved_dependencies))) < 1e-12
+
+        # The other refactorings rebuild the graph
+        extract_class = RefactoringOperation('Extract Class', source_package='p1', source_class='S')
+        assert modularity.incremental_modularity('project.und', session=session,
+                                                 refactoring_operations=[extract_class]) == q
+    finally:
+        modularity._BASELINE_GRAPHS.clear()
+
+
+if __name__ == '__main__':
+    test_baseline_modularity()
+    test_move_class()
+    test_random_moves()
+    test_from_database_excludes_nested_classes()
+    test_move_members()
@@ -0,0 +1,107 @@
+"""
+    Compares the event sequences of the listeners walked by `CompositeWalker` (codart.utility.composite_walker)
+    with the ones of `ParseTreeWalker` on the Java fixtures of the tests and on sources with syntax errors,
+    for both the JavaLabeled grammar (labeled alternatives) and the Java grammar.
+
+    test status: pass
+"""
+
+import glob
+import os
+
+from antlr4 import CommonTokenStream, FileStream, InputStream, ParseTreeWalker
+from antlr4.error.ErrorListener import ErrorListener
+from antlr4.tree.Tree import TerminalNode
+
+from codart.utility.composite_walker import CompositeWalker
+from gen.java.JavaLexer import JavaLexer
+from gen.java.JavaParser import JavaParser
+from gen.java.JavaParserListener import JavaParserListener
+from gen.javaLabeled.JavaLexer import JavaLexer as JavaLabeledLexer
+from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
+from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_FILES = sorted(glob.glob(os.path.join(TESTS_DIR, '*.java')) + glob.glob(os.path.join(TESTS_DIR, '*', '*.java')))
+
+# Sources whose parse trees have error nodes, e.g., the extraneous and the missing tokens of the error recovery
+ERROR_SOURCES = [
+    'class A { int x = 1;; ) void m() { x = x + ; } }',
+    'package p; class B extends { void m( { return } } }',
+    'class C { void m() { if (x) { y(); } else } ',
+]
+
+
+def _recording_method(name):
+    def method(self, node):
+        position = node.symbol.tokenIndex if isinstance(node, TerminalNode) else node.getSourceInterval()
+        self.events.append((name, type(node).__name__, position))
+    return method
+
+
+def recording_listener_class(listener_base_class, names=None):
+    """
+    A listener which records all of its events, or the events of the given method names only
+    """
+    names = [name for name in dir(listener_base_class) if name.startswith(('enter', 'exit', 'visit'))] \
+        if names is None else names
+    return type('Recording' + listener_base_class.__name__, (listener_base_class,),
+                {'__init__': lambda self: setattr(self, 'events', []),
+                 **{name: _recording_method(name) for name in names}})
+
+
+class SilentErrorListener(ErrorListener):
+    pass
+
+
+def parse(stream, lexer_class, parser_class):
+    parser = parser_class(CommonTokenStream(lexer_class(stream)))
+    parser.removeErrorListeners()
+    parser.addErrorListener(SilentErrorListener())
+    return parser.compilationUnit()
+
+
+def assert_same_events(tree, listener_base_class):
+    listener_classes = [
+        recording_listener_class(listener_base_class),
+        # Only some rule events, without the every rule events
+        recording_listener_class(listener_base_class, ['enterClassDeclaration', 'exitMethodDeclaration',
+                                                       'visitErrorNode']),
+        # The base listener, which overrides nothing
+        listener_base_class,
+    ]
+    walked_listeners = CompositeWalker([listener_class() for listener_class in listener_classes]).walk(tree)
+    for listener_class, walked_listener in zip(listener_classes, walked_listeners):
+        if listener_class is listener_base_class:
+            continue
+        listener = listener_class()
+        ParseTreeWalker().walk(listener, tree)
+        assert walked_listener.events == listener.events
+    return walked_listeners[0].events
+
+
+def test_fixtures():
+    assert len(FIXTURE_FILES) > 10
+    for java_file in FIXTURE_FILES:
+        for lexer_class, parser_class, listener_base_class in (
+                (JavaLabeledLexer, JavaParserLabeled, JavaParserLabeledListener),
+                (JavaLexer, JavaParser, JavaParserListener)):
+            tree = parse(FileStream(java_file, encoding='utf8', errors='ignore'), lexer_class, parser_class)
+            events = assert_same_events(tree, listener_base_class)
+            assert events[0][0] == 'enterEveryRule' and events[-1][0] == 'exitEveryRule'
+
+
+def test_error_nodes():
+    error_nodes = 0
+    for source in ERROR_SOURCES:
+        for lexer_class, parser_class, listener_base_class in (
+                (JavaLabeledLexer, JavaParserLabeled, JavaParserLabeledListener),
+                (JavaLexer, JavaParser, JavaParserListener)):
+            events = assert_same_events(parse(InputStream(source), lexer_class, parser_class), listener_base_class)
+            error_nodes += sum(1 for event in events if event[0] == 'visitErrorNode')
+    assert error_nodes > 0
+
+
+if __name__ == '__main__':
+    test_fixtures()
+    test_error_nodes()
@@ -0,0 +1,52 @@
+"""
+    Checks that the token indices of the parse trees of the speedy C++ back-end match the token stream
+    returned by `create_parse_tree`, which is always created by the Python lexer.
+    The test is skipped if the C++ extension is not available.
+
+    test status: skipped without the C++ extension
+"""
+
+import glob
+import os
+
+import pytest
+from antlr4 import FileStream
+from antlr4.tree.Tree import TerminalNode
+
+from codart.utility.parsing import cpp_backend_available, use_cpp_backend, create_parse_tree
+from sbse import config
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def check_token(token, token_stream):
+    if token is None or token.tokenIndex < 0:
+        return
+    stream_token = token_stream.tokens[token.tokenIndex]
+    assert (stream_token.type, stream_token.text) == (token.type, token.text)
+
+
+@pytest.mark.skipif(not cpp_backend_available(), reason='The C++ extension of speedy is not available')
+def test_token_indices():
+    use_cpp_backend_ = config.USE_CPP_BACKEND
+    config.USE_CPP_BACKEND = True
+    try:
+        assert use_cpp_backend()
+        for java_file_path in sorted(glob.glob(os.path.join(TESTS_DIR, '**', '*.java'), recursive=True)):
+            tree, token_stream = create_parse_tree(FileStream(java_file_path, encoding='utf8', errors='ignore'))
+            stack = [tree]
+            while stack:
+                node = stack.pop()
+                if isinstance(node, TerminalNode):
+                    check_token(node.symbol, token_stream)
+                    continue
+                check_token(node.start, token_stream)
+                check_token(node.stop, token_stream)
+                stack.extend(node.children or [])
+    finally:
+        config.USE_CPP_BACKEND = use_cpp_backend_
+
+
+if __name__ == '__main__':
+    if cpp_backend_available():
+        test_token_indices()
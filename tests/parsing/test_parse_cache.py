@@ -0,0 +1,71 @@
+"""
+    Invalidation tests of the parse tree cache (codart.utility.parse_cache) used by `parse_and_walk`.
+
+    A cached tree is reused while the file is unchanged, and is parsed again after the file is rewritten
+    by `parse_and_walk(has_write=True)` or by another writer.
+
+    test status: pass
+"""
+
+import os
+import tempfile
+
+from codart.symbol_table import parse_and_walk
+from codart.utility import parse_cache as parse_cache_module
+from codart.utility.parse_cache import ParseTreeCache
+from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+from sbse import config
+
+SOURCE_CODE = 'package p;\nclass A {\n    int x;\n    void m() { x = x + 1; }\n}\n'
+
+
+class ClassNameListener(JavaParserLabeledListener):
+    """
+    Collects the class names, and renames the classes if a new name and a rewriter are given
+    """
+
+    def __init__(self, rewriter=None, new_name=None):
+        self.rewriter = rewriter
+        self.new_name = new_name
+        self.class_names = []
+
+    def enterClassDeclaration(self, ctx):
+        self.class_names.append(ctx.IDENTIFIER().getText())
+        if self.rewriter is not None:
+            self.rewriter.replaceSingleToken(ctx.IDENTIFIER().symbol, self.new_name)
+
+
+def test_invalidation():
+    file_descriptor, file_path = tempfile.mkstemp(suffix='.java')
+    with os.fdopen(file_descriptor, 'w') as f:
+        f.write(SOURCE_CODE)
+    parse_cache_enabled, parse_cache_ = config.PARSE_CACHE, parse_cache_module._PARSE_CACHE
+    config.PARSE_CACHE = True
+    parse_cache_module._PARSE_CACHE = ParseTreeCache()
+    cache = parse_cache_module.get_parse_cache()
+    try:
+        assert parse_and_walk(file_path, ClassNameListener).class_names == ['A']
+        assert parse_and_walk(file_path, ClassNameListener).class_names == ['A']
+        assert (cache.misses, cache.hits) == (1, 1)
+
+        # The rewrite walks the cached tree, and drops it after writing the file
+        assert parse_and_walk(file_path, ClassNameListener, has_write=True, new_name='B').class_names == ['A']
+        assert (cache.misses, cache.hits, len(cache)) == (1, 2, 0)
+        with open(file_path) as f:
+            assert f.read() == SOURCE_CODE.replace('class A', 'class B')
+        assert parse_and_walk(file_path, ClassNameListener).class_names == ['B']
+        assert (cache.misses, cache.hits) == (2, 2)
+
+        # A write by another writer changes the content hash of the file, even with the same size
+        with open(file_path, 'w') as f:
+            f.write(SOURCE_CODE.replace('class A', 'class C'))
+        assert parse_and_walk(file_path, ClassNameListener).class_names == ['C']
+        assert parse_and_walk(file_path, ClassNameListener).class_names == ['C']
+        assert (cache.misses, cache.hits, len(cache)) == (3, 3, 1)
+    finally:
+        config.PARSE_CACHE, parse_cache_module._PARSE_CACHE = parse_cache_enabled, parse_cache_
+        os.remove(file_path)
+
+
+if __name__ == '__main__':
+    test_invalidation()
@@ -0,0 +1,72 @@
+"""
+    Checks that the parsing budgets (codart.utility.parsing.ParsingBudget) are enforced on
+    the read-only project walks, and not on the rewrites of the refactorings.
+
+    test status: pass
+"""
+
+import os
+import tempfile
+
+from antlr4 import InputStream
+
+from codart.symbol_table import parse_and_walk
+from codart.utility.parsing import create_parse_tree, ParsingBudget, ParsingBudgetExceeded
+from gen.javaLabeled.JavaParserLabeledListener import JavaParserLabeledListener
+from sbse import config
+
+SOURCE_CODE = 'package p;\nclass A {\n    int x;\n    void m() { x = x + 1; }\n}\n'
+
+
+class ClassCounter(JavaParserLabeledListener):
+    def __init__(self, rewriter=None):
+        self.rewriter = rewriter
+        self.classes = 0
+
+    def enterClassDeclaration(self, ctx):
+        self.classes += 1
+        if self.rewriter is not None:
+            self.rewriter.insertBeforeToken(ctx.start, '/* visited */ ')
+
+
+def write_source_file():
+    file_descriptor, file_path = tempfile.mkstemp(suffix='.java')
+    with os.fdopen(file_descriptor, 'w') as f:
+        f.write(SOURCE_CODE)
+    return file_path
+
+
+def test_create_parse_tree_budget():
+    tree, token_stream = create_parse_tree(InputStream(SOURCE_CODE))
+    assert tree.getText().startswith('packagep;')
+    try:
+        create_parse_tree(InputStream(SOURCE_CODE), budget=ParsingBudget(token_budget=10))
+        assert False, 'The token budget is not enforced'
+    except ParsingBudgetExceeded as e:
+        assert e.budget_name == 'tokens'
+
+
+def test_parse_and_walk_budget():
+    file_path = write_source_file()
+    token_budget = config.PARSING_TOKEN_BUDGET
+    config.PARSING_TOKEN_BUDGET = 10
+    try:
+        # The read-only walks fail rather than return the listeners unwalked
+        try:
+            parse_and_walk(file_path, ClassCounter)
+            assert False, 'A file skipped by the parsing budgets is walked'
+        except Exception as e:
+            assert 'budget' in str(e)
+        # The rewrites parse the file without budgets
+        assert parse_and_walk(file_path, ClassCounter, has_write=True).classes == 1
+        with open(file_path) as f:
+            assert '/* visited */ class A' in f.read()
+    finally:
+        config.PARSING_TOKEN_BUDGET = token_budget
+        os.remove(file_path)
+    assert parse_and_walk(write_source_file(), ClassCounter).classes == 1
+
+
+if __name__ == '__main__':
+    test_create_parse_tree_budget()
+    test_parse_and_walk_budget()
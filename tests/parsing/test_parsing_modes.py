@@ -0,0 +1,88 @@
+"""
+    Compares the two-stage SLL_LL parsing (codart.utility.parsing.parse) with the full-LL parsing:
+    both modes must give the same parse trees on the Java fixtures of the tests, and a file which fails
+    the SLL stage must fall back to the LL stage and report the same syntax errors as the LL mode.
+
+    test status: pass
+"""
+
+import glob
+import os
+
+from antlr4 import CommonTokenStream, FileStream, InputStream
+from antlr4.error.ErrorListener import ErrorListener
+
+from codart.utility.parsing import parse, get_parsing_statistics
+from gen.java.JavaLexer import JavaLexer
+from gen.java.JavaParser import JavaParser
+from gen.javaLabeled.JavaLexer import JavaLexer as JavaLabeledLexer
+from gen.javaLabeled.JavaParserLabeled import JavaParserLabeled
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_FILES = sorted(glob.glob(os.path.join(TESTS_DIR, '*.java')) + glob.glob(os.path.join(TESTS_DIR, '*', '*.java')))
+GRAMMARS = ((JavaLabeledLexer, JavaParserLabeled), (JavaLexer, JavaParser))
+
+SYNTAX_ERROR_SOURCE = 'package p;\nclass A {\n    int x = 1;;\n    void m() { x = x + ; }\n    void n( { }\n}\n'
+
+
+class SyntaxErrorCollector(ErrorListener):
+    def __init__(self):
+        self.errors = []
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        # The expected token sets of the messages depend on the shared DFA cache of the parser class
+        # (e.g., <EOF> is expected after the first parse of the process) rather than on the parsing mode
+        self.errors.append((line, column, msg.split(' expecting ')[0]))
+
+
+def parse_source(stream, lexer_class, parser_class, mode):
+    """
+    Returns the string tree and the syntax errors of the source in a parsing mode
+    """
+    parser = parser_class(CommonTokenStream(lexer_class(stream)))
+    parser.removeErrorListeners()
+    error_collector = SyntaxErrorCollector()
+    parser.addErrorListener(error_collector)
+    tree = parse(parser, mode=mode)
+    return tree.toStringTree(recog=parser), error_collector.errors
+
+
+def test_same_trees_on_fixtures():
+    assert len(FIXTURE_FILES) > 10
+    statistics = get_parsing_statistics()
+    for java_file in FIXTURE_FILES:
+        for lexer_class, parser_class in GRAMMARS:
+            ll_fallbacks = statistics.ll_fallbacks
+            ll_tree, ll_errors = parse_source(FileStream(java_file, encoding='utf8', errors='ignore'),
+                                              lexer_class, parser_class, 'LL')
+            sll_ll_tree, sll_ll_errors = parse_source(FileStream(java_file, encoding='utf8', errors='ignore'),
+                                                      lexer_class, parser_class, 'SLL_LL')
+            assert sll_ll_tree == ll_tree, java_file
+            assert sll_ll_errors == ll_errors, java_file
+            # The files with syntax errors fail the SLL stage (the valid files fall back on SLL conflicts only)
+            if ll_errors:
+                assert statistics.ll_fallbacks == ll_fallbacks + 1, java_file
+
+
+def test_fallback_reports_syntax_errors():
+    statistics = get_parsing_statistics()
+    for lexer_class, parser_class in GRAMMARS:
+        ll_tree, ll_errors = parse_source(InputStream(SYNTAX_ERROR_SOURCE), lexer_class, parser_class, 'LL')
+        assert len(ll_errors) >= 2
+        ll_fallbacks, sll_parses = statistics.ll_fallbacks, statistics.sll_parses
+        sll_ll_tree, sll_ll_errors = parse_source(InputStream(SYNTAX_ERROR_SOURCE), lexer_class, parser_class,
+                                                  'SLL_LL')
+        assert (statistics.ll_fallbacks, statistics.sll_parses) == (ll_fallbacks + 1, sll_parses)
+        # The SLL stage bails out silently, the LL stage reports the errors and recovers as the LL mode does
+        assert sll_ll_errors == ll_errors
+        assert sll_ll_tree == ll_tree
+
+        # A valid file does not fall back
+        valid_source = SYNTAX_ERROR_SOURCE.replace(';;', ';').replace('+ ;', '+ 1;').replace('n( {', 'n() {')
+        assert parse_source(InputStream(valid_source), lexer_class, parser_class, 'SLL_LL')[1] == []
+        assert (statistics.ll_fallbacks, statistics.sll_parses) == (ll_fallbacks + 1, sll_parses + 1)
+
+
+if __name__ == '__main__':
+    test_same_trees_on_fixtures()
+    test_fallback_reports_syntax_errors()
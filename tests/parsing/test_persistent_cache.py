@@ -0,0 +1,133 @@
+"""
+    Round-trip tests of the persistent parse cache (codart.utility.persistent_cache).
+
+    The token stream rebuilt from the cached token array must be identical to the one of a fresh lexer,
+    and the cached declaration summary must be identical to the one of a fresh parse.
+    The cache must stay within its size cap and keep its recently used entries.
+
+    test status: pass
+"""
+
+import os
+import shutil
+import tempfile
+
+from antlr4 import CommonTokenStream, InputStream
+
+from codart.utility import persistent_cache
+from codart.utility.persistent_cache import PersistentParseCache
+from codart.utility.project_parser import summarize_java_file
+from gen.java.JavaLexer import JavaLexer
+from gen.javaLabeled.JavaLexer import JavaLexer as JavaLabeledLexer
+from sbse import config
+
+SOURCE_CODE = 'package p;\n\nimport java.util.List;\n\n/** A class */\npublic class A {\n' \
+              '    private int x = 0; // a field\n    void m(List<String> s) { x = x + s.size(); }\n}\n'
+
+
+def token_tuples(token_stream):
+    token_stream.fill()
+    return [(t.type, t.channel, t.start, t.stop, t.line, t.column, t.tokenIndex, t.text)
+            for t in token_stream.tokens]
+
+
+def fresh_tokens(lexer_class, source=SOURCE_CODE):
+    return token_tuples(CommonTokenStream(lexer_class(InputStream(source))))
+
+
+def test_token_stream_round_trip():
+    cache_dir = tempfile.mkdtemp(prefix='parse_cache_test_')
+    try:
+        for lexer_class in (JavaLexer, JavaLabeledLexer):
+            cache = PersistentParseCache(cache_dir)
+            missed = token_tuples(cache.get_token_stream(InputStream(SOURCE_CODE), lexer_class))
+            hit = token_tuples(cache.get_token_stream(InputStream(SOURCE_CODE), lexer_class))
+            assert (cache.token_misses, cache.token_hits) == (1, 1)
+            assert missed == fresh_tokens(lexer_class)
+            assert hit == missed
+        # Each lexer has its own entries, although both lexer classes are named JavaLexer
+        assert sorted(os.listdir(cache_dir)) == ['tokens_gen.java.JavaLexer.JavaLexer',
+                                                 'tokens_gen.javaLabeled.JavaLexer.JavaLexer']
+        # Another content is a miss
+        cache = PersistentParseCache(cache_dir)
+        other_source = SOURCE_CODE.replace('x', 'y')
+        assert token_tuples(cache.get_token_stream(InputStream(other_source), JavaLexer)) == \
+               fresh_tokens(JavaLexer, other_source)
+        assert (cache.token_misses, cache.token_hits) == (1, 0)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def test_size_cap():
+    cache_dir = tempfile.mkdtemp(prefix='parse_cache_test_')
+    try:
+        cache = PersistentParseCache(cache_dir, max_size_mb=0.01)
+        cache.get_token_stream(InputStream(SOURCE_CODE), JavaLexer)
+        for i in range(30):
+            # The rewritten versions of a file, each used once
+            cache.get_token_stream(InputStream(SOURCE_CODE.replace('x', f'x{i}')), JavaLexer)
+            # The baseline version, used in every evaluation
+            assert token_tuples(cache.get_token_stream(InputStream(SOURCE_CODE), JavaLexer)) == \
+                   fresh_tokens(JavaLexer)
+        assert cache.evictions > 0
+        assert cache.size() <= cache.max_size
+        assert (cache.token_misses, cache.token_hits) == (31, 30)
+
+        # Another process sees the pruned cache
+        other_cache = PersistentParseCache(cache_dir, max_size_mb=0.01)
+        other_cache.get_token_stream(InputStream(SOURCE_CODE), JavaLexer)
+        assert other_cache.token_hits == 1
+        assert other_cache.prune(max_size=0) > 0 and other_cache.size() == 0
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def summary_state(value):
+    """
+    The summary as nested builtins, without the filename
+    """
+    if isinstance(value, dict):
+        return {key: summary_state(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [summary_state(item) for item in value]
+    if hasattr(value, '__dict__'):
+        return {key: summary_state(item) for key, item in vars(value).items() if key != 'filename'}
+    return value
+
+
+def test_summary_round_trip():
+    cache_dir = tempfile.mkdtemp(prefix='parse_cache_test_')
+    source_dir = tempfile.mkdtemp(prefix='parse_cache_source_')
+    parse_disk_cache, cache_ = config.PARSE_DISK_CACHE, persistent_cache._PERSISTENT_CACHE
+    try:
+        filename = os.path.join(source_dir, 'A.java')
+        with open(filename, 'w') as f:
+            f.write(SOURCE_CODE)
+        config.PARSE_DISK_CACHE = 0
+        uncached = summarize_java_file(filename)
+        assert uncached.error is None
+
+        config.PARSE_DISK_CACHE = 1
+        persistent_cache._PERSISTENT_CACHE = PersistentParseCache(cache_dir)
+        missed = summarize_java_file(filename)
+        hit = summarize_java_file(filename)
+        cache = persistent_cache.get_persistent_cache()
+        assert (cache.summary_misses, cache.summary_hits) == (1, 1)
+        assert summary_state(missed) == summary_state(uncached)
+        assert summary_state(hit) == summary_state(uncached)
+
+        # The same content under another name is a hit with the new filename
+        other_filename = os.path.join(source_dir, 'B.java')
+        shutil.copy(filename, other_filename)
+        assert summarize_java_file(other_filename).filename == other_filename
+        assert cache.summary_hits == 2
+    finally:
+        config.PARSE_DISK_CACHE, persistent_cache._PERSISTENT_CACHE = parse_disk_cache, cache_
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        shutil.rmtree(source_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_token_stream_round_trip()
+    test_size_cap()
+    test_summary_round_trip()
@@ -0,0 +1,71 @@
+"""
+    Regression test of the vectorized QMOOD engine.
+
+    The design metrics and quality attributes computed by QMOODEngine on the feature matrix
+    must be the same as the ones computed by the class-level properties of DesignMetrics and
+    the formulas of DesignQualityAttributes, on randomly generated class records.
+
+    test status: pass
+"""
+
+import random
+
+from metrics.evaluation_session import EvaluationSession, ClassRecord
+from metrics.qmood import DesignMetrics, DesignQualityAttributes, QMOODEngine
+from sbse import config
+
+
+def create_random_session(seed, number_of_classes=200):
+    random.seed(seed)
+    session = EvaluationSession(udb_path=None)
+    names = [f'C{i}' for i in range(number_of_classes)]
+    session.all_classes = set(names)
+    session.user_defined_classes = set(random.sample(names, number_of_classes // 2))
+    for name in names:
+        kindname = random.choice(['Public Class', 'Final Class', 'Abstract Class', 'Interface', 'Unresolved Class'])
+        record = ClassRecord(f'p.{name}', name, kindname, is_known='Unresolved' not in kindname)
+        record.metrics = {
+            'MaxInheritanceTree': random.randint(1, 4),
+            'PercentLackOfCohesion': random.choice([None, 0, 33, 67, 100]),
+            'CountDeclMethod': random.randint(0, 6),
+            'CountDeclMethodAll': random.randint(6, 20),
+            'CountDeclMethodPublic': random.choice([None, 0, 2, 5]),
+            'SumCyclomaticModified': random.randint(0, 30),
+        }
+        record.has_descendants = random.random() < 0.3
+        record.aggregation_types = random.choices(names + ['int', 'String'], k=random.randint(0, 8))
+        for visibility in record.variable_visibilities:
+            record.variable_visibilities[visibility] = random.randint(0, 3)
+        record.method_kindnames = random.choices(
+            ['Public Method', 'Private Method', 'Static Method', 'Final Method'], k=random.randint(0, 10)
+        )
+        if not record.is_interface:
+            record.coupling_types = random.choices(names + ['void'], k=random.randint(0, 10))
+            record.implemented_interfaces_methods = [random.randint(0, 5) for _ in range(random.randint(0, 2))]
+        session.classes.append(record)
+    return session
+
+
+def test_design_metrics():
+    config.CURRENT_METRICS = {name: random.choice([0, 1., 2.5]) for name in QMOODEngine.design_metrics_names}
+    for seed in range(20):
+        session = create_random_session(seed)
+        design_metrics = DesignMetrics(udb_path=None, session=session)
+        engine_metrics = QMOODEngine(session).design_metrics()
+        for name in QMOODEngine.design_metrics_names:
+            assert engine_metrics[name] == getattr(design_metrics, name), (seed, name)
+
+
+def test_quality_attributes():
+    config.CURRENT_METRICS = {name: 1. for name in QMOODEngine.design_metrics_names}
+    for seed in range(20):
+        session = create_random_session(seed)
+        design_quality_attributes = DesignQualityAttributes(udb_path=None, session=session)
+        quality_attributes = QMOODEngine(session).quality_attributes()
+        for name in QMOODEngine.quality_attributes_names:
+            assert quality_attributes[name] == getattr(design_quality_attributes, name), (seed, name)
+
+
+if __name__ == '__main__':
+    test_design_metrics()
+    test_quality_attributes()
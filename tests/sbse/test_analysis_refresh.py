@@ -0,0 +1,146 @@
+"""
+    Tests of the lazy refresh scheduler of the understand database (sbse.analysis_refresh).
+
+    The database updater is replaced by a stub which records the refreshes.
+    Only the refactorings in DATABASE_REFACTORINGS refresh a dirty database before they are applied,
+    the other ones are applied on the stale database, and the objectives always see a fresh database.
+
+    test status: pass
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+
+from codart.utility import snapshot_manager
+from codart.utility.directory_utils import restore_project
+from sbse import analysis_refresh, config
+from sbse.analysis_refresh import DATABASE_REFACTORINGS, AnalysisRefreshScheduler
+
+PROJECT_NAME = 'proj'
+BASELINE_FILES = {
+    'A.java': 'class A { }\n',
+    'B.java': 'class B { }\n',
+}
+
+
+class AppendOperation:
+    """
+    A refactoring operation which appends a text to a file, under the name of a codart refactoring
+    """
+
+    def __init__(self, name, file_path, text):
+        self.name = name
+        self.params = {'file_path': file_path, 'text': text}
+
+    def do_refactoring(self):
+        if self.params['text']:
+            with open(self.params['file_path'], 'a') as f:
+                f.write(self.params['text'])
+        return True
+
+
+def with_project(fast_restore):
+    def decorator(test):
+        def run_test():
+            root_dir = tempfile.mkdtemp(prefix='analysis_refresh_test_')
+            project_dir = os.path.join(root_dir, PROJECT_NAME)
+            os.makedirs(project_dir)
+            for relative_path, content in BASELINE_FILES.items():
+                with open(os.path.join(project_dir, relative_path), 'w') as f:
+                    f.write(content)
+            for command in (['git', 'init', '-q'], ['git', 'add', '.'],
+                            ['git', '-c', 'user.name=test', '-c', 'user.email=test@test', 'commit', '-q', '-m', 'b']):
+                subprocess.run(command, cwd=project_dir, check=True)
+            udb_path = os.path.join(root_dir, PROJECT_NAME + '.und')
+
+            main_config = config.FAST_RESTORE, config.LAZY_DB_REFRESH, config.INCREMENTAL_MODULARITY
+            update_understand_database = analysis_refresh.update_understand_database
+            config.FAST_RESTORE, config.LAZY_DB_REFRESH, config.INCREMENTAL_MODULARITY = fast_restore, True, False
+            refreshes = []
+            analysis_refresh.update_understand_database = refreshes.append
+            try:
+                test(project_dir, udb_path, refreshes)
+            finally:
+                config.FAST_RESTORE, config.LAZY_DB_REFRESH, config.INCREMENTAL_MODULARITY = main_config
+                analysis_refresh.update_understand_database = update_understand_database
+                snapshot_manager._MANAGERS.pop(os.path.normcase(os.path.abspath(project_dir)), None)
+                shutil.rmtree(root_dir, ignore_errors=True)
+        run_test.__name__ = test.__name__
+        return run_test
+    return decorator
+
+
+def apply(scheduler, refactoring_operation):
+    scheduler.before_refactoring(refactoring_operation)
+    refactoring_operation.do_refactoring()
+    scheduler.notify_refactoring_applied(refactoring_operation)
+
+
+@with_project(fast_restore=True)
+def test_database_refactorings_refresh_the_database(project_dir, udb_path, refreshes):
+    a_java, b_java = os.path.join(project_dir, 'A.java'), os.path.join(project_dir, 'B.java')
+    assert 'Move Method' in DATABASE_REFACTORINGS and 'Rename Method' not in DATABASE_REFACTORINGS
+    scheduler = AnalysisRefreshScheduler(project_dir, udb_path)
+    restore_project(project_dir)
+    scheduler.notify_restored()
+    # Nothing was touched by the first restore, and the database of the baseline is fresh
+    scheduler.before_metrics()
+    assert refreshes == []
+
+    # A parser-based refactoring is applied on the stale database
+    apply(scheduler, AppendOperation('Rename Method', a_java, '// 1\n'))
+    apply(scheduler, AppendOperation('Extract Method', b_java, '// 2\n'))
+    assert refreshes == [] and scheduler.dirty_files == {'A.java', 'B.java'}
+    # A refactoring which reads the database forces a single refresh for both files
+    apply(scheduler, AppendOperation('Move Method', a_java, '// 3\n'))
+    assert refreshes == [udb_path]
+    assert scheduler.dirty_files == {'A.java'}
+    # A refactoring which changed nothing does not make the database dirty
+    scheduler.before_metrics()
+    assert len(refreshes) == 2
+    apply(scheduler, AppendOperation('Rename Class', a_java, ''))
+    scheduler.before_metrics()
+    assert len(refreshes) == 2
+    # A refactoring which reads a fresh database does not refresh it
+    apply(scheduler, AppendOperation('Pull Up Method', a_java, '// 4\n'))
+    assert len(refreshes) == 2
+    scheduler.before_metrics()
+    assert len(refreshes) == 3
+    assert [operation.name for operation in scheduler.applied_refactorings] == [
+        'Rename Method', 'Extract Method', 'Move Method', 'Pull Up Method']
+
+    # The restored files are dirty until the next refresh
+    restore_project(project_dir)
+    scheduler.notify_restored()
+    assert scheduler.applied_refactorings == [] and scheduler.is_dirty
+    apply(scheduler, AppendOperation('Make Field Static', b_java, '// 5\n'))
+    assert len(refreshes) == 4
+    assert (scheduler.requested_refreshes, scheduler.performed_refreshes) == (8, 4)
+    assert scheduler.avoided_refreshes == 4
+
+
+@with_project(fast_restore=False)
+def test_untracked_changes(project_dir, udb_path, refreshes):
+    a_java = os.path.join(project_dir, 'A.java')
+    scheduler = AnalysisRefreshScheduler(project_dir, udb_path)
+    restore_project(project_dir)
+    # Without a snapshot manager, the restored project and each refactoring make the database dirty
+    scheduler.notify_restored()
+    apply(scheduler, AppendOperation('Rename Field', a_java, ''))
+    assert refreshes == []
+    apply(scheduler, AppendOperation('Move Field', a_java, ''))
+    assert refreshes == [udb_path]
+    apply(scheduler, AppendOperation('Decrease Field Visibility', a_java, ''))
+    assert len(refreshes) == 2
+    # A copied database is consistent with the copied files
+    apply(scheduler, AppendOperation('Rename Field', a_java, ''))
+    scheduler.mark_clean()
+    scheduler.before_metrics()
+    assert len(refreshes) == 2
+
+
+if __name__ == '__main__':
+    test_database_refactorings_refresh_the_database()
+    test_untracked_changes()
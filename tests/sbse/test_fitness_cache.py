@@ -0,0 +1,134 @@
+"""
+    Key canonicalization tests of the fitness cache (sbse.fitness_cache).
+
+    The location parameters are dropped, the paths inside the project are relative, and the baseline revision
+    is a part of the key: the same sequence has the same key on the main project and on every worker copy,
+    and a cache of another HEAD revision misses.
+
+    test status: pass
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+
+from sbse import config
+from sbse.fitness_cache import FitnessCache, canonical_params, sequence_hash
+from sbse.parallel_evaluation import relocate_refactoring_params
+
+PROJECT_NAME = 'proj'
+
+
+class RefactoringOperation:
+    def __init__(self, name, params):
+        self.name = name
+        self.params = params
+
+
+def create_sequence(project_dir, udb_path):
+    return [
+        RefactoringOperation('Move Field', {
+            'udb_path': udb_path, 'project_dir': project_dir, 'source_class': 'A', 'field_name': 'x',
+            'file_path': os.path.join(project_dir, 'src', 'p', 'A.java'),
+        }),
+        RefactoringOperation('Extract Class', {
+            'udb_path': udb_path, 'file_path': os.path.join(project_dir, 'src', 'p', 'B.java'),
+            'moved_fields': ['y'], 'other_file': '/elsewhere/C.java',
+        }),
+    ]
+
+
+def git_commit(project_dir, message):
+    for command in (['git', 'add', '.'],
+                    ['git', '-c', 'user.name=test', '-c', 'user.email=test@test', 'commit', '-q', '-m', message]):
+        subprocess.run(command, cwd=project_dir, check=True)
+
+
+def with_project(test):
+    def run_test():
+        root_dir = tempfile.mkdtemp(prefix='fitness_cache_test_')
+        project_dir = os.path.join(root_dir, PROJECT_NAME)
+        os.makedirs(project_dir)
+        main_config = config.PROJECT_PATH, config.PROJECT_NAME, config.UDB_PATH, config.WORKERS_ROOT_DIR
+        config.PROJECT_PATH, config.PROJECT_NAME = project_dir, PROJECT_NAME
+        config.UDB_PATH = os.path.join(root_dir, PROJECT_NAME + '.und')
+        config.WORKERS_ROOT_DIR = os.path.join(root_dir, 'workers')
+        try:
+            test(root_dir)
+        finally:
+            config.PROJECT_PATH, config.PROJECT_NAME, config.UDB_PATH, config.WORKERS_ROOT_DIR = main_config
+            shutil.rmtree(root_dir, ignore_errors=True)
+    run_test.__name__ = test.__name__
+    return run_test
+
+
+@with_project
+def test_canonical_params(root_dir):
+    sequence = create_sequence(config.PROJECT_PATH, config.UDB_PATH)
+    assert canonical_params(sequence[0].params) == {'source_class': 'A', 'field_name': 'x',
+                                                    'file_path': 'src/p/A.java'}
+    # The paths outside the project are kept
+    assert canonical_params(sequence[1].params) == {'file_path': 'src/p/B.java', 'moved_fields': ['y'],
+                                                    'other_file': '/elsewhere/C.java'}
+    # The key depends on the revision, the order of the operations, and the namespace
+    assert sequence_hash(sequence, 'r1') != sequence_hash(sequence, 'r2')
+    assert sequence_hash(sequence, 'r1') != sequence_hash(sequence[::-1], 'r1')
+    assert sequence_hash(sequence, 'r1') != sequence_hash(sequence, 'r1', namespace='other')
+
+
+@with_project
+def test_worker_copies_share_keys(root_dir):
+    sequence = create_sequence(config.PROJECT_PATH, config.UDB_PATH)
+    key = sequence_hash(sequence, 'r1')
+    for worker_id in range(2):
+        worker_dir = os.path.join(config.WORKERS_ROOT_DIR, f'worker_{worker_id}')
+        worker_project_dir = os.path.join(worker_dir, PROJECT_NAME)
+        worker_udb_path = os.path.join(worker_dir, PROJECT_NAME + '.und')
+        worker_sequence = [
+            RefactoringOperation(ro.name, relocate_refactoring_params(ro.params, worker_project_dir, worker_udb_path))
+            for ro in sequence
+        ]
+        assert worker_sequence[0].params['file_path'].startswith(worker_project_dir)
+        assert sequence_hash(worker_sequence, 'r1') == key
+    # Another project under the workers directory is not a worker copy
+    other_sequence = create_sequence(os.path.join(config.WORKERS_ROOT_DIR, 'worker_0', 'other'), config.UDB_PATH)
+    assert sequence_hash(other_sequence, 'r1') != key
+
+
+@with_project
+def test_revision_miss(root_dir):
+    project_dir = config.PROJECT_PATH
+    subprocess.run(['git', 'init', '-q'], cwd=project_dir, check=True)
+    with open(os.path.join(project_dir, 'A.java'), 'w') as f:
+        f.write('class A { }\n')
+    git_commit(project_dir, 'baseline')
+    db_path = os.path.join(root_dir, 'fitness_cache.sqlite3')
+    sequence = create_sequence(project_dir, config.UDB_PATH)
+
+    cache = FitnessCache(db_path=db_path)
+    assert len(cache.baseline_revision) == 40
+    key = cache.key(sequence)
+    assert cache.get(key) is None
+    cache.put(key, [1, 2.5])
+    cache.close()
+    # Another execution on the same revision reads the on-disk store
+    cache = FitnessCache(db_path=db_path)
+    assert cache.get(cache.key(sequence)) == [1.0, 2.5]
+    assert (cache.hits, cache.misses) == (1, 0)
+    cache.close()
+
+    with open(os.path.join(project_dir, 'A.java'), 'w') as f:
+        f.write('class A { int x; }\n')
+    git_commit(project_dir, 'next')
+    cache = FitnessCache(db_path=db_path)
+    assert cache.key(sequence) != key
+    assert cache.get(cache.key(sequence)) is None
+    assert (cache.hits, cache.misses) == (0, 1)
+    cache.close()
+
+
+if __name__ == '__main__':
+    test_canonical_params()
+    test_worker_copies_share_keys()
+    test_revision_miss()
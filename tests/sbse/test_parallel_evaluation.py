@@ -0,0 +1,199 @@
+"""
+    Tests of the parallel population evaluation (sbse.parallel_evaluation).
+
+    The refactoring parameters are relocated from the main project to the worker copies,
+    a population evaluated by two workers (each on its own git worktree) has the same objectives as
+    the serial evaluation on the main project, and a dead worker fails the evaluation instead of blocking it.
+    The understand database refresh is replaced by a no-op, since the objectives of the test only read the files.
+
+    test status: pass
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures.process import BrokenProcessPool
+
+from codart.utility.directory_utils import restore_project
+from sbse import analysis_refresh, config
+from sbse import parallel_evaluation
+from sbse.parallel_evaluation import EvaluationWorkerPool, relocate_refactoring_params
+
+PROJECT_NAME = 'proj'
+BASELINE_FILES = {
+    'A.java': 'class A { }\n',
+    os.path.join('pkg', 'B.java'): 'package pkg;\nclass B { }\n',
+}
+
+
+class AppendOperation:
+    """
+    A picklable refactoring operation which appends a text to a file
+    """
+
+    def __init__(self, file_path, text):
+        self.name = 'Append'
+        self.params = {'file_path': file_path, 'text': text, 'udb_path': config.UDB_PATH}
+
+    def do_refactoring(self):
+        with open(self.params['file_path'], 'a') as f:
+            f.write(self.params['text'])
+        return True
+
+
+class ExitOperation(AppendOperation):
+    """
+    A refactoring operation which kills the worker process, as a crash of understand would
+    """
+
+    def do_refactoring(self):
+        os._exit(1)
+
+
+def file_contents_objective(udb_path):
+    """
+    The contents of the project files of the understand database, instead of the quality metrics
+    """
+    project_dir = os.path.splitext(udb_path)[0]
+    contents = {}
+    for relative_path in sorted(BASELINE_FILES):
+        with open(os.path.join(project_dir, relative_path)) as f:
+            contents[relative_path] = f.read()
+    return [len(content) for content in contents.values()], contents
+
+
+def create_main_project():
+    root_dir = tempfile.mkdtemp(prefix='parallel_evaluation_test_')
+    project_dir = os.path.join(root_dir, PROJECT_NAME)
+    for relative_path, content in BASELINE_FILES.items():
+        os.makedirs(os.path.join(project_dir, os.path.dirname(relative_path)), exist_ok=True)
+        with open(os.path.join(project_dir, relative_path), 'w') as f:
+            f.write(content)
+    for command in (['git', 'init', '-q'], ['git', 'add', '.'],
+                    ['git', '-c', 'user.name=test', '-c', 'user.email=test@test', 'commit', '-q', '-m', 'baseline']):
+        subprocess.run(command, cwd=project_dir, check=True)
+    config.PROJECT_PATH = project_dir
+    config.PROJECT_NAME = PROJECT_NAME
+    config.UDB_PATH = os.path.join(root_dir, PROJECT_NAME + '.und')
+    config.WORKERS_ROOT_DIR = os.path.join(root_dir, 'workers')
+    config.FAST_RESTORE = True
+    for worker_id in range(2):
+        # The worker databases exist, so they are not created by understand
+        worker_dir = os.path.join(config.WORKERS_ROOT_DIR, f'worker_{worker_id}')
+        os.makedirs(worker_dir)
+        open(os.path.join(worker_dir, PROJECT_NAME + '.und'), 'w').close()
+    return root_dir
+
+
+def create_population(project_dir):
+    a_java, b_java = os.path.join(project_dir, 'A.java'), os.path.join(project_dir, 'pkg', 'B.java')
+    return [
+        [AppendOperation(a_java, '// 1\n')],
+        [AppendOperation(a_java, '// 2\n'), AppendOperation(b_java, '// 2\n')],
+        [],
+        [AppendOperation(b_java, '// 4\n'), AppendOperation(b_java, '// 44\n')],
+        [AppendOperation(a_java, '// 5\n')],
+    ]
+
+
+def serial_evaluation(population):
+    results = []
+    for individual_ in population:
+        restore_project(config.PROJECT_PATH)
+        for refactoring_operation in individual_:
+            refactoring_operation.do_refactoring()
+        results.append(file_contents_objective(config.UDB_PATH))
+    restore_project(config.PROJECT_PATH)
+    return results
+
+
+def test_relocate_refactoring_params():
+    main_project_dir, main_udb_path = config.PROJECT_PATH, config.UDB_PATH
+    config.PROJECT_PATH, config.UDB_PATH = '/main/proj', '/main/proj.und'
+    try:
+        params = {
+            'udb_path': '/main/proj.und',
+            'project_dir': '/main/proj',
+            'file_path': '/main/proj/src/pkg/A.java',
+            'other_project_file': '/main/proj2/A.java',
+            'source_class': 'A',
+            'lines': [1, 2],
+            'is_static': False,
+        }
+        relocated_params = relocate_refactoring_params(params, '/workers/worker_0/proj', '/workers/worker_0/proj.und')
+        assert relocated_params == {
+            'udb_path': '/workers/worker_0/proj.und',
+            'project_dir': '/workers/worker_0/proj',
+            'file_path': '/workers/worker_0/proj/src/pkg/A.java',
+            'other_project_file': '/main/proj2/A.java',
+            'source_class': 'A',
+            'lines': [1, 2],
+            'is_static': False,
+        }
+        # The parameters of the main project are not changed
+        assert params['file_path'] == '/main/proj/src/pkg/A.java'
+    finally:
+        config.PROJECT_PATH, config.UDB_PATH = main_project_dir, main_udb_path
+
+
+def with_main_project(test):
+    def run_test():
+        main_config = (config.PROJECT_PATH, config.PROJECT_NAME, config.UDB_PATH, config.WORKERS_ROOT_DIR,
+                       config.FAST_RESTORE)
+        update_understand_database = analysis_refresh.update_understand_database
+        # The workers are forked, so they inherit the no-op refresh
+        analysis_refresh.update_understand_database = lambda udb_path: None
+        root_dir = create_main_project()
+        try:
+            test()
+        finally:
+            parallel_evaluation.shutdown_worker_pool()
+            (config.PROJECT_PATH, config.PROJECT_NAME, config.UDB_PATH, config.WORKERS_ROOT_DIR,
+             config.FAST_RESTORE) = main_config
+            analysis_refresh.update_understand_database = update_understand_database
+            shutil.rmtree(root_dir, ignore_errors=True)
+    run_test.__name__ = test.__name__
+    return run_test
+
+
+@with_main_project
+def test_parallel_evaluation_matches_serial_evaluation():
+    population = create_population(config.PROJECT_PATH)
+    expected_results = serial_evaluation(population)
+    assert expected_results[1][1]['A.java'] == 'class A { }\n// 2\n'
+    assert expected_results[2][1] == BASELINE_FILES
+
+    worker_pool = parallel_evaluation.get_worker_pool(2)
+    assert worker_pool.evaluate(population, file_contents_objective) == expected_results
+    # The next generation is evaluated by the same workers on the restored copies
+    assert worker_pool.evaluate(population[::-1], file_contents_objective) == expected_results[::-1]
+    assert parallel_evaluation.get_worker_pool(2) is worker_pool
+    # The main project is not touched by the workers
+    assert serial_evaluation([[]]) == [(expected_results[2][0], BASELINE_FILES)]
+
+
+@with_main_project
+def test_dead_worker_fails_the_evaluation():
+    population = create_population(config.PROJECT_PATH)
+    worker_pool = EvaluationWorkerPool(n_workers=2)
+    try:
+        worker_pool.evaluate(population + [[ExitOperation(os.path.join(config.PROJECT_PATH, 'A.java'), '')]],
+                             file_contents_objective)
+        assert False, 'The evaluation of a dead worker did not fail'
+    except BrokenProcessPool:
+        assert worker_pool.is_broken
+    finally:
+        worker_pool.close()
+
+    # A broken pool is recreated
+    parallel_evaluation._WORKER_POOL = worker_pool
+    new_worker_pool = parallel_evaluation.get_worker_pool(2)
+    assert new_worker_pool is not worker_pool
+    assert new_worker_pool.evaluate(population, file_contents_objective) == serial_evaluation(population)
+
+
+if __name__ == '__main__':
+    test_relocate_refactoring_params()
+    test_parallel_evaluation_matches_serial_evaluation()
+    test_dead_worker_fails_the_evaluation()
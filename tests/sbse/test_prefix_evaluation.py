@@ -0,0 +1,175 @@
+"""
+    Tests of the prefix-sharing evaluation (sbse.prefix_evaluation) on a small git project.
+
+    The sequences of a population which share prefixes share the nodes of the RefactoringTrie,
+    and the files after each sequence, evaluated from the ProjectSnapshot of its branching node,
+    are the same as after a serial application of the sequence on the restored project,
+    with the fast restore (snapshot manager) and with the git restore.
+    The understand database refresh is replaced by a no-op, since the objectives of the test only read the files.
+
+    test status: pass
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+
+from codart.utility import snapshot_manager
+from codart.utility.directory_utils import restore_project
+from sbse import analysis_refresh, config
+from sbse.prefix_evaluation import PrefixSharingEvaluator, RefactoringTrie
+
+PROJECT_NAME = 'proj'
+BASELINE_FILES = {
+    'A.java': 'class A { }\n',
+    os.path.join('pkg', 'B.java'): 'package pkg;\nclass B { }\n',
+}
+
+
+class AppendOperation:
+    """
+    A refactoring operation which appends a text to a file, or creates the file
+    """
+
+    def __init__(self, file_path, text):
+        self.name = 'Append'
+        self.params = {'file_path': file_path, 'text': text, 'udb_path': config.UDB_PATH}
+
+    def do_refactoring(self):
+        with open(self.params['file_path'], 'a') as f:
+            f.write(self.params['text'])
+        return True
+
+
+class DeleteOperation(AppendOperation):
+    """
+    A refactoring operation which deletes a file
+    """
+
+    def __init__(self, file_path):
+        super(DeleteOperation, self).__init__(file_path, '')
+        self.name = 'Delete'
+
+    def do_refactoring(self):
+        os.remove(self.params['file_path'])
+        return True
+
+
+def project_files(udb_path):
+    """
+    The contents of the project files, instead of the quality metrics
+    """
+    project_dir = os.path.splitext(udb_path)[0]
+    contents = {}
+    for directory, directory_names, file_names in os.walk(project_dir):
+        directory_names[:] = [name for name in directory_names if name != '.git']
+        for file_name in file_names:
+            with open(os.path.join(directory, file_name)) as f:
+                contents[os.path.relpath(os.path.join(directory, file_name), project_dir)] = f.read()
+    return contents
+
+
+def create_population(project_dir):
+    a_java, b_java = os.path.join(project_dir, 'A.java'), os.path.join(project_dir, 'pkg', 'B.java')
+    c_java = os.path.join(project_dir, 'pkg', 'C.java')
+    return [
+        [AppendOperation(a_java, '// 1\n'), AppendOperation(b_java, '// 2\n')],
+        [AppendOperation(a_java, '// 1\n'), AppendOperation(c_java, 'class C { }\n'), DeleteOperation(b_java)],
+        [AppendOperation(a_java, '// 1\n')],
+        [],
+        [AppendOperation(b_java, '// 3\n'), AppendOperation(a_java, '// 1\n')],
+        [AppendOperation(a_java, '// 1\n'), AppendOperation(b_java, '// 2\n'), AppendOperation(a_java, '// 4\n')],
+        [AppendOperation(a_java, '// 1\n'), AppendOperation(c_java, 'class C { }\n'),
+         AppendOperation(a_java, '// 5\n')],
+    ]
+
+
+def serial_evaluation(population):
+    results = []
+    for individual_ in population:
+        restore_project(config.PROJECT_PATH)
+        for refactoring_operation in individual_:
+            refactoring_operation.do_refactoring()
+        results.append(project_files(config.UDB_PATH))
+    restore_project(config.PROJECT_PATH)
+    return results
+
+
+def with_project(fast_restore):
+    def decorator(test):
+        def run_test():
+            root_dir = tempfile.mkdtemp(prefix='prefix_evaluation_test_')
+            project_dir = os.path.join(root_dir, PROJECT_NAME)
+            for relative_path, content in BASELINE_FILES.items():
+                os.makedirs(os.path.join(project_dir, os.path.dirname(relative_path)), exist_ok=True)
+                with open(os.path.join(project_dir, relative_path), 'w') as f:
+                    f.write(content)
+            for command in (['git', 'init', '-q'], ['git', 'add', '.'],
+                            ['git', '-c', 'user.name=test', '-c', 'user.email=test@test', 'commit', '-q', '-m', 'b']):
+                subprocess.run(command, cwd=project_dir, check=True)
+            # The database is a placeholder file, which is checkpointed with the snapshots
+            udb_path = os.path.join(root_dir, PROJECT_NAME + '.und')
+            open(udb_path, 'w').close()
+
+            main_config = config.PROJECT_PATH, config.UDB_PATH, config.FAST_RESTORE
+            update_understand_database = analysis_refresh.update_understand_database
+            config.PROJECT_PATH, config.UDB_PATH, config.FAST_RESTORE = project_dir, udb_path, fast_restore
+            analysis_refresh.update_understand_database = lambda udb_path_: None
+            try:
+                test(root_dir)
+            finally:
+                config.PROJECT_PATH, config.UDB_PATH, config.FAST_RESTORE = main_config
+                analysis_refresh.update_understand_database = update_understand_database
+                snapshot_manager._MANAGERS.pop(os.path.normcase(os.path.abspath(project_dir)), None)
+                analysis_refresh._SCHEDULERS.pop((os.path.normcase(os.path.abspath(project_dir)),
+                                                  os.path.normcase(os.path.abspath(udb_path))), None)
+                shutil.rmtree(root_dir, ignore_errors=True)
+        run_test.__name__ = test.__name__
+        return run_test
+    return decorator
+
+
+def test_trie():
+    population = create_population('/proj')
+    trie = RefactoringTrie(population)
+    assert trie.sum_of_lengths == 14
+    # A1 is shared by five sequences, A1 -> B2 by two, and A1 -> C by two
+    assert trie.number_of_nodes == 8
+    assert trie.root.individuals == [3]
+    assert len(trie.root.children) == 2
+    a1 = trie.root.children[RefactoringTrie.operation_key(population[0][0])]
+    assert a1.individuals == [2] and len(a1.children) == 2
+
+
+def assert_same_as_serial_evaluation(root_dir):
+    population = create_population(config.PROJECT_PATH)
+    expected_results = serial_evaluation(population)
+    assert 'pkg/B.java' not in expected_results[1] and expected_results[1]['pkg/C.java'] == 'class C { }\n'
+    assert expected_results[3] == BASELINE_FILES
+
+    evaluator = PrefixSharingEvaluator(snapshots_dir=os.path.join(root_dir, 'snapshots'))
+    assert evaluator.evaluate(population, project_files) == expected_results
+    assert (evaluator.applied_refactorings, evaluator.snapshots) == (8, 2)
+    assert not os.path.exists(os.path.join(root_dir, 'snapshots', 'depth_1'))
+    # The next generation starts from the baseline
+    assert evaluator.evaluate(population[::-1], project_files) == expected_results[::-1]
+    assert serial_evaluation([[]]) == [BASELINE_FILES]
+
+
+@with_project(fast_restore=True)
+def test_prefix_sharing_with_fast_restore(root_dir):
+    assert_same_as_serial_evaluation(root_dir)
+    # The snapshots took the changed files from the snapshot manager, instead of git status
+    assert snapshot_manager.get_active_snapshot_manager(config.PROJECT_PATH) is not None
+
+
+@with_project(fast_restore=False)
+def test_prefix_sharing_with_git_restore(root_dir):
+    assert_same_as_serial_evaluation(root_dir)
+
+
+if __name__ == '__main__':
+    test_trie()
+    test_prefix_sharing_with_fast_restore()
+    test_prefix_sharing_with_git_restore()
@@ -0,0 +1,91 @@
+"""
+    Tests of the Cyclic Hierarchy and Cyclically-dependent Modularization smells on small projects,
+    whose cycles go through interfaces, enums, and nested types (see codart.utility.dependency_graph).
+
+    test status: pass
+"""
+
+import os
+import shutil
+import tempfile
+
+from codart.smells.cyclic_hierarchy import CyclicHierarchy
+from codart.smells.cyclically_dependent_modularization import CyclicDependentModularization
+
+INTERFACE_CYCLE_FILES = {
+    os.path.join('shapes', 'Shape.java'): 'package shapes;\npublic interface Shape {\n    Circle asCircle();\n}\n',
+    os.path.join('shapes', 'Circle.java'): 'package shapes;\npublic class Circle implements Shape {\n'
+                                           '    public Circle asCircle() { return this; }\n}\n',
+    os.path.join('shapes', 'Square.java'): 'package shapes;\npublic class Square implements Shape {\n'
+                                           '    public Circle asCircle() { return null; }\n}\n',
+}
+
+NESTED_CYCLE_FILES = {
+    os.path.join('p', 'Outer.java'): 'package p;\nimport q.Color;\npublic class Outer {\n'
+                                     '    public interface Visitor {\n        void visit(Node node);\n    }\n'
+                                     '    public static class Node implements Visitor {\n'
+                                     '        public void visit(Node node) { }\n    }\n'
+                                     '    Color color;\n}\n',
+    os.path.join('q', 'Color.java'): 'package q;\nimport p.Outer;\npublic enum Color implements Outer.Visitor {\n'
+                                     '    RED;\n    public void visit(Outer.Node node) { }\n}\n',
+    os.path.join('q', 'Other.java'): 'package q;\nclass Other {\n    class Node { }\n    Node node;\n}\n',
+}
+
+
+def create_project(files):
+    project_dir = tempfile.mkdtemp(prefix='cyclic_smells_test_')
+    for relative_path, content in files.items():
+        file_path = os.path.join(project_dir, relative_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as f:
+            f.write(content)
+    return project_dir, [os.path.join(project_dir, relative_path) for relative_path in sorted(files)]
+
+
+def test_interface_cycle():
+    project_dir, source_files = create_project(INTERFACE_CYCLE_FILES)
+    try:
+        smells = CyclicHierarchy(source_files).check()
+        assert [smell['classes'] for smell in smells] == [['shapes.Circle', 'shapes.Shape']]
+        assert smells[0]['supertypes'] == ['shapes.Shape']
+        assert {'source': 'shapes.Circle', 'target': 'shapes.Shape', 'kinds': ['implements', 'reference']} in \
+               smells[0]['edges']
+        assert {'source': 'shapes.Shape', 'target': 'shapes.Circle', 'kinds': ['reference', 'return']} in \
+               smells[0]['edges']
+        # Square depends on the cycle, but it is not a part of it
+        cycles = CyclicDependentModularization(source_files).check()
+        assert [cycle['classes'] for cycle in cycles] == [['shapes.Circle', 'shapes.Shape']]
+    finally:
+        shutil.rmtree(project_dir, ignore_errors=True)
+
+
+def test_nested_types_and_enums():
+    project_dir, source_files = create_project(NESTED_CYCLE_FILES)
+    try:
+        cyclic_hierarchy = CyclicHierarchy(source_files)
+        graph = cyclic_hierarchy.dependency_graph
+        assert sorted(graph.classes) == ['p.Outer', 'p.Outer.Node', 'p.Outer.Visitor', 'q.Color', 'q.Other',
+                                         'q.Other.Node']
+        assert graph.classes['q.Color'].kind == 'enum' and graph.classes['p.Outer.Visitor'].kind == 'interface'
+        # The nested types are resolved in their enclosing types first
+        assert graph.edges['q.Other'] == {'q.Other.Node': {'field', 'reference'}}
+        assert 'implements' in graph.edges['q.Color']['p.Outer.Visitor']
+        # The parameter of Visitor.visit is a reference of the nested type, not of Outer
+        assert 'parameter' in graph.edges['p.Outer.Visitor']['p.Outer.Node']
+        assert 'p.Outer.Node' not in graph.edges['p.Outer']
+
+        # Node implements Visitor, and Visitor depends on Node
+        smells = cyclic_hierarchy.check()
+        assert [smell['classes'] for smell in smells] == [['p.Outer.Node', 'p.Outer.Visitor']]
+        assert smells[0]['files'] == [os.path.join(project_dir, 'p', 'Outer.java')]
+        # Outer has a field of Color, and Color names Outer in Outer.Visitor and Outer.Node
+        cycles = CyclicDependentModularization(source_files, dependency_graph=graph).check()
+        assert [cycle['classes'] for cycle in cycles] == [['p.Outer', 'q.Color'], ['p.Outer.Node', 'p.Outer.Visitor']]
+        assert cycles[0]['packages'] == ['p', 'q']
+    finally:
+        shutil.rmtree(project_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_interface_cycle()
+    test_nested_types_and_enums()
@@ -0,0 +1,66 @@
+"""
+    Compares the strongly connected components of codart.utility.dependency_graph (iterative Tarjan)
+    with networkx on random directed graphs, and checks the reverse topological order of the components.
+
+    test status: pass
+"""
+
+import random
+
+import networkx as nx
+
+from codart.utility.dependency_graph import strongly_connected_components
+
+
+def random_graph(rng, number_of_nodes, edge_probability):
+    graph = nx.DiGraph()
+    graph.add_nodes_from(f'n{i}' for i in range(number_of_nodes))
+    graph.add_edges_from((f'n{i}', f'n{j}') for i in range(number_of_nodes) for j in range(number_of_nodes)
+                         if rng.random() < edge_probability)
+    return graph
+
+
+def assert_same_components(graph, nodes=None):
+    components = strongly_connected_components(graph.nodes if nodes is None else nodes,
+                                               lambda node: graph.successors(node))
+    assert sorted(sorted(component) for component in components) == \
+           sorted(sorted(component) for component in nx.strongly_connected_components(graph))
+    # Reverse topological order: the successors of a component are in it or in the components before it
+    position = {node: k for k, component in enumerate(components) for node in component}
+    assert all(position[target] <= position[source] for source, target in graph.edges)
+
+
+def test_random_graphs():
+    rng = random.Random(13)
+    for _ in range(300):
+        number_of_nodes = rng.randint(0, 40)
+        graph = random_graph(rng, number_of_nodes, rng.choice([0.01, 0.03, 0.05, 0.1, 0.3]))
+        assert_same_components(graph)
+        # The components do not depend on the order of the roots
+        nodes = list(graph.nodes)
+        rng.shuffle(nodes)
+        assert_same_components(graph, nodes)
+
+
+def test_self_loops_and_multi_edges():
+    graph = nx.DiGraph([('a', 'a'), ('a', 'b'), ('b', 'a'), ('c', 'c'), ('c', 'a')])
+    assert_same_components(graph)
+    # Repeated successors, as in a multigraph
+    components = strongly_connected_components(['x', 'y'], lambda node: {'x': ['y', 'y'], 'y': ['x', 'x']}[node])
+    assert [sorted(component) for component in components] == [['x', 'y']]
+
+
+def test_deep_graphs():
+    # Deeper than the recursion limit of Python
+    number_of_nodes = 20000
+    path = nx.DiGraph([(i, i + 1) for i in range(number_of_nodes)])
+    assert_same_components(path)
+    cycle = nx.DiGraph([(i, (i + 1) % number_of_nodes) for i in range(number_of_nodes)])
+    assert_same_components(cycle)
+    assert len(strongly_connected_components(cycle.nodes, cycle.successors)) == 1
+
+
+if __name__ == '__main__':
+    test_random_graphs()
+    test_self_loops_and_multi_edges()
+    test_deep_graphs()
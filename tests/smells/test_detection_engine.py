@@ -0,0 +1,238 @@
+"""
+    Tests of the native smell detection engine (codart.smells.detection_engine) on a small project,
+    and the round trip of its CSV files through the loaders of sbse.initialize.SmellInitialization.
+
+    test status: pass
+"""
+
+import os
+import shutil
+import tempfile
+
+from codart.smells import detection_engine
+from codart.smells.detection_engine import detect_smells, save_smells
+from sbse import initialize
+from sbse.initialize import SmellInitialization, get_extracted_entities
+
+SOURCE_FILES = {
+    os.path.join('shapes', 'Shape.java'): """package shapes;
+public abstract class Shape {
+    public void draw() { System.out.println("shape"); }
+    public abstract double area();
+}
+""",
+    os.path.join('shapes', 'Circle.java'): """package shapes;
+public class Circle extends Shape {
+    private int color;
+    public void draw() { throw new UnsupportedOperationException(); }
+    public double area() { return 3.14; }
+    public String label() { return "shape"; }
+}
+""",
+    os.path.join('shapes', 'Square.java'): """package shapes;
+public class Square extends Shape {
+    private int color;
+    public double area() { return 1; }
+    public String label() { return "shape"; }
+}
+""",
+    os.path.join('shapes', 'Renderer.java'): """package shapes;
+public interface Renderer { void render(Shape shape); }
+class SvgRenderer implements Renderer {
+    public void render(Shape shape) { shape.draw(); }
+}
+""",
+    os.path.join('shapes', 'Levels.java'): """package shapes;
+class L1 { }
+class L2 extends L1 { }
+class L3 extends L2 { }
+class L4 extends L3 { }
+class L5 extends L4 { }
+class L6 extends L5 { }
+class L7 extends L6 { }
+""",
+    os.path.join('model', 'Data.java'): """package model;
+public class Data {
+    public int a;
+    public int b;
+    public int c;
+    public int getD() { return a; }
+}
+""",
+    os.path.join('model', 'Env.java'): """package model;
+public class Env {
+    private int own;
+    private int temp;
+    int envy(Data data) { return data.a + data.b + data.c + data.getD(); }
+    int compute() { temp = own * 2; return temp + 1; }
+    void move(int x, int y, int z) { own = x + y + z; }
+    void scale(int x, int y, int z) { own = x * y * z; }
+    void shift(int x, int y, int z) { own = x - y - z; }
+}
+""",
+    os.path.join('model', 'Record.java'): """package model;
+public class Record {
+    private int id;
+    private int age;
+    private long time;
+    private String name;
+    private String city;
+    private boolean active;
+    public Record(int id) { this.id = id; }
+}
+""",
+    os.path.join('model', 'Big.java'): """package model;
+import java.util.*;
+public class Big {
+    private Map<String, Integer> counts;
+    private List<String> names;
+    void put(String key, int value) { counts.put(key, value); }
+    int count(String key) { return counts.get(key); }
+    void add(String name) { names.add(name); }
+    void remove(String name) { names.remove(name); }
+    int size() { return names.size(); }
+}
+""",
+}
+
+THRESHOLDS = [
+    (detection_engine.GodClassDetector, 'MIN_WMC', 5),
+    (detection_engine.GodClassDetector, 'MAX_TCC', 0.5),
+    (detection_engine.GodClassDetector, 'MIN_ATFD', -1),
+    (detection_engine.LongMethodDetector, 'MIN_STATEMENTS', 2),
+    (detection_engine.HubLikeModularizationDetector, 'MIN_FAN_IN', 1),
+    (detection_engine.HubLikeModularizationDetector, 'MIN_FAN_OUT', 1),
+]
+
+
+def create_project():
+    project_dir = tempfile.mkdtemp(prefix='smells_test_')
+    for relative_path, content in SOURCE_FILES.items():
+        os.makedirs(os.path.join(project_dir, os.path.dirname(relative_path)), exist_ok=True)
+        with open(os.path.join(project_dir, relative_path), 'w') as f:
+            f.write(content)
+    return project_dir
+
+
+def run_detection(project_dir):
+    previous_thresholds = [(detector_class, name, getattr(detector_class, name)) for detector_class, name, _ in
+                           THRESHOLDS]
+    for detector_class, name, value in THRESHOLDS:
+        setattr(detector_class, name, value)
+    try:
+        source_files = sorted(os.path.join(project_dir, path) for path in SOURCE_FILES)
+        return detect_smells(source_files, n_jobs=1)
+    finally:
+        for detector_class, name, value in previous_thresholds:
+            setattr(detector_class, name, value)
+
+
+def locations(smells, name):
+    return {(smell.qualified_class_name, smell.method or smell.field) for smell in smells[name]}
+
+
+def test_detectors():
+    project_dir = create_project()
+    try:
+        smells = run_detection(project_dir)
+    finally:
+        shutil.rmtree(project_dir)
+    assert locations(smells, 'Feature Envy') == {('model.Env', 'envy(Data)')}
+    assert smells['Feature Envy'][0].target == 'model.Data'
+    assert locations(smells, 'Refused Bequest') == {('shapes.Circle', 'draw()')}
+    assert locations(smells, 'Unfactored Hierarchy') == {('shapes.Shape', 'label()'), ('shapes.Shape', 'color')}
+    assert locations(smells, 'Speculative Hierarchy') == {('shapes.Renderer', None)}
+    assert locations(smells, 'Deep Hierarchy') == {('shapes.L7', None)}
+    assert locations(smells, 'Data Clumps') == {
+        ('model.Env', 'move(int, int, int)'), ('model.Env', 'scale(int, int, int)'),
+        ('model.Env', 'shift(int, int, int)')
+    }
+    assert smells['Data Clumps'][0].metrics['clump'] == ['int x', 'int y', 'int z']
+    assert locations(smells, 'Temporary Field') == {('model.Env', 'temp')}
+    assert locations(smells, 'Primitive Obsession') == {('model.Record', None)}
+    assert locations(smells, 'Broken Modularization') == {('model.Data', None), ('model.Record', None)}
+    # The middle levels are used by their subclass and use their superclass
+    assert locations(smells, 'Hub-like Modularization') == {(f'shapes.L{i}', None) for i in range(2, 7)}
+    assert locations(smells, 'Promiscuous Package') == {('shapes', None)}
+    assert smells['Promiscuous Package'][0].metrics['features'] == [
+        ['shapes.Circle', 'shapes.Renderer', 'shapes.Shape', 'shapes.Square', 'shapes.SvgRenderer'],
+        ['shapes.L1', 'shapes.L2', 'shapes.L3', 'shapes.L4', 'shapes.L5', 'shapes.L6', 'shapes.L7'],
+    ]
+    god_class, = smells['God Class']
+    assert god_class.entities == ['model.Big::put(String, int):void', 'model.Big::count(String):int',
+                                  'Map<String,Integer> counts']
+
+
+def test_extracted_entities():
+    assert get_extracted_entities(r'[p.A::m(int\, String):void, Map<String\,Integer> map, int x]') == [
+        'p.A::m(int, String):void', 'Map<String,Integer> map', 'int x']
+    # The CSV files of the other tools do not escape the commas
+    assert get_extracted_entities('[p.A::m(int, String):void, Map<String, Integer> map]') == [
+        'p.A::m(int, String):void', 'Map<String, Integer> map']
+
+
+class Entity:
+    def __init__(self, longname, parent=None):
+        self.longname_, self.parent_ = longname, parent
+
+    def longname(self):
+        return self.longname_
+
+    def parent(self):
+        return self.parent_
+
+
+class Database:
+    def __init__(self, project_dir):
+        self.project_dir = project_dir
+
+    def lookup(self, name, kind):
+        for relative_path in SOURCE_FILES:
+            file_path = os.path.join(self.project_dir, relative_path)
+            if kind == 'File' and os.path.basename(relative_path) == name:
+                return [Entity(file_path)]
+            if kind == 'Class' and not isinstance(name, str):
+                class_name = relative_path[:-len('.java')].replace(os.sep, '.')
+                if name.match(class_name):
+                    return [Entity(class_name, parent=Entity(file_path))]
+        return []
+
+    def close(self):
+        pass
+
+
+def test_loaders():
+    project_dir = create_project()
+    output_dir = tempfile.mkdtemp(prefix='smells_csv_')
+    und_open = initialize.und.open
+    try:
+        paths = save_smells(run_detection(project_dir), output_dir)
+        initialize.und.open = lambda udb_path: Database(project_dir)
+        smell_initialization = SmellInitialization.__new__(SmellInitialization)
+        smell_initialization.udb_path = os.path.join(project_dir, 'project.und')
+        smell_initialization.smell_paths = paths
+
+        assert smell_initialization.load_move_method_candidates() == [{
+            'source_package': 'model', 'source_class': 'Env', 'method_name': 'envy',
+            'target_package': 'model', 'target_class': 'Data'
+        }]
+        assert smell_initialization.load_extract_class_candidates() == [{
+            'source_class': 'Big', 'moved_fields': ['counts'], 'moved_methods': ['put', 'count'],
+            'file_path': os.path.join(project_dir, 'model', 'Big.java')
+        }]
+        extract_method_candidates = {
+            (os.path.basename(candidate['file_path']), tuple(sorted(candidate['lines'])))
+            for candidate in smell_initialization.load_extract_method_candidates()
+        }
+        # Env.compute() is the only method with two statements, and its body is in line 6
+        assert extract_method_candidates == {('Env.java', (6,))}
+    finally:
+        initialize.und.open = und_open
+        shutil.rmtree(project_dir)
+        shutil.rmtree(output_dir)
+
+
+if __name__ == '__main__':
+    test_detectors()
+    test_extracted_entities()
+    test_loaders()
@@ -0,0 +1,149 @@
+"""
+    Touch-and-restore tests of the copy-on-write snapshot manager (codart.utility.snapshot_manager).
+
+    Each test modifies a small git project through one of the tracked file system operations,
+    restores it by `restore_project` (FAST_RESTORE), and checks that the project is identical to its git baseline.
+    The last test writes a file behind the audit hook (by a subprocess) and checks that
+    the consistency check restores it.
+
+    test status: pass
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from codart.utility.directory_utils import restore_project
+from codart.utility.snapshot_manager import get_snapshot_manager
+from sbse import config
+
+BASELINE_FILES = {
+    'A.java': 'class A { }\n',
+    os.path.join('pkg', 'B.java'): 'package pkg;\nclass B { }\n',
+    os.path.join('pkg', 'sub', 'C.java'): 'package pkg.sub;\nclass C { }\n',
+}
+
+
+def create_project():
+    project_dir = tempfile.mkdtemp(prefix='snapshot_test_')
+    for relative_path, content in BASELINE_FILES.items():
+        os.makedirs(os.path.join(project_dir, os.path.dirname(relative_path)), exist_ok=True)
+        with open(os.path.join(project_dir, relative_path), 'w') as f:
+            f.write(content)
+    for command in (['git', 'init', '-q'], ['git', 'add', '.'],
+                    ['git', '-c', 'user.name=test', '-c', 'user.email=test@test', 'commit', '-q', '-m', 'baseline']):
+        subprocess.run(command, cwd=project_dir, check=True)
+    config.FAST_RESTORE = True
+    restore_project(project_dir)
+    assert get_snapshot_manager(project_dir) is not None
+    return project_dir
+
+
+def project_files(project_dir):
+    result = {}
+    for root, dirs, files in os.walk(project_dir):
+        if '.git' in dirs:
+            dirs.remove('.git')
+        for file in files:
+            with open(os.path.join(root, file)) as f:
+                result[os.path.relpath(os.path.join(root, file), project_dir)] = f.read()
+    return result
+
+
+def project_dirs(project_dir):
+    return sorted(os.path.relpath(root, project_dir) for root, dirs, _ in os.walk(project_dir)
+                  if '.git' not in os.path.relpath(root, project_dir).split(os.sep))
+
+
+def assert_restored(project_dir):
+    restore_project(project_dir)
+    assert project_files(project_dir) == BASELINE_FILES
+    assert project_dirs(project_dir) == ['.', 'pkg', os.path.join('pkg', 'sub')]
+
+
+def run_restore_test(modify):
+    project_dir = create_project()
+    try:
+        modify(project_dir)
+        assert project_files(project_dir) != BASELINE_FILES or project_dirs(project_dir) != [
+            '.', 'pkg', os.path.join('pkg', 'sub')]
+        assert_restored(project_dir)
+        # A second modification after a restore is tracked again
+        modify(project_dir)
+        assert_restored(project_dir)
+    finally:
+        shutil.rmtree(project_dir, ignore_errors=True)
+
+
+def test_open_write():
+    def modify(project_dir):
+        with open(os.path.join(project_dir, 'A.java'), 'w') as f:
+            f.write('class A { int x; }\n')
+        with open(os.path.join(project_dir, 'pkg', 'B.java'), 'a') as f:
+            f.write('// appended\n')
+        with open(os.path.join(project_dir, 'pkg', 'New.java'), 'x') as f:
+            f.write('class New { }\n')
+    run_restore_test(modify)
+
+
+def test_os_open_flags():
+    def modify(project_dir):
+        fd = os.open(os.path.join(project_dir, 'A.java'), os.O_WRONLY | os.O_TRUNC)
+        os.write(fd, b'class A { }\n// truncated\n')
+        os.close(fd)
+        fd = os.open(os.path.join(project_dir, 'Created.java'), os.O_RDWR | os.O_CREAT)
+        os.write(fd, b'class Created { }\n')
+        os.close(fd)
+        # A read-only open is not a modification
+        os.close(os.open(os.path.join(project_dir, 'pkg', 'B.java'), os.O_RDONLY))
+    run_restore_test(modify)
+
+
+def test_rename_and_replace():
+    def modify(project_dir):
+        os.rename(os.path.join(project_dir, 'A.java'), os.path.join(project_dir, 'pkg', 'A.java'))
+        os.replace(os.path.join(project_dir, 'pkg', 'sub', 'C.java'), os.path.join(project_dir, 'pkg', 'B.java'))
+    run_restore_test(modify)
+
+
+def test_mkdir_and_remove():
+    def modify(project_dir):
+        os.makedirs(os.path.join(project_dir, 'pkg', 'new', 'deep'))
+        with open(os.path.join(project_dir, 'pkg', 'new', 'deep', 'D.java'), 'w') as f:
+            f.write('class D { }\n')
+        os.remove(os.path.join(project_dir, 'A.java'))
+    run_restore_test(modify)
+
+
+def test_rmtree():
+    def modify(project_dir):
+        shutil.rmtree(os.path.join(project_dir, 'pkg'))
+    run_restore_test(modify)
+
+
+def test_consistency_check():
+    project_dir = create_project()
+    try:
+        # A write by another process is not seen by the audit hook
+        subprocess.run([sys.executable, '-c', "open('A.java', 'w').write('class A { int y; }')"],
+                       cwd=project_dir, check=True)
+        subprocess.run([sys.executable, '-c', "open('Untracked.java', 'w').write('class U { }')"],
+                       cwd=project_dir, check=True)
+        manager = get_snapshot_manager(project_dir)
+        assert manager.find_unrestored_files() == ['A.java', 'Untracked.java']
+        config.FAST_RESTORE_CHECK_INTERVAL = 1
+        assert_restored(project_dir)
+        assert manager.find_unrestored_files() == []
+    finally:
+        shutil.rmtree(project_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_open_write()
+    test_os_open_flags()
+    test_rename_and_replace()
+    test_mkdir_and_remove()
+    test_rmtree()
+    test_consistency_check()
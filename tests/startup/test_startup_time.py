@@ -0,0 +1,62 @@
+"""
+    Startup-time test of the search-based refactoring modules.
+
+    Importing sbse.initialize must not import the refactoring modules, the generated grammars, or
+    the heavy third-party packages, which are imported on the first call of a refactoring main function.
+    The import is timed in a fresh interpreter, and calling a refactoring through REFACTORING_MAIN_MAP
+    must still resolve the main function of its module.
+
+    test status: pass
+"""
+
+import subprocess
+import sys
+import time
+
+LAZY_MODULE_PREFIXES = ('refactorings', 'gen.', 'java8speedy', 'networkx', 'sklearn', 'pymoo')
+
+# The maximum time of importing sbse.initialize in seconds (the eager imports took about one second)
+MAX_IMPORT_TIME = 0.5
+
+_IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import sbse.initialize
+import_time = time.perf_counter() - start
+print(import_time, ','.join(sorted(name for name in sys.modules if name.startswith({prefixes!r}))))
+"""
+
+
+def measure_import():
+    """
+    Returns the import time of sbse.initialize and the lazy modules loaded by the import, in a fresh interpreter
+    """
+    result = subprocess.run(
+        [sys.executable, '-c', _IMPORT_SCRIPT.format(prefixes=LAZY_MODULE_PREFIXES)],
+        capture_output=True, text=True, check=True
+    )
+    import_time, _, loaded_modules = result.stdout.rstrip('\n').split('\n')[-1].partition(' ')
+    return float(import_time), [name for name in loaded_modules.split(',') if name]
+
+
+def test_startup_time():
+    start = time.perf_counter()
+    import_time, loaded_modules = measure_import()
+    print(f'import sbse.initialize: {import_time:.3f}s ({time.perf_counter() - start:.3f}s with the interpreter)')
+    assert not loaded_modules, loaded_modules
+    assert import_time < MAX_IMPORT_TIME, import_time
+
+
+def test_lazy_refactoring_main():
+    import pickle
+    import importlib
+    from sbse.initialize import REFACTORING_MAIN_MAP
+    for refactoring_name, main in REFACTORING_MAIN_MAP.items():
+        assert pickle.loads(pickle.dumps(main)) == main, refactoring_name
+    main = REFACTORING_MAIN_MAP['Make Field Static']
+    assert main.resolve() is importlib.import_module('refactorings.make_field_static').main
+
+
+if __name__ == '__main__':
+    test_startup_time()
+    test_lazy_refactoring_main()
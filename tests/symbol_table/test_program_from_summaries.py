@@ -0,0 +1,70 @@
+"""
+    Checks that the symbol table built from the file summaries of the project parser
+    (`get_program(from_summaries=True)`) agrees with the symbol table built from the parse trees.
+
+    test status: pass
+"""
+
+import glob
+import os
+
+from codart.symbol_table import get_program
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIRS = ['pullup_method', 'pushdown_field', 'move_method', 'extract_interface', 'encapsulate_field_tests']
+
+
+def fixture_files():
+    source_files = []
+    for fixture_dir in FIXTURE_DIRS:
+        source_files.extend(sorted(glob.glob(os.path.join(TESTS_DIR, fixture_dir, '**', '*.java'), recursive=True)))
+    return source_files
+
+
+def describe_field(field):
+    return field.datatype, field.name, field.initializer, list(field.modifiers), list(field.neighbor_names), \
+        field.index_in_variable_declarators
+
+
+def describe_method(method):
+    return method.returntype, method.name, method.body_text, list(method.modifiers), list(method.parameters), \
+        method.is_constructor
+
+
+def describe_class(class_):
+    file_info = class_.file_info
+    return {
+        'name': class_.name,
+        'package': class_.package_name,
+        'filename': class_.filename,
+        'modifiers': list(class_.modifiers),
+        'superclass': class_.superclass_name,
+        'interfaces': list(class_.superinterface_names),
+        'fields': {name: describe_field(field) for name, field in class_.fields.items()},
+        'methods': {key: describe_method(method) for key, method in class_.methods.items()},
+        'class_imports': [(import_.package_name, import_.class_name) for import_ in file_info.class_imports],
+        'package_imports': [import_.package_name for import_ in file_info.package_imports],
+    }
+
+
+def describe_program(program):
+    return {
+        package_name: {class_name: describe_class(class_) for class_name, class_ in package.classes.items()}
+        for package_name, package in program.packages.items()
+    }
+
+
+def test_program_from_summaries():
+    source_files = fixture_files()
+    assert source_files
+    tree_program = get_program(source_files)
+    summary_program = get_program(source_files, from_summaries=True, n_jobs=1)
+    tree_description, summary_description = describe_program(tree_program), describe_program(summary_program)
+    assert sorted(tree_description) == sorted(summary_description)
+    for package_name, classes in tree_description.items():
+        assert classes == summary_description[package_name], package_name
+    assert sorted(tree_program.classes_by_qualified_name) == sorted(summary_program.classes_by_qualified_name)
+
+
+if __name__ == '__main__':
+    test_program_from_summaries()